@@ -106,6 +106,10 @@ class AdvisorPlanningEngine(PlanningEngine):
                     max_steps=request.max_steps,
                     allow_fallback=not request.strict,
                     collaboration_instruction=collaboration_instruction,
+                    on_step=(
+                        (lambda step: request.on_task(_planner_step_to_task(step)))
+                        if request.on_task is not None else None
+                    ),
                 )
                 steps = raw.get("steps") or []
         return PlanResult(
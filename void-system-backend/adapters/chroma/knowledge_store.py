@@ -13,7 +13,7 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
 
 import chromadb
 from langchain_chroma import Chroma
@@ -21,6 +21,7 @@ from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from core.knowledge_contracts import KnowledgeChunk, KnowledgeQuery, KnowledgeRetrievalError, KnowledgeScope
+from core.model_connection_profile import resolve_embedding_connection
 from core.runtime_settings import RuntimeSettings
 from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
 from services.ai_services.llm_factory import get_embeddings
@@ -29,6 +30,8 @@ logger = logging.getLogger("void-system.knowledge.chroma")
 SYSTEM_COLLECTION = "system_knowledge"
 LEGACY_SYSTEM_COLLECTION = "langchain"
 _SAFE_COLLECTION_PART = re.compile(r"^[A-Za-z0-9_-]+$")
+_INDEX_BATCH_SIZE = 64
+ChunkBatchSink = Callable[[int, Sequence[str], Sequence[Sequence[float]]], None]
 
 
 @dataclass(frozen=True)
@@ -52,6 +55,7 @@ class ChromaKnowledgeStore:
         self._path = Path(settings.get_chroma_path())
         self._cipher = cipher or KnowledgeSourceCipher(settings, Path(settings.BASE_DIR) / "user_documents")
         self._path.mkdir(parents=True, exist_ok=True)
+        self._settings = settings
         self._embeddings = get_embeddings(settings=settings)
         self._collections: Dict[str, Chroma] = {}
         self._native_clients: list[Any] = []
@@ -99,6 +103,11 @@ class ChromaKnowledgeStore:
         self._collections.clear()
         self._native_clients.clear()
 
+    @property
+    def embedding_identity(self) -> str:
+        """Digest of the embedding endpoint and model that produce this store's vectors."""
+        return resolve_embedding_connection(self._settings).output_identity
+
     def collection_name(self, scope: KnowledgeScope, owner_id: Optional[str] = None) -> str:
         """Return the only valid persistent collection name for a scope."""
         if scope == KnowledgeScope.SYSTEM:
@@ -111,54 +120,80 @@ class ChromaKnowledgeStore:
             return f"user_{owner_id}_docs"
         raise ValueError(f"Knowledge scope {scope.value!r} is not persistent")
 
-    def index_text(self, *, scope: KnowledgeScope, owner_id: str, document_id: str, text: str, metadata: Optional[Mapping[str, Any]] = None) -> IndexWriteResult:
+    def index_text(self, *, scope: KnowledgeScope, owner_id: str, document_id: str, text: str, metadata: Optional[Mapping[str, Any]] = None, on_batch: Optional[ChunkBatchSink] = None) -> IndexWriteResult:
         """Replace one document's chunks; retries cannot leave mixed versions."""
         content = str(text or "").strip()
         if not content:
             raise ValueError("Knowledge text must not be empty")
-        chunks = self._splitter_for(str((metadata or {}).get("file_type") or "")).split_text(content)
-        if not chunks:
+        return self.index_sections(scope=scope, owner_id=owner_id, document_id=document_id, sections=[content], metadata=metadata, on_batch=on_batch)
+
+    def index_sections(self, *, scope: KnowledgeScope, owner_id: str, document_id: str, sections: Iterable[str], metadata: Optional[Mapping[str, Any]] = None, on_batch: Optional[ChunkBatchSink] = None) -> IndexWriteResult:
+        """Replace one document's chunks while its pages or sheets are still being parsed.
+
+        Inputs: ordered text sections, such as PDF pages or spreadsheet row blocks.
+        Outputs: the written chunk ids and collection. Called by: personal ingestion
+        for streamed formats and index_text. Side effects: new chunks are embedded and
+        written in bounded batches under a fresh index generation, so only one section
+        and one batch are held in memory; the previous generation is deleted only after
+        the last batch is written. Failure: a parse or write error removes the partial
+        new generation and leaves the previous chunks searchable. The last chunk of
+        each section is re-split with the next one, so chunks still span page breaks.
+        ``on_batch`` receives each written batch's first index, texts, and vectors.
+        """
+        splitter = self._splitter_for(str((metadata or {}).get("file_type") or ""))
+        base, collection = self._prepare_replacement(scope, owner_id, document_id, metadata)
+        ids: list[str] = []
+        pending: list[str] = []
+        carry = ""
+
+        def flush(chunks: list[str]) -> None:
+            embeddings = self._embeddings.embed_documents(list(chunks))
+            start = len(ids)
+            ids.extend(self._write_chunks(collection, scope, owner_id, document_id, base, start, chunks, embeddings))
+            if on_batch is not None:
+                on_batch(start, chunks, embeddings)
+
+        try:
+            for section in sections:
+                if not str(section or "").strip():
+                    continue
+                chunks = splitter.split_text(f"{carry}\n\n{section}" if carry else str(section))
+                if not chunks:
+                    continue
+                carry = chunks.pop()
+                pending.extend(chunks)
+                if len(pending) >= _INDEX_BATCH_SIZE:
+                    flush(pending)
+                    pending = []
+            if carry:
+                pending.append(carry)
+            if pending:
+                flush(pending)
+        except BaseException:
+            self._discard_chunks(collection, ids)
+            raise
+        if not ids:
             raise ValueError("Knowledge text did not produce searchable chunks")
-        self.delete_document(scope=scope, owner_id=owner_id, document_id=document_id)
-        base = self._scalar_metadata(metadata or {})
-        base.update({
-            "doc_id": str(document_id), "document_id": str(document_id), "scope": scope.value,
-            "owner_id": str(owner_id), "chunk_count": len(chunks),
-            "indexed_at": datetime.now(timezone.utc).isoformat(),
-        })
-        if scope == KnowledgeScope.USER:
-            base["user_id"] = str(owner_id)
+        self._retire_previous_generation(collection, document_id, ids)
+        return IndexWriteResult(ids, self.collection_name(scope, owner_id))
+
+    def index_embedded_chunks(self, *, scope: KnowledgeScope, owner_id: str, document_id: str, batches: Iterable[Tuple[Sequence[str], Sequence[Sequence[float]]]], metadata: Optional[Mapping[str, Any]] = None) -> IndexWriteResult:
+        """Replace one document's chunks with already split and embedded batches.
+
+        Used when an identical source was ingested before: only the scope's
+        encryption and the Chroma write are repeated, never the embedding call.
+        """
+        base, collection = self._prepare_replacement(scope, owner_id, document_id, metadata)
         ids: list[str] = []
-        documents: list[Document] = []
-        encrypted_texts: list[str] = []
-        if scope == KnowledgeScope.USER:
-            # Titles and file names already come from the SQLite catalog at read
-            # time. Keeping only the minimum routing metadata in Chroma avoids a
-            # second plaintext copy of user-provided identity data.
-            base.pop("title", None)
-            base.pop("file_name", None)
-            base["content_encryption"] = self._cipher.VERSION
-        for index, chunk_text in enumerate(chunks):
-            chunk_id = self._chunk_id(scope, owner_id, document_id, index, chunk_text)
-            ids.append(chunk_id)
-            metadata_for_chunk = {**base, "chunk_index": index, "chunk_id": chunk_id}
-            documents.append(Document(page_content=chunk_text, metadata=metadata_for_chunk))
-            if scope == KnowledgeScope.USER:
-                encrypted_texts.append(self._cipher.encrypt_text(chunk_text))
-        collection = self._collection(scope, owner_id)
-        if scope == KnowledgeScope.USER:
-            # Chroma persists ciphertext, while embeddings are calculated from the
-            # trusted in-memory chunks. Semantic retrieval therefore remains useful
-            # without retaining a plaintext document body on disk.
-            embeddings = self._embeddings.embed_documents(chunks)
-            collection._collection.add(
-                ids=ids,
-                documents=encrypted_texts,
-                metadatas=[document.metadata for document in documents],
-                embeddings=embeddings,
-            )
-        else:
-            collection.add_documents(documents, ids=ids)
+        try:
+            for texts, embeddings in batches:
+                ids.extend(self._write_chunks(collection, scope, owner_id, document_id, base, len(ids), texts, embeddings))
+        except BaseException:
+            self._discard_chunks(collection, ids)
+            raise
+        if not ids:
+            raise ValueError("Knowledge text did not produce searchable chunks")
+        self._retire_previous_generation(collection, document_id, ids)
         return IndexWriteResult(ids, self.collection_name(scope, owner_id))
 
     def semantic_search(self, *, query: KnowledgeQuery, scope: KnowledgeScope, catalog: Mapping[str, Mapping[str, Any]]) -> Sequence[KnowledgeChunk]:
@@ -329,6 +364,58 @@ class ChromaKnowledgeStore:
             "target_collection": SYSTEM_COLLECTION,
         }
 
+    def _prepare_replacement(self, scope: KnowledgeScope, owner_id: str, document_id: str, metadata: Optional[Mapping[str, Any]]) -> Tuple[Dict[str, Any], Chroma]:
+        base = self._scalar_metadata(metadata or {})
+        base.update({
+            "doc_id": str(document_id), "document_id": str(document_id), "scope": scope.value,
+            "owner_id": str(owner_id), "indexed_at": datetime.now(timezone.utc).isoformat(),
+            # Chunk ids include the generation, so a rebuild never overwrites the
+            # chunks that stay searchable until it completes.
+            "index_generation": uuid.uuid4().hex,
+        })
+        if scope == KnowledgeScope.USER:
+            base["user_id"] = str(owner_id)
+            # Titles and file names already come from the SQLite catalog at read
+            # time. Keeping only the minimum routing metadata in Chroma avoids a
+            # second plaintext copy of user-provided identity data.
+            base.pop("title", None)
+            base.pop("file_name", None)
+            base["content_encryption"] = self._cipher.VERSION
+        return base, self._collection(scope, owner_id)
+
+    def _write_chunks(self, collection: Chroma, scope: KnowledgeScope, owner_id: str, document_id: str, base: Mapping[str, Any], start_index: int, chunks: Sequence[str], embeddings: Sequence[Sequence[float]]) -> list[str]:
+        ids: list[str] = []
+        metadatas: list[Dict[str, Any]] = []
+        for index, chunk_text in enumerate(chunks, start=start_index):
+            chunk_id = self._chunk_id(scope, owner_id, document_id, str(base["index_generation"]), index, chunk_text)
+            ids.append(chunk_id)
+            metadatas.append({**base, "chunk_index": index, "chunk_id": chunk_id})
+        # Chroma persists ciphertext for private chunks, while embeddings are
+        # calculated from the trusted in-memory chunks. Semantic retrieval therefore
+        # remains useful without retaining a plaintext document body on disk.
+        documents = [self._cipher.encrypt_text(chunk_text) for chunk_text in chunks] if scope == KnowledgeScope.USER else list(chunks)
+        collection._collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=[list(vector) for vector in embeddings])
+        return ids
+
+    @staticmethod
+    def _discard_chunks(collection: Chroma, ids: Sequence[str]) -> None:
+        """Remove a failed generation's written chunks without touching earlier ones."""
+        if not ids:
+            return
+        try:
+            collection._collection.delete(ids=list(ids))
+        except Exception:
+            logger.exception("Could not remove a partially indexed knowledge generation")
+
+    @staticmethod
+    def _retire_previous_generation(collection: Chroma, document_id: str, current_ids: Sequence[str]) -> None:
+        """Delete a document's chunks that are not part of the generation just written."""
+        current = set(current_ids)
+        existing = collection._collection.get(where={"doc_id": str(document_id)}, include=[]).get("ids") or []
+        stale = [str(item_id) for item_id in existing if str(item_id) not in current]
+        if stale:
+            collection._collection.delete(ids=stale)
+
     def _collection(self, scope: KnowledgeScope, owner_id: str) -> Chroma:
         name = self.collection_name(scope, owner_id)
         if name not in self._collections:
@@ -378,9 +465,9 @@ class ChromaKnowledgeStore:
             self._raise_retrieval_failure("private_content_decryption", exc)
 
     @staticmethod
-    def _chunk_id(scope: KnowledgeScope, owner_id: str, document_id: str, index: int, text: str) -> str:
+    def _chunk_id(scope: KnowledgeScope, owner_id: str, document_id: str, generation: str, index: int, text: str) -> str:
         digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
-        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"void-knowledge:{scope.value}:{owner_id}:{document_id}:{index}:{digest}"))
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"void-knowledge:{scope.value}:{owner_id}:{document_id}:{generation}:{index}:{digest}"))
 
     @staticmethod
     def _scalar_metadata(values: Mapping[str, Any]) -> Dict[str, Any]:
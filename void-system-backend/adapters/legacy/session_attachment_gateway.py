@@ -1,10 +1,10 @@
 """Legacy adapter for the existing session file manager."""
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from api.session_context_manager import SessionContextManager
-from api.session_file_access import session_file_row_to_data_url
+from api.session_file_access import build_data_urls_for_session_files, session_file_row_to_data_url
 from core.session_attachment_contracts import SessionAttachmentGateway
 from database import Database
 
@@ -42,3 +42,9 @@ class LegacySessionAttachmentGateway(SessionAttachmentGateway):
         if row is None or row.get("session_id") != session_id:
             return None
         return session_file_row_to_data_url(row)
+
+    def image_data_urls(self, user_id: str, session_id: str, file_ids: List[str]) -> List[str]:
+        return build_data_urls_for_session_files(self._database, user_id, session_id, file_ids)
+
+    def sweep_expired(self, limit: int) -> Dict[str, int]:
+        return self._manager.sweep_expired_files(limit)
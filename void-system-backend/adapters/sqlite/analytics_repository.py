@@ -1,15 +1,42 @@
 """SQLite read-model adapter for administrator analytics."""
 from __future__ import annotations
 
+import json
+import logging
 import sqlite3
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional
+
+from adapters.sqlite.analytics_rollups import (
+    SnapshotRows,
+    backfill_analytics_rollups,
+    compute_analytics_snapshots,
+    refresh_analytics_rollups,
+)
+
+
+logger = logging.getLogger("void-system.analytics.overview")
+
+_IN_PROGRESS_STEP_STATUSES = ("ready", "running", "waiting_approval")
+_ATTRIBUTE_VALUE_RANGES = ("0-19", "20-39", "40-59", "60-79", "80-100+")
+_GROWTH_POINT_RANGES = ("0", "1-99", "100-499", "500-999", "1000+")
 
 
 class SQLiteAnalyticsRepository:
-    """Keeps aggregate SQL out of HTTP routes and returns stable empty-safe shapes."""
+    """Keeps aggregate SQL out of HTTP routes and returns stable empty-safe shapes.
+
+    Administrator trends and distributions read ``analytics_rollup_buckets``, which the
+    rollup worker refreshes on a schedule, so their cost does not grow with platform
+    history. They lag source tables by at most one refresh interval.
+    """
 
-    def __init__(self, connection_factory: Callable[[], sqlite3.Connection]):
+    def __init__(
+        self,
+        connection_factory: Callable[[], sqlite3.Connection],
+        *,
+        cache_user_overview: bool = True,
+    ):
         self._connection_factory = connection_factory
+        self._cache_user_overview = cache_user_overview
 
     def _one(self, query: str, parameters: tuple[Any, ...] = ()) -> Dict[str, Any]:
         connection = self._connection_factory()
@@ -31,116 +58,226 @@ class SQLiteAnalyticsRepository:
         return f"-{max(1, min(days, 365))} days"
 
     def user_overview(self, user_id: str) -> Dict[str, Any]:
-        """Return one user dashboard overview without currency semantics."""
+        """Return one user dashboard overview without currency semantics.
+
+        Inputs: the authenticated owner. Output: user, Step, attribute and growth-point
+        statistics. Step and ledger figures come from a cached per-user rollup when it
+        was computed today and no Step or ledger write has invalidated it; otherwise one
+        grouped pass over the covering Step index and the growth-point projections
+        recomputes it. Attributes and documents are always read live.
+        Side effects: stores a fresh rollup unless caching is disabled or a concurrent
+        write made the computed snapshot stale, in which case the result is returned
+        uncached.
+        """
         connection = self._connection_factory()
         try:
-            attributes = [dict(row) for row in connection.execute(
-                "SELECT * FROM attributes WHERE user_id = ? ORDER BY created_at DESC", (user_id,)
-            ).fetchall()]
-            user_row = connection.execute(
-                """SELECT COUNT(*) AS total_tasks,
-                          COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0) AS completed_tasks,
-                          COALESCE(SUM(CASE WHEN status IN ('ready', 'running', 'waiting_approval') THEN 1 ELSE 0 END), 0) AS in_progress_tasks
-                   FROM task_steps WHERE user_id = ?""",
-                (user_id,),
+            activity = self._cached_activity_rollup(connection, user_id)
+            if activity is None and self._cache_user_overview:
+                connection.execute("BEGIN")
+                activity = self._activity_rollup(connection, user_id)
+                self._store_activity_rollup(connection, user_id, activity)
+            elif activity is None:
+                activity = self._activity_rollup(connection, user_id)
+            live = connection.execute(
+                """SELECT (SELECT COUNT(*) FROM user_documents WHERE user_id = ?) AS total_documents,
+                          (SELECT COUNT(*) FROM attributes WHERE user_id = ?) AS total_attributes,
+                          (SELECT AVG(COALESCE(attr_value, 0)) FROM attributes WHERE user_id = ?) AS average_value""",
+                (user_id, user_id, user_id),
             ).fetchone()
-            total_tasks = int(user_row["total_tasks"] or 0)
-            completed_tasks = int(user_row["completed_tasks"] or 0)
-            growth_points = int(connection.execute(
-                """SELECT COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0)
-                   FROM growth_point_ledger WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()[0] or 0)
-            recent_growth_points = int(connection.execute(
-                """SELECT COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0)
-                   FROM growth_point_ledger
-                   WHERE user_id = ? AND created_at >= date('now', '-7 days')""",
+            max_value_attr = connection.execute(
+                """SELECT * FROM attributes WHERE user_id = ?
+                   ORDER BY COALESCE(attr_value, 0) DESC, created_at DESC LIMIT 1""",
                 (user_id,),
-            ).fetchone()[0] or 0)
-            user_stats = {
+            ).fetchone()
+        finally:
+            connection.close()
+        total_tasks = activity["total_tasks"]
+        completed_tasks = activity["completed_tasks"]
+        return {
+            "user_stats": {
                 "total_tasks": total_tasks,
                 "completed_tasks": completed_tasks,
-                "in_progress_tasks": int(user_row["in_progress_tasks"] or 0),
+                "in_progress_tasks": activity["in_progress_tasks"],
                 "completion_rate": completed_tasks / total_tasks * 100 if total_tasks else 0,
-                "growth_points": growth_points,
-                "total_documents": int(connection.execute(
-                    "SELECT COUNT(*) FROM user_documents WHERE user_id = ?", (user_id,)
-                ).fetchone()[0] or 0),
-            }
-            status_rows = connection.execute(
-                "SELECT status, COUNT(*) AS count FROM task_steps WHERE user_id = ? GROUP BY status", (user_id,)
-            ).fetchall()
-            task_stats = {
-                "total_tasks": sum(int(row["count"]) for row in status_rows),
-                "status_stats": {str(row["status"]): int(row["count"]) for row in status_rows},
-                "completed_last_30_days": int(connection.execute(
-                    """SELECT COUNT(*) FROM task_steps WHERE user_id = ? AND status = 'completed'
-                       AND completed_at >= date('now', '-30 days')""", (user_id,)
-                ).fetchone()[0] or 0),
-                "avg_estimated_time": round(float(connection.execute(
-                    """SELECT COALESCE(AVG((julianday(completed_at) - julianday(created_at)) * 24), 0)
-                       FROM task_steps WHERE user_id = ? AND status = 'completed' AND completed_at IS NOT NULL""", (user_id,)
-                ).fetchone()[0] or 0), 1),
-            }
-            values = [int(attribute.get("attr_value") or 0) for attribute in attributes]
-            return {
-                "user_stats": user_stats,
-                "task_stats": task_stats,
-                "attribute_stats": {
-                    "total_attributes": len(attributes),
-                    "average_value": sum(values) / len(values) if values else 0,
-                    "max_value_attr": max(attributes, key=lambda item: int(item.get("attr_value") or 0)) if attributes else None,
-                },
-                "growth_points": {
-                    "total_recorded": growth_points,
-                    "recorded_last_7_days": recent_growth_points,
-                },
-            }
+                "growth_points": activity["growth_points"],
+                "total_documents": int(live["total_documents"] or 0),
+            },
+            "task_stats": {
+                "total_tasks": total_tasks,
+                "status_stats": activity["status_stats"],
+                "completed_last_30_days": activity["completed_last_30_days"],
+                "avg_estimated_time": activity["avg_estimated_time"],
+            },
+            "attribute_stats": {
+                "total_attributes": int(live["total_attributes"] or 0),
+                "average_value": float(live["average_value"] or 0),
+                "max_value_attr": dict(max_value_attr) if max_value_attr else None,
+            },
+            "growth_points": {
+                "total_recorded": activity["growth_points"],
+                "recorded_last_7_days": activity["recorded_last_7_days"],
+            },
+        }
+
+    def _cached_activity_rollup(
+        self, connection: sqlite3.Connection, user_id: str
+    ) -> Optional[Dict[str, Any]]:
+        if not self._cache_user_overview:
+            return None
+        row = connection.execute(
+            """SELECT rollup FROM user_overview_rollups
+               WHERE user_id = ? AND computed_on = date('now')""",
+            (user_id,),
+        ).fetchone()
+        return json.loads(row["rollup"]) if row else None
+
+    @staticmethod
+    def _store_activity_rollup(
+        connection: sqlite3.Connection, user_id: str, activity: Dict[str, Any]
+    ) -> None:
+        """Cache a rollup only if no writer committed since its read snapshot began.
+
+        A busy or locked database means a concurrent writer won, so the rollup is
+        dropped quietly; any other failure is logged and the overview is still served.
+        """
+        try:
+            connection.execute(
+                """INSERT OR REPLACE INTO user_overview_rollups (user_id, rollup, computed_on)
+                   VALUES (?, ?, date('now'))""",
+                (user_id, json.dumps(activity, sort_keys=True)),
+            )
+            connection.commit()
+        except sqlite3.OperationalError as exc:
+            connection.rollback()
+            code = getattr(exc, "sqlite_errorcode", None)
+            if code is None or code & 0xFF not in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+                logger.warning("User overview rollup was not cached for %s", user_id, exc_info=True)
+
+    @staticmethod
+    def _activity_rollup(connection: sqlite3.Connection, user_id: str) -> Dict[str, Any]:
+        """Aggregate Step and growth-point figures in one pass per source table."""
+        status_rows = connection.execute(
+            """SELECT status, COUNT(*) AS count,
+                      SUM(CASE WHEN completed_at >= date('now', '-30 days') THEN 1 ELSE 0 END) AS recent_completed,
+                      AVG((julianday(completed_at) - julianday(created_at)) * 24) AS average_hours
+               FROM task_steps WHERE user_id = ? GROUP BY status""",
+            (user_id,),
+        ).fetchall()
+        points = connection.execute(
+            """SELECT COALESCE((SELECT total_income FROM growth_point_balances WHERE user_id = ?), 0) AS recorded,
+                      (SELECT COALESCE(SUM(income), 0) FROM growth_point_daily_totals
+                       WHERE user_id = ? AND day >= date('now', '-7 days')) AS recent""",
+            (user_id, user_id),
+        ).fetchone()
+        status_stats = {str(row["status"]): int(row["count"]) for row in status_rows}
+        completed = next((row for row in status_rows if row["status"] == "completed"), None)
+        return {
+            "total_tasks": sum(status_stats.values()),
+            "completed_tasks": status_stats.get("completed", 0),
+            "in_progress_tasks": sum(status_stats.get(status, 0) for status in _IN_PROGRESS_STEP_STATUSES),
+            "status_stats": status_stats,
+            "completed_last_30_days": int(completed["recent_completed"] or 0) if completed else 0,
+            "avg_estimated_time": round(float(completed["average_hours"] or 0), 1) if completed else 0.0,
+            "growth_points": int(points["recorded"] or 0),
+            "recorded_last_7_days": int(points["recent"] or 0),
+        }
+
+    def refresh_rollups(self) -> Dict[str, str]:
+        """Fold new source rows into administrator rollups; called by the rollup worker."""
+        return self._write_rollups(refresh_analytics_rollups, due_only=True)
+
+    def backfill_rollups(self) -> Dict[str, str]:
+        """Rebuild administrator rollups from full history; called by the backfill tool."""
+        return self._write_rollups(backfill_analytics_rollups, due_only=False)
+
+    def _write_rollups(
+        self,
+        operation: Callable[[sqlite3.Connection, Optional[SnapshotRows]], Dict[str, str]],
+        *,
+        due_only: bool,
+    ) -> Dict[str, str]:
+        connection = self._connection_factory()
+        try:
+            # Snapshot scans read whole tables; run them before the write lock is taken.
+            snapshots = compute_analytics_snapshots(connection, due_only=due_only)
+            connection.execute("BEGIN IMMEDIATE")
+            watermarks = operation(connection, snapshots)
+            connection.commit()
+            return watermarks
+        except Exception:
+            connection.rollback()
+            raise
         finally:
             connection.close()
 
-    def global_user_stats(self) -> Dict[str, Any]:
+    def _series(self, metric: str, days: int, granularity: str) -> List[Dict[str, Any]]:
+        """Return buckets of one series metric inside the requested window, oldest first."""
+        cutoff_format = "%Y-%m-%dT%H" if granularity == "hour" else "%Y-%m-%d"
+        return self._many(
+            """SELECT bucket, count, value FROM analytics_rollup_buckets
+               WHERE metric = ? AND granularity = ? AND dimension = ''
+                 AND bucket >= strftime(?, 'now', ?)
+               ORDER BY bucket""",
+            (metric, "hour" if granularity == "hour" else "day", cutoff_format, self._cutoff(days)),
+        )
+
+    def _series_total(self, metric: str) -> Dict[str, Any]:
         return self._one(
+            """SELECT COALESCE(SUM(count), 0) AS count, COALESCE(SUM(value), 0) AS value
+               FROM analytics_rollup_buckets WHERE metric = ? AND granularity = 'day'""",
+            (metric,),
+        )
+
+    def _snapshot(self, metric: str) -> List[Dict[str, Any]]:
+        return self._many(
+            """SELECT dimension, count, value FROM analytics_rollup_buckets
+               WHERE metric = ? AND granularity = 'snapshot' ORDER BY dimension""",
+            (metric,),
+        )
+
+    def global_user_stats(self) -> Dict[str, Any]:
+        result = self._one(
             """SELECT COUNT(*) AS total_users,
                       SUM(CASE WHEN role = 'admin' THEN 1 ELSE 0 END) AS admin_users,
-                      SUM(CASE WHEN last_login IS NOT NULL THEN 1 ELSE 0 END) AS users_with_login,
-                      SUM(CASE WHEN datetime(created_at) >= datetime('now', '-30 days') THEN 1 ELSE 0 END) AS new_users_30d
+                      SUM(CASE WHEN last_login IS NOT NULL THEN 1 ELSE 0 END) AS users_with_login
                  FROM users"""
         )
+        result["new_users_30d"] = sum(int(row["count"]) for row in self._series("users.registered", 30, "day"))
+        return result
 
     def global_task_stats(self) -> Dict[str, Any]:
-        result = self._one(
-            """SELECT COUNT(*) AS total_tasks,
-                      COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0) AS completed_tasks,
-                      COALESCE(SUM(CASE WHEN status IN ('ready', 'running', 'waiting_approval') THEN 1 ELSE 0 END), 0) AS in_progress_tasks,
-                      COALESCE(SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END), 0) AS pending_tasks
-                 FROM task_steps"""
-        )
-        total = int(result.get("total_tasks") or 0)
-        completed = int(result.get("completed_tasks") or 0)
-        result["completion_rate"] = completed / total * 100 if total else 0
-        return result
+        counts = {row["dimension"]: int(row["count"]) for row in self._snapshot("task_steps.status")}
+        total = sum(counts.values())
+        completed = counts.get("completed", 0)
+        return {
+            "total_tasks": total,
+            "completed_tasks": completed,
+            "in_progress_tasks": sum(counts.get(status, 0) for status in _IN_PROGRESS_STEP_STATUSES),
+            "pending_tasks": counts.get("pending", 0),
+            "completion_rate": completed / total * 100 if total else 0,
+        }
 
     def global_attribute_stats(self) -> Dict[str, Any]:
-        return self._one(
-            """SELECT COUNT(*) AS total_attributes,
-                      COALESCE(SUM(attr_value), 0) AS total_value,
-                      COALESCE(AVG(attr_value), 0) AS average_value
-                 FROM attributes"""
-        )
+        rows = self._snapshot("attributes.name")
+        total = sum(int(row["count"]) for row in rows)
+        total_value = int(sum(row["value"] for row in rows))
+        return {
+            "total_attributes": total,
+            "total_value": total_value,
+            "average_value": total_value / total if total else 0,
+        }
 
     def global_growth_point_stats(self) -> Dict[str, Any]:
         """Aggregate recorded points without treating them as spendable balances."""
-        return self._one(
-            """WITH point_totals AS (
-                    SELECT user_id, COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0) AS recorded_points
-                    FROM growth_point_ledger GROUP BY user_id
-                )
-                SELECT COALESCE((SELECT SUM(recorded_points) FROM point_totals), 0) AS total_recorded_points,
-                       COALESCE((SELECT COUNT(*) FROM point_totals WHERE recorded_points > 0), 0) AS users_with_recorded_points,
-                       COALESCE((SELECT AVG(recorded_points) FROM point_totals WHERE recorded_points > 0), 0) AS average_recorded_points,
-                       COALESCE((SELECT COUNT(*) FROM growth_point_ledger WHERE amount > 0), 0) AS recorded_activity_count"""
-        )
+        earning = [row for row in self._snapshot("growth_points.user_range") if row["dimension"] != "0"]
+        total_points = int(sum(row["value"] for row in earning))
+        earning_users = sum(int(row["count"]) for row in earning)
+        return {
+            "total_recorded_points": total_points,
+            "users_with_recorded_points": earning_users,
+            "average_recorded_points": total_points / earning_users if earning_users else 0,
+            "recorded_activity_count": int(self._series_total("growth_points.recorded")["count"]),
+        }
 
     def global_document_stats(self) -> Dict[str, Any]:
         return self._one(
@@ -151,13 +288,11 @@ class SQLiteAnalyticsRepository:
                  FROM user_documents"""
         )
 
-    def user_registration_trend(self, days: int) -> List[Dict[str, Any]]:
-        return self._many(
-            """SELECT substr(created_at, 1, 10) AS date, COUNT(*) AS user_count
-                 FROM users WHERE datetime(created_at) >= datetime('now', ?)
-                 GROUP BY substr(created_at, 1, 10) ORDER BY date""",
-            (self._cutoff(days),),
-        )
+    def user_registration_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]:
+        return [
+            {"date": row["bucket"], "user_count": int(row["count"])}
+            for row in self._series("users.registered", days, granularity)
+        ]
 
     def user_activity_stats(self, days: int) -> Dict[str, Any]:
         return self._one(
@@ -174,113 +309,87 @@ class SQLiteAnalyticsRepository:
         )
 
     def task_status_distribution(self) -> List[Dict[str, Any]]:
-        return self._many(
-            "SELECT status, COUNT(*) AS task_count FROM task_steps GROUP BY status ORDER BY status"
-        )
+        return [
+            {"status": row["dimension"], "task_count": int(row["count"])}
+            for row in self._snapshot("task_steps.status")
+        ]
 
-    def task_completion_trend(self, days: int) -> List[Dict[str, Any]]:
-        return self._many(
-            """SELECT substr(completed_at, 1, 10) AS date, COUNT(*) AS completed_count
-                 FROM task_steps
-                 WHERE status = 'completed' AND completed_at IS NOT NULL
-                   AND datetime(completed_at) >= datetime('now', ?)
-                 GROUP BY substr(completed_at, 1, 10) ORDER BY date""",
-            (self._cutoff(days),),
-        )
+    def task_completion_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]:
+        return [
+            {"date": row["bucket"], "completed_count": int(row["count"])}
+            for row in self._series("task_steps.completed", days, granularity)
+        ]
 
     def task_category_stats(self) -> List[Dict[str, Any]]:
-        return self._many(
-            """SELECT kind AS category_name, kind AS category_id, COUNT(*) AS task_count,
-                      COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0) AS completed_count
-                 FROM task_steps
-                 GROUP BY kind
-                 ORDER BY task_count DESC, category_name"""
-        )
+        rows = [
+            {
+                "category_name": row["dimension"],
+                "category_id": row["dimension"],
+                "task_count": int(row["count"]),
+                "completed_count": int(row["value"]),
+            }
+            for row in self._snapshot("task_steps.kind")
+        ]
+        return sorted(rows, key=lambda item: (-item["task_count"], item["category_name"]))
 
     def task_duration_stats(self) -> Dict[str, Any]:
-        return self._one(
-            """SELECT COUNT(*) AS completed_tasks,
-                      COALESCE(AVG((julianday(completed_at) - julianday(created_at)) * 24), 0) AS average_completion_hours
-                 FROM task_steps
-                 WHERE status = 'completed' AND completed_at IS NOT NULL"""
-        )
+        totals = self._series_total("task_steps.completed")
+        completed = int(totals["count"])
+        return {
+            "completed_tasks": completed,
+            "average_completion_hours": float(totals["value"]) / completed if completed else 0,
+        }
 
     def attribute_type_distribution(self) -> List[Dict[str, Any]]:
-        return self._many(
-            "SELECT attr_name, COUNT(*) AS attribute_count FROM attributes GROUP BY attr_name ORDER BY attribute_count DESC, attr_name"
-        )
+        rows = [
+            {"attr_name": row["dimension"], "attribute_count": int(row["count"])}
+            for row in self._snapshot("attributes.name")
+        ]
+        return sorted(rows, key=lambda item: (-item["attribute_count"], item["attr_name"]))
 
     def attribute_value_distribution(self) -> List[Dict[str, Any]]:
-        return self._many(
-            """SELECT CASE
-                        WHEN attr_value < 20 THEN '0-19'
-                        WHEN attr_value < 40 THEN '20-39'
-                        WHEN attr_value < 60 THEN '40-59'
-                        WHEN attr_value < 80 THEN '60-79'
-                        ELSE '80-100+'
-                      END AS value_range,
-                      COUNT(*) AS attribute_count
-                 FROM attributes GROUP BY value_range
-                 ORDER BY CASE value_range
-                    WHEN '0-19' THEN 1 WHEN '20-39' THEN 2 WHEN '40-59' THEN 3
-                    WHEN '60-79' THEN 4 ELSE 5 END"""
-        )
+        counts = {row["dimension"]: int(row["count"]) for row in self._snapshot("attributes.value_range")}
+        return [
+            {"value_range": value_range, "attribute_count": counts[value_range]}
+            for value_range in _ATTRIBUTE_VALUE_RANGES
+            if value_range in counts
+        ]
 
     def popular_attributes(self, limit: int) -> List[Dict[str, Any]]:
-        return self._many(
-            """SELECT attr_name, COUNT(*) AS attribute_count,
-                      COALESCE(AVG(attr_value), 0) AS average_value
-                 FROM attributes GROUP BY attr_name
-                 ORDER BY attribute_count DESC, average_value DESC, attr_name LIMIT ?""",
-            (max(1, min(limit, 100)),),
-        )
+        rows = [
+            {
+                "attr_name": row["dimension"],
+                "attribute_count": int(row["count"]),
+                "average_value": float(row["value"]) / int(row["count"]),
+            }
+            for row in self._snapshot("attributes.name")
+        ]
+        rows.sort(key=lambda item: (-item["attribute_count"], -item["average_value"], item["attr_name"]))
+        return rows[: max(1, min(limit, 100))]
 
-    def growth_point_activity_trend(self, days: int) -> List[Dict[str, Any]]:
-        """Return daily positive point records for the requested analytics window."""
-        return self._many(
-            """SELECT substr(created_at, 1, 10) AS date,
-                      COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0) AS recorded_points,
-                      COALESCE(SUM(CASE WHEN amount > 0 THEN 1 ELSE 0 END), 0) AS activity_count
-                 FROM growth_point_ledger
-                 WHERE datetime(created_at) >= datetime(?)
-                 GROUP BY substr(created_at, 1, 10) ORDER BY date""",
-            (self._cutoff(days),),
-        )
+    def growth_point_activity_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]:
+        """Return positive point records per bucket for the requested analytics window."""
+        return [
+            {"date": row["bucket"], "recorded_points": int(row["value"]), "activity_count": int(row["count"])}
+            for row in self._series("growth_points.recorded", days, granularity)
+        ]
 
     def growth_point_distribution(self) -> List[Dict[str, Any]]:
         """Group users by recorded points; historical debits never create negative bands."""
-        return self._many(
-            """WITH recorded_points AS (
-                    SELECT u.user_id, COALESCE(SUM(CASE WHEN ledger.amount > 0 THEN ledger.amount ELSE 0 END), 0) AS total_points
-                    FROM users u
-                    LEFT JOIN growth_point_ledger ledger ON ledger.user_id = u.user_id
-                    GROUP BY u.user_id
-                )
-                SELECT CASE
-                        WHEN total_points = 0 THEN '0'
-                        WHEN total_points < 100 THEN '1-99'
-                        WHEN total_points < 500 THEN '100-499'
-                        WHEN total_points < 1000 THEN '500-999'
-                        ELSE '1000+'
-                      END AS points_range,
-                      COUNT(*) AS user_count
-                 FROM recorded_points GROUP BY points_range
-                 ORDER BY CASE points_range
-                    WHEN '0' THEN 1 WHEN '1-99' THEN 2 WHEN '100-499' THEN 3
-                    WHEN '500-999' THEN 4 ELSE 5 END"""
-        )
+        counts = {row["dimension"]: int(row["count"]) for row in self._snapshot("growth_points.user_range")}
+        return [
+            {"points_range": points_range, "user_count": counts[points_range]}
+            for points_range in _GROWTH_POINT_RANGES
+            if points_range in counts
+        ]
 
     def growth_point_health_metrics(self) -> Dict[str, Any]:
         """Summarize recorded point activity for administrators."""
-        return self._one(
-            """WITH recorded_points AS (
-                    SELECT u.user_id, COALESCE(SUM(CASE WHEN ledger.amount > 0 THEN ledger.amount ELSE 0 END), 0) AS total_points
-                    FROM users u
-                    LEFT JOIN growth_point_ledger ledger ON ledger.user_id = u.user_id
-                    GROUP BY u.user_id
-                )
-                SELECT COUNT(*) AS total_users,
-                       COALESCE(SUM(CASE WHEN total_points > 0 THEN 1 ELSE 0 END), 0) AS users_with_recorded_points,
-                       COALESCE(AVG(total_points), 0) AS average_recorded_points
-                  FROM recorded_points"""
-        )
+        rows = self._snapshot("growth_points.user_range")
+        total_users = sum(int(row["count"]) for row in rows)
+        total_points = sum(row["value"] for row in rows)
+        return {
+            "total_users": total_users,
+            "users_with_recorded_points": sum(int(row["count"]) for row in rows if row["dimension"] != "0"),
+            "average_recorded_points": total_points / total_users if total_users else 0,
+        }
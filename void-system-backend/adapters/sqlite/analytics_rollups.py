@@ -0,0 +1,303 @@
+"""Time-bucketed and snapshot rollups that back administrator analytics reads."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from core.analytics_contracts import HOUR_TREND_MAX_DAYS
+
+# Completion timestamps are computed just before their write transaction commits. Folding
+# only Steps completed at least this long ago keeps a slow writer from landing behind the
+# watermark.
+COMPLETION_SETTLE_SECONDS = 60
+# Snapshots rescan their source tables, so a refresh recomputes them at most this often.
+SNAPSHOT_REFRESH_SECONDS = 900
+# Hour buckets older than this are dropped; day buckets keep full history.
+HOUR_BUCKET_RETENTION_DAYS = HOUR_TREND_MAX_DAYS
+SNAPSHOT_WATERMARK = "snapshots"
+
+# (metric, dimension, count, value) rows of every snapshot metric.
+SnapshotRows = List[Tuple[str, str, int, float]]
+
+GRANULARITIES = ("hour", "day")
+_BUCKET_EXPRESSIONS = {
+    "hour": "substr(ts, 1, 10) || 'T' || substr(ts, 12, 2)",
+    "day": "substr(ts, 1, 10)",
+}
+_HOUR_BUCKET_FORMAT = "%Y-%m-%dT%H"
+
+
+@dataclass(frozen=True)
+class _SeriesMetric:
+    """An append-ordered source folded into hour and day buckets past a watermark."""
+
+    source: str
+    watermark_kind: str
+    # Selects ts and v for rows with ? < position <= ?.
+    rows_sql: str
+    # Selects ts and v for every source row; folded instead when there is no watermark.
+    history_sql: Optional[str] = None
+
+
+# users and growth_point_ledger have plain rowids, which SQLite reuses after the newest
+# row is deleted. Insert triggers append their rows to an AUTOINCREMENT feed instead, and
+# the feed's sequence is the watermark; folded feed rows are deleted.
+_FEED_SOURCES = {
+    "users.registered": ("users", "NEW.created_at", "1", ""),
+    "growth_points.recorded": ("growth_point_ledger", "NEW.created_at", "NEW.amount", "WHEN NEW.amount > 0"),
+}
+
+SERIES_METRICS: Dict[str, _SeriesMetric] = {
+    "users.registered": _SeriesMetric(
+        source="analytics_rollup_feed",
+        watermark_kind="sequence",
+        rows_sql="""SELECT ts, v FROM analytics_rollup_feed
+                    WHERE metric = 'users.registered' AND seq > ? AND seq <= ?""",
+        history_sql="SELECT created_at AS ts, 1 AS v FROM users",
+    ),
+    "growth_points.recorded": _SeriesMetric(
+        source="analytics_rollup_feed",
+        watermark_kind="sequence",
+        rows_sql="""SELECT ts, v FROM analytics_rollup_feed
+                    WHERE metric = 'growth_points.recorded' AND seq > ? AND seq <= ?""",
+        history_sql="SELECT created_at AS ts, amount AS v FROM growth_point_ledger WHERE amount > 0",
+    ),
+    "task_steps.completed": _SeriesMetric(
+        source="task_steps",
+        watermark_kind="completed_at",
+        rows_sql="""SELECT completed_at AS ts,
+                           COALESCE((julianday(completed_at) - julianday(created_at)) * 24, 0) AS v
+                    FROM task_steps
+                    WHERE status = 'completed' AND completed_at > ? AND completed_at <= ?""",
+    ),
+}
+
+# Current-state distributions recomputed whole on every refresh; each query yields
+# dimension, count and value columns.
+SNAPSHOT_METRICS: Dict[str, str] = {
+    "task_steps.status": """SELECT status AS dimension, COUNT(*) AS count, 0 AS value
+                            FROM task_steps GROUP BY status""",
+    "task_steps.kind": """SELECT kind AS dimension, COUNT(*) AS count,
+                                 SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS value
+                          FROM task_steps GROUP BY kind""",
+    "attributes.name": """SELECT attr_name AS dimension, COUNT(*) AS count, SUM(attr_value) AS value
+                          FROM attributes GROUP BY attr_name""",
+    "attributes.value_range": """SELECT CASE
+                                     WHEN attr_value < 20 THEN '0-19'
+                                     WHEN attr_value < 40 THEN '20-39'
+                                     WHEN attr_value < 60 THEN '40-59'
+                                     WHEN attr_value < 80 THEN '60-79'
+                                     ELSE '80-100+'
+                                 END AS dimension, COUNT(*) AS count, 0 AS value
+                                 FROM attributes GROUP BY dimension""",
+    "growth_points.user_range": """SELECT CASE
+                                       WHEN total_points = 0 THEN '0'
+                                       WHEN total_points < 100 THEN '1-99'
+                                       WHEN total_points < 500 THEN '100-499'
+                                       WHEN total_points < 1000 THEN '500-999'
+                                       ELSE '1000+'
+                                   END AS dimension, COUNT(*) AS count, SUM(total_points) AS value
+                                   FROM (
+                                       SELECT COALESCE(b.total_income, 0) AS total_points
+                                       FROM users u LEFT JOIN growth_point_balances b ON b.user_id = u.user_id
+                                   )
+                                   GROUP BY dimension""",
+}
+
+
+def create_analytics_rollup_tables(conn: sqlite3.Connection) -> None:
+    """Create bucket, watermark and feed tables, the feed triggers, and the completion index."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS analytics_rollup_buckets (
+               metric TEXT NOT NULL,
+               granularity TEXT NOT NULL,
+               bucket TEXT NOT NULL,
+               dimension TEXT NOT NULL DEFAULT '',
+               count INTEGER NOT NULL DEFAULT 0,
+               value REAL NOT NULL DEFAULT 0,
+               PRIMARY KEY (metric, granularity, bucket, dimension)
+           )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS analytics_rollup_watermarks (
+               metric TEXT PRIMARY KEY,
+               position TEXT NOT NULL,
+               refreshed_at TEXT NOT NULL
+           )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS analytics_rollup_feed (
+               seq INTEGER PRIMARY KEY AUTOINCREMENT,
+               metric TEXT NOT NULL,
+               ts TEXT,
+               v REAL NOT NULL DEFAULT 0
+           )"""
+    )
+    for metric, (table, ts, value, condition) in _FEED_SOURCES.items():
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS trg_analytics_feed_{table}
+                AFTER INSERT ON {table} {condition}
+                BEGIN
+                    INSERT INTO analytics_rollup_feed (metric, ts, v) VALUES ('{metric}', {ts}, {value});
+                END"""
+        )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_steps_status_completed
+           ON task_steps(status, completed_at)"""
+    )
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _upper_bound(conn: sqlite3.Connection, metric: _SeriesMetric, now: datetime) -> str:
+    if metric.watermark_kind == "sequence":
+        return str(conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {metric.source}").fetchone()[0])
+    return (now - timedelta(seconds=COMPLETION_SETTLE_SECONDS)).isoformat()
+
+
+def _position(metric: _SeriesMetric, value: Optional[str]) -> object:
+    if metric.watermark_kind == "sequence":
+        return int(value or 0)
+    return value or ""
+
+
+def _fold_series(
+    conn: sqlite3.Connection, name: str, metric: _SeriesMetric, lower: Optional[str], now: datetime
+) -> None:
+    upper = _upper_bound(conn, metric, now)
+    lower_position = _position(metric, lower)
+    upper_position = _position(metric, upper)
+    if lower is not None and not lower_position < upper_position:  # type: ignore[operator]
+        conn.execute(
+            "UPDATE analytics_rollup_watermarks SET refreshed_at = ? WHERE metric = ?",
+            (now.isoformat(), name),
+        )
+        return
+    if lower is None and metric.history_sql is not None:
+        rows_sql, parameters = metric.history_sql, ()
+    else:
+        rows_sql, parameters = metric.rows_sql, (lower_position, upper_position)
+    for granularity in GRANULARITIES:
+        conn.execute(
+            f"""INSERT INTO analytics_rollup_buckets (metric, granularity, bucket, dimension, count, value)
+               SELECT ?, ?, {_BUCKET_EXPRESSIONS[granularity]} AS bucket, '', COUNT(*), COALESCE(SUM(v), 0)
+               FROM ({rows_sql}) WHERE ts IS NOT NULL
+               GROUP BY bucket
+               ON CONFLICT(metric, granularity, bucket, dimension) DO UPDATE SET
+                   count = count + excluded.count,
+                   value = value + excluded.value""",
+            (name, granularity, *parameters),
+        )
+    conn.execute(
+        """INSERT OR REPLACE INTO analytics_rollup_watermarks (metric, position, refreshed_at)
+           VALUES (?, ?, ?)""",
+        (name, upper, now.isoformat()),
+    )
+
+
+def _snapshots_due(computed_at: Optional[str], now: datetime) -> bool:
+    if not computed_at:
+        return True
+    return now - datetime.fromisoformat(computed_at) >= timedelta(seconds=SNAPSHOT_REFRESH_SECONDS)
+
+
+def _snapshot_rows(conn: sqlite3.Connection) -> SnapshotRows:
+    return [
+        (name, row[0], row[1], row[2])
+        for name, query in SNAPSHOT_METRICS.items()
+        for row in conn.execute(
+            f"SELECT COALESCE(dimension, ''), count, COALESCE(value, 0) FROM ({query})"
+        ).fetchall()
+    ]
+
+
+def compute_analytics_snapshots(conn: sqlite3.Connection, *, due_only: bool = True) -> Optional[SnapshotRows]:
+    """Run the snapshot aggregates before the caller takes its write lock.
+
+    Inputs: a connection outside any transaction, so each full-table scan holds only a
+    read lock. Output: the snapshot rows, or None when ``due_only`` is set and the last
+    snapshots are younger than ``SNAPSHOT_REFRESH_SECONDS``. Rows committed between this
+    read and the write are picked up by the next snapshot refresh.
+    """
+    if due_only:
+        row = conn.execute(
+            "SELECT position FROM analytics_rollup_watermarks WHERE metric = ?", (SNAPSHOT_WATERMARK,)
+        ).fetchone()
+        if not _snapshots_due(row[0] if row else None, _now()):
+            return None
+    return _snapshot_rows(conn)
+
+
+def _replace_snapshots(conn: sqlite3.Connection, rows: SnapshotRows, now: datetime) -> None:
+    conn.execute("DELETE FROM analytics_rollup_buckets WHERE granularity = 'snapshot'")
+    conn.executemany(
+        """INSERT INTO analytics_rollup_buckets (metric, granularity, bucket, dimension, count, value)
+           VALUES (?, 'snapshot', '', ?, ?, ?)""",
+        rows,
+    )
+    conn.execute(
+        """INSERT OR REPLACE INTO analytics_rollup_watermarks (metric, position, refreshed_at)
+           VALUES (?, ?, ?)""",
+        (SNAPSHOT_WATERMARK, now.isoformat(), now.isoformat()),
+    )
+
+
+def _prune_hour_buckets(conn: sqlite3.Connection, now: datetime) -> None:
+    cutoff = (now - timedelta(days=HOUR_BUCKET_RETENTION_DAYS)).strftime(_HOUR_BUCKET_FORMAT)
+    conn.execute(
+        "DELETE FROM analytics_rollup_buckets WHERE granularity = 'hour' AND bucket < ?", (cutoff,)
+    )
+
+
+def refresh_analytics_rollups(
+    conn: sqlite3.Connection, snapshots: Optional[SnapshotRows] = None
+) -> Dict[str, str]:
+    """Fold source rows past each watermark into buckets and replace due snapshots.
+
+    Inputs: an open write transaction and, optionally, rows from
+    ``compute_analytics_snapshots`` taken before it began. Output: the new watermark per
+    series metric and the time snapshots were last computed. Called by the scheduled
+    rollup worker. A metric without a watermark is folded from the beginning, so the
+    first refresh after migration equals a backfill. Snapshots are replaced once
+    ``SNAPSHOT_REFRESH_SECONDS`` have passed, and hour buckets past
+    ``HOUR_BUCKET_RETENTION_DAYS`` are dropped. Without precomputed rows the snapshot
+    scans run inside the write transaction, as they do during migrations.
+    """
+    now = _now()
+    watermarks = {
+        row["metric"]: row["position"]
+        for row in conn.execute("SELECT metric, position FROM analytics_rollup_watermarks").fetchall()
+    }
+    for name, metric in SERIES_METRICS.items():
+        _fold_series(conn, name, metric, watermarks.get(name), now)
+    _prune_hour_buckets(conn, now)
+    if _snapshots_due(watermarks.get(SNAPSHOT_WATERMARK), now):
+        _replace_snapshots(conn, snapshots if snapshots is not None else _snapshot_rows(conn), now)
+    positions = {
+        row["metric"]: row["position"]
+        for row in conn.execute("SELECT metric, position FROM analytics_rollup_watermarks").fetchall()
+    }
+    folded = min(
+        int(positions[name]) for name, metric in SERIES_METRICS.items() if metric.watermark_kind == "sequence"
+    )
+    conn.execute("DELETE FROM analytics_rollup_feed WHERE seq <= ?", (folded,))
+    return positions
+
+
+def backfill_analytics_rollups(
+    conn: sqlite3.Connection, snapshots: Optional[SnapshotRows] = None
+) -> Dict[str, str]:
+    """Discard every bucket and watermark, then rebuild them from full source history.
+
+    Called by migration 42 and the manual backfill tool inside one write transaction;
+    use it after restoring data, deleting history, or changing a metric definition.
+    ``snapshots`` are rows computed before that transaction, as for a refresh.
+    """
+    conn.execute("DELETE FROM analytics_rollup_buckets")
+    conn.execute("DELETE FROM analytics_rollup_watermarks")
+    # Without watermarks the feed is superseded by the source tables it mirrors.
+    return refresh_analytics_rollups(conn, snapshots)
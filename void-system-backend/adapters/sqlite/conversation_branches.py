@@ -0,0 +1,199 @@
+"""Copy-on-write lineage for duplicated chat sessions."""
+from __future__ import annotations
+
+import sqlite3
+from typing import List, Optional, Tuple
+
+from adapters.sqlite.conversation_search import index_message_rows
+
+
+# A branch records its parent and the (created_at, message_id) key of the parent's newest
+# visible message when it was made; it sees its own messages plus the parent's up to that
+# key. Reads merge one index range per ancestor, so chains are flattened past this depth.
+MAX_BRANCH_DEPTH = 8
+
+MessageKey = Tuple[str, str]
+Segment = Tuple[str, Optional[MessageKey]]
+
+
+def add_branch_columns(conn: sqlite3.Connection) -> None:
+    """Add the parent pointer and branch key to chat_sessions and index children by parent."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chat_sessions)").fetchall()}
+    for column in ("parent_session_id", "branch_created_at", "branch_message_id"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE chat_sessions ADD COLUMN {column} TEXT")
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_chat_sessions_parent
+           ON chat_sessions(user_id, parent_session_id) WHERE parent_session_id IS NOT NULL"""
+    )
+
+
+def lineage_segments(conn: sqlite3.Connection, user_id: str, session_id: str) -> Optional[List[Segment]]:
+    """Return ``(session_id, upper_key)`` ranges whose messages the session sees, newest first.
+
+    The first range is the session's own messages and is unbounded. Returns ``None``
+    when the owner has no such session.
+    """
+    rows = conn.execute(
+        """WITH RECURSIVE lineage(session_id, parent_session_id, branch_created_at, branch_message_id, depth) AS (
+               SELECT session_id, parent_session_id, branch_created_at, branch_message_id, 0
+               FROM chat_sessions WHERE session_id = ? AND user_id = ?
+               UNION ALL
+               SELECT s.session_id, s.parent_session_id, s.branch_created_at, s.branch_message_id, l.depth + 1
+               FROM chat_sessions s JOIN lineage l ON s.session_id = l.parent_session_id
+               WHERE s.user_id = ? AND l.depth < ?
+           )
+           SELECT * FROM lineage ORDER BY depth""",
+        (session_id, user_id, user_id, MAX_BRANCH_DEPTH),
+    ).fetchall()
+    if not rows:
+        return None
+    segments: List[Segment] = [(rows[0]["session_id"], None)]
+    bound: Optional[MessageKey] = None
+    for child, parent in zip(rows, rows[1:]):
+        key = (child["branch_created_at"], child["branch_message_id"])
+        bound = key if bound is None else min(bound, key)
+        segments.append((parent["session_id"], bound))
+    return segments
+
+
+def segment_clause(alias: str, bound: Optional[MessageKey]) -> Tuple[str, Tuple[str, ...]]:
+    """Return the SQL condition and parameters keeping one range's messages at or before ``bound``."""
+    if bound is None:
+        return "", ()
+    return (
+        f"AND ({alias}.created_at < ? OR ({alias}.created_at = ? AND {alias}.message_id <= ?))",
+        (bound[0], bound[0], bound[1]),
+    )
+
+
+def newest_visible_key(conn: sqlite3.Connection, user_id: str, segments: List[Segment]) -> Optional[MessageKey]:
+    """Return the key of the newest message the lineage sees, or ``None`` if it sees none."""
+    # Each session's own messages postdate its branch key, so the first non-empty range wins.
+    for session_id, bound in segments:
+        clause, parameters = segment_clause("m", bound)
+        row = conn.execute(
+            f"""SELECT m.created_at, m.message_id FROM chat_messages m
+                WHERE m.user_id = ? AND m.session_id = ? {clause}
+                ORDER BY m.created_at DESC, m.message_id DESC LIMIT 1""",
+            (user_id, session_id, *parameters),
+        ).fetchone()
+        if row is not None:
+            return row[0], row[1]
+    return None
+
+
+def is_visible(conn: sqlite3.Connection, user_id: str, segments: List[Segment], message_id: str) -> bool:
+    """Return whether the owner's message lies inside one of the lineage's ranges."""
+    row = conn.execute(
+        "SELECT session_id, created_at FROM chat_messages WHERE message_id = ? AND user_id = ?",
+        (message_id, user_id),
+    ).fetchone()
+    if row is None:
+        return False
+    return any(
+        row["session_id"] == session_id and (bound is None or (row["created_at"], message_id) <= bound)
+        for session_id, bound in segments
+    )
+
+
+def copy_messages(conn: sqlite3.Connection, user_id: str, segments: List[Segment], target_session_id: str) -> int:
+    """Copy the ranges' messages into ``target_session_id`` with fresh ids and return the count.
+
+    Replies between copied messages point at the copies. ``temp.chat_message_copies`` keeps
+    the old-to-new id map until the next copy on this connection.
+    """
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS chat_message_copies (old_id TEXT PRIMARY KEY, new_id TEXT NOT NULL)"
+    )
+    conn.execute("DELETE FROM temp.chat_message_copies")
+    for session_id, bound in segments:
+        clause, parameters = segment_clause("m", bound)
+        conn.execute(
+            f"""INSERT INTO temp.chat_message_copies (old_id, new_id)
+                SELECT m.message_id, lower(hex(randomblob(16))) FROM chat_messages m
+                WHERE m.user_id = ? AND m.session_id = ? {clause}""",
+            (user_id, session_id, *parameters),
+        )
+    copied = conn.execute(
+        """INSERT INTO chat_messages
+           (message_id, session_id, user_id, role, content, tokens, reply_to_id, created_at)
+           SELECT c.new_id, ?, m.user_id, m.role, m.content, m.tokens,
+                  COALESCE(r.new_id, m.reply_to_id), m.created_at
+           FROM temp.chat_message_copies c
+           JOIN chat_messages m ON m.message_id = c.old_id
+           LEFT JOIN temp.chat_message_copies r ON r.old_id = m.reply_to_id""",
+        (target_session_id,),
+    ).rowcount
+    index_message_rows(
+        conn,
+        conn.execute(
+            """SELECT m.rowid, m.content FROM temp.chat_message_copies c
+               JOIN chat_messages m ON m.message_id = c.new_id"""
+        ).fetchall(),
+    )
+    return copied
+
+
+def detach_children(conn: sqlite3.Connection, user_id: str, session_id: str) -> None:
+    """Give each direct branch its own copy of this session's shared messages.
+
+    Called inside the write transaction before the session's messages are deleted. A
+    branch keeps sharing older ancestors: it is re-pointed at this session's parent.
+    """
+    parent = conn.execute(
+        """SELECT parent_session_id, branch_created_at, branch_message_id
+           FROM chat_sessions WHERE session_id = ? AND user_id = ?""",
+        (session_id, user_id),
+    ).fetchone()
+    children = conn.execute(
+        """SELECT session_id, branch_created_at, branch_message_id FROM chat_sessions
+           WHERE user_id = ? AND parent_session_id = ?""",
+        (user_id, session_id),
+    ).fetchall()
+    for child in children:
+        child_key = (child["branch_created_at"], child["branch_message_id"])
+        copy_messages(conn, user_id, [(session_id, child_key)], child["session_id"])
+        # The branch and its own branches may reply to, or branch at, the originals.
+        subtree = [
+            row[0]
+            for row in conn.execute(
+                """WITH RECURSIVE subtree(session_id) AS (
+                       SELECT ?
+                       UNION
+                       SELECT s.session_id FROM chat_sessions s
+                       JOIN subtree t ON s.parent_session_id = t.session_id
+                       WHERE s.user_id = ?
+                   )
+                   SELECT session_id FROM subtree""",
+                (child["session_id"], user_id),
+            ).fetchall()
+        ]
+        placeholders = ",".join("?" for _ in subtree)
+        conn.execute(
+            f"""UPDATE chat_messages
+                SET reply_to_id = (SELECT new_id FROM temp.chat_message_copies WHERE old_id = reply_to_id)
+                WHERE user_id = ? AND session_id IN ({placeholders})
+                  AND reply_to_id IN (SELECT old_id FROM temp.chat_message_copies)""",
+            (user_id, *subtree),
+        )
+        conn.execute(
+            f"""UPDATE chat_sessions
+                SET branch_message_id = (
+                    SELECT new_id FROM temp.chat_message_copies WHERE old_id = branch_message_id
+                )
+                WHERE user_id = ? AND session_id IN ({placeholders})
+                  AND branch_message_id IN (SELECT old_id FROM temp.chat_message_copies)""",
+            (user_id, *subtree),
+        )
+        new_parent: Optional[str] = None
+        new_key: Optional[MessageKey] = None
+        if parent is not None and parent["parent_session_id"] is not None:
+            new_parent = parent["parent_session_id"]
+            new_key = min(child_key, (parent["branch_created_at"], parent["branch_message_id"]))
+        conn.execute(
+            """UPDATE chat_sessions
+               SET parent_session_id = ?, branch_created_at = ?, branch_message_id = ?
+               WHERE session_id = ? AND user_id = ?""",
+            (new_parent, *(new_key or (None, None)), child["session_id"], user_id),
+        )
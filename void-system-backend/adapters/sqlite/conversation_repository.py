@@ -3,9 +3,28 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 import sqlite3
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import uuid
 
+from adapters.sqlite.conversation_branches import (
+    MAX_BRANCH_DEPTH,
+    copy_messages,
+    detach_children,
+    is_visible,
+    lineage_segments,
+    newest_visible_key,
+    segment_clause,
+)
+from adapters.sqlite.conversation_search import (
+    index_message,
+    index_session_title,
+    search_conversations,
+    unindex_sessions,
+)
+
+
+REPLY_PREVIEW_CHARS = 200
+
 
 class SQLiteConversationRepository:
     def __init__(self, connection_factory: Callable[[], sqlite3.Connection]):
@@ -15,27 +34,109 @@ class SQLiteConversationRepository:
     def _now() -> str:
         return datetime.now(timezone.utc).isoformat()
 
-    def list_groups(self, user_id: str) -> List[Dict[str, Any]]:
+    def list_groups(self, user_id: str, session_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return the owner's groups with a projected, newest-first session summary each.
+
+        One statement reads every group and its sessions from
+        ``idx_chat_sessions_group_recent``. With ``session_limit`` a correlated subquery
+        keeps only each group's newest sessions, and ``session_count`` still reports the
+        full size so callers can page the rest with ``list_group_sessions``.
+        """
         connection = self._connection_factory()
         try:
-            cursor = connection.cursor()
-            cursor.execute(
-                "SELECT * FROM chat_groups WHERE user_id = ? ORDER BY created_at DESC",
-                (user_id,),
-            )
-            groups = [dict(row) for row in cursor.fetchall()]
+            if session_limit is None:
+                rows = connection.execute(
+                    """SELECT g.group_id, g.group_name, g.created_at AS group_created_at,
+                              s.session_id, s.session_name, s.created_at, s.updated_at
+                       FROM chat_groups g
+                       LEFT JOIN chat_sessions s
+                         ON s.user_id = g.user_id AND s.group_id = g.group_id
+                       WHERE g.user_id = ?
+                       ORDER BY g.created_at DESC, g.group_id, s.updated_at DESC, s.session_id DESC""",
+                    (user_id,),
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    """SELECT g.group_id, g.group_name, g.created_at AS group_created_at,
+                              (SELECT COUNT(*) FROM chat_sessions c
+                               WHERE c.user_id = g.user_id AND c.group_id = g.group_id) AS session_count,
+                              s.session_id, s.session_name, s.created_at, s.updated_at
+                       FROM chat_groups g
+                       LEFT JOIN chat_sessions s ON s.session_id IN (
+                           SELECT p.session_id FROM chat_sessions p
+                           WHERE p.user_id = g.user_id AND p.group_id = g.group_id
+                           ORDER BY p.updated_at DESC, p.session_id DESC
+                           LIMIT ?
+                       )
+                       WHERE g.user_id = ?
+                       ORDER BY g.created_at DESC, g.group_id, s.updated_at DESC, s.session_id DESC""",
+                    (session_limit, user_id),
+                ).fetchall()
+        finally:
+            connection.close()
+        groups: List[Dict[str, Any]] = []
+        for row in rows:
+            if not groups or groups[-1]["group_id"] != row["group_id"]:
+                groups.append({
+                    "group_id": row["group_id"],
+                    "group_name": row["group_name"],
+                    "created_at": row["group_created_at"],
+                    "session_count": row["session_count"] if session_limit is not None else 0,
+                    "sessions": [],
+                })
+            if row["session_id"] is not None:
+                groups[-1]["sessions"].append(self._session_summary(row))
+        if session_limit is None:
             for group in groups:
-                cursor.execute(
-                    """SELECT * FROM chat_sessions
-                       WHERE group_id = ? AND user_id = ?
-                       ORDER BY updated_at DESC""",
-                    (group["group_id"], user_id),
-                )
-                group["sessions"] = [dict(row) for row in cursor.fetchall()]
-            return groups
+                group["session_count"] = len(group["sessions"])
+        return groups
+
+    def list_group_sessions(
+        self,
+        user_id: str,
+        group_id: str,
+        limit: int,
+        after: Optional[Tuple[str, str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return one owned group's sessions after an ``(updated_at, session_id)`` key."""
+        connection = self._connection_factory()
+        try:
+            owner = connection.execute(
+                "SELECT 1 FROM chat_groups WHERE group_id = ? AND user_id = ?",
+                (group_id, user_id),
+            ).fetchone()
+            if owner is None:
+                return None
+            if after is None:
+                rows = connection.execute(
+                    """SELECT session_id, group_id, session_name, created_at, updated_at
+                       FROM chat_sessions WHERE user_id = ? AND group_id = ?
+                       ORDER BY updated_at DESC, session_id DESC LIMIT ?""",
+                    (user_id, group_id, limit),
+                ).fetchall()
+            else:
+                rows = connection.execute(
+                    """SELECT session_id, group_id, session_name, created_at, updated_at
+                       FROM chat_sessions
+                       WHERE user_id = ? AND group_id = ?
+                         AND (updated_at < ? OR (updated_at = ? AND session_id < ?))
+                       ORDER BY updated_at DESC, session_id DESC LIMIT ?""",
+                    (user_id, group_id, after[0], after[0], after[1], limit),
+                ).fetchall()
+            return [self._session_summary(row) for row in rows]
         finally:
             connection.close()
 
+    @staticmethod
+    def _session_summary(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "session_id": row["session_id"],
+            "group_id": row["group_id"],
+            "session_name": row["session_name"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
     def create_group(self, user_id: str, name: str) -> str:
         group_id = str(uuid.uuid4())
         connection = self._connection_factory()
@@ -70,7 +171,15 @@ class SQLiteConversationRepository:
                 (group_id, user_id),
             )
             session_ids = [row[0] for row in cursor.fetchall()]
+            # Detach parents before their branches so copies move down the lineage.
+            depths = {
+                session_id: len(lineage_segments(connection, user_id, session_id) or ())
+                for session_id in session_ids
+            }
+            for session_id in sorted(session_ids, key=depths.__getitem__):
+                detach_children(connection, user_id, session_id)
             if session_ids:
+                unindex_sessions(connection, user_id, session_ids)
                 placeholders = ",".join("?" for _ in session_ids)
                 cursor.execute(
                     f"DELETE FROM chat_messages WHERE user_id = ? AND session_id IN ({placeholders})",
@@ -120,6 +229,7 @@ class SQLiteConversationRepository:
                    VALUES (?, ?, ?, ?, ?, ?)""",
                 (value, group_id, user_id, name, now, now),
             )
+            index_session_title(connection, value)
             connection.commit()
             return value
         except sqlite3.IntegrityError:
@@ -160,8 +270,13 @@ class SQLiteConversationRepository:
                 f"UPDATE chat_sessions SET {', '.join(fields)} WHERE session_id = ? AND user_id = ?",
                 params,
             )
+            if cursor.rowcount > 0 and name is not None:
+                index_session_title(connection, session_id)
             connection.commit()
             return cursor.rowcount > 0
+        except Exception:
+            connection.rollback()
+            raise
         finally:
             connection.close()
 
@@ -175,6 +290,8 @@ class SQLiteConversationRepository:
             ).fetchone()
             if exists is None:
                 return False
+            detach_children(connection, user_id, session_id)
+            unindex_sessions(connection, user_id, [session_id])
             cursor.execute(
                 "DELETE FROM chat_messages WHERE session_id = ? AND user_id = ?",
                 (session_id, user_id),
@@ -196,6 +313,12 @@ class SQLiteConversationRepository:
             connection.close()
 
     def duplicate_session(self, user_id: str, session_id: str) -> Optional[str]:
+        """Branch a session without copying its history.
+
+        The duplicate points at the source and its newest visible message, sharing every
+        message up to that key; only a lineage already ``MAX_BRANCH_DEPTH`` deep is
+        flattened into one ``INSERT ... SELECT`` copy.
+        """
         connection = self._connection_factory()
         try:
             cursor = connection.cursor()
@@ -205,37 +328,30 @@ class SQLiteConversationRepository:
             ).fetchone()
             if source is None:
                 return None
+            segments = lineage_segments(connection, user_id, session_id) or []
+            branch_key = newest_visible_key(connection, user_id, segments)
+            shared = branch_key is not None and len(segments) < MAX_BRANCH_DEPTH
             new_session_id = str(uuid.uuid4())
             now = self._now()
             cursor.execute(
                 """INSERT INTO chat_sessions
-                   (session_id, group_id, user_id, session_name, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (new_session_id, source["group_id"], user_id, f'{source["session_name"]} (副本)', now, now),
-            )
-            cursor.execute(
-                """SELECT * FROM chat_messages
-                   WHERE session_id = ? AND user_id = ? ORDER BY created_at ASC""",
-                (session_id, user_id),
+                   (session_id, group_id, user_id, session_name, created_at, updated_at,
+                    parent_session_id, branch_created_at, branch_message_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    new_session_id,
+                    source["group_id"],
+                    user_id,
+                    f'{source["session_name"]} (副本)',
+                    now,
+                    now,
+                    session_id if shared else None,
+                    *(branch_key if shared else (None, None)),
+                ),
             )
-            messages = cursor.fetchall()
-            id_map = {row["message_id"]: str(uuid.uuid4()) for row in messages}
-            for row in messages:
-                cursor.execute(
-                    """INSERT INTO chat_messages
-                       (message_id, session_id, user_id, role, content, tokens, reply_to_id, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        id_map[row["message_id"]],
-                        new_session_id,
-                        user_id,
-                        row["role"],
-                        row["content"],
-                        row["tokens"],
-                        id_map.get(row["reply_to_id"]),
-                        row["created_at"],
-                    ),
-                )
+            index_session_title(connection, new_session_id)
+            if branch_key is not None and not shared:
+                copy_messages(connection, user_id, segments, new_session_id)
             connection.commit()
             return new_session_id
         except Exception:
@@ -244,27 +360,56 @@ class SQLiteConversationRepository:
         finally:
             connection.close()
 
-    def list_messages(self, user_id: str, session_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+    def list_messages(
+        self,
+        user_id: str,
+        session_id: str,
+        limit: int,
+        before: Optional[Tuple[str, str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return up to ``limit`` of a session's newest messages, oldest first.
+
+        Reads backwards along ``idx_chat_messages_session_recent`` from an optional
+        ``(created_at, message_id)`` key, one range per session in the branch lineage, so
+        the cost depends on the page size rather than the session length. Shared messages
+        are reported under ``session_id``. ``reply_content`` is the first
+        ``REPLY_PREVIEW_CHARS`` characters of the quoted message, fetched by primary key.
+        """
         connection = self._connection_factory()
         try:
-            owner = connection.execute(
-                "SELECT 1 FROM chat_sessions WHERE session_id = ? AND user_id = ?",
-                (session_id, user_id),
-            ).fetchone()
-            if owner is None:
+            segments = lineage_segments(connection, user_id, session_id)
+            if segments is None:
                 return None
-            cursor = connection.execute(
-                """SELECT m.*, r.content AS reply_content
-                   FROM chat_messages m
-                   LEFT JOIN chat_messages r
-                     ON m.reply_to_id = r.message_id
-                    AND r.session_id = m.session_id
-                    AND r.user_id = m.user_id
-                   WHERE m.session_id = ? AND m.user_id = ?
-                   ORDER BY m.created_at ASC LIMIT ?""",
-                (session_id, user_id, limit),
-            )
-            return [dict(row) for row in cursor.fetchall()]
+            keyset = ""
+            keyset_parameters: Tuple[str, ...] = ()
+            if before is not None:
+                keyset = "AND (m.created_at < ? OR (m.created_at = ? AND m.message_id < ?))"
+                keyset_parameters = (before[0], before[0], before[1])
+            ranges: List[str] = []
+            parameters: List[Any] = [REPLY_PREVIEW_CHARS]
+            for source_id, bound in segments:
+                clause, bound_parameters = segment_clause("m", bound)
+                ranges.append(
+                    f"""SELECT * FROM (
+                            SELECT m.* FROM chat_messages m
+                            WHERE m.user_id = ? AND m.session_id = ? {clause} {keyset}
+                            ORDER BY m.created_at DESC, m.message_id DESC
+                            LIMIT ?
+                        )"""
+                )
+                parameters.extend((user_id, source_id, *bound_parameters, *keyset_parameters, limit))
+            parameters.append(limit)
+            rows = connection.execute(
+                f"""SELECT page.*,
+                          (SELECT substr(r.content, 1, ?) FROM chat_messages r
+                           WHERE r.message_id = page.reply_to_id
+                             AND r.user_id = page.user_id) AS reply_content
+                   FROM ({" UNION ALL ".join(ranges)}) page
+                   ORDER BY page.created_at DESC, page.message_id DESC
+                   LIMIT ?""",
+                parameters,
+            ).fetchall()
+            return [{**dict(row), "session_id": session_id} for row in reversed(rows)]
         finally:
             connection.close()
 
@@ -280,20 +425,11 @@ class SQLiteConversationRepository:
         connection = self._connection_factory()
         try:
             cursor = connection.cursor()
-            owner = cursor.execute(
-                "SELECT 1 FROM chat_sessions WHERE session_id = ? AND user_id = ?",
-                (session_id, user_id),
-            ).fetchone()
-            if owner is None:
+            segments = lineage_segments(connection, user_id, session_id)
+            if segments is None:
+                return None
+            if reply_to_id is not None and not is_visible(connection, user_id, segments, reply_to_id):
                 return None
-            if reply_to_id is not None:
-                reply = cursor.execute(
-                    """SELECT 1 FROM chat_messages
-                       WHERE message_id = ? AND session_id = ? AND user_id = ?""",
-                    (reply_to_id, session_id, user_id),
-                ).fetchone()
-                if reply is None:
-                    return None
             message_id = str(uuid.uuid4())
             now = self._now()
             cursor.execute(
@@ -302,6 +438,7 @@ class SQLiteConversationRepository:
                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
                 (message_id, session_id, user_id, role, content, tokens, reply_to_id, now),
             )
+            index_message(connection, message_id)
             cursor.execute(
                 """UPDATE chat_sessions SET updated_at = ?
                    WHERE session_id = ? AND user_id = ?""",
@@ -324,11 +461,32 @@ class SQLiteConversationRepository:
             ).fetchone()
             if owner is None:
                 return False
+            detach_children(connection, user_id, session_id)
+            unindex_sessions(connection, user_id, [session_id], keep_titles=True)
             connection.execute(
                 "DELETE FROM chat_messages WHERE session_id = ? AND user_id = ?",
                 (session_id, user_id),
             )
+            connection.execute(
+                """UPDATE chat_sessions
+                   SET parent_session_id = NULL, branch_created_at = NULL, branch_message_id = NULL
+                   WHERE session_id = ? AND user_id = ?""",
+                (session_id, user_id),
+            )
             connection.commit()
             return True
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def search(
+        self, user_id: str, phrases: List[Tuple[str, ...]], limit: int, offset: int
+    ) -> List[Dict[str, Any]]:
+        """Return one page of the owner's ranked title and message matches for every phrase."""
+        connection = self._connection_factory()
+        try:
+            return search_conversations(connection, user_id, phrases, limit, offset)
         finally:
             connection.close()
@@ -0,0 +1,233 @@
+"""Full-text index over chat message content and session titles."""
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+# FTS5's bundled tokenizers keep a whole CJK run as one token, so text is indexed as the
+# same terms personal memories use: Latin and digit words plus overlapping CJK bigrams,
+# space-separated in document order so that a query's bigrams match as a phrase.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+SNIPPET_CHARS = 80
+RANKED_CANDIDATES = 500
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+
+
+def search_terms(text: str) -> List[str]:
+    """Return one text's index terms in document order."""
+    terms: List[str] = []
+    for run in _TOKEN_PATTERN.findall(str(text or "").lower()):
+        if run.isascii() or len(run) == 1:
+            terms.append(run[:64])
+        else:
+            terms.extend(run[index:index + 2] for index in range(len(run) - 1))
+    return terms
+
+
+def query_phrases(query: str) -> List[Tuple[str, ...]]:
+    """Split user input into one term phrase per word; every phrase must match."""
+    phrases: List[Tuple[str, ...]] = []
+    for word in query.split():
+        terms = tuple(search_terms(word))
+        if terms and terms not in phrases:
+            phrases.append(terms)
+    return phrases
+
+
+def _is_prefix(phrase: Tuple[str, ...]) -> bool:
+    # A lone CJK character only occurs inside bigrams, so it matches as a prefix.
+    return len(phrase) == 1 and len(phrase[0]) == 1 and not phrase[0].isascii()
+
+
+def match_expression(phrases: List[Tuple[str, ...]]) -> str:
+    """Return the FTS5 query requiring every phrase."""
+    return " AND ".join(
+        '"' + " ".join(phrase) + '"' + (" *" if _is_prefix(phrase) else "") for phrase in phrases
+    )
+
+
+def create_conversation_search_tables(conn: sqlite3.Connection) -> None:
+    """Create FTS5 tables whose rowids mirror chat_messages and chat_sessions rowids."""
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_search USING fts5(terms, tokenize = 'unicode61')"
+    )
+    conn.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS chat_session_search USING fts5(terms, tokenize = 'unicode61')"
+    )
+
+
+def index_message(conn: sqlite3.Connection, message_id: str) -> None:
+    """Index one stored message inside the caller's write transaction."""
+    row = conn.execute(
+        "SELECT rowid, content FROM chat_messages WHERE message_id = ?", (message_id,)
+    ).fetchone()
+    if row is not None:
+        conn.execute("DELETE FROM chat_message_search WHERE rowid = ?", (row[0],))
+        conn.execute(
+            "INSERT INTO chat_message_search (rowid, terms) VALUES (?, ?)",
+            (row[0], " ".join(search_terms(row[1]))),
+        )
+
+
+def index_message_rows(conn: sqlite3.Connection, rows: Iterable[Tuple[int, str]]) -> None:
+    """Index newly stored messages given as ``(rowid, content)`` pairs."""
+    conn.executemany(
+        "INSERT INTO chat_message_search (rowid, terms) VALUES (?, ?)",
+        [(row[0], " ".join(search_terms(row[1]))) for row in rows],
+    )
+
+
+def index_session_title(conn: sqlite3.Connection, session_id: str) -> None:
+    """Replace one session's title entry inside the caller's write transaction."""
+    row = conn.execute(
+        "SELECT rowid, session_name FROM chat_sessions WHERE session_id = ?", (session_id,)
+    ).fetchone()
+    if row is not None:
+        conn.execute("DELETE FROM chat_session_search WHERE rowid = ?", (row[0],))
+        conn.execute(
+            "INSERT INTO chat_session_search (rowid, terms) VALUES (?, ?)",
+            (row[0], " ".join(search_terms(row[1]))),
+        )
+
+
+def unindex_sessions(
+    conn: sqlite3.Connection, user_id: str, session_ids: Iterable[str], *, keep_titles: bool = False
+) -> None:
+    """Drop the entries of the owner's sessions before their rows are deleted."""
+    ids = list(session_ids)
+    if not ids:
+        return
+    placeholders = ",".join("?" for _ in ids)
+    conn.execute(
+        f"""DELETE FROM chat_message_search WHERE rowid IN (
+                SELECT rowid FROM chat_messages WHERE user_id = ? AND session_id IN ({placeholders}))""",
+        (user_id, *ids),
+    )
+    if not keep_titles:
+        conn.execute(
+            f"""DELETE FROM chat_session_search WHERE rowid IN (
+                    SELECT rowid FROM chat_sessions WHERE user_id = ? AND session_id IN ({placeholders}))""",
+            (user_id, *ids),
+        )
+
+
+def rebuild_conversation_search(conn: sqlite3.Connection, batch_size: int = 2000) -> int:
+    """Re-index every session title and message and return the messages indexed."""
+    conn.execute("DELETE FROM chat_message_search")
+    conn.execute("DELETE FROM chat_session_search")
+    conn.executemany(
+        "INSERT INTO chat_session_search (rowid, terms) VALUES (?, ?)",
+        [
+            (row[0], " ".join(search_terms(row[1])))
+            for row in conn.execute("SELECT rowid, session_name FROM chat_sessions").fetchall()
+        ],
+    )
+    indexed = 0
+    last_rowid = 0
+    while True:
+        rows = conn.execute(
+            "SELECT rowid, content FROM chat_messages WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (last_rowid, batch_size),
+        ).fetchall()
+        if not rows:
+            return indexed
+        index_message_rows(conn, rows)
+        indexed += len(rows)
+        last_rowid = rows[-1][0]
+
+
+def snippet(text: str, query: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """Return a window of ``text`` around the first query word and the matched spans in it."""
+    words = [word.lower() for word in query.split() if word]
+    lowered = text.lower()
+    positions = [lowered.find(word) for word in words]
+    found = [position for position in positions if position >= 0]
+    start = max(0, min(found) - SNIPPET_CHARS // 4) if found else 0
+    end = min(len(text), start + SNIPPET_CHARS)
+    window = text[start:end]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    spans: List[Tuple[int, int]] = []
+    window_lowered = window.lower()
+    for word in words:
+        offset = window_lowered.find(word)
+        while offset >= 0:
+            spans.append((offset + len(prefix), offset + len(prefix) + len(word)))
+            offset = window_lowered.find(word, offset + len(word))
+    return prefix + window + suffix, sorted(spans)
+
+
+def _rank(hits: List[Dict[str, Any]], phrases: List[Tuple[str, ...]]) -> None:
+    """Score hits with bm25's saturated term frequency and length normalisation.
+
+    Every hit matches every phrase, so bm25's per-phrase IDF would need a scan of each
+    phrase's full doclist; it is treated as constant across the window instead.
+    """
+    lengths = [hit["terms"].count(" ") + 1 for hit in hits]
+    average = sum(lengths) / len(lengths) if lengths else 1.0
+    patterns = [" " + " ".join(phrase) + ("" if _is_prefix(phrase) else " ") for phrase in phrases]
+    for hit, length in zip(hits, lengths):
+        padded = f" {hit.pop('terms')} "
+        norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * length / average)
+        hit["score"] = round(sum(
+            frequency * (_BM25_K1 + 1) / (frequency + norm)
+            for frequency in (padded.count(pattern) for pattern in patterns)
+        ), 4)
+
+
+def search_conversations(
+    conn: sqlite3.Connection, user_id: str, phrases: List[Tuple[str, ...]], limit: int, offset: int
+) -> List[Dict[str, Any]]:
+    """Return one page of the owner's best-ranked title and message matches.
+
+    Each index is walked newest rowid first and stops after ``RANKED_CANDIDATES`` owned
+    matches, so a common word costs about the same as a rare one; that window is ranked.
+    A message shared copy-on-write is stored once under its source session and is
+    reported once for the source and once for every branch whose branch key, and every
+    intermediate branch key, is at or after it.
+    """
+    expression = match_expression(phrases)
+    rows = conn.execute(
+        """WITH RECURSIVE session_hits AS (
+               SELECT f.rowid AS hit, f.terms
+               FROM chat_session_search f CROSS JOIN chat_sessions s ON s.rowid = f.rowid
+               WHERE chat_session_search MATCH ? AND s.user_id = ?
+               ORDER BY f.rowid DESC LIMIT ?
+           ),
+           message_hits AS (
+               SELECT f.rowid AS hit, f.terms
+               FROM chat_message_search f CROSS JOIN chat_messages m ON m.rowid = f.rowid
+               WHERE chat_message_search MATCH ? AND m.user_id = ?
+               ORDER BY f.rowid DESC LIMIT ?
+           ),
+           visible(hit, session_id) AS (
+               SELECT h.hit, m.session_id FROM message_hits h JOIN chat_messages m ON m.rowid = h.hit
+               UNION ALL
+               SELECT v.hit, c.session_id
+               FROM visible v
+               JOIN chat_messages m ON m.rowid = v.hit
+               JOIN chat_sessions c ON c.user_id = m.user_id AND c.parent_session_id = v.session_id
+               WHERE c.branch_created_at > m.created_at
+                  OR (c.branch_created_at = m.created_at AND c.branch_message_id >= m.message_id)
+           )
+           SELECT 'session' AS kind, s.session_id, s.session_name, s.group_id,
+                  NULL AS message_id, NULL AS role, s.session_name AS text,
+                  s.updated_at AS created_at, h.terms
+           FROM session_hits h JOIN chat_sessions s ON s.rowid = h.hit
+           UNION ALL
+           SELECT 'message', v.session_id, s.session_name, s.group_id,
+                  m.message_id, m.role, m.content, m.created_at, h.terms
+           FROM visible v
+           JOIN message_hits h ON h.hit = v.hit
+           JOIN chat_messages m ON m.rowid = v.hit
+           JOIN chat_sessions s ON s.session_id = v.session_id AND s.user_id = m.user_id""",
+        (expression, user_id, RANKED_CANDIDATES, expression, user_id, RANKED_CANDIDATES),
+    ).fetchall()
+    hits = [dict(row) for row in rows]
+    _rank(hits, phrases)
+    hits.sort(key=lambda hit: hit["created_at"] or "", reverse=True)
+    hits.sort(key=lambda hit: hit["score"], reverse=True)
+    return hits[offset:offset + limit]
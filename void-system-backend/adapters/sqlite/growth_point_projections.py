@@ -0,0 +1,195 @@
+"""Growth-point ledger writes with atomically maintained balance and daily projections."""
+from __future__ import annotations
+
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+# Ledger rows use ISO timestamps or SQLite CURRENT_TIMESTAMP; both start with YYYY-MM-DD.
+_DAY_EXPRESSION = "substr(created_at, 1, 10)"
+
+
+def create_growth_point_projection_tables(conn: sqlite3.Connection) -> None:
+    """Create the per-owner balance and per-owner daily rollup tables."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS growth_point_balances (
+               user_id TEXT PRIMARY KEY,
+               balance INTEGER NOT NULL DEFAULT 0,
+               total_income INTEGER NOT NULL DEFAULT 0,
+               total_expense INTEGER NOT NULL DEFAULT 0,
+               entry_count INTEGER NOT NULL DEFAULT 0,
+               updated_at TEXT NOT NULL,
+               FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS growth_point_daily_totals (
+               user_id TEXT NOT NULL,
+               day TEXT NOT NULL,
+               income INTEGER NOT NULL DEFAULT 0,
+               expense INTEGER NOT NULL DEFAULT 0,
+               entry_count INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (user_id, day),
+               FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+           )"""
+    )
+
+
+def append_growth_point_entry(
+    conn: sqlite3.Connection,
+    user_id: str,
+    amount: int,
+    entry_type: str,
+    source: Optional[str],
+    *,
+    created_at: str,
+) -> str:
+    """Insert one ledger row and fold it into the owner's projections.
+
+    Inputs: an open write transaction, a signed integer amount, the ledger type and
+    source labels, and the timestamp stored on the ledger row. Returns the new record id.
+    Called by every runtime ledger writer, currently Step reward settlement. The caller
+    owns commit and rollback, so the ledger and its projections change together or not
+    at all. Direct ledger inserts that bypass this function are reported by
+    ``find_growth_point_projection_drift``.
+    """
+    record_id = str(uuid.uuid4())
+    conn.execute(
+        """INSERT INTO growth_point_ledger (record_id, user_id, amount, type, source, created_at)
+           VALUES (?, ?, ?, ?, ?, ?)""",
+        (record_id, user_id, amount, entry_type, source, created_at),
+    )
+    income = amount if amount > 0 else 0
+    expense = -amount if amount < 0 else 0
+    conn.execute(
+        """INSERT INTO growth_point_balances
+           (user_id, balance, total_income, total_expense, entry_count, updated_at)
+           VALUES (?, ?, ?, ?, 1, ?)
+           ON CONFLICT(user_id) DO UPDATE SET
+               balance = balance + excluded.balance,
+               total_income = total_income + excluded.total_income,
+               total_expense = total_expense + excluded.total_expense,
+               entry_count = entry_count + 1,
+               updated_at = excluded.updated_at""",
+        (user_id, amount, income, expense, created_at),
+    )
+    conn.execute(
+        """INSERT INTO growth_point_daily_totals (user_id, day, income, expense, entry_count)
+           VALUES (?, ?, ?, ?, 1)
+           ON CONFLICT(user_id, day) DO UPDATE SET
+               income = income + excluded.income,
+               expense = expense + excluded.expense,
+               entry_count = entry_count + 1""",
+        (user_id, created_at[:10], income, expense),
+    )
+    return record_id
+
+
+def rebuild_growth_point_projections(
+    conn: sqlite3.Connection, user_id: Optional[str] = None
+) -> int:
+    """Replace projections with values aggregated from the ledger.
+
+    Inputs: an open write transaction and one owner or ``None`` for all owners. Returns
+    the number of balance rows written. Called by migration 40 for backfill and by the
+    repair path of the consistency checker.
+    """
+    owner_clause, params = ("WHERE user_id = ?", (user_id,)) if user_id else ("", ())
+    conn.execute(f"DELETE FROM growth_point_balances {owner_clause}", params)
+    conn.execute(f"DELETE FROM growth_point_daily_totals {owner_clause}", params)
+    conn.execute(
+        f"""INSERT INTO growth_point_daily_totals (user_id, day, income, expense, entry_count)
+           SELECT user_id, {_DAY_EXPRESSION},
+                  COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0),
+                  COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0),
+                  COUNT(*)
+           FROM growth_point_ledger {owner_clause}
+           GROUP BY user_id, {_DAY_EXPRESSION}""",
+        params,
+    )
+    cursor = conn.execute(
+        f"""INSERT INTO growth_point_balances
+           (user_id, balance, total_income, total_expense, entry_count, updated_at)
+           SELECT user_id, SUM(income) - SUM(expense), SUM(income), SUM(expense),
+                  SUM(entry_count), ?
+           FROM growth_point_daily_totals {owner_clause}
+           GROUP BY user_id""",
+        (datetime.now(timezone.utc).isoformat(), *params),
+    )
+    return cursor.rowcount
+
+
+def find_growth_point_projection_drift(
+    conn: sqlite3.Connection, user_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Compare stored projections with a full ledger aggregation.
+
+    Output: one item per mismatched owner balance or owner day, naming the projection,
+    its key, and the stored and expected values. An empty list means the projections
+    are consistent. Read-only; used by the repository checker and its CLI tool.
+    """
+    owner_filter = "AND user_id = ?" if user_id else ""
+    params = (user_id,) if user_id else ()
+    expected_days = {
+        (row["user_id"], row["day"]): (int(row["income"]), int(row["expense"]), int(row["entry_count"]))
+        for row in conn.execute(
+            f"""SELECT user_id, {_DAY_EXPRESSION} AS day,
+                       COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0) AS income,
+                       COALESCE(SUM(CASE WHEN amount < 0 THEN -amount ELSE 0 END), 0) AS expense,
+                       COUNT(*) AS entry_count
+                FROM growth_point_ledger WHERE 1 = 1 {owner_filter}
+                GROUP BY user_id, {_DAY_EXPRESSION}""",
+            params,
+        ).fetchall()
+    }
+    stored_days = {
+        (row["user_id"], row["day"]): (int(row["income"]), int(row["expense"]), int(row["entry_count"]))
+        for row in conn.execute(
+            f"""SELECT user_id, day, income, expense, entry_count
+                FROM growth_point_daily_totals WHERE 1 = 1 {owner_filter}""",
+            params,
+        ).fetchall()
+    }
+    expected_balances: Dict[str, tuple[int, int, int, int]] = {}
+    for (owner_id, _day), (income, expense, count) in expected_days.items():
+        balance, total_income, total_expense, entries = expected_balances.get(owner_id, (0, 0, 0, 0))
+        expected_balances[owner_id] = (
+            balance + income - expense, total_income + income, total_expense + expense, entries + count
+        )
+    stored_balances = {
+        row["user_id"]: (
+            int(row["balance"]), int(row["total_income"]), int(row["total_expense"]), int(row["entry_count"])
+        )
+        for row in conn.execute(
+            f"""SELECT user_id, balance, total_income, total_expense, entry_count
+                FROM growth_point_balances WHERE 1 = 1 {owner_filter}""",
+            params,
+        ).fetchall()
+    }
+    drift: List[Dict[str, Any]] = []
+    zero_balance = (0, 0, 0, 0)
+    for owner_id in sorted(set(expected_balances) | set(stored_balances)):
+        expected = expected_balances.get(owner_id, zero_balance)
+        stored = stored_balances.get(owner_id, zero_balance)
+        if expected != stored:
+            drift.append({
+                "projection": "balance",
+                "user_id": owner_id,
+                "stored": dict(zip(("balance", "total_income", "total_expense", "entry_count"), stored)),
+                "expected": dict(zip(("balance", "total_income", "total_expense", "entry_count"), expected)),
+            })
+    zero_day = (0, 0, 0)
+    for key in sorted(set(expected_days) | set(stored_days)):
+        expected_day = expected_days.get(key, zero_day)
+        stored_day = stored_days.get(key, zero_day)
+        if expected_day != stored_day:
+            drift.append({
+                "projection": "daily",
+                "user_id": key[0],
+                "day": key[1],
+                "stored": dict(zip(("income", "expense", "entry_count"), stored_day)),
+                "expected": dict(zip(("income", "expense", "entry_count"), expected_day)),
+            })
+    return drift
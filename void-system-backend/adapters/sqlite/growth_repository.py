@@ -6,6 +6,10 @@ from datetime import datetime
 from typing import Any, Dict, List, Mapping, Optional
 
 from adapters.sqlite.connection import ConnectionFactory
+from adapters.sqlite.growth_point_projections import (
+    find_growth_point_projection_drift,
+    rebuild_growth_point_projections,
+)
 from core.growth_contracts import GrowthProfileRepository
 
 
@@ -16,8 +20,10 @@ class SQLiteGrowthProfileRepository(GrowthProfileRepository):
     def get_balance(self, user_id: str) -> int:
         conn = self._connection_factory()
         try:
-            row = conn.execute("SELECT COALESCE(SUM(amount), 0) FROM growth_point_ledger WHERE user_id = ?", (user_id,)).fetchone()
-            return int(row[0] or 0)
+            row = conn.execute(
+                "SELECT balance FROM growth_point_balances WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            return int(row[0] or 0) if row is not None else 0
         finally:
             conn.close()
 
@@ -32,29 +38,56 @@ class SQLiteGrowthProfileRepository(GrowthProfileRepository):
             conn.close()
 
     def growth_point_summary(self, user_id: str) -> Dict[str, Any]:
+        """Read lifetime totals from the balance projection and weekly totals from daily buckets."""
         conn = self._connection_factory()
         try:
-            row = conn.execute(
-                """SELECT
-                       COALESCE(SUM(CASE WHEN amount > 0 THEN amount ELSE 0 END), 0) AS total_income,
-                       COALESCE(ABS(SUM(CASE WHEN amount < 0 THEN amount ELSE 0 END)), 0) AS total_expense,
-                       COALESCE(SUM(CASE WHEN amount > 0 AND created_at >= date('now', '-7 days') THEN amount ELSE 0 END), 0) AS weekly_income,
-                       COALESCE(ABS(SUM(CASE WHEN amount < 0 AND created_at >= date('now', '-7 days') THEN amount ELSE 0 END)), 0) AS weekly_expense
-                   FROM growth_point_ledger WHERE user_id = ?""",
+            totals = conn.execute(
+                "SELECT total_income, total_expense FROM growth_point_balances WHERE user_id = ?",
                 (user_id,),
             ).fetchone()
-            total_income = int(row["total_income"] or 0)
-            total_expense = int(row["total_expense"] or 0)
+            weekly = conn.execute(
+                """SELECT COALESCE(SUM(income), 0) AS weekly_income,
+                          COALESCE(SUM(expense), 0) AS weekly_expense
+                   FROM growth_point_daily_totals
+                   WHERE user_id = ? AND day >= date('now', '-7 days')""",
+                (user_id,),
+            ).fetchone()
+            total_income = int(totals["total_income"] or 0) if totals is not None else 0
+            total_expense = int(totals["total_expense"] or 0) if totals is not None else 0
             return {
                 "total_income": total_income,
                 "total_expense": total_expense,
-                "weekly_income": int(row["weekly_income"] or 0),
-                "weekly_expense": int(row["weekly_expense"] or 0),
+                "weekly_income": int(weekly["weekly_income"] or 0),
+                "weekly_expense": int(weekly["weekly_expense"] or 0),
                 "net_income": total_income - total_expense,
             }
         finally:
             conn.close()
 
+    def check_growth_point_projections(
+        self, user_id: Optional[str] = None, *, repair: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Compare balance and daily projections with the ledger, optionally rebuilding them.
+
+        Inputs: one owner or ``None`` for every owner; ``repair`` rebuilds drifted scopes
+        from the ledger in the same exclusive transaction. Returns the drift found before
+        any repair, so an empty list means the projections were consistent. Called by
+        ``tools/check_growth_point_projections.py`` and tests.
+        """
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            drift = find_growth_point_projection_drift(conn, user_id)
+            if repair and drift:
+                rebuild_growth_point_projections(conn, user_id)
+            conn.commit()
+            return drift
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def list_attributes(self, user_id: str) -> List[Dict[str, Any]]:
         conn = self._connection_factory()
         try:
@@ -133,7 +133,7 @@ class SQLiteIdentityRepository:
             )
             in_progress_tasks = cursor.fetchone()[0]
             cursor.execute(
-                "SELECT COALESCE(SUM(amount), 0) FROM growth_point_ledger WHERE user_id = ?",
+                "SELECT COALESCE((SELECT balance FROM growth_point_balances WHERE user_id = ?), 0)",
                 (user_id,),
             )
             growth_points = int(cursor.fetchone()[0] or 0)
@@ -0,0 +1,288 @@
+"""Content-addressed SQLite cache of parsed chunks and their embeddings.
+
+A source whose exact bytes were already ingested under the same index version,
+file type, and embedding model reuses these chunks instead of being parsed,
+captioned, and embedded again. Chunk bodies are stored as ciphertext; vectors are
+stored as float32 blobs, the same precision Chroma keeps. Each entry records the
+documents indexed from it and is deleted once the last of them is purged or reindexed
+from another entry, so private content does not outlive its documents.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
+
+
+ConnectionFactory = Callable[[], sqlite3.Connection]
+
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_BATCH_SIZE = 64
+# An entry still being written after this long belongs to a worker that died.
+STALE_WRITE_SECONDS = 60 * 60
+
+
+def ingestion_cache_key(*, content_fingerprint: str, index_version: str, file_type: str, embedding_identity: str) -> str:
+    """Return the cache key for every input that shapes a source's chunks and vectors."""
+    encoded = json.dumps(
+        [content_fingerprint, index_version, file_type.lower(), embedding_identity], ensure_ascii=False
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def create_knowledge_ingestion_cache_tables(conn: sqlite3.Connection) -> None:
+    """Create the cache entry, chunk, and document reference tables with their indexes."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS knowledge_ingestion_cache (
+               cache_key TEXT PRIMARY KEY,
+               complete INTEGER NOT NULL DEFAULT 0,
+               chunk_count INTEGER NOT NULL DEFAULT 0,
+               content_preview TEXT NOT NULL DEFAULT '',
+               created_at TEXT NOT NULL,
+               last_used_at TEXT NOT NULL
+           )"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS knowledge_ingestion_cache_chunks (
+               cache_key TEXT NOT NULL,
+               chunk_index INTEGER NOT NULL,
+               chunk_text TEXT NOT NULL,
+               embedding BLOB NOT NULL,
+               PRIMARY KEY (cache_key, chunk_index),
+               FOREIGN KEY (cache_key) REFERENCES knowledge_ingestion_cache(cache_key) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_knowledge_ingestion_cache_recency
+           ON knowledge_ingestion_cache(complete, last_used_at)"""
+    )
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS knowledge_ingestion_cache_refs (
+               owner_id TEXT NOT NULL,
+               document_id TEXT NOT NULL,
+               cache_key TEXT NOT NULL,
+               PRIMARY KEY (owner_id, document_id),
+               FOREIGN KEY (cache_key) REFERENCES knowledge_ingestion_cache(cache_key) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_knowledge_ingestion_cache_refs_key
+           ON knowledge_ingestion_cache_refs(cache_key)"""
+    )
+
+
+class SQLiteKnowledgeIngestionCache:
+    """Share one source's parse and embedding results between documents and owners.
+
+    Inputs:
+        connection_factory: Opens application-configured SQLite connections.
+        cipher: Encrypts chunk bodies and previews at rest.
+        max_entries: Least recently used complete entries beyond this are deleted.
+    Outputs:
+        Complete entries and their chunk batches in index order.
+    Called by:
+        PersonalKnowledgeDocumentManager before parsing and while indexing a source.
+    Side effects:
+        A writer claims a key with begin(), appends batches, then marks it complete.
+        reference() and release() track which documents were indexed from an entry;
+        an entry no document references any more is deleted with its chunks.
+    Failure:
+        Propagates SQLite failures. Incomplete entries are never read, and a claim
+        left by a crashed worker expires after STALE_WRITE_SECONDS.
+    """
+
+    def __init__(self, connection_factory: ConnectionFactory, *, cipher: KnowledgeSourceCipher,
+                 max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._connection_factory = connection_factory
+        self._cipher = cipher
+        self._max_entries = max(1, int(max_entries))
+
+    def get(self, cache_key: str) -> Optional[Dict[str, object]]:
+        """Return a complete entry's chunk count and preview, refreshing its recency."""
+        conn = self._connection_factory()
+        try:
+            row = conn.execute(
+                """UPDATE knowledge_ingestion_cache SET last_used_at = ?
+                   WHERE cache_key = ? AND complete = 1
+                   RETURNING chunk_count, content_preview""",
+                (_now(), cache_key),
+            ).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        preview = self._cipher.decrypt_text(row["content_preview"]) if row["content_preview"] else ""
+        return {"chunk_count": int(row["chunk_count"]), "content_preview": preview}
+
+    def iter_batches(self, cache_key: str, *, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[Tuple[List[str], List[List[float]]]]:
+        """Yield (texts, embeddings) batches in chunk order, one bounded page at a time."""
+        after = -1
+        while True:
+            conn = self._connection_factory()
+            try:
+                rows = conn.execute(
+                    """SELECT chunk_index, chunk_text, embedding FROM knowledge_ingestion_cache_chunks
+                       WHERE cache_key = ? AND chunk_index > ? ORDER BY chunk_index LIMIT ?""",
+                    (cache_key, after, batch_size),
+                ).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            after = int(rows[-1]["chunk_index"])
+            yield (
+                [self._cipher.decrypt_text(row["chunk_text"]) for row in rows],
+                [array("f", bytes(row["embedding"])).tolist() for row in rows],
+            )
+
+    def begin(self, cache_key: str) -> bool:
+        """Claim an absent key for writing; False when another writer or entry holds it."""
+        now = datetime.now(timezone.utc)
+        stale_before = (now - timedelta(seconds=STALE_WRITE_SECONDS)).isoformat()
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM knowledge_ingestion_cache WHERE cache_key = ? AND complete = 0 AND created_at < ?",
+                (cache_key, stale_before),
+            )
+            claimed = conn.execute(
+                """INSERT OR IGNORE INTO knowledge_ingestion_cache (cache_key, created_at, last_used_at)
+                   VALUES (?, ?, ?)""",
+                (cache_key, now.isoformat(), now.isoformat()),
+            ).rowcount
+            conn.commit()
+            return bool(claimed)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def add_chunks(self, cache_key: str, start_index: int, texts: Sequence[str], embeddings: Sequence[Sequence[float]]) -> None:
+        """Append one written batch to a claimed, still incomplete entry."""
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                """INSERT INTO knowledge_ingestion_cache_chunks (cache_key, chunk_index, chunk_text, embedding)
+                   SELECT ?, ?, ?, ? WHERE EXISTS (
+                       SELECT 1 FROM knowledge_ingestion_cache WHERE cache_key = ? AND complete = 0)""",
+                [
+                    (cache_key, index, self._cipher.encrypt_text(text), array("f", embedding).tobytes(), cache_key)
+                    for index, (text, embedding) in enumerate(zip(texts, embeddings), start=start_index)
+                ],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def complete(self, cache_key: str, *, chunk_count: int, content_preview: str) -> None:
+        """Publish a fully written entry and trim the least recently used ones."""
+        now = _now()
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """UPDATE knowledge_ingestion_cache
+                   SET complete = 1, chunk_count = ?, content_preview = ?, last_used_at = ?
+                   WHERE cache_key = ? AND complete = 0""",
+                (chunk_count, self._cipher.encrypt_text(content_preview) if content_preview else "", now, cache_key),
+            )
+            conn.execute(
+                """DELETE FROM knowledge_ingestion_cache WHERE complete = 1 AND cache_key NOT IN (
+                       SELECT cache_key FROM knowledge_ingestion_cache WHERE complete = 1
+                       ORDER BY last_used_at DESC LIMIT ?)""",
+                (self._max_entries,),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def reference(self, cache_key: str, *, owner_id: str, document_id: str) -> None:
+        """Record that a document's index was built from a complete entry.
+
+        A document references one entry; the entry it referenced before is deleted
+        when no other document still references it.
+        """
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = _referenced_key(conn, owner_id, document_id)
+            conn.execute(
+                """INSERT OR REPLACE INTO knowledge_ingestion_cache_refs (owner_id, document_id, cache_key)
+                   SELECT ?, ?, cache_key FROM knowledge_ingestion_cache WHERE cache_key = ? AND complete = 1""",
+                (owner_id, document_id, cache_key),
+            )
+            if previous is not None and previous != cache_key:
+                _delete_unreferenced(conn, previous)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def release(self, *, owner_id: str, document_id: str) -> None:
+        """Forget a purged document and delete its entry if no other document uses it."""
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            previous = _referenced_key(conn, owner_id, document_id)
+            if previous is not None:
+                conn.execute(
+                    "DELETE FROM knowledge_ingestion_cache_refs WHERE owner_id = ? AND document_id = ?",
+                    (owner_id, document_id),
+                )
+                _delete_unreferenced(conn, previous)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def discard(self, cache_key: str) -> None:
+        """Drop an incomplete entry after its writer failed or was cancelled."""
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM knowledge_ingestion_cache WHERE cache_key = ? AND complete = 0", (cache_key,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def _referenced_key(conn: sqlite3.Connection, owner_id: str, document_id: str) -> Optional[str]:
+    row = conn.execute(
+        "SELECT cache_key FROM knowledge_ingestion_cache_refs WHERE owner_id = ? AND document_id = ?",
+        (owner_id, document_id),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _delete_unreferenced(conn: sqlite3.Connection, cache_key: str) -> None:
+    conn.execute(
+        """DELETE FROM knowledge_ingestion_cache WHERE cache_key = ? AND complete = 1
+           AND NOT EXISTS (SELECT 1 FROM knowledge_ingestion_cache_refs WHERE cache_key = ?)""",
+        (cache_key, cache_key),
+    )
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
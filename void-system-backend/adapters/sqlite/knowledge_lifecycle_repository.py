@@ -184,6 +184,20 @@ class SQLiteKnowledgeLifecycleRepository:
         finally:
             connection.close()
 
+    def latest_source_version(self, *, document_id: str, owner_id: str) -> Optional[Dict[str, Any]]:
+        """Return the fingerprint and byte size recorded for one owned document's newest version."""
+        connection = self._connection_factory()
+        try:
+            row = connection.execute(
+                """SELECT content_fingerprint, source_size FROM knowledge_document_versions
+                   WHERE document_id = ? AND owner_id = ?
+                   ORDER BY created_at DESC LIMIT 1""",
+                (document_id, owner_id),
+            ).fetchone()
+            return dict(row) if row else None
+        finally:
+            connection.close()
+
     def recover_interrupted_jobs(self) -> int:
         """Requeue abandoned work and honour durable cancellations during startup.
 
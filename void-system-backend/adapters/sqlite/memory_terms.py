@@ -0,0 +1,70 @@
+"""Lexical postings for relevance-ranked personal memory retrieval."""
+from __future__ import annotations
+
+from collections import Counter
+import re
+import sqlite3
+from typing import Dict, Optional
+
+
+# Memory titles and content are mostly Chinese with embedded Latin words, so Latin and
+# digit runs become whole-word terms while CJK runs become overlapping bigrams.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+MAX_TERMS_PER_TEXT = 96
+
+
+def text_terms(text: str, *, limit: int = MAX_TERMS_PER_TEXT) -> Dict[str, int]:
+    """Return term frequencies for one text, keeping the ``limit`` most frequent terms."""
+    counts: Counter[str] = Counter()
+    for run in _TOKEN_PATTERN.findall(str(text or "").lower()):
+        if run.isascii():
+            if len(run) > 1:
+                counts[run[:64]] += 1
+        elif len(run) == 1:
+            counts[run] += 1
+        else:
+            counts.update(run[index:index + 2] for index in range(len(run) - 1))
+    return dict(counts.most_common(limit))
+
+
+def create_memory_term_table(conn: sqlite3.Connection) -> None:
+    """Create owner-partitioned postings keyed for term lookups within one owner."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS personal_memory_terms (
+               owner_id TEXT NOT NULL,
+               term TEXT NOT NULL,
+               memory_id TEXT NOT NULL,
+               frequency INTEGER NOT NULL,
+               PRIMARY KEY (owner_id, term, memory_id),
+               FOREIGN KEY (memory_id) REFERENCES personal_memories(memory_id) ON DELETE CASCADE
+           ) WITHOUT ROWID"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_personal_memory_terms_memory
+           ON personal_memory_terms(memory_id)"""
+    )
+
+
+def index_memory_terms(
+    conn: sqlite3.Connection, owner_id: str, memory_id: str, title: str, content: str
+) -> None:
+    """Replace one memory's postings inside the caller's write transaction."""
+    conn.execute("DELETE FROM personal_memory_terms WHERE memory_id = ?", (memory_id,))
+    terms = text_terms(f"{title}\n{content}")
+    conn.executemany(
+        """INSERT INTO personal_memory_terms (owner_id, term, memory_id, frequency)
+           VALUES (?, ?, ?, ?)""",
+        [(owner_id, term, memory_id, frequency) for term, frequency in terms.items()],
+    )
+
+
+def rebuild_memory_terms(conn: sqlite3.Connection, owner_id: Optional[str] = None) -> int:
+    """Re-index every memory, or one owner's memories, and return the memories indexed."""
+    owner_clause, params = ("WHERE owner_id = ?", (owner_id,)) if owner_id else ("", ())
+    conn.execute(f"DELETE FROM personal_memory_terms {owner_clause}", params)
+    rows = conn.execute(
+        f"SELECT memory_id, owner_id, title, content FROM personal_memories {owner_clause}", params
+    ).fetchall()
+    for row in rows:
+        index_memory_terms(conn, row["owner_id"], row["memory_id"], row["title"], row["content"])
+    return len(rows)
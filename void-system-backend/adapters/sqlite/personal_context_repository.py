@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import json
+import math
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, Mapping, Optional, Sequence
 
 from adapters.sqlite.connection import ConnectionFactory
+from adapters.sqlite.memory_terms import index_memory_terms, text_terms
 from core.personal_context_contracts import PersonalContextRepository
 
 
@@ -147,6 +149,9 @@ class SQLitePersonalContextRepository(PersonalContextRepository):
                     now,
                 ),
             )
+            index_memory_terms(
+                conn, owner_id, memory_id, str(values["title"]), str(values["content"])
+            )
             conn.commit()
             return _decode(
                 conn.execute(
@@ -190,6 +195,91 @@ class SQLitePersonalContextRepository(PersonalContextRepository):
         finally:
             conn.close()
 
+    def search_context_memories(
+        self, owner_id: str, query: Optional[str], *, limit: int
+    ) -> Sequence[Dict[str, Any]]:
+        """Return the owner's context-eligible memories ranked by relevance to ``query``.
+
+        Inputs: the owner, the current message or request text (may be empty), and the
+        number of memories the context section can hold. Output: at most ``limit``
+        decoded memories, each with a ``relevance`` score. Memories sharing terms with
+        the query rank first by saturated term frequency weighted by inverse document
+        frequency; the rest follow the kind, confidence and recency priority that was
+        used before. Candidate generation, scoring, and the cut-off all run in SQL, so
+        only ``limit`` rows leave the database. Called by PersonalContext.build_context.
+        """
+        terms = text_terms(query or "", limit=32)
+        conn = self._connection_factory()
+        try:
+            weights: list[tuple[str, float]] = []
+            if terms:
+                placeholders = ", ".join("?" for _ in terms)
+                total = conn.execute(
+                    "SELECT COUNT(*) FROM personal_memories WHERE owner_id = ?", (owner_id,)
+                ).fetchone()[0]
+                document_frequency = {
+                    row["term"]: int(row["df"])
+                    for row in conn.execute(
+                        f"""SELECT term, COUNT(*) AS df FROM personal_memory_terms
+                            WHERE owner_id = ? AND term IN ({placeholders}) GROUP BY term""",
+                        (owner_id, *terms),
+                    ).fetchall()
+                }
+                weights = [
+                    (term, math.log(1 + total / df) * min(count, 3))
+                    for term, count in terms.items()
+                    if (df := document_frequency.get(term))
+                ]
+            if weights:
+                scores = (
+                    "WITH query_terms(term, weight) AS (VALUES "
+                    + ", ".join("(?, ?)" for _ in weights)
+                    + """), scores AS (
+                        SELECT p.memory_id,
+                               SUM(q.weight * p.frequency / (p.frequency + 1.0)) AS relevance
+                        FROM query_terms q
+                        JOIN personal_memory_terms p ON p.owner_id = ? AND p.term = q.term
+                        GROUP BY p.memory_id
+                    ) """
+                )
+                score_params: list[Any] = [value for pair in weights for value in pair]
+                score_params.append(owner_id)
+                relevance = "COALESCE(s.relevance, 0)"
+                join = "LEFT JOIN scores s ON s.memory_id = m.memory_id"
+            else:
+                scores, score_params, relevance, join = "", [], "0", ""
+            rows = conn.execute(
+                f"""{scores}SELECT m.*, {relevance} AS relevance
+                    FROM personal_memories m {join}
+                    WHERE m.owner_id = ? AND m.status = 'active' AND m.use_in_context = 1
+                      AND m.review_status IN ('confirmed', 'corrected')
+                      AND (m.expires_at IS NULL OR m.expires_at = '' OR julianday(m.expires_at) > julianday(?))
+                    ORDER BY relevance DESC,
+                             CASE m.memory_type WHEN 'fact' THEN 0 WHEN 'preference' THEN 1
+                                  WHEN 'episode' THEN 2 WHEN 'inference' THEN 3 ELSE 4 END,
+                             m.confidence DESC, m.updated_at DESC
+                    LIMIT ?""",
+                (*score_params, owner_id, _now(), limit),
+            ).fetchall()
+            return [_decode(row) or {} for row in rows]
+        finally:
+            conn.close()
+
+    def count_profile_memories(self, owner_id: str) -> int:
+        """Count active, reviewed context memories the owner opted into profile use."""
+        conn = self._connection_factory()
+        try:
+            return int(conn.execute(
+                """SELECT COUNT(*) FROM personal_memories
+                   WHERE owner_id = ? AND status = 'active' AND use_in_context = 1
+                     AND review_status IN ('confirmed', 'corrected')
+                     AND json_valid(metadata)
+                     AND json_type(metadata, '$.contribute_to_profile') = 'true'""",
+                (owner_id,),
+            ).fetchone()[0])
+        finally:
+            conn.close()
+
     def get_memory(self, owner_id: str, memory_id: str) -> Optional[Dict[str, Any]]:
         conn = self._connection_factory()
         try:
@@ -245,6 +335,12 @@ class SQLitePersonalContextRepository(PersonalContextRepository):
                 "WHERE memory_id = ? AND owner_id = ?",
                 params,
             )
+            if cursor.rowcount and ("title" in values or "content" in values):
+                row = conn.execute(
+                    "SELECT title, content FROM personal_memories WHERE memory_id = ?",
+                    (memory_id,),
+                ).fetchone()
+                index_memory_terms(conn, owner_id, memory_id, row["title"], row["content"])
             conn.commit()
             return cursor.rowcount > 0
         finally:
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Any, Callable, Dict, Mapping, Optional, Sequence
 
 from adapters.sqlite.object_json import decode_object, encode_object
+from adapters.sqlite.task_behavior_summary import record_behavior
 
 
 ConnectionFactory = Callable[[], sqlite3.Connection]
@@ -233,6 +234,18 @@ class SQLitePlanDraftRepository:
                     conn.execute("INSERT INTO task_step_dependencies (run_id, step_id, depends_on_step_id) VALUES (?, ?, ?)", (run_id, step_id, dependency_id))
             for event_type, payload in (("run.created", {"step_count": len(steps), "source": "plan_draft"}), ("run.started", {"source": "plan_draft", "initial_ready_steps": sum(1 for _step_id, _key, step, _position in normalized_steps if not step.get("depends_on"))})):
                 conn.execute("INSERT INTO task_events (event_id, run_id, user_id, event_type, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)", (str(uuid.uuid4()), run_id, user_id, event_type, encode_object(payload), now))
+            record_behavior(
+                conn,
+                user_id,
+                counts={
+                    "goal_count": 1,
+                    "run_count": 1,
+                    "assisted_run_count": 1 if run.get("mode") == "assisted" else 0,
+                    "step_count": len(steps),
+                },
+                observed=("runs", "steps") if steps else ("runs",),
+                at=now,
+            )
             conn.execute(
                 """UPDATE plan_drafts SET status = 'published', publication_key = ?, published_goal_id = ?, published_run_id = ?, published_at = ?, updated_at = ?, version = version + 1
                    WHERE draft_id = ? AND user_id = ? AND status = 'ready'""",
@@ -5,7 +5,7 @@ import json
 import sqlite3
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import Any, Callable, Dict, Mapping, Optional
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
 
 from adapters.sqlite.plan_draft_repository import SQLitePlanDraftRepository
 
@@ -27,13 +27,14 @@ def _decode(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
     if row is None:
         return None
     item = dict(row)
-    for field, fallback in (("advisor_prefs", {}), ("result", None)):
+    for field, fallback in (("advisor_prefs", {}), ("result", None), ("partial_steps", [])):
         try:
             item[field] = json.loads(item[field]) if item.get(field) is not None else fallback
         except (TypeError, json.JSONDecodeError):
             item[field] = fallback
     item["attempt_count"] = int(item.get("attempt_count") or 0)
     item["cancel_requested"] = bool(item.get("cancel_requested", False))
+    item["regenerate"] = bool(item.get("regenerate", False))
     return item
 
 
@@ -66,11 +67,11 @@ class SQLitePlanGenerationRepository:
             conn.execute(
                 """INSERT INTO plan_generation_jobs
                    (generation_id, user_id, topic, execution_mode, max_steps, advisor_prefs,
-                    status, stage, progress, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?, 'queued', 'queued', 0, ?, ?)""",
+                    regenerate, status, stage, progress, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', 'queued', 0, ?, ?)""",
                 (generation_id, user_id, values["topic"], values["execution_mode"],
                  values["max_steps"], json.dumps(values.get("advisor_prefs") or {}, ensure_ascii=False),
-                 now, now),
+                 int(bool(values.get("regenerate"))), now, now),
             )
             conn.commit()
             return self.get(user_id, generation_id) or {}
@@ -127,7 +128,7 @@ class SQLitePlanGenerationRepository:
                    WHERE status = 'generating' AND cancel_requested = 1""", (now, now))
             requeued = conn.execute(
                 """UPDATE plan_generation_jobs
-                   SET status = 'queued', stage = 'queued', progress = 0,
+                   SET status = 'queued', stage = 'queued', progress = 0, partial_steps = NULL,
                        worker_id = NULL, lease_token = NULL, lease_expires_at = NULL,
                        heartbeat_at = NULL, updated_at = ?
                    WHERE status = 'generating' AND cancel_requested = 0""", (now,))
@@ -169,7 +170,7 @@ class SQLitePlanGenerationRepository:
             generation_id = str(row["generation_id"])
             updated = conn.execute(
                 """UPDATE plan_generation_jobs
-                   SET status = 'generating', stage = 'preparing_context', progress = 10,
+                   SET status = 'generating', stage = 'preparing_context', progress = 10, partial_steps = NULL,
                        started_at = COALESCE(started_at, ?), worker_id = ?, lease_token = ?,
                        lease_expires_at = ?, heartbeat_at = ?, attempt_count = attempt_count + 1,
                        updated_at = ?
@@ -222,15 +223,26 @@ class SQLitePlanGenerationRepository:
             conn.close()
 
     def update_progress(self, generation_id: str, worker_id: str, lease_token: str,
-                        stage: str, progress: int) -> bool:
-        """Write a progress checkpoint only while the worker still owns its lease."""
+                        stage: str, progress: int, *,
+                        partial_steps: Optional[Sequence[Mapping[str, Any]]] = None) -> bool:
+        """Write a progress checkpoint only while the worker still owns its lease.
+
+        ``partial_steps`` replaces the streamed step previews of the current attempt; None
+        keeps them. Previews are display-only and never become a draft.
+        """
         conn, now = self._connection_factory(), _now()
+        encoded = (
+            json.dumps([dict(step) for step in partial_steps], ensure_ascii=False)
+            if partial_steps is not None else None
+        )
         try:
             changed = conn.execute(
-                """UPDATE plan_generation_jobs SET stage = ?, progress = ?, updated_at = ?
+                """UPDATE plan_generation_jobs
+                   SET stage = ?, progress = ?, partial_steps = COALESCE(?, partial_steps), updated_at = ?
                    WHERE generation_id = ? AND status = 'generating' AND cancel_requested = 0
                      AND worker_id = ? AND lease_token = ? AND lease_expires_at > ?""",
-                (stage, max(0, min(99, int(progress))), now, generation_id, worker_id, lease_token, now),
+                (stage, max(0, min(99, int(progress))), encoded, now, generation_id, worker_id,
+                 lease_token, now),
             )
             conn.commit()
             return bool(changed.rowcount)
@@ -296,7 +308,7 @@ class SQLitePlanGenerationRepository:
                 changed = conn.execute(
                     """UPDATE plan_generation_jobs
                        SET status = 'ready', stage = 'ready', progress = 100, result = ?,
-                           draft_id = ?, error_message = NULL, completed_at = ?, worker_id = NULL,
+                           partial_steps = NULL, draft_id = ?, error_message = NULL, completed_at = ?, worker_id = NULL,
                            lease_token = NULL, lease_expires_at = NULL, heartbeat_at = NULL, updated_at = ?
                        WHERE generation_id = ? AND status = 'generating' AND cancel_requested = 0
                          AND worker_id = ? AND lease_token = ?""",
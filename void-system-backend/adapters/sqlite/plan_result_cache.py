@@ -0,0 +1,106 @@
+"""SQLite cache of validated plan-generation results for repeated identical requests."""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from adapters.sqlite.object_json import decode_object, encode_object
+
+
+ConnectionFactory = Callable[[], sqlite3.Connection]
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES_PER_USER = 20
+
+
+def create_plan_result_cache_table(conn: sqlite3.Connection) -> None:
+    """Create the owner-scoped cache table and its per-user recency index."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS plan_result_cache (
+               user_id TEXT NOT NULL,
+               cache_key TEXT NOT NULL,
+               result TEXT NOT NULL,
+               created_at TEXT NOT NULL,
+               last_used_at TEXT NOT NULL,
+               expires_at TEXT NOT NULL,
+               PRIMARY KEY (user_id, cache_key),
+               FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_plan_result_cache_recency
+           ON plan_result_cache(user_id, last_used_at)"""
+    )
+
+
+class SQLitePlanResultCache:
+    """Keep recent validated plan results per user, keyed by the full generation input.
+
+    Inputs:
+        connection_factory: Opens application-configured SQLite connections.
+        ttl_seconds: Age after which an entry is never returned again.
+        max_entries_per_user: Least recently used entries beyond this are deleted on write.
+    Outputs:
+        The stored result for a live key, or None.
+    Called by:
+        generate_run_plan_draft before and after its single planner call.
+    Side effects:
+        Reads refresh recency; writes replace the key and trim the owner's expired and
+        least recently used entries.
+    Failure:
+        Propagates SQLite failures; a cache miss is never an error.
+    Invariants:
+        Entries are only visible to their owner and are never served past their expiry.
+    """
+
+    def __init__(self, connection_factory: ConnectionFactory, *, ttl_seconds: int = DEFAULT_TTL_SECONDS,
+                 max_entries_per_user: int = DEFAULT_MAX_ENTRIES_PER_USER) -> None:
+        self._connection_factory = connection_factory
+        self._ttl_seconds = max(1, int(ttl_seconds))
+        self._max_entries = max(1, int(max_entries_per_user))
+
+    def get(self, user_id: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        now = datetime.now(timezone.utc).isoformat()
+        conn = self._connection_factory()
+        try:
+            row = conn.execute(
+                """UPDATE plan_result_cache SET last_used_at = ?
+                   WHERE user_id = ? AND cache_key = ? AND expires_at > ?
+                   RETURNING result""",
+                (now, user_id, cache_key, now),
+            ).fetchone()
+            conn.commit()
+            return decode_object(row["result"]) if row is not None else None
+        finally:
+            conn.close()
+
+    def put(self, user_id: str, cache_key: str, result: Mapping[str, Any]) -> None:
+        current = datetime.now(timezone.utc)
+        now = current.isoformat()
+        expires_at = (current + timedelta(seconds=self._ttl_seconds)).isoformat()
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """INSERT INTO plan_result_cache
+                   (user_id, cache_key, result, created_at, last_used_at, expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(user_id, cache_key) DO UPDATE SET
+                       result = excluded.result, created_at = excluded.created_at,
+                       last_used_at = excluded.last_used_at, expires_at = excluded.expires_at""",
+                (user_id, cache_key, encode_object(result), now, now, expires_at),
+            )
+            conn.execute(
+                """DELETE FROM plan_result_cache
+                   WHERE user_id = ? AND (expires_at <= ? OR cache_key NOT IN (
+                       SELECT cache_key FROM plan_result_cache WHERE user_id = ?
+                       ORDER BY last_used_at DESC LIMIT ?))""",
+                (user_id, now, user_id, self._max_entries),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
@@ -0,0 +1,44 @@
+"""Run versions that advance with every change visible in a Run snapshot."""
+from __future__ import annotations
+
+import sqlite3
+
+
+_BUMP_RUN = "UPDATE task_runs SET version = version + 1 WHERE run_id = NEW.run_id;"
+
+# (trigger suffix, SQLite event and condition, version update body)
+_VERSION_TRIGGERS = (
+    (
+        "step_changed",
+        """AFTER UPDATE ON task_steps
+           WHEN OLD.status IS NOT NEW.status OR OLD.updated_at IS NOT NEW.updated_at""",
+        _BUMP_RUN,
+    ),
+    ("artifact_added", "AFTER INSERT ON task_artifacts", _BUMP_RUN),
+    ("approval_added", "AFTER INSERT ON task_approvals", _BUMP_RUN),
+    ("approval_changed", "AFTER UPDATE ON task_approvals", _BUMP_RUN),
+    ("action_added", "AFTER INSERT ON task_actions", _BUMP_RUN),
+    ("action_changed", "AFTER UPDATE ON task_actions", _BUMP_RUN),
+    (
+        "goal_renamed",
+        "AFTER UPDATE OF title ON task_goals WHEN OLD.title IS NOT NEW.title",
+        "UPDATE task_runs SET version = version + 1 WHERE goal_id = NEW.goal_id;",
+    ),
+)
+
+
+def create_run_version_triggers(conn: sqlite3.Connection) -> None:
+    """Advance ``task_runs.version`` whenever a Step, Artifact, Approval, or Action changes.
+
+    Run status changes bump the version where they are written. The triggers cover the
+    rest of the snapshot, so the version is a complete ETag for ``get_run``. Counter-only
+    Step updates leave ``updated_at`` unchanged and therefore do not advance it.
+    """
+    for suffix, event, body in _VERSION_TRIGGERS:
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS bump_run_version_{suffix}
+               {event}
+               BEGIN
+                   {body}
+               END"""
+        )
@@ -0,0 +1,141 @@
+"""Per-Step unmet-dependency counters that make readiness checks incremental."""
+from __future__ import annotations
+
+import sqlite3
+from typing import Optional
+
+
+_SATISFIED = "('completed', 'skipped')"
+
+# (trigger suffix, SQLite event and condition, counter update body)
+_COUNTER_TRIGGERS = (
+    (
+        "dependency_insert",
+        "AFTER INSERT ON task_step_dependencies",
+        f"""UPDATE task_steps SET unmet_dependency_count = unmet_dependency_count + 1
+            WHERE step_id = NEW.step_id
+              AND (SELECT status FROM task_steps WHERE step_id = NEW.depends_on_step_id)
+                  NOT IN {_SATISFIED};""",
+    ),
+    (
+        "dependency_delete",
+        "AFTER DELETE ON task_step_dependencies",
+        f"""UPDATE task_steps SET unmet_dependency_count = unmet_dependency_count - 1
+            WHERE step_id = OLD.step_id
+              AND (SELECT status FROM task_steps WHERE step_id = OLD.depends_on_step_id)
+                  NOT IN {_SATISFIED};""",
+    ),
+    (
+        "parent_satisfied",
+        f"""AFTER UPDATE OF status ON task_steps
+            WHEN NEW.status IN {_SATISFIED} AND OLD.status NOT IN {_SATISFIED}""",
+        """UPDATE task_steps SET unmet_dependency_count = unmet_dependency_count - 1
+            WHERE step_id IN (
+                SELECT step_id FROM task_step_dependencies WHERE depends_on_step_id = NEW.step_id
+            );""",
+    ),
+    (
+        "parent_reopened",
+        f"""AFTER UPDATE OF status ON task_steps
+            WHEN OLD.status IN {_SATISFIED} AND NEW.status NOT IN {_SATISFIED}""",
+        """UPDATE task_steps SET unmet_dependency_count = unmet_dependency_count + 1
+            WHERE step_id IN (
+                SELECT step_id FROM task_step_dependencies WHERE depends_on_step_id = NEW.step_id
+            );""",
+    ),
+)
+
+
+def create_step_readiness_schema(conn: sqlite3.Connection) -> None:
+    """Add the counter column, its lookup indexes, and the triggers that maintain it.
+
+    Counters move in the writer's own transaction, so Run creation, plan publication,
+    and every Step transition keep them exact without each writer knowing about them.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(task_steps)").fetchall()}
+    if "unmet_dependency_count" not in columns:
+        conn.execute(
+            "ALTER TABLE task_steps ADD COLUMN unmet_dependency_count INTEGER NOT NULL DEFAULT 0"
+        )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_step_dependencies_parent
+           ON task_step_dependencies(depends_on_step_id)"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_steps_run_unmet
+           ON task_steps(run_id, status, unmet_dependency_count, position)"""
+    )
+    for suffix, event, body in _COUNTER_TRIGGERS:
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS maintain_step_unmet_{suffix}
+               {event}
+               BEGIN
+                   {body}
+               END"""
+        )
+
+
+def rebuild_step_readiness_counters(conn: sqlite3.Connection, run_id: Optional[str] = None) -> None:
+    """Recount unmet dependencies from the dependency table for every Step or one Run."""
+    run_clause, params = ("WHERE run_id = ?", (run_id,)) if run_id else ("", ())
+    conn.execute(
+        f"""UPDATE task_steps SET unmet_dependency_count = (
+                SELECT COUNT(*) FROM task_step_dependencies d
+                JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
+                WHERE d.step_id = task_steps.step_id AND parent.status NOT IN {_SATISFIED}
+            ) {run_clause}""",
+        params,
+    )
+
+
+def ready_step_ids(
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    *,
+    parent_step_id: Optional[str] = None,
+) -> list[str]:
+    """Return pending Steps with no unmet dependencies, in position order.
+
+    With ``parent_step_id`` only that Step's direct children are examined; a child can
+    only become ready when one of its parents is satisfied, so this is exact after a
+    completion or skip. Without it the whole Run is scanned through the counter index,
+    which is needed when a Run starts or resumes.
+    """
+    if parent_step_id is None:
+        rows = conn.execute(
+            """SELECT step_id FROM task_steps
+               WHERE run_id = ? AND user_id = ? AND status = 'pending' AND unmet_dependency_count = 0
+               ORDER BY position""",
+            (run_id, user_id),
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            """SELECT s.step_id FROM task_step_dependencies d
+               JOIN task_steps s ON s.step_id = d.step_id
+               WHERE d.depends_on_step_id = ? AND s.run_id = ? AND s.user_id = ?
+                 AND s.status = 'pending' AND s.unmet_dependency_count = 0
+               ORDER BY s.position""",
+            (parent_step_id, run_id, user_id),
+        ).fetchall()
+    return [row["step_id"] for row in rows]
+
+
+def promote_ready_steps(
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    *,
+    now: str,
+    parent_step_id: Optional[str] = None,
+) -> list[str]:
+    """Move ready pending Steps to ``ready`` in one statement and return their ids."""
+    step_ids = ready_step_ids(conn, user_id, run_id, parent_step_id=parent_step_id)
+    if step_ids:
+        placeholders = ", ".join("?" for _ in step_ids)
+        conn.execute(
+            f"""UPDATE task_steps SET status = 'ready', updated_at = ?
+                WHERE step_id IN ({placeholders}) AND status = 'pending'""",
+            (now, *step_ids),
+        )
+    return step_ids
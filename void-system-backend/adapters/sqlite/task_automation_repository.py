@@ -3,20 +3,34 @@ from __future__ import annotations
 
 import sqlite3
 import uuid
-from datetime import datetime
-from typing import Any, Callable, Dict, Mapping, Optional, Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
 
 from adapters.sqlite.object_json import decode_object, encode_object
+from adapters.sqlite.task_execution_repository import insert_run
+from adapters.sqlite.trigger_schedules import write_trigger_schedule
+
+DEFAULT_SCHEDULE_LEASE_SECONDS = 120
+DEFAULT_EVENT_BATCH_SIZE = 200
+_TRIGGER_SELECT = """SELECT t.*, s.next_fire_at FROM task_triggers t
+                     LEFT JOIN task_trigger_schedules s ON s.trigger_id = t.trigger_id"""
 
 
 def _now() -> str:
-    return datetime.now().isoformat()
+    """Return the UTC text that Trigger, Firing, schedule slot and lease times share."""
+    return datetime.now(timezone.utc).isoformat()
 
 
 def _json(value: Any) -> str:
     return encode_object(value)
 
 
+def _event_type(trigger_type: str, configuration: Optional[Mapping[str, Any]]) -> Optional[str]:
+    if trigger_type != "event":
+        return None
+    return str((configuration or {}).get("event_type") or "").strip() or None
+
+
 def _decode(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
     if row is None:
         return None
@@ -24,6 +38,8 @@ def _decode(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
     for field in ("configuration", "run_template", "payload"):
         if field in value:
             value[field] = decode_object(value[field])
+    if value.get("compiled_run_plan") is not None:
+        value["compiled_run_plan"] = decode_object(value["compiled_run_plan"])
     return value
 
 
@@ -38,13 +54,19 @@ class SQLiteTaskAutomationRepository:
             conn.execute(
                 """INSERT INTO task_triggers
                    (trigger_id, user_id, goal_id, name, trigger_type, status,
-                    configuration, run_template, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, 'active', ?, ?, ?, ?)""",
+                    configuration, run_template, compiled_run_plan, event_type, created_at, updated_at)
+                   VALUES (?, ?, ?, ?, ?, 'active', ?, ?, ?, ?, ?, ?)""",
                 (trigger_id, user_id, values["goal_id"], values["name"], values["trigger_type"],
-                 _json(values.get("configuration")), _json(values["run_template"]), now, now),
+                 _json(values.get("configuration")), _json(values["run_template"]),
+                 _json(values["compiled_run_plan"]) if values.get("compiled_run_plan") else None,
+                 _event_type(values["trigger_type"], values.get("configuration")), now, now),
             )
+            write_trigger_schedule(conn, trigger_id, user_id, values.get("next_fire_at"))
             conn.commit()
             return self.get_trigger(user_id, trigger_id) or {}
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
 
@@ -52,7 +74,7 @@ class SQLiteTaskAutomationRepository:
         conn = self._connection_factory()
         try:
             return [_decode(row) or {} for row in conn.execute(
-                "SELECT * FROM task_triggers WHERE user_id = ? ORDER BY updated_at DESC", (user_id,)
+                f"{_TRIGGER_SELECT} WHERE t.user_id = ? ORDER BY t.updated_at DESC", (user_id,)
             ).fetchall()]
         finally:
             conn.close()
@@ -61,7 +83,7 @@ class SQLiteTaskAutomationRepository:
         conn = self._connection_factory()
         try:
             return _decode(conn.execute(
-                "SELECT * FROM task_triggers WHERE trigger_id = ? AND user_id = ?", (trigger_id, user_id)
+                f"{_TRIGGER_SELECT} WHERE t.trigger_id = ? AND t.user_id = ?", (trigger_id, user_id)
             ).fetchone())
         finally:
             conn.close()
@@ -69,12 +91,16 @@ class SQLiteTaskAutomationRepository:
     def update_trigger(
         self, user_id: str, trigger_id: str, values: Mapping[str, Any]
     ) -> bool:
-        allowed = {"name", "configuration", "run_template"}
+        allowed = {"name", "configuration", "run_template", "compiled_run_plan"}
+        json_fields = {"configuration", "run_template", "compiled_run_plan"}
         fields = [field for field in allowed if field in values]
         if not fields:
             return False
         assignments = [f"{field} = ?" for field in fields]
-        params = [_json(values[field]) if field in {"configuration", "run_template"} else values[field] for field in fields]
+        params = [_json(values[field]) if field in json_fields else values[field] for field in fields]
+        if "configuration" in values:
+            assignments.append("event_type = CASE WHEN trigger_type = 'event' THEN ? END")
+            params.append(_event_type("event", values["configuration"]))
         assignments.append("updated_at = ?")
         params.extend((_now(), trigger_id, user_id))
         conn = self._connection_factory()
@@ -83,8 +109,13 @@ class SQLiteTaskAutomationRepository:
                 f"UPDATE task_triggers SET {', '.join(assignments)} WHERE trigger_id = ? AND user_id = ?",
                 params,
             )
+            if cursor.rowcount > 0 and "next_fire_at" in values:
+                write_trigger_schedule(conn, trigger_id, user_id, values["next_fire_at"])
             conn.commit()
             return cursor.rowcount > 0
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
 
@@ -100,13 +131,110 @@ class SQLiteTaskAutomationRepository:
         finally:
             conn.close()
 
-    def set_trigger_status(self, user_id: str, trigger_id: str, status: str) -> bool:
+    def set_trigger_status(
+        self, user_id: str, trigger_id: str, status: str, *, next_fire_at: Optional[str] = None
+    ) -> bool:
         conn = self._connection_factory()
         try:
             cursor = conn.execute(
                 "UPDATE task_triggers SET status = ?, updated_at = ? WHERE trigger_id = ? AND user_id = ?",
                 (status, _now(), trigger_id, user_id),
             )
+            if cursor.rowcount > 0:
+                write_trigger_schedule(conn, trigger_id, user_id, next_fire_at)
+            conn.commit()
+            return cursor.rowcount > 0
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def claim_due_schedules(
+        self,
+        worker_id: str,
+        *,
+        limit: int = 100,
+        lease_seconds: int = DEFAULT_SCHEDULE_LEASE_SECONDS,
+    ) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` due schedule Triggers for one worker.
+
+        Inputs:
+            worker_id: Stable identity of the claiming scheduler.
+            limit: Batch size for this tick.
+            lease_seconds: How long other workers must wait before re-claiming a slot.
+        Outputs:
+            Trigger snapshots with ``scheduled_for`` (the due slot) and an internal
+            ``lease_token`` that must be passed back to ``complete_schedule``.
+        Side effects:
+            One range scan of the due-time index and one lease update in a single
+            immediate transaction, so concurrent workers never claim the same row.
+        """
+        moment, token = datetime.now(timezone.utc), str(uuid.uuid4())
+        now = moment.isoformat()
+        expires_at = (moment + timedelta(seconds=max(30, lease_seconds))).isoformat()
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            claimed = [row["trigger_id"] for row in conn.execute(
+                """SELECT trigger_id FROM task_trigger_schedules
+                   WHERE next_fire_at <= ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)
+                   ORDER BY next_fire_at LIMIT ?""",
+                (now, now, max(1, limit)),
+            ).fetchall()]
+            if not claimed:
+                conn.commit()
+                return []
+            placeholders = ", ".join("?" for _ in claimed)
+            conn.execute(
+                f"""UPDATE task_trigger_schedules
+                    SET worker_id = ?, lease_token = ?, lease_expires_at = ?
+                    WHERE trigger_id IN ({placeholders})""",
+                (worker_id, token, expires_at, *claimed),
+            )
+            rows = conn.execute(
+                f"""SELECT t.*, s.next_fire_at, s.next_fire_at AS scheduled_for, s.lease_token
+                    FROM task_trigger_schedules s JOIN task_triggers t ON t.trigger_id = s.trigger_id
+                    WHERE s.trigger_id IN ({placeholders}) ORDER BY s.next_fire_at""",
+                claimed,
+            ).fetchall()
+            conn.commit()
+            return [_decode(row) or {} for row in rows]
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def complete_schedule(self, trigger_id: str, lease_token: str, next_fire_at: str) -> bool:
+        """Advance a leased Trigger to its next slot and release the lease.
+
+        Returns False when the lease was lost to expiry or the owner rescheduled,
+        paused, or deleted the Trigger meanwhile; the newer state is left untouched.
+        """
+        conn = self._connection_factory()
+        try:
+            cursor = conn.execute(
+                """UPDATE task_trigger_schedules
+                   SET next_fire_at = ?, worker_id = NULL, lease_token = NULL, lease_expires_at = NULL
+                   WHERE trigger_id = ? AND lease_token = ?""",
+                (next_fire_at, trigger_id, lease_token),
+            )
+            conn.commit()
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def store_compiled_run_plan(
+        self, trigger_id: str, plan: Mapping[str, Any], *, expected_updated_at: str
+    ) -> bool:
+        """Cache a recompiled Run plan unless the Trigger was edited since it was read."""
+        conn = self._connection_factory()
+        try:
+            cursor = conn.execute(
+                "UPDATE task_triggers SET compiled_run_plan = ? WHERE trigger_id = ? AND updated_at = ?",
+                (_json(plan), trigger_id, expected_updated_at),
+            )
             conn.commit()
             return cursor.rowcount > 0
         finally:
@@ -160,3 +288,130 @@ class SQLiteTaskAutomationRepository:
             raise
         finally:
             conn.close()
+
+    def list_event_triggers(
+        self, event_type: str, *, user_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return active event Triggers for one event type with their Goal status.
+
+        One lookup on ``idx_task_triggers_event_type`` regardless of how many owners
+        subscribe; ``user_id`` narrows delivery to one owner.
+        """
+        clauses, params = ["t.event_type = ?", "t.status = 'active'"], [event_type]
+        if user_id is not None:
+            clauses.append("t.user_id = ?")
+            params.append(user_id)
+        conn = self._connection_factory()
+        try:
+            return [_decode(row) or {} for row in conn.execute(
+                f"""SELECT t.*, g.status AS goal_status FROM task_triggers t
+                    JOIN task_goals g ON g.goal_id = t.goal_id
+                    WHERE {' AND '.join(clauses)} ORDER BY t.created_at""",
+                params,
+            ).fetchall()]
+        finally:
+            conn.close()
+
+    def record_event_firings(
+        self,
+        source_key: str,
+        payload: Mapping[str, Any],
+        deliveries: Sequence[Mapping[str, Any]],
+        *,
+        batch_size: int = DEFAULT_EVENT_BATCH_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Create one Run and Firing per delivery in batched write transactions.
+
+        Inputs:
+            source_key: The event's idempotency key, shared by every delivery.
+            payload: Event payload recorded on each Firing.
+            deliveries: Items with ``trigger_id``, ``user_id``, ``goal_id``, ``run_values``
+                (Run fields including the idempotency key), ``steps`` and pre-resolved
+                dependency ``edges`` from a compiled Run plan.
+            batch_size: Deliveries committed per ``BEGIN IMMEDIATE`` transaction.
+        Outputs:
+            One compact result per delivery: ``created``, ``replayed`` or ``failed``.
+        Side effects:
+            Each delivery runs under its own savepoint, so a rejected Run template
+            rolls back only that delivery and leaves the rest of its batch intact.
+            A batch stamps its Runs, Firings and events with one UTC timestamp.
+        Invariants:
+            A (trigger_id, source_key) pair maps to at most one Firing and one Run, the
+            same as ``record_firing``; redelivering an event replays recorded results.
+        """
+        results: List[Dict[str, Any]] = []
+        size = max(1, batch_size)
+        for offset in range(0, len(deliveries), size):
+            conn, now = self._connection_factory(), _now()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for delivery in deliveries[offset:offset + size]:
+                    conn.execute("SAVEPOINT event_delivery")
+                    try:
+                        results.append(self._record_event_firing(conn, source_key, payload, delivery, now))
+                        conn.execute("RELEASE SAVEPOINT event_delivery")
+                    except (ValueError, sqlite3.IntegrityError) as exc:
+                        conn.execute("ROLLBACK TO SAVEPOINT event_delivery")
+                        conn.execute("RELEASE SAVEPOINT event_delivery")
+                        results.append({
+                            "trigger_id": delivery["trigger_id"], "user_id": delivery["user_id"],
+                            "status": "failed", "code": "RUN_SPEC_INVALID", "message": str(exc),
+                        })
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+        return results
+
+    @staticmethod
+    def _record_event_firing(
+        conn: sqlite3.Connection,
+        source_key: str,
+        payload: Mapping[str, Any],
+        delivery: Mapping[str, Any],
+        now: str,
+    ) -> Dict[str, Any]:
+        trigger_id, user_id = delivery["trigger_id"], delivery["user_id"]
+        existing = conn.execute(
+            "SELECT firing_id, run_id FROM task_trigger_firings WHERE trigger_id = ? AND source_key = ?",
+            (trigger_id, source_key),
+        ).fetchone()
+        if existing is not None:
+            return {"trigger_id": trigger_id, "user_id": user_id, "status": "replayed",
+                    "firing_id": existing["firing_id"], "run_id": existing["run_id"]}
+        run_values = delivery["run_values"]
+        # A Run left by an interrupted single-trigger firing shares this idempotency key.
+        run = conn.execute(
+            "SELECT run_id FROM task_runs WHERE user_id = ? AND idempotency_key = ?",
+            (user_id, run_values["idempotency_key"]),
+        ).fetchone()
+        if run is not None:
+            run_id = run["run_id"]
+        else:
+            run_id = str(uuid.uuid4())
+            insert_run(
+                conn, run_id, user_id, delivery["goal_id"], run_values, delivery["steps"], now,
+                edges=delivery.get("edges"),
+            )
+        firing_id = str(uuid.uuid4())
+        conn.execute(
+            """INSERT INTO task_trigger_firings
+               (firing_id, trigger_id, user_id, source_key, run_id, payload, fired_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (firing_id, trigger_id, user_id, source_key, run_id, _json(payload), now),
+        )
+        conn.execute(
+            "UPDATE task_triggers SET last_fired_at = ?, updated_at = ? WHERE trigger_id = ?",
+            (now, now, trigger_id),
+        )
+        conn.execute(
+            """INSERT INTO task_events
+               (event_id, run_id, user_id, event_type, payload, created_at)
+               VALUES (?, ?, ?, 'trigger.fired', ?, ?)""",
+            (str(uuid.uuid4()), run_id, user_id,
+             _json({"trigger_id": trigger_id, "source_key": source_key}), now),
+        )
+        return {"trigger_id": trigger_id, "user_id": user_id, "status": "created",
+                "firing_id": firing_id, "run_id": run_id}
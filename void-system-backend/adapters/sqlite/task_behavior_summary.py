@@ -0,0 +1,296 @@
+"""Incrementally maintained per-owner Task Execution behavior summary."""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+
+BEHAVIOR_COUNTERS = (
+    "goal_count",
+    "run_count",
+    "completed_run_count",
+    "cancelled_run_count",
+    "assisted_run_count",
+    "step_count",
+    "finished_step_count",
+    "review_count",
+    "review_with_next_action_count",
+    "review_with_notes_count",
+    "rating_total",
+    "rated_review_count",
+    "pause_count",
+    "resume_count",
+    "retry_count",
+    "approval_count",
+    "approved_approval_count",
+    "rejected_approval_count",
+    "goal_change_count",
+    "goal_plan_refinement_count",
+    "refined_goal_count",
+)
+BEHAVIOR_RANGES = (
+    "runs", "steps", "reviews", "pauses", "resumes", "approvals", "goal_plan_refinements",
+)
+# Event types whose counts and time ranges are part of the public summary.
+BEHAVIOR_EVENTS: Dict[str, tuple[str, Optional[str]]] = {
+    "run.paused": ("pause_count", "pauses"),
+    "run.resumed": ("resume_count", "resumes"),
+    "run.retry_requested": ("retry_count", None),
+}
+
+
+def create_behavior_summary_table(conn: sqlite3.Connection) -> None:
+    """Create the one-row-per-owner summary table inside a migration transaction."""
+    counter_columns = ",\n".join(
+        f"{column} INTEGER NOT NULL DEFAULT 0" for column in BEHAVIOR_COUNTERS
+    )
+    range_columns = ",\n".join(
+        f"{name}_observed_from TEXT,\n{name}_observed_to TEXT" for name in BEHAVIOR_RANGES
+    )
+    conn.execute(
+        f"""CREATE TABLE IF NOT EXISTS task_behavior_summaries (
+               user_id TEXT PRIMARY KEY,
+               {counter_columns},
+               {range_columns},
+               updated_at TEXT NOT NULL,
+               FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+           )"""
+    )
+
+
+def record_behavior(
+    conn: sqlite3.Connection,
+    user_id: str,
+    *,
+    counts: Optional[Mapping[str, int]] = None,
+    observed: Sequence[str] = (),
+    at: str,
+) -> None:
+    """Fold one execution change into the owner's summary in the caller's transaction.
+
+    Inputs:
+        counts: counter deltas keyed by ``BEHAVIOR_COUNTERS``; zero deltas are ignored.
+        observed: range names from ``BEHAVIOR_RANGES`` whose bounds should include ``at``.
+        at: the timestamp the caller persisted on the changed record.
+    Called by:
+        SQLite Task Execution write helpers after their own row change succeeded.
+    Side effects:
+        Creates the owner's summary row on first use and updates it in place. The caller
+        owns commit and rollback, so the summary can never diverge from a rolled-back write.
+    Invariants:
+        Column names come only from the fixed allow-lists above; unknown names raise.
+    """
+    assignments: list[str] = []
+    params: list[Any] = []
+    for column, delta in (counts or {}).items():
+        if column not in BEHAVIOR_COUNTERS:
+            raise ValueError(f"Unknown behavior counter: {column}")
+        if delta:
+            assignments.append(f"{column} = {column} + ?")
+            params.append(int(delta))
+    for name in observed:
+        if name not in BEHAVIOR_RANGES:
+            raise ValueError(f"Unknown behavior range: {name}")
+        assignments.append(
+            f"{name}_observed_from = COALESCE(min({name}_observed_from, ?), ?)"
+        )
+        assignments.append(f"{name}_observed_to = COALESCE(max({name}_observed_to, ?), ?)")
+        params.extend((at, at, at, at))
+    if not assignments:
+        return
+    conn.execute(
+        """INSERT INTO task_behavior_summaries (user_id, updated_at) VALUES (?, ?)
+           ON CONFLICT(user_id) DO NOTHING""",
+        (user_id, at),
+    )
+    conn.execute(
+        f"UPDATE task_behavior_summaries SET {', '.join(assignments)}, updated_at = ? "
+        "WHERE user_id = ?",
+        (*params, at, user_id),
+    )
+
+
+def scan_behavior_summary(conn: sqlite3.Connection, user_id: str) -> Dict[str, Any]:
+    """Recompute one owner's summary columns from the full execution history."""
+    runs = conn.execute(
+        """SELECT
+               COUNT(*) AS run_count,
+               COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0)
+                   AS completed_run_count,
+               COALESCE(SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END), 0)
+                   AS cancelled_run_count,
+               COALESCE(SUM(CASE WHEN mode = 'assisted' THEN 1 ELSE 0 END), 0)
+                   AS assisted_run_count,
+               MIN(created_at) AS observed_from,
+               MAX(COALESCE(completed_at, updated_at, created_at)) AS observed_to
+           FROM task_runs WHERE user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    steps = conn.execute(
+        """SELECT
+               COUNT(*) AS step_count,
+               COALESCE(SUM(CASE WHEN status IN ('completed', 'skipped') THEN 1 ELSE 0 END), 0)
+                   AS finished_step_count,
+               MIN(created_at) AS observed_from,
+               MAX(COALESCE(completed_at, updated_at, created_at)) AS observed_to
+           FROM task_steps WHERE user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    reviews = conn.execute(
+        """SELECT
+               COUNT(*) AS review_count,
+               COALESCE(SUM(CASE WHEN next_action <> '' THEN 1 ELSE 0 END), 0)
+                   AS review_with_next_action_count,
+               COALESCE(SUM(CASE WHEN notes <> '' THEN 1 ELSE 0 END), 0)
+                   AS review_with_notes_count,
+               COALESCE(SUM(rating), 0) AS rating_total,
+               COUNT(rating) AS rated_review_count,
+               MIN(created_at) AS observed_from,
+               MAX(updated_at) AS observed_to
+           FROM task_run_reviews WHERE user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    event_rows = conn.execute(
+        f"""SELECT event_type, COUNT(*) AS event_count,
+                  MIN(created_at) AS observed_from,
+                  MAX(created_at) AS observed_to
+           FROM task_events
+           WHERE user_id = ? AND event_type IN ({', '.join('?' for _ in BEHAVIOR_EVENTS)})
+           GROUP BY event_type""",
+        (user_id, *BEHAVIOR_EVENTS),
+    ).fetchall()
+    approvals = conn.execute(
+        """SELECT
+               COUNT(CASE WHEN status IN ('approved', 'rejected') THEN 1 END) AS approval_count,
+               COALESCE(SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END), 0)
+                   AS approved_approval_count,
+               COALESCE(SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END), 0)
+                   AS rejected_approval_count,
+               MIN(CASE WHEN status IN ('approved', 'rejected') THEN resolved_at END) AS observed_from,
+               MAX(CASE WHEN status IN ('approved', 'rejected') THEN resolved_at END) AS observed_to
+           FROM task_approvals WHERE user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    goal_changes = conn.execute(
+        """SELECT
+               COUNT(*) AS goal_change_count,
+               COALESCE(SUM(CASE WHEN change_kind = 'plan_refined' THEN 1 ELSE 0 END), 0)
+                   AS goal_plan_refinement_count,
+               COUNT(DISTINCT CASE WHEN change_kind = 'plan_refined' THEN goal_id END)
+                   AS refined_goal_count,
+               MIN(CASE WHEN change_kind = 'plan_refined' THEN created_at END) AS observed_from,
+               MAX(CASE WHEN change_kind = 'plan_refined' THEN created_at END) AS observed_to
+           FROM task_goal_changes WHERE user_id = ?""",
+        (user_id,),
+    ).fetchone()
+    goal_count = conn.execute(
+        "SELECT COUNT(*) FROM task_goals WHERE user_id = ?", (user_id,)
+    ).fetchone()[0]
+
+    values: Dict[str, Any] = {"goal_count": int(goal_count or 0)}
+    for row in (runs, steps, reviews, approvals, goal_changes):
+        for column in row.keys():
+            if column in BEHAVIOR_COUNTERS:
+                values[column] = int(row[column] or 0)
+    for name, row in (
+        ("runs", runs),
+        ("steps", steps),
+        ("reviews", reviews),
+        ("approvals", approvals),
+        ("goal_plan_refinements", goal_changes),
+    ):
+        values[f"{name}_observed_from"] = row["observed_from"]
+        values[f"{name}_observed_to"] = row["observed_to"]
+    for event_type, (counter, range_name) in BEHAVIOR_EVENTS.items():
+        values[counter] = 0
+        if range_name is not None:
+            values[f"{range_name}_observed_from"] = None
+            values[f"{range_name}_observed_to"] = None
+    for row in event_rows:
+        counter, range_name = BEHAVIOR_EVENTS[str(row["event_type"])]
+        values[counter] = int(row["event_count"])
+        if range_name is not None:
+            values[f"{range_name}_observed_from"] = row["observed_from"]
+            values[f"{range_name}_observed_to"] = row["observed_to"]
+    return values
+
+
+def rebuild_behavior_summaries(
+    conn: sqlite3.Connection, user_id: Optional[str] = None
+) -> int:
+    """Replace stored summaries with values scanned from execution history.
+
+    Inputs: an open transaction and either one owner or ``None`` for every user.
+    Output: the number of summary rows written. Called by migration 39 for backfill,
+    by the repository rebuild command, and by ``tools/rebuild_behavior_summaries.py``.
+    The scan is the reference definition; incremental maintenance must agree with it.
+    """
+    if user_id is None:
+        owner_ids = [row[0] for row in conn.execute("SELECT user_id FROM users").fetchall()]
+    else:
+        owner_ids = [user_id]
+    now = datetime.now(timezone.utc).isoformat()
+    for owner_id in owner_ids:
+        values = scan_behavior_summary(conn, owner_id)
+        columns = ["user_id", *values, "updated_at"]
+        conn.execute(
+            f"INSERT OR REPLACE INTO task_behavior_summaries ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            (owner_id, *values.values(), now),
+        )
+    return len(owner_ids)
+
+
+def _range(row: Optional[sqlite3.Row], name: str) -> Dict[str, Optional[str]]:
+    if row is None:
+        return {"observed_from": None, "observed_to": None}
+    return {
+        "observed_from": row[f"{name}_observed_from"],
+        "observed_to": row[f"{name}_observed_to"],
+    }
+
+
+def behavior_summary_payload(row: Optional[sqlite3.Row]) -> Dict[str, Any]:
+    """Translate a stored summary row into the public aggregate-only signal shape."""
+
+    def count(column: str) -> int:
+        return int(row[column] or 0) if row is not None else 0
+
+    def event_range(counter: str, name: str) -> Dict[str, Any]:
+        if not count(counter):
+            return _range(None, name)
+        return {"count": count(counter), **_range(row, name)}
+
+    rated = count("rated_review_count")
+    return {
+        "goal_count": count("goal_count"),
+        "run_count": count("run_count"),
+        "completed_run_count": count("completed_run_count"),
+        "cancelled_run_count": count("cancelled_run_count"),
+        "assisted_run_count": count("assisted_run_count"),
+        "step_count": count("step_count"),
+        "finished_step_count": count("finished_step_count"),
+        "review_count": count("review_count"),
+        "review_with_next_action_count": count("review_with_next_action_count"),
+        "review_with_notes_count": count("review_with_notes_count"),
+        "average_rating": count("rating_total") / rated if rated else None,
+        "pause_count": count("pause_count"),
+        "resume_count": count("resume_count"),
+        "retry_count": count("retry_count"),
+        "approval_count": count("approval_count"),
+        "approved_approval_count": count("approved_approval_count"),
+        "rejected_approval_count": count("rejected_approval_count"),
+        "goal_change_count": count("goal_change_count"),
+        "goal_plan_refinement_count": count("goal_plan_refinement_count"),
+        "refined_goal_count": count("refined_goal_count"),
+        "observation_ranges": {
+            "runs": _range(row, "runs"),
+            "steps": _range(row, "steps"),
+            "reviews": _range(row, "reviews"),
+            "pauses": event_range("pause_count", "pauses"),
+            "resumes": event_range("resume_count", "resumes"),
+            "approvals": _range(row, "approvals"),
+            "goal_plan_refinements": _range(row, "goal_plan_refinements"),
+        },
+    }
@@ -8,14 +8,23 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Mapping, Optional, Sequence
 
 from adapters.sqlite.connection import ConnectionFactory
+from adapters.sqlite.growth_point_projections import append_growth_point_entry
 from adapters.sqlite.object_json import decode_object, encode_object
-from core.task_execution_contracts import TaskExecutionRepository
+from adapters.sqlite.step_readiness import promote_ready_steps
+from adapters.sqlite.task_behavior_summary import (
+    BEHAVIOR_EVENTS,
+    behavior_summary_payload,
+    rebuild_behavior_summaries,
+    record_behavior,
+)
+from core.task_execution_contracts import SATISFIED_STEP_STATUSES, TaskExecutionRepository
 
 
 _JSON_FIELDS = {
     "metadata", "completion_criteria", "input_data", "reward_spec", "output_data", "payload",
     "request_data", "decision_data",
 }
+_RUN_STATUS_COUNTERS = {"completed": "completed_run_count", "cancelled": "cancelled_run_count"}
 
 
 def _now() -> str:
@@ -26,12 +35,6 @@ def _json(value: Any) -> str:
     return encode_object(value)
 
 
-def _observation_range(row: Optional[sqlite3.Row]) -> Dict[str, Optional[str]]:
-    if row is None:
-        return {"observed_from": None, "observed_to": None}
-    return {"observed_from": row["observed_from"], "observed_to": row["observed_to"]}
-
-
 def _decode(row: sqlite3.Row | None) -> Optional[Dict[str, Any]]:
     if row is None:
         return None
@@ -64,6 +67,12 @@ def _insert_event(
            VALUES (?, ?, ?, ?, ?, ?, ?)""",
         (event_id, run_id, step_id, user_id, event_type, _json(payload), created_at),
     )
+    if event_type in BEHAVIOR_EVENTS:
+        counter, range_name = BEHAVIOR_EVENTS[event_type]
+        record_behavior(
+            conn, user_id, counts={counter: 1},
+            observed=(range_name,) if range_name else (), at=created_at,
+        )
     return {
         "event_id": event_id,
         "run_id": run_id,
@@ -89,7 +98,8 @@ def _settle_completed_step_reward(
     function reads only the Step's persisted reward specification, writes one immutable
     settlement and its matching growth-ledger entry, then returns a public event payload.
     Callers invoke it only after the Step status changed to completed; any malformed
-    specification or ledger failure raises and rolls back the entire transition.
+    specification or ledger failure raises and rolls back the entire transition, including
+    the balance and daily growth-point projections maintained with the ledger entry.
     """
     row = conn.execute(
         """SELECT reward_spec FROM task_steps
@@ -113,11 +123,8 @@ def _settle_completed_step_reward(
            VALUES (?, ?, ?, ?, ?, 'task_step_completed', ?)""",
         (settlement_id, user_id, run_id, step_id, growth_points, now),
     )
-    ledger_record_id = str(uuid.uuid4())
-    conn.execute(
-        """INSERT INTO growth_point_ledger (record_id, user_id, amount, type, source, created_at)
-           VALUES (?, ?, ?, 'earn', ?, ?)""",
-        (ledger_record_id, user_id, growth_points, f"task_step:{step_id}", now),
+    ledger_record_id = append_growth_point_entry(
+        conn, user_id, growth_points, "earn", f"task_step:{step_id}", created_at=now
     )
     return {
         "settlement_id": settlement_id,
@@ -155,6 +162,13 @@ def _update_run_status(
     if target == "failed" or error_summary is not None:
         assignments.append("error_summary = ?")
         params.append(error_summary)
+    counter = _RUN_STATUS_COUNTERS.get(target)
+    if counter is not None and target in expected:
+        previous = conn.execute(
+            "SELECT status FROM task_runs WHERE run_id = ? AND user_id = ?", (run_id, user_id)
+        ).fetchone()
+        if previous is not None and previous[0] == target:
+            counter = None
     placeholders = ", ".join("?" for _ in expected)
     params.extend((run_id, user_id, *expected))
     cursor = conn.execute(
@@ -162,7 +176,13 @@ def _update_run_status(
         f"WHERE run_id = ? AND user_id = ? AND status IN ({placeholders})",
         params,
     )
-    return cursor.rowcount > 0
+    if cursor.rowcount == 0:
+        return False
+    record_behavior(
+        conn, user_id, counts={counter: 1} if counter else None,
+        observed=("runs",), at=changed_at,
+    )
+    return True
 
 
 def _update_step_status(
@@ -197,6 +217,14 @@ def _update_step_status(
     if error_summary is not None:
         assignments.append("error_summary = ?")
         params.append(error_summary)
+    finishes = target in SATISFIED_STEP_STATUSES
+    if finishes and SATISFIED_STEP_STATUSES.intersection(expected):
+        previous = conn.execute(
+            "SELECT status FROM task_steps WHERE step_id = ? AND run_id = ? AND user_id = ?",
+            (step_id, run_id, user_id),
+        ).fetchone()
+        if previous is not None and previous[0] in SATISFIED_STEP_STATUSES:
+            finishes = False
     placeholders = ", ".join("?" for _ in expected)
     params.extend((step_id, run_id, user_id, *expected))
     cursor = conn.execute(
@@ -204,38 +232,397 @@ def _update_step_status(
         f"WHERE step_id = ? AND run_id = ? AND user_id = ? AND status IN ({placeholders})",
         params,
     )
-    return cursor.rowcount > 0
+    if cursor.rowcount == 0:
+        return False
+    record_behavior(
+        conn, user_id, counts={"finished_step_count": 1} if finishes else None,
+        observed=("steps",), at=changed_at,
+    )
+    return True
+
+
+def _run_version_matches(
+    conn: sqlite3.Connection, user_id: str, run_id: str, expected_version: Optional[int]
+) -> bool:
+    """Check an optimistic Run version inside the caller's write transaction."""
+    if expected_version is None:
+        return True
+    row = conn.execute(
+        "SELECT version FROM task_runs WHERE run_id = ? AND user_id = ?", (run_id, user_id)
+    ).fetchone()
+    return row is not None and int(row["version"]) == int(expected_version)
 
 
 def _mark_ready_steps(
-    conn: sqlite3.Connection, user_id: str, run_id: str, *, now: Optional[str] = None
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    *,
+    now: Optional[str] = None,
+    parent_step_id: Optional[str] = None,
 ) -> list[str]:
     changed_at = now or _now()
-    rows = conn.execute(
-        """SELECT s.step_id
-           FROM task_steps s
-           WHERE s.run_id = ? AND s.user_id = ? AND s.status = 'pending'
-             AND NOT EXISTS (
-                 SELECT 1 FROM task_step_dependencies d
-                 JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
-                 WHERE d.run_id = s.run_id AND d.step_id = s.step_id
-                   AND parent.status NOT IN ('completed', 'skipped')
-             )
-           ORDER BY s.position""",
-        (run_id, user_id),
-    ).fetchall()
-    ready_ids: list[str] = []
-    for row in rows:
-        cursor = conn.execute(
-            """UPDATE task_steps SET status = 'ready', updated_at = ?
-               WHERE step_id = ? AND run_id = ? AND user_id = ? AND status = 'pending'""",
-            (changed_at, row["step_id"], run_id, user_id),
-        )
-        if cursor.rowcount > 0:
-            ready_ids.append(row["step_id"])
+    ready_ids = promote_ready_steps(
+        conn, user_id, run_id, now=changed_at, parent_step_id=parent_step_id
+    )
+    if ready_ids:
+        record_behavior(conn, user_id, observed=("steps",), at=changed_at)
     return ready_ids
 
 
+def _review_deltas(
+    existing: Optional[sqlite3.Row], values: Mapping[str, Any]
+) -> Dict[str, int]:
+    """Return summary counter changes caused by replacing one Run review."""
+    old_rating = existing["rating"] if existing is not None else None
+    new_rating = values.get("rating")
+    return {
+        "review_count": 0 if existing is not None else 1,
+        "review_with_next_action_count": (
+            int(bool(values.get("next_action", "")))
+            - int(existing is not None and bool(existing["next_action"]))
+        ),
+        "review_with_notes_count": (
+            int(bool(values.get("notes", "")))
+            - int(existing is not None and bool(existing["notes"]))
+        ),
+        "rating_total": int(new_rating or 0) - int(old_rating or 0),
+        "rated_review_count": int(new_rating is not None) - int(old_rating is not None),
+    }
+
+
+def _record_approval_decision(
+    conn: sqlite3.Connection, user_id: str, decision: str, resolved_at: str
+) -> None:
+    if decision not in {"approved", "rejected"}:
+        return
+    record_behavior(
+        conn,
+        user_id,
+        counts={"approval_count": 1, f"{decision}_approval_count": 1},
+        observed=("approvals",),
+        at=resolved_at,
+    )
+
+
+def _apply_step_transition(
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    step_id: str,
+    expected: Sequence[str],
+    target: str,
+    event_type: str,
+    *,
+    now: str,
+    payload: Optional[Mapping[str, Any]] = None,
+    output_data: Optional[Mapping[str, Any]] = None,
+    error_summary: Optional[str] = None,
+    increment_attempt: bool = False,
+    artifacts: Sequence[Mapping[str, Any]] = (),
+    publish_ready_steps: bool = False,
+    run_expected: Sequence[str] = (),
+    run_target: Optional[str] = None,
+    run_event_type: Optional[str] = None,
+    run_payload: Optional[Mapping[str, Any]] = None,
+    run_error_summary: Optional[str] = None,
+    complete_run_if_satisfied: bool = False,
+) -> Dict[str, Any]:
+    """Apply one Step transition inside the caller's write transaction.
+
+    Returns ``changed`` False, leaving rollback to the caller, when the Step or Run
+    no longer has an expected status.
+    """
+    artifact_ids: list[str] = []
+    ready_step_ids: list[str] = []
+    run_completed = False
+    if not _update_step_status(
+        conn, user_id, run_id, step_id, expected, target,
+        output_data=output_data, error_summary=error_summary,
+        increment_attempt=increment_attempt, now=now,
+    ):
+        return {"changed": False}
+    settlement = (
+        _settle_completed_step_reward(conn, user_id, run_id, step_id, now=now)
+        if target == "completed"
+        else {"growth_points": 0, "settled": False}
+    )
+    for artifact in artifacts:
+        artifact_id = str(uuid.uuid4())
+        conn.execute(
+            """INSERT INTO task_artifacts
+               (artifact_id, run_id, step_id, user_id, kind, title, uri,
+                content_type, metadata, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                artifact_id, run_id, step_id, user_id, artifact.get("kind", "result"),
+                artifact["title"], artifact.get("uri"), artifact.get("content_type"),
+                _json(artifact.get("metadata")), now,
+            ),
+        )
+        artifact_ids.append(artifact_id)
+    event_payload = dict(payload or {})
+    if settlement["settled"]:
+        event_payload["reward_settlement"] = settlement
+    if artifact_ids:
+        event_payload["artifact_ids"] = artifact_ids
+    _insert_event(
+        conn, user_id, run_id, event_type, step_id=step_id,
+        payload=event_payload, now=now,
+    )
+    if publish_ready_steps:
+        # Only a satisfied Step can unblock others, and only its direct children.
+        ready_step_ids = (
+            _mark_ready_steps(conn, user_id, run_id, now=now, parent_step_id=step_id)
+            if target in SATISFIED_STEP_STATUSES
+            else _mark_ready_steps(conn, user_id, run_id, now=now)
+        )
+        for ready_step_id in ready_step_ids:
+            _insert_event(
+                conn, user_id, run_id, "step.ready",
+                step_id=ready_step_id, now=now,
+            )
+    if run_target is not None:
+        if not _update_run_status(
+            conn, user_id, run_id, run_expected, run_target,
+            error_summary=run_error_summary, now=now,
+        ):
+            return {"changed": False, "run_conflict": True}
+        _insert_event(
+            conn, user_id, run_id, run_event_type or f"run.{run_target}",
+            payload=run_payload, now=now,
+        )
+    if complete_run_if_satisfied:
+        unfinished = conn.execute(
+            """SELECT 1 FROM task_steps
+               WHERE run_id = ? AND user_id = ?
+                 AND status NOT IN ('completed', 'skipped') LIMIT 1""",
+            (run_id, user_id),
+        ).fetchone()
+        if unfinished is None and _update_run_status(
+            conn, user_id, run_id, ["running"], "completed", now=now
+        ):
+            run_completed = True
+            _insert_event(conn, user_id, run_id, "run.completed", now=now)
+    return {
+        "changed": True,
+        "reward_settlement": settlement,
+        "artifact_ids": artifact_ids,
+        "ready_step_ids": ready_step_ids,
+        "run_completed": run_completed,
+    }
+
+
+def _request_approval(
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    step_id: str,
+    expected_step_status: str,
+    request: Mapping[str, Any],
+    *,
+    now: str,
+) -> tuple[Optional[sqlite3.Row], bool]:
+    """Open an approval and pause its Step and Run inside the caller's transaction.
+
+    Returns the pending approval and whether this call created it; ``(None, False)``
+    means the Step or Run left its expected status and the caller must roll back.
+    """
+    existing = conn.execute(
+        """SELECT * FROM task_approvals
+           WHERE run_id = ? AND step_id = ? AND user_id = ? AND status = 'pending'""",
+        (run_id, step_id, user_id),
+    ).fetchone()
+    if existing is not None:
+        return existing, False
+    approval_id = str(uuid.uuid4())
+    conn.execute(
+        """INSERT INTO task_approvals
+           (approval_id, run_id, step_id, user_id, status, request_data,
+            decision_data, requested_at)
+           VALUES (?, ?, ?, ?, 'pending', ?, '{}', ?)""",
+        (approval_id, run_id, step_id, user_id, _json(request), now),
+    )
+    if not _update_step_status(
+        conn, user_id, run_id, step_id, [expected_step_status],
+        "waiting_approval", now=now,
+    ) or not _update_run_status(
+        conn, user_id, run_id, ["running"], "waiting_approval", now=now
+    ):
+        return None, False
+    payload = {"approval_id": approval_id, "step_id": step_id}
+    _insert_event(
+        conn, user_id, run_id, "run.waiting_approval", payload=payload, now=now
+    )
+    _insert_event(
+        conn, user_id, run_id, "approval.requested", step_id=step_id,
+        payload={"approval_id": approval_id}, now=now,
+    )
+    return conn.execute(
+        "SELECT * FROM task_approvals WHERE approval_id = ?", (approval_id,)
+    ).fetchone(), True
+
+
+def _resolve_approval(
+    conn: sqlite3.Connection,
+    user_id: str,
+    approval: sqlite3.Row,
+    decision: str,
+    note: Optional[str],
+    *,
+    now: str,
+) -> bool:
+    """Record a decision and resume or fail the waiting Step and Run in the caller's transaction."""
+    approval_id = approval["approval_id"]
+    run_id = approval["run_id"]
+    step_id = approval["step_id"]
+    target = "ready" if decision == "approved" else "failed"
+    run_target = "running" if decision == "approved" else "failed"
+    error = None if decision == "approved" else (note or "Approval rejected")
+    cursor = conn.execute(
+        """UPDATE task_approvals
+           SET status = ?, decision_data = ?, resolved_at = ?
+           WHERE approval_id = ? AND user_id = ? AND status = 'pending'""",
+        (decision, _json({"decision": decision, "note": note}), now, approval_id, user_id),
+    )
+    if cursor.rowcount == 0 or not _update_step_status(
+        conn, user_id, run_id, step_id, ["waiting_approval"], target,
+        error_summary=error, now=now,
+    ) or not _update_run_status(
+        conn, user_id, run_id, ["waiting_approval"], run_target,
+        error_summary=error, now=now,
+    ):
+        return False
+    _record_approval_decision(conn, user_id, decision, now)
+    _insert_event(
+        conn, user_id, run_id, f"approval.{decision}", step_id=step_id,
+        payload={"approval_id": approval_id, "note": note}, now=now,
+    )
+    return True
+
+
+def _apply_step_command(
+    conn: sqlite3.Connection,
+    user_id: str,
+    run_id: str,
+    command: Mapping[str, Any],
+    *,
+    now: str,
+) -> Dict[str, Any]:
+    """Dispatch one prepared batch command to the matching single-command helper."""
+    step_id = command["step_id"]
+    if command["kind"] == "request_approval":
+        approval, created = _request_approval(
+            conn, user_id, run_id, step_id, command["expected_step_status"],
+            command["request"], now=now,
+        )
+        return {"changed": created, "approval_id": approval["approval_id"] if created else None}
+    if command["kind"] == "resolve_approval":
+        approval = conn.execute(
+            """SELECT * FROM task_approvals
+               WHERE run_id = ? AND step_id = ? AND user_id = ? AND status = 'pending'""",
+            (run_id, step_id, user_id),
+        ).fetchone()
+        changed = approval is not None and _resolve_approval(
+            conn, user_id, approval, command["decision"], command.get("note"), now=now
+        )
+        return {"changed": changed, "approval_id": approval["approval_id"] if changed else None}
+    return _apply_step_transition(
+        conn, user_id, run_id, step_id, command["expected"], command["target"],
+        command["event_type"], now=now, **command.get("options", {}),
+    )
+
+
+def insert_run(
+    conn: sqlite3.Connection,
+    run_id: str,
+    user_id: str,
+    goal_id: str,
+    values: Mapping[str, Any],
+    steps: Sequence[Mapping[str, Any]],
+    now: str,
+    *,
+    edges: Optional[Sequence[Sequence[int]]] = None,
+) -> None:
+    """Insert a queued Run, its Steps, dependencies, and creation Event in the caller's transaction.
+
+    ``edges`` are pre-resolved (step index, dependency index) pairs from a compiled Run
+    plan; without them dependencies are resolved from Step keys. Raises ValueError for
+    duplicate Step keys or unknown dependencies; callers roll back.
+    """
+    idempotency_key = values.get("idempotency_key")
+    conn.execute(
+        """INSERT INTO task_runs
+           (run_id, goal_id, user_id, title, objective, mode, status, idempotency_key,
+            metadata, created_at, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)""",
+        (
+            run_id, goal_id, user_id, values["title"], values.get("objective", ""),
+            values.get("mode", "manual"), idempotency_key, _json(values.get("metadata")),
+            now, now,
+        ),
+    )
+    key_to_id: Dict[str, str] = {}
+    normalized_steps = []
+    for position, step in enumerate(steps):
+        step_id = str(uuid.uuid4())
+        client_key = str(step.get("client_key") or f"step-{position + 1}")
+        if client_key in key_to_id:
+            raise ValueError(f"Duplicate step key: {client_key}")
+        key_to_id[client_key] = step_id
+        normalized_steps.append((step_id, client_key, step, position))
+        conn.execute(
+            """INSERT INTO task_steps
+               (step_id, run_id, user_id, client_key, title, description, kind, status,
+                position, parallel_group, attempt_count, max_attempts, requires_approval,
+                progress, completion_criteria, input_data, reward_spec, output_data, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, 0, ?, ?, 0, ?, ?, ?, '{}', ?, ?)""",
+            (
+                step_id, run_id, user_id, client_key, step["title"], step.get("description", ""),
+                step.get("kind", "manual"), position, step.get("parallel_group"),
+                int(step.get("max_attempts", 1)), 1 if step.get("requires_approval") else 0,
+                _json(step.get("completion_criteria")), _json(step.get("input_data")),
+                _json(step.get("reward_spec")), now, now,
+            ),
+        )
+    if edges is not None:
+        dependency_rows = [
+            (run_id, normalized_steps[step][0], normalized_steps[dependency][0]) for step, dependency in edges
+        ]
+    else:
+        dependency_rows = []
+        for step_id, _client_key, step, _position in normalized_steps:
+            for dependency_key in step.get("depends_on", []):
+                dependency_id = key_to_id.get(str(dependency_key))
+                if dependency_id is None:
+                    raise ValueError(f"Unknown step dependency: {dependency_key}")
+                if dependency_id == step_id:
+                    raise ValueError("A step cannot depend on itself")
+                dependency_rows.append((run_id, step_id, dependency_id))
+    conn.executemany(
+        """INSERT INTO task_step_dependencies
+           (run_id, step_id, depends_on_step_id) VALUES (?, ?, ?)""",
+        dependency_rows,
+    )
+    conn.execute(
+        """INSERT INTO task_events
+           (event_id, run_id, user_id, event_type, payload, created_at)
+           VALUES (?, ?, ?, 'run.created', ?, ?)""",
+        (str(uuid.uuid4()), run_id, user_id, _json({"step_count": len(steps)}), now),
+    )
+    record_behavior(
+        conn,
+        user_id,
+        counts={
+            "run_count": 1,
+            "assisted_run_count": 1 if values.get("mode") == "assisted" else 0,
+            "step_count": len(steps),
+        },
+        observed=("runs", "steps") if steps else ("runs",),
+        at=now,
+    )
+
+
 class SQLiteTaskExecutionRepository(TaskExecutionRepository):
     """Store execution state while keeping state policy in the Module."""
 
@@ -268,6 +655,7 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                     idempotency_key, _json(values.get("metadata")), now, now,
                 ),
             )
+            record_behavior(conn, user_id, counts={"goal_count": 1}, at=now)
             conn.commit()
             return self.get_goal(user_id, goal_id) or {}
         except Exception:
@@ -346,6 +734,22 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                     else "status_changed" if "status" in changed_fields
                     else "metadata_changed"
                 )
+                counts = {"goal_change_count": 1}
+                if change_kind == "plan_refined":
+                    counts["goal_plan_refinement_count"] = 1
+                    first_refinement = conn.execute(
+                        """SELECT 1 FROM task_goal_changes
+                           WHERE user_id = ? AND change_kind = 'plan_refined' AND goal_id = ?
+                           LIMIT 1""",
+                        (user_id, goal_id),
+                    ).fetchone() is None
+                    if first_refinement:
+                        counts["refined_goal_count"] = 1
+                record_behavior(
+                    conn, user_id, counts=counts,
+                    observed=("goal_plan_refinements",) if change_kind == "plan_refined" else (),
+                    at=now,
+                )
                 conn.execute(
                     """INSERT INTO task_goal_changes
                        (change_id, goal_id, user_id, change_kind, changed_fields, created_at)
@@ -369,6 +773,8 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         goal_id: str,
         values: Mapping[str, Any],
         steps: Sequence[Mapping[str, Any]],
+        *,
+        edges: Optional[Sequence[Sequence[int]]] = None,
     ) -> Dict[str, Any]:
         run_id = str(uuid.uuid4())
         now = _now()
@@ -388,58 +794,7 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                 if existing is not None:
                     conn.rollback()
                     return self.get_run(user_id, existing["run_id"]) or {}
-            conn.execute(
-                """INSERT INTO task_runs
-                   (run_id, goal_id, user_id, title, objective, mode, status, idempotency_key,
-                    metadata, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?, ?)""",
-                (
-                    run_id, goal_id, user_id, values["title"], values.get("objective", ""),
-                    values.get("mode", "manual"), idempotency_key, _json(values.get("metadata")),
-                    now, now,
-                ),
-            )
-            key_to_id: Dict[str, str] = {}
-            normalized_steps = []
-            for position, step in enumerate(steps):
-                step_id = str(uuid.uuid4())
-                client_key = str(step.get("client_key") or f"step-{position + 1}")
-                if client_key in key_to_id:
-                    raise ValueError(f"Duplicate step key: {client_key}")
-                key_to_id[client_key] = step_id
-                normalized_steps.append((step_id, client_key, step, position))
-                conn.execute(
-                    """INSERT INTO task_steps
-                       (step_id, run_id, user_id, client_key, title, description, kind, status,
-                        position, parallel_group, attempt_count, max_attempts, requires_approval,
-                        progress, completion_criteria, input_data, reward_spec, output_data, created_at, updated_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, 0, ?, ?, 0, ?, ?, ?, '{}', ?, ?)""",
-                    (
-                        step_id, run_id, user_id, client_key, step["title"], step.get("description", ""),
-                        step.get("kind", "manual"), position, step.get("parallel_group"),
-                        int(step.get("max_attempts", 1)), 1 if step.get("requires_approval") else 0,
-                        _json(step.get("completion_criteria")), _json(step.get("input_data")),
-                        _json(step.get("reward_spec")), now, now,
-                    ),
-                )
-            for step_id, _client_key, step, _position in normalized_steps:
-                for dependency_key in step.get("depends_on", []):
-                    dependency_id = key_to_id.get(str(dependency_key))
-                    if dependency_id is None:
-                        raise ValueError(f"Unknown step dependency: {dependency_key}")
-                    if dependency_id == step_id:
-                        raise ValueError("A step cannot depend on itself")
-                    conn.execute(
-                        """INSERT INTO task_step_dependencies
-                           (run_id, step_id, depends_on_step_id) VALUES (?, ?, ?)""",
-                        (run_id, step_id, dependency_id),
-                    )
-            conn.execute(
-                """INSERT INTO task_events
-                   (event_id, run_id, user_id, event_type, payload, created_at)
-                   VALUES (?, ?, ?, 'run.created', ?, ?)""",
-                (str(uuid.uuid4()), run_id, user_id, _json({"step_count": len(steps)}), now),
-            )
+            insert_run(conn, run_id, user_id, goal_id, values, steps, now, edges=edges)
             conn.commit()
             return self.get_run(user_id, run_id) or {}
         except Exception:
@@ -482,125 +837,36 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
             conn.close()
 
     def summarize_profile_behavior(self, user_id: str) -> Dict[str, Any]:
-        """Return aggregate execution signals without exposing review text or artifacts."""
+        """Return aggregate execution signals without exposing review text or artifacts.
+
+        Reads the owner's single materialized summary row, which every execution write
+        keeps current in its own transaction. Owners without any history have no row and
+        receive zero counts with empty observation ranges.
+        """
         conn = self._connection_factory()
         try:
-            goals = conn.execute(
-                """SELECT COUNT(*) AS goal_count,
-                          MIN(created_at) AS observed_from,
-                          MAX(updated_at) AS observed_to
-                   FROM task_goals WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            totals = conn.execute(
-                """SELECT
-                       COUNT(*) AS run_count,
-                       COALESCE(SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END), 0)
-                           AS completed_run_count,
-                       COALESCE(SUM(CASE WHEN status = 'cancelled' THEN 1 ELSE 0 END), 0)
-                           AS cancelled_run_count,
-                       COALESCE(SUM(CASE WHEN mode = 'assisted' THEN 1 ELSE 0 END), 0)
-                           AS assisted_run_count,
-                       MIN(created_at) AS observed_from,
-                       MAX(COALESCE(completed_at, updated_at, created_at)) AS observed_to
-                   FROM task_runs WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            steps = conn.execute(
-                """SELECT
-                       COUNT(*) AS step_count,
-                       COALESCE(SUM(CASE WHEN status IN ('completed', 'skipped') THEN 1 ELSE 0 END), 0)
-                           AS finished_step_count,
-                       MIN(created_at) AS observed_from,
-                       MAX(COALESCE(completed_at, updated_at, created_at)) AS observed_to
-                   FROM task_steps WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            reviews = conn.execute(
-                """SELECT
-                       COUNT(*) AS review_count,
-                       COALESCE(SUM(CASE WHEN next_action <> '' THEN 1 ELSE 0 END), 0)
-                           AS review_with_next_action_count,
-                       COALESCE(SUM(CASE WHEN notes <> '' THEN 1 ELSE 0 END), 0)
-                           AS review_with_notes_count,
-                       AVG(rating) AS average_rating,
-                       MIN(created_at) AS observed_from,
-                       MAX(updated_at) AS observed_to
-                   FROM task_run_reviews WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            event_rows = conn.execute(
-                """SELECT event_type, COUNT(*) AS event_count,
-                          MIN(created_at) AS observed_from,
-                          MAX(created_at) AS observed_to
-                   FROM task_events
-                   WHERE user_id = ? AND event_type IN ('run.paused', 'run.resumed', 'run.retry_requested')
-                   GROUP BY event_type""",
-                (user_id,),
-            ).fetchall()
-            events = {
-                str(row["event_type"]): {
-                    "count": int(row["event_count"]),
-                    "observed_from": row["observed_from"],
-                    "observed_to": row["observed_to"],
-                }
-                for row in event_rows
-            }
-            approvals = conn.execute(
-                """SELECT
-                       COUNT(CASE WHEN status IN ('approved', 'rejected') THEN 1 END) AS approval_count,
-                       COALESCE(SUM(CASE WHEN status = 'approved' THEN 1 ELSE 0 END), 0)
-                           AS approved_approval_count,
-                       COALESCE(SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END), 0)
-                           AS rejected_approval_count,
-                       MIN(CASE WHEN status IN ('approved', 'rejected') THEN resolved_at END) AS observed_from,
-                       MAX(CASE WHEN status IN ('approved', 'rejected') THEN resolved_at END) AS observed_to
-                   FROM task_approvals WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            goal_changes = conn.execute(
-                """SELECT
-                       COUNT(*) AS goal_change_count,
-                       COALESCE(SUM(CASE WHEN change_kind = 'plan_refined' THEN 1 ELSE 0 END), 0)
-                           AS goal_plan_refinement_count,
-                       COUNT(DISTINCT CASE WHEN change_kind = 'plan_refined' THEN goal_id END)
-                           AS refined_goal_count,
-                       MIN(CASE WHEN change_kind = 'plan_refined' THEN created_at END) AS observed_from,
-                       MAX(CASE WHEN change_kind = 'plan_refined' THEN created_at END) AS observed_to
-                   FROM task_goal_changes WHERE user_id = ?""",
-                (user_id,),
-            ).fetchone()
-            return {
-                "goal_count": int(goals['goal_count'] or 0),
-                "run_count": int(totals['run_count'] or 0),
-                "completed_run_count": int(totals['completed_run_count'] or 0),
-                "cancelled_run_count": int(totals['cancelled_run_count'] or 0),
-                "assisted_run_count": int(totals['assisted_run_count'] or 0),
-                "step_count": int(steps['step_count'] or 0),
-                "finished_step_count": int(steps['finished_step_count'] or 0),
-                "review_count": int(reviews['review_count'] or 0),
-                "review_with_next_action_count": int(reviews['review_with_next_action_count'] or 0),
-                "review_with_notes_count": int(reviews['review_with_notes_count'] or 0),
-                "average_rating": float(reviews['average_rating']) if reviews['average_rating'] is not None else None,
-                "pause_count": events.get('run.paused', {}).get("count", 0),
-                "resume_count": events.get('run.resumed', {}).get("count", 0),
-                "retry_count": events.get('run.retry_requested', {}).get("count", 0),
-                "approval_count": int(approvals['approval_count'] or 0),
-                "approved_approval_count": int(approvals['approved_approval_count'] or 0),
-                "rejected_approval_count": int(approvals['rejected_approval_count'] or 0),
-                "goal_change_count": int(goal_changes['goal_change_count'] or 0),
-                "goal_plan_refinement_count": int(goal_changes['goal_plan_refinement_count'] or 0),
-                "refined_goal_count": int(goal_changes['refined_goal_count'] or 0),
-                "observation_ranges": {
-                    "runs": _observation_range(totals),
-                    "steps": _observation_range(steps),
-                    "reviews": _observation_range(reviews),
-                    "pauses": events.get("run.paused", _observation_range(None)),
-                    "resumes": events.get("run.resumed", _observation_range(None)),
-                    "approvals": _observation_range(approvals),
-                    "goal_plan_refinements": _observation_range(goal_changes),
-                },
-            }
+            return behavior_summary_payload(conn.execute(
+                "SELECT * FROM task_behavior_summaries WHERE user_id = ?", (user_id,)
+            ).fetchone())
+        finally:
+            conn.close()
+
+    def rebuild_profile_behavior_summaries(self, user_id: Optional[str] = None) -> int:
+        """Recompute materialized behavior summaries from full execution history.
+
+        Inputs: one owner, or ``None`` to rebuild every user. Returns the number of rows
+        written. Used for backfill and repair by ``tools/rebuild_behavior_summaries.py``;
+        the exclusive transaction keeps concurrent transitions from interleaving.
+        """
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rebuilt = rebuild_behavior_summaries(conn, user_id)
+            conn.commit()
+            return rebuilt
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
 
@@ -619,17 +885,20 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                 "SELECT * FROM task_steps WHERE run_id = ? AND user_id = ? ORDER BY position, created_at",
                 (run_id, user_id),
             ).fetchall()
+            dependencies: Dict[str, list[Dict[str, Any]]] = {}
+            for item in conn.execute(
+                """SELECT d.step_id AS child_step_id, parent.client_key, parent.step_id, parent.status
+                   FROM task_step_dependencies d
+                   JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
+                   WHERE d.run_id = ? ORDER BY parent.position""",
+                (run_id,),
+            ).fetchall():
+                parent = dict(item)
+                dependencies.setdefault(parent.pop("child_step_id"), []).append(parent)
             steps = []
             for row in step_rows:
                 step = _decode(row) or {}
-                dependencies = conn.execute(
-                    """SELECT parent.client_key, parent.step_id, parent.status
-                       FROM task_step_dependencies d
-                       JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
-                       WHERE d.run_id = ? AND d.step_id = ? ORDER BY parent.position""",
-                    (run_id, step["step_id"]),
-                ).fetchall()
-                step["depends_on"] = [dict(item) for item in dependencies]
+                step["depends_on"] = dependencies.get(step["step_id"], [])
                 steps.append(step)
             run["steps"] = steps
             run["artifacts"] = [
@@ -654,6 +923,43 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         finally:
             conn.close()
 
+    def get_run_state(
+        self, user_id: str, run_id: str, *, step_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return the Run status projection used to validate commands.
+
+        With ``step_id`` the projection also carries that Step, when it belongs to the
+        Run, and the statuses of its approvals, shaped like the full snapshot's lists.
+        Cost does not depend on how many Steps, Artifacts, or Actions the Run has.
+        """
+        conn = self._connection_factory()
+        try:
+            row = conn.execute(
+                """SELECT run_id, goal_id, title, mode, status, version, updated_at
+                   FROM task_runs WHERE run_id = ? AND user_id = ?""",
+                (run_id, user_id),
+            ).fetchone()
+            if row is None:
+                return None
+            state = dict(row)
+            if step_id is not None:
+                state["steps"] = [
+                    _decode(step) or {} for step in conn.execute(
+                        "SELECT * FROM task_steps WHERE step_id = ? AND run_id = ? AND user_id = ?",
+                        (step_id, run_id, user_id),
+                    ).fetchall()
+                ]
+                state["approvals"] = [
+                    dict(approval) for approval in conn.execute(
+                        """SELECT approval_id, step_id, status FROM task_approvals
+                           WHERE run_id = ? AND step_id = ? AND user_id = ?""",
+                        (run_id, step_id, user_id),
+                    ).fetchall()
+                ]
+            return state
+        finally:
+            conn.close()
+
     def compare_and_set_run_status(
         self,
         user_id: str,
@@ -715,12 +1021,15 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         error_summary: Optional[str] = None,
         cancel_open_steps: bool = False,
         publish_ready_steps: bool = False,
+        expected_version: Optional[int] = None,
     ) -> bool:
         conn = self._connection_factory()
         now = _now()
         try:
             conn.execute("BEGIN IMMEDIATE")
-            if not _update_run_status(
+            if not _run_version_matches(
+                conn, user_id, run_id, expected_version
+            ) or not _update_run_status(
                 conn, user_id, run_id, expected, target, error_summary=error_summary, now=now
             ):
                 conn.rollback()
@@ -778,87 +1087,77 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         run_payload: Optional[Mapping[str, Any]] = None,
         run_error_summary: Optional[str] = None,
         complete_run_if_satisfied: bool = False,
+        expected_version: Optional[int] = None,
     ) -> Dict[str, Any]:
         conn = self._connection_factory()
-        now = _now()
-        artifact_ids: list[str] = []
-        ready_step_ids: list[str] = []
-        run_completed = False
         try:
             conn.execute("BEGIN IMMEDIATE")
-            if not _update_step_status(
-                conn, user_id, run_id, step_id, expected, target,
-                output_data=output_data, error_summary=error_summary,
-                increment_attempt=increment_attempt, now=now,
-            ):
+            if not _run_version_matches(conn, user_id, run_id, expected_version):
                 conn.rollback()
-                return {"changed": False}
-            settlement = (
-                _settle_completed_step_reward(conn, user_id, run_id, step_id, now=now)
-                if target == "completed"
-                else {"growth_points": 0, "settled": False}
+                return {"changed": False, "version_conflict": True}
+            result = _apply_step_transition(
+                conn, user_id, run_id, step_id, expected, target, event_type,
+                now=_now(),
+                payload=payload, output_data=output_data, error_summary=error_summary,
+                increment_attempt=increment_attempt, artifacts=artifacts,
+                publish_ready_steps=publish_ready_steps, run_expected=run_expected,
+                run_target=run_target, run_event_type=run_event_type,
+                run_payload=run_payload, run_error_summary=run_error_summary,
+                complete_run_if_satisfied=complete_run_if_satisfied,
             )
-            for artifact in artifacts:
-                artifact_id = str(uuid.uuid4())
-                conn.execute(
-                    """INSERT INTO task_artifacts
-                       (artifact_id, run_id, step_id, user_id, kind, title, uri,
-                        content_type, metadata, created_at)
-                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    (
-                        artifact_id, run_id, step_id, user_id, artifact.get("kind", "result"),
-                        artifact["title"], artifact.get("uri"), artifact.get("content_type"),
-                        _json(artifact.get("metadata")), now,
-                    ),
-                )
-                artifact_ids.append(artifact_id)
-            event_payload = dict(payload or {})
-            if settlement["settled"]:
-                event_payload["reward_settlement"] = settlement
-            if artifact_ids:
-                event_payload["artifact_ids"] = artifact_ids
-            _insert_event(
-                conn, user_id, run_id, event_type, step_id=step_id,
-                payload=event_payload, now=now,
-            )
-            if publish_ready_steps:
-                ready_step_ids = _mark_ready_steps(conn, user_id, run_id, now=now)
-                for ready_step_id in ready_step_ids:
-                    _insert_event(
-                        conn, user_id, run_id, "step.ready",
-                        step_id=ready_step_id, now=now,
-                    )
-            if run_target is not None:
-                if not _update_run_status(
-                    conn, user_id, run_id, run_expected, run_target,
-                    error_summary=run_error_summary, now=now,
-                ):
+            if result["changed"]:
+                conn.commit()
+            else:
+                conn.rollback()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def apply_step_commands(
+        self,
+        user_id: str,
+        run_id: str,
+        commands: Sequence[Mapping[str, Any]],
+        *,
+        expected_version: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Apply prepared Step commands in order inside one write transaction.
+
+        Inputs:
+            commands: ``step``, ``request_approval``, or ``resolve_approval`` mappings
+                whose expected statuses were derived by the Module.
+        Outputs:
+            ``changed`` with one result per command and the Run's final status, or
+            ``changed`` False with the failing ``index`` after a full rollback, flagged
+            ``version_conflict`` when ``expected_version`` no longer matches.
+        Called by:
+            TaskExecution.apply_step_commands.
+        Side effects:
+            The same Step, Run, approval, reward, and event writes as the single commands.
+        """
+        conn = self._connection_factory()
+        now = _now()
+        results: list[Dict[str, Any]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if not _run_version_matches(conn, user_id, run_id, expected_version):
+                conn.rollback()
+                return {"changed": False, "version_conflict": True, "index": 0}
+            for index, command in enumerate(commands):
+                result = _apply_step_command(conn, user_id, run_id, command, now=now)
+                if not result["changed"]:
                     conn.rollback()
-                    return {"changed": False, "run_conflict": True}
-                _insert_event(
-                    conn, user_id, run_id, run_event_type or f"run.{run_target}",
-                    payload=run_payload, now=now,
-                )
-            if complete_run_if_satisfied:
-                unfinished = conn.execute(
-                    """SELECT 1 FROM task_steps
-                       WHERE run_id = ? AND user_id = ?
-                         AND status NOT IN ('completed', 'skipped') LIMIT 1""",
-                    (run_id, user_id),
-                ).fetchone()
-                if unfinished is None and _update_run_status(
-                    conn, user_id, run_id, ["running"], "completed", now=now
-                ):
-                    run_completed = True
-                    _insert_event(conn, user_id, run_id, "run.completed", now=now)
+                    return {**result, "index": index}
+                results.append(result)
+            run = conn.execute(
+                "SELECT status, version, updated_at FROM task_runs WHERE run_id = ? AND user_id = ?",
+                (run_id, user_id),
+            ).fetchone()
             conn.commit()
-            return {
-                "changed": True,
-                "reward_settlement": settlement,
-                "artifact_ids": artifact_ids,
-                "ready_step_ids": ready_step_ids,
-                "run_completed": run_completed,
-            }
+            return {"changed": True, "results": results, "run": dict(run)}
         except Exception:
             conn.rollback()
             raise
@@ -870,25 +1169,7 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         now = _now()
         try:
             conn.execute("BEGIN IMMEDIATE")
-            rows = conn.execute(
-                """SELECT s.step_id
-                   FROM task_steps s
-                   WHERE s.run_id = ? AND s.user_id = ? AND s.status = 'pending'
-                     AND NOT EXISTS (
-                         SELECT 1 FROM task_step_dependencies d
-                         JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
-                         WHERE d.run_id = s.run_id AND d.step_id = s.step_id
-                           AND parent.status NOT IN ('completed', 'skipped')
-                     )
-                   ORDER BY s.position""",
-                (run_id, user_id),
-            ).fetchall()
-            step_ids = [row["step_id"] for row in rows]
-            for step_id in step_ids:
-                conn.execute(
-                    "UPDATE task_steps SET status = 'ready', updated_at = ? WHERE step_id = ? AND status = 'pending'",
-                    (now, step_id),
-                )
+            step_ids = _mark_ready_steps(conn, user_id, run_id, now=now)
             conn.commit()
             return step_ids
         except Exception:
@@ -899,13 +1180,16 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
 
     def cancel_open_steps(self, user_id: str, run_id: str) -> None:
         conn = self._connection_factory()
+        now = _now()
         try:
-            conn.execute(
+            cursor = conn.execute(
                 """UPDATE task_steps SET status = 'cancelled', completed_at = ?, updated_at = ?
                    WHERE run_id = ? AND user_id = ?
                      AND status NOT IN ('completed', 'failed', 'skipped', 'cancelled')""",
-                (_now(), _now(), run_id, user_id),
+                (now, now, run_id, user_id),
             )
+            if cursor.rowcount > 0:
+                record_behavior(conn, user_id, observed=("steps",), at=now)
             conn.commit()
         finally:
             conn.close()
@@ -919,19 +1203,14 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         step_id: Optional[str] = None,
         payload: Optional[Mapping[str, Any]] = None,
     ) -> Dict[str, Any]:
-        event_id = str(uuid.uuid4())
-        now = _now()
         conn = self._connection_factory()
         try:
-            conn.execute(
-                """INSERT INTO task_events
-                   (event_id, run_id, step_id, user_id, event_type, payload, created_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (event_id, run_id, step_id, user_id, event_type, _json(payload), now),
+            event = _insert_event(
+                conn, user_id, run_id, event_type, step_id=step_id, payload=payload
             )
             conn.commit()
             return _decode(conn.execute(
-                "SELECT * FROM task_events WHERE event_id = ?", (event_id,)
+                "SELECT * FROM task_events WHERE event_id = ?", (event["event_id"],)
             ).fetchone()) or {}
         finally:
             conn.close()
@@ -965,6 +1244,7 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         conn = self._connection_factory()
         now = _now()
         try:
+            conn.execute("BEGIN IMMEDIATE")
             existing = conn.execute(
                 "SELECT * FROM task_run_reviews WHERE run_id = ? AND user_id = ?",
                 (run_id, user_id),
@@ -1000,11 +1280,18 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                         user_id,
                     ),
                 )
+            record_behavior(
+                conn, user_id, counts=_review_deltas(existing, values),
+                observed=("reviews",), at=now,
+            )
             conn.commit()
             return _decode(conn.execute(
                 "SELECT * FROM task_run_reviews WHERE run_id = ? AND user_id = ?",
                 (run_id, user_id),
             ).fetchone()) or {}
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
 
@@ -1177,13 +1464,16 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         note: Optional[str],
     ) -> bool:
         conn = self._connection_factory()
+        now = _now()
         try:
             cursor = conn.execute(
                 """UPDATE task_approvals
                    SET status = ?, decision_data = ?, resolved_at = ?
                    WHERE approval_id = ? AND user_id = ? AND status = 'pending'""",
-                (decision, _json({"decision": decision, "note": note}), _now(), approval_id, user_id),
+                (decision, _json({"decision": decision, "note": note}), now, approval_id, user_id),
             )
+            if cursor.rowcount > 0:
+                _record_approval_decision(conn, user_id, decision, now)
             conn.commit()
             return cursor.rowcount > 0
         finally:
@@ -1196,47 +1486,23 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         step_id: str,
         expected_step_status: str,
         request: Mapping[str, Any],
+        *,
+        expected_version: Optional[int] = None,
     ) -> Optional[Dict[str, Any]]:
         conn = self._connection_factory()
-        now = _now()
         try:
             conn.execute("BEGIN IMMEDIATE")
-            existing = conn.execute(
-                """SELECT * FROM task_approvals
-                   WHERE run_id = ? AND step_id = ? AND user_id = ? AND status = 'pending'""",
-                (run_id, step_id, user_id),
-            ).fetchone()
-            if existing is not None:
-                conn.rollback()
-                return _decode(existing)
-            approval_id = str(uuid.uuid4())
-            conn.execute(
-                """INSERT INTO task_approvals
-                   (approval_id, run_id, step_id, user_id, status, request_data,
-                    decision_data, requested_at)
-                   VALUES (?, ?, ?, ?, 'pending', ?, '{}', ?)""",
-                (approval_id, run_id, step_id, user_id, _json(request), now),
-            )
-            if not _update_step_status(
-                conn, user_id, run_id, step_id, [expected_step_status],
-                "waiting_approval", now=now,
-            ) or not _update_run_status(
-                conn, user_id, run_id, ["running"], "waiting_approval", now=now
-            ):
+            if not _run_version_matches(conn, user_id, run_id, expected_version):
                 conn.rollback()
                 return None
-            payload = {"approval_id": approval_id, "step_id": step_id}
-            _insert_event(
-                conn, user_id, run_id, "run.waiting_approval", payload=payload, now=now
-            )
-            _insert_event(
-                conn, user_id, run_id, "approval.requested", step_id=step_id,
-                payload={"approval_id": approval_id}, now=now,
+            approval, created = _request_approval(
+                conn, user_id, run_id, step_id, expected_step_status, request, now=_now()
             )
-            conn.commit()
-            return _decode(conn.execute(
-                "SELECT * FROM task_approvals WHERE approval_id = ?", (approval_id,)
-            ).fetchone())
+            if created:
+                conn.commit()
+            else:
+                conn.rollback()
+            return _decode(approval)
         except Exception:
             conn.rollback()
             raise
@@ -1251,7 +1517,6 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
         note: Optional[str],
     ) -> Optional[str]:
         conn = self._connection_factory()
-        now = _now()
         try:
             conn.execute("BEGIN IMMEDIATE")
             approval = conn.execute(
@@ -1259,35 +1524,67 @@ class SQLiteTaskExecutionRepository(TaskExecutionRepository):
                    WHERE approval_id = ? AND user_id = ? AND status = 'pending'""",
                 (approval_id, user_id),
             ).fetchone()
-            if approval is None:
-                conn.rollback()
-                return None
-            run_id = approval["run_id"]
-            step_id = approval["step_id"]
-            target = "ready" if decision == "approved" else "failed"
-            run_target = "running" if decision == "approved" else "failed"
-            error = None if decision == "approved" else (note or "Approval rejected")
-            cursor = conn.execute(
-                """UPDATE task_approvals
-                   SET status = ?, decision_data = ?, resolved_at = ?
-                   WHERE approval_id = ? AND user_id = ? AND status = 'pending'""",
-                (decision, _json({"decision": decision, "note": note}), now, approval_id, user_id),
-            )
-            if cursor.rowcount == 0 or not _update_step_status(
-                conn, user_id, run_id, step_id, ["waiting_approval"], target,
-                error_summary=error, now=now,
-            ) or not _update_run_status(
-                conn, user_id, run_id, ["waiting_approval"], run_target,
-                error_summary=error, now=now,
+            if approval is None or not _resolve_approval(
+                conn, user_id, approval, decision, note, now=_now()
             ):
                 conn.rollback()
                 return None
-            _insert_event(
-                conn, user_id, run_id, f"approval.{decision}", step_id=step_id,
-                payload={"approval_id": approval_id, "note": note}, now=now,
-            )
             conn.commit()
-            return str(run_id)
+            return str(approval["run_id"])
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def resolve_approvals(
+        self,
+        user_id: str,
+        decisions: Sequence[Mapping[str, Any]],
+    ) -> Dict[str, Any]:
+        """Resolve pending approvals across Runs in one write transaction.
+
+        Returns ``changed`` with each approval's Run status, or ``changed`` False with
+        the failing ``index`` and that approval's current status (None when missing)
+        after rolling back every decision.
+        """
+        conn = self._connection_factory()
+        now = _now()
+        results: list[Dict[str, Any]] = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for index, item in enumerate(decisions):
+                approval = conn.execute(
+                    "SELECT * FROM task_approvals WHERE approval_id = ? AND user_id = ?",
+                    (item["approval_id"], user_id),
+                ).fetchone()
+                if approval is None or approval["status"] != "pending" or not _resolve_approval(
+                    conn, user_id, approval, item["decision"], item.get("note"), now=now
+                ):
+                    conn.rollback()
+                    return {
+                        "changed": False,
+                        "index": index,
+                        "approval_status": approval["status"] if approval is not None else None,
+                    }
+                results.append({
+                    "approval_id": approval["approval_id"],
+                    "run_id": approval["run_id"],
+                    "step_id": approval["step_id"],
+                    "decision": item["decision"],
+                })
+            run_ids = sorted({item["run_id"] for item in results})
+            placeholders = ", ".join("?" for _ in run_ids)
+            run_statuses = {
+                row["run_id"]: row["status"] for row in conn.execute(
+                    f"SELECT run_id, status FROM task_runs WHERE run_id IN ({placeholders})",
+                    run_ids,
+                ).fetchall()
+            }
+            conn.commit()
+            for item in results:
+                item["run_status"] = run_statuses.get(item["run_id"])
+            return {"changed": True, "results": results}
         except Exception:
             conn.rollback()
             raise
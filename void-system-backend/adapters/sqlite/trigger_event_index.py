@@ -0,0 +1,33 @@
+"""Indexed event-type lookup for event Trigger fan-out."""
+from __future__ import annotations
+
+import sqlite3
+
+from adapters.sqlite.object_json import ObjectJSONContractError, decode_object
+
+
+def create_trigger_event_index(conn: sqlite3.Connection) -> None:
+    """Add a denormalized ``event_type`` column to event Triggers and index it."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(task_triggers)").fetchall()}
+    if "event_type" not in columns:
+        conn.execute("ALTER TABLE task_triggers ADD COLUMN event_type TEXT")
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_triggers_event_type
+           ON task_triggers(event_type, status) WHERE event_type IS NOT NULL"""
+    )
+
+
+def backfill_trigger_event_types(conn: sqlite3.Connection) -> int:
+    """Copy ``configuration.event_type`` into the indexed column for every event Trigger."""
+    rows = conn.execute(
+        "SELECT trigger_id, configuration FROM task_triggers WHERE trigger_type = 'event'"
+    ).fetchall()
+    updates = []
+    for row in rows:
+        try:
+            event_type = str(decode_object(row["configuration"]).get("event_type") or "").strip()
+        except ObjectJSONContractError:
+            event_type = ""
+        updates.append((event_type or None, row["trigger_id"]))
+    conn.executemany("UPDATE task_triggers SET event_type = ? WHERE trigger_id = ?", updates)
+    return len(updates)
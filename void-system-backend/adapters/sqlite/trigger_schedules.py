@@ -0,0 +1,76 @@
+"""Due-time index and worker leases for schedule Triggers."""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import logging
+import sqlite3
+from typing import Optional
+
+from adapters.sqlite.object_json import decode_object
+from modules.tasks.schedule import format_slot, next_fire_time
+
+
+logger = logging.getLogger("void-system.tasks.schedules")
+
+
+def create_trigger_schedule_table(conn: sqlite3.Connection) -> None:
+    """Create one row per active schedule Trigger, indexed by its next due slot."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS task_trigger_schedules (
+               trigger_id TEXT PRIMARY KEY,
+               user_id TEXT NOT NULL,
+               next_fire_at TEXT NOT NULL,
+               worker_id TEXT,
+               lease_token TEXT,
+               lease_expires_at TEXT,
+               FOREIGN KEY (trigger_id) REFERENCES task_triggers(trigger_id) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_trigger_schedules_due
+           ON task_trigger_schedules(next_fire_at)"""
+    )
+
+
+def write_trigger_schedule(
+    conn: sqlite3.Connection, trigger_id: str, user_id: str, next_fire_at: Optional[str]
+) -> None:
+    """Set or clear a Trigger's next slot inside the caller's write transaction.
+
+    Rescheduling drops any worker lease, so a claim taken against the old slot cannot
+    overwrite the new one when it completes.
+    """
+    if next_fire_at is None:
+        conn.execute("DELETE FROM task_trigger_schedules WHERE trigger_id = ?", (trigger_id,))
+        return
+    conn.execute(
+        """INSERT INTO task_trigger_schedules (trigger_id, user_id, next_fire_at)
+           VALUES (?, ?, ?)
+           ON CONFLICT(trigger_id) DO UPDATE SET
+               next_fire_at = excluded.next_fire_at,
+               worker_id = NULL, lease_token = NULL, lease_expires_at = NULL""",
+        (trigger_id, user_id, next_fire_at),
+    )
+
+
+def backfill_trigger_schedules(conn: sqlite3.Connection, now: Optional[datetime] = None) -> int:
+    """Schedule every active schedule Trigger from ``now`` and return the rows written.
+
+    Triggers whose stored configuration predates cron validation and cannot be
+    evaluated are left unscheduled and logged; saving a valid configuration schedules them.
+    """
+    moment = now or datetime.now(timezone.utc)
+    written = 0
+    rows = conn.execute(
+        """SELECT trigger_id, user_id, configuration FROM task_triggers
+           WHERE trigger_type = 'schedule' AND status = 'active'"""
+    ).fetchall()
+    for row in rows:
+        try:
+            slot = next_fire_time(decode_object(row["configuration"]), moment)
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.warning("Schedule trigger %s left unscheduled: %s", row["trigger_id"], exc)
+            continue
+        write_trigger_schedule(conn, row["trigger_id"], row["user_id"], format_slot(slot))
+        written += 1
+    return written
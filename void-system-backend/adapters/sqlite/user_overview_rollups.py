@@ -0,0 +1,45 @@
+"""Per-user dashboard rollup cache invalidated by Step and growth-ledger writes."""
+from __future__ import annotations
+
+import sqlite3
+
+
+# (trigger suffix, table, SQLite event, owner references whose cache row is dropped)
+_INVALIDATION_TRIGGERS = (
+    ("task_steps_insert", "task_steps", "INSERT", ("NEW",)),
+    ("task_steps_update", "task_steps", "UPDATE OF user_id, status, created_at, completed_at", ("OLD", "NEW")),
+    ("task_steps_delete", "task_steps", "DELETE", ("OLD",)),
+    ("growth_point_ledger_insert", "growth_point_ledger", "INSERT", ("NEW",)),
+    ("growth_point_ledger_update", "growth_point_ledger", "UPDATE", ("OLD", "NEW")),
+    ("growth_point_ledger_delete", "growth_point_ledger", "DELETE", ("OLD",)),
+)
+
+
+def create_user_overview_rollup_schema(conn: sqlite3.Connection) -> None:
+    """Create the rollup table, its covering Step index, and invalidation triggers.
+
+    The triggers delete the owner's cached rollup in the writer's own transaction, so
+    every Step transition and ledger entry, including cascades and maintenance tools,
+    invalidates it without each writer knowing about the cache.
+    """
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS user_overview_rollups (
+               user_id TEXT PRIMARY KEY,
+               rollup TEXT NOT NULL DEFAULT '{}',
+               computed_on TEXT NOT NULL,
+               FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_task_steps_user_status_completed
+           ON task_steps(user_id, status, completed_at, created_at)"""
+    )
+    for suffix, table_name, event, references in _INVALIDATION_TRIGGERS:
+        owners = ", ".join(f"{reference}.user_id" for reference in references)
+        conn.execute(
+            f"""CREATE TRIGGER IF NOT EXISTS invalidate_user_overview_{suffix}
+               AFTER {event} ON {table_name}
+               BEGIN
+                   DELETE FROM user_overview_rollups WHERE user_id IN ({owners});
+               END"""
+        )
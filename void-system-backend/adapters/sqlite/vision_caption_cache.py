@@ -0,0 +1,101 @@
+"""SQLite cache of vision-model captions keyed by normalized image content."""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
+
+
+ConnectionFactory = Callable[[], sqlite3.Connection]
+
+DEFAULT_MAX_ENTRIES = 2000
+
+
+def vision_caption_key(*, image_digest: str, model_identity: str, prompt_version: str) -> str:
+    """Return the cache key for every input that shapes one caption."""
+    encoded = json.dumps([image_digest, model_identity, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def create_vision_caption_cache_table(conn: sqlite3.Connection) -> None:
+    """Create the caption table and its recency index."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS vision_caption_cache (
+               cache_key TEXT PRIMARY KEY,
+               caption TEXT NOT NULL,
+               created_at TEXT NOT NULL,
+               last_used_at TEXT NOT NULL
+           )"""
+    )
+    conn.execute(
+        """CREATE INDEX IF NOT EXISTS idx_vision_caption_cache_recency
+           ON vision_caption_cache(last_used_at)"""
+    )
+
+
+class SQLiteVisionCaptionCache:
+    """Return stored captions for images already described by the same model and prompt.
+
+    Inputs:
+        connection_factory: Opens application-configured SQLite connections.
+        cipher: Encrypts caption text at rest; captions transcribe private images.
+        max_entries: Least recently used captions beyond this are deleted on write.
+    Outputs:
+        The stored caption for a key, or None.
+    Called by:
+        vision_caption before each knowledge-image or session-image model call.
+    Side effects:
+        Reads refresh recency; writes replace the key and trim old entries.
+    Failure:
+        Propagates SQLite failures; a cache miss is never an error.
+    """
+
+    def __init__(self, connection_factory: ConnectionFactory, *, cipher: KnowledgeSourceCipher,
+                 max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self._connection_factory = connection_factory
+        self._cipher = cipher
+        self._max_entries = max(1, int(max_entries))
+
+    def get(self, cache_key: str) -> Optional[str]:
+        conn = self._connection_factory()
+        try:
+            row = conn.execute(
+                "UPDATE vision_caption_cache SET last_used_at = ? WHERE cache_key = ? RETURNING caption",
+                (_now(), cache_key),
+            ).fetchone()
+            conn.commit()
+        finally:
+            conn.close()
+        return self._cipher.decrypt_text(row["caption"]) if row is not None else None
+
+    def put(self, cache_key: str, caption: str) -> None:
+        now = _now()
+        conn = self._connection_factory()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                """INSERT INTO vision_caption_cache (cache_key, caption, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(cache_key) DO UPDATE SET
+                       caption = excluded.caption, last_used_at = excluded.last_used_at""",
+                (cache_key, self._cipher.encrypt_text(caption), now, now),
+            )
+            conn.execute(
+                """DELETE FROM vision_caption_cache WHERE cache_key NOT IN (
+                       SELECT cache_key FROM vision_caption_cache ORDER BY last_used_at DESC LIMIT ?)""",
+                (self._max_entries,),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
@@ -16,8 +16,11 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
+from adapters.legacy.session_attachment_gateway import LegacySessionAttachmentGateway
+from adapters.sqlite.analytics_repository import SQLiteAnalyticsRepository
 from adapters.sqlite.identity_repository import SQLiteIdentityRepository
 from adapters.sqlite.plan_generation_repository import SQLitePlanGenerationRepository
+from adapters.sqlite.plan_result_cache import SQLitePlanResultCache
 from api.http.responses import APIResponse
 from api.http.routers.administration import router as administration_router
 from api.http.routers.ai import router as ai_router
@@ -40,8 +43,10 @@ from database import Database
 from errors import VoidSystemException
 from middleware.auth import get_password_hash
 from modules.administration.ai_configuration import AIConfigurationManager
+from modules.analytics.rollups import AnalyticsRollupWorker
 from modules.growth.service import get_growth_profile
 from modules.knowledge.jobs import KnowledgeJobWorker, get_knowledge_job_service
+from modules.knowledge.parser import document_parser
 from modules.knowledge.service import create_user_knowledge_resources, migrate_private_knowledge_sources
 from modules.personal_context.composition import compose_personal_context
 from modules.planning.generation import (
@@ -49,6 +54,11 @@ from modules.planning.generation import (
     generate_run_plan_draft,
     get_plan_generation_service,
 )
+from modules.session_attachments import SessionAttachments, SessionAttachmentSweeper
+from modules.tasks.schedule_worker import TriggerScheduleWorker
+from modules.tasks.service import get_task_automation
+from services.ai_services.model_clients import model_clients
+from services.ai_services.model_scheduler import BACKGROUND, model_call_priority, model_scheduler
 
 
 logger = logging.getLogger("void-system")
@@ -66,6 +76,9 @@ class ApplicationOptions:
     bootstrap_admin: Optional[bool] = None
     enable_plan_generation_worker: bool = True
     enable_knowledge_job_worker: bool = True
+    enable_analytics_rollup_worker: bool = True
+    enable_trigger_schedule_worker: bool = True
+    enable_session_attachment_sweeper: bool = True
     settings: Optional[RuntimeSettings] = None
 
 
@@ -181,7 +194,8 @@ def _register_langserve_routes(app: FastAPI) -> None:
     """Expose the optional legacy persona chain endpoint when explicitly enabled."""
     try:
         from langchain_core.runnables import RunnableLambda
-        from langserve import add_routes        from services.ai_services.persona_chain import load_persona_chain
+        from langserve import add_routes
+        from services.ai_services.persona_chain import load_persona_chain
 
         def purge_internal_prompt(output: Any) -> Any:
             if isinstance(output, dict) and "content" in output:
@@ -259,9 +273,12 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
                 any vector or retrieval resource that was bound to the old profile.
                 """
                 app.state.runtime_settings = next_settings
+                model_clients.invalidate()
+                model_scheduler.prune_idle()
                 app.state.user_knowledge_resources = None
                 app.state.user_knowledge_workspace = None
                 app.state.system_knowledge_resources = None
+                app.state.vision_caption_cache = None
 
             app.state.ai_configuration = AIConfigurationManager(
                 _ENV_FILE,
@@ -270,9 +287,13 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
             )
             app.state.plan_generation_worker = None
             app.state.knowledge_job_worker = None
+            app.state.analytics_rollup_worker = None
+            app.state.trigger_schedule_worker = None
+            app.state.session_attachment_sweeper = None
             app.state.user_knowledge_resources = None
             app.state.user_knowledge_workspace = None
             app.state.knowledge_resources_lock = threading.Lock()
+            app.state.vision_caption_cache = None
             app.state.system_knowledge_resources = None
             app.state.system_knowledge_resources_lock = threading.Lock()
             if bootstrap_admin:
@@ -291,9 +312,10 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
             if options.enable_plan_generation_worker:
                 plan_generation_service = get_plan_generation_service(database)
                 identity_repository = SQLiteIdentityRepository(database.get_connection)
+                plan_result_cache = SQLitePlanResultCache(database.get_connection)
 
                 def execute_generation_job(job: dict[str, Any]) -> None:
-                    def generate(job_snapshot: dict[str, Any], report: Callable[[str, int], bool]) -> dict[str, Any]:
+                    def generate(job_snapshot: dict[str, Any], report: Callable[..., bool]) -> dict[str, Any]:
                         user = identity_repository.get_user_by_id(str(job_snapshot["user_id"]))
                         if user is None or not user.get("is_active", True):
                             raise VoidSystemException(
@@ -310,9 +332,12 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
                             max_steps=int(job_snapshot["max_steps"]),
                             advisor_prefs=dict(job_snapshot.get("advisor_prefs") or {}),
                             progress_callback=report,
+                            result_cache=plan_result_cache,
+                            use_cached_result=not job_snapshot.get("regenerate", False),
                         )
 
-                    plan_generation_service.execute_claimed(job, generate)
+                    with model_call_priority(BACKGROUND):
+                        plan_generation_service.execute_claimed(job, generate)
 
                 worker = PlanGenerationWorker(plan_generation_service, execute_generation_job)
                 worker.start()
@@ -333,7 +358,8 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
                             )
                         )
 
-                    knowledge_job_service.execute_claimed(job, process)
+                    with model_call_priority(BACKGROUND):
+                        knowledge_job_service.execute_claimed(job, process)
 
                 knowledge_worker = KnowledgeJobWorker(knowledge_job_service, execute_knowledge_job)
                 knowledge_worker.start()
@@ -358,6 +384,18 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
                     # the encrypted vector migration retries when the service is
                     # next started with a working embedding configuration.
                     logger.exception("Private knowledge encrypted index rebuild could not be queued")
+            if options.enable_analytics_rollup_worker:
+                rollup_worker = AnalyticsRollupWorker(SQLiteAnalyticsRepository(database.get_connection))
+                rollup_worker.start()
+                app.state.analytics_rollup_worker = rollup_worker
+            if options.enable_trigger_schedule_worker:
+                schedule_worker = TriggerScheduleWorker(get_task_automation(database, runtime_settings))
+                schedule_worker.start()
+                app.state.trigger_schedule_worker = schedule_worker
+            if options.enable_session_attachment_sweeper:
+                sweeper = SessionAttachmentSweeper(SessionAttachments(LegacySessionAttachmentGateway(database)))
+                sweeper.start()
+                app.state.session_attachment_sweeper = sweeper
             yield
         finally:
             app.state.user_knowledge_resources = None
@@ -371,6 +409,20 @@ def create_app(options: Optional[ApplicationOptions] = None) -> FastAPI:
             if knowledge_worker is not None:
                 knowledge_worker.stop()
             app.state.knowledge_job_worker = None
+            rollup_worker = getattr(app.state, "analytics_rollup_worker", None)
+            if rollup_worker is not None:
+                rollup_worker.stop()
+            app.state.analytics_rollup_worker = None
+            schedule_worker = getattr(app.state, "trigger_schedule_worker", None)
+            if schedule_worker is not None:
+                schedule_worker.stop()
+            app.state.trigger_schedule_worker = None
+            sweeper = getattr(app.state, "session_attachment_sweeper", None)
+            if sweeper is not None:
+                sweeper.stop()
+            app.state.session_attachment_sweeper = None
+            model_clients.close()
+            document_parser.close()
             app.state.ai_configuration = None
             app.state.database = None
             if database is not None:
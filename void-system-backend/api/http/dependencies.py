@@ -105,6 +105,39 @@ def get_user_library_catalog(
     )
 
 
+def get_vision_caption_cache(
+    request: Request,
+    db: Database = Depends(get_db),
+    settings: RuntimeSettings = Depends(get_runtime_settings),
+):
+    """Provide the durable caption cache shared by session images and knowledge images.
+
+    Built once per application and settings publication, so the encryption key is not
+    resolved again on every request.
+    """
+    cache = getattr(request.app.state, "vision_caption_cache", None)
+    if cache is not None:
+        return cache
+    lock = getattr(request.app.state, "knowledge_resources_lock", None)
+    if lock is None:
+        from threading import Lock
+
+        lock = Lock()
+        request.app.state.knowledge_resources_lock = lock
+    with lock:
+        cache = getattr(request.app.state, "vision_caption_cache", None)
+        if cache is None:
+            from adapters.sqlite.vision_caption_cache import SQLiteVisionCaptionCache
+            from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
+
+            cache = SQLiteVisionCaptionCache(
+                db.get_connection,
+                cipher=KnowledgeSourceCipher(settings, settings.BASE_DIR / "user_documents"),
+            )
+            request.app.state.vision_caption_cache = cache
+    return cache
+
+
 def get_system_knowledge_catalog(
     db: Database = Depends(get_db),
 ):
@@ -14,6 +14,7 @@ from api.http.schemas.administration import (
 )
 from errors import VoidSystemException
 from modules.administration.ai_configuration import AIConfigurationError, AIConfigurationManager
+from services.ai_services.model_scheduler import model_scheduler
 
 
 router = APIRouter(prefix="/api/admin/system", tags=["系统配置"])
@@ -48,6 +49,29 @@ async def get_ai_runtime_config(
     return create_success_response("模型连接配置获取成功", data=data)
 
 
+@router.get("/ai-calls", summary="获取模型调用队列状态", response_model=APIResponse)
+async def get_ai_call_queues(
+    current_admin: Dict[str, Any] = Depends(get_current_admin),
+) -> APIResponse:
+    """Report per-profile model call occupancy, rejections, and recent queue waits."""
+    del current_admin
+    return create_success_response("模型调用队列状态获取成功", data={"lanes": model_scheduler.snapshot()})
+
+
+@router.get("/session-attachment-sweeps", summary="获取会话附件过期清理状态", response_model=APIResponse)
+async def get_session_attachment_sweeps(
+    request: Request,
+    current_admin: Dict[str, Any] = Depends(get_current_admin),
+) -> APIResponse:
+    """Report the expired-attachment sweeper's last tick and cumulative counts."""
+    del current_admin
+    sweeper = getattr(request.app.state, "session_attachment_sweeper", None)
+    return create_success_response(
+        "会话附件清理状态获取成功",
+        data={"enabled": sweeper is not None, "sweeper": sweeper.snapshot() if sweeper is not None else None},
+    )
+
+
 @router.put("/ai-config", summary="更新模型连接配置", response_model=APIResponse)
 async def update_ai_runtime_config(
     payload: AIConfigUpdateRequest,
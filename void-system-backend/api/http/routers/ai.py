@@ -18,6 +18,7 @@ from api.http.dependencies import (
     get_runtime_settings,
     get_user_knowledge_resources,
     get_session_attachments,
+    get_vision_caption_cache,
 )
 from api.http.responses import APIResponse, create_success_response
 from core.knowledge_contracts import KnowledgeQuery, KnowledgeScope
@@ -40,6 +41,7 @@ _CONFIGURATION_MESSAGES = {
     "AI_CREDENTIAL_REQUIRED": "当前 AI 服务缺少访问密钥，请由管理员补全配置。",
     "AI_ENDPOINT_REQUIRED": "当前 AI 服务缺少上游地址，请由管理员补全配置。",
     "AI_PROTOCOL_NOT_SUPPORTED": "当前 AI 服务协议不受支持，请检查系统配置。",
+    "AI_PROVIDER_BUSY": "AI 服务繁忙，请稍后重试。",
 }
 
 
@@ -193,6 +195,7 @@ async def stream_chat_endpoint(
                     current_user["user_id"],
                     current_user,
                     purpose="conversation_assist",
+                    query=payload.text,
                 )
                 personal_context = companion.render_ai_context(context_snapshot)
                 if context_snapshot.get("permissions", {}).get("knowledge", False):
@@ -273,6 +276,7 @@ async def image_caption_endpoint(
     current_user: Dict[str, Any] = Depends(get_current_user),
     attachments: SessionAttachments = Depends(get_session_attachments),
     settings: RuntimeSettings = Depends(get_runtime_settings),
+    caption_cache: Any = Depends(get_vision_caption_cache),
 ) -> APIResponse:
     from services.ai_services.vision_caption import caption_one_image_data_url
 
@@ -281,7 +285,7 @@ async def image_caption_endpoint(
     except SessionAttachmentError as exc:
         raise HTTPException(status_code=exc.status_code, detail=exc.message) from exc
     try:
-        summary = await caption_one_image_data_url(data_url, settings=settings)
+        summary = await caption_one_image_data_url(data_url, settings=settings, cache=caption_cache)
     except ModelConnectionError as exc:
         raise _model_connection_http_error(exc) from exc
     except Exception as exc:
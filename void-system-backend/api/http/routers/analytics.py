@@ -8,7 +8,7 @@ from typing import Any, Dict
 from fastapi import APIRouter, Depends, Query, status as http_status
 
 from api.http.dependencies import get_analytics_dashboard, get_analytics_repository, get_current_admin, get_current_user
-from core.analytics_contracts import AnalyticsRepository
+from core.analytics_contracts import HOUR_TREND_MAX_DAYS, AnalyticsRepository
 from api.http.responses import APIResponse, create_success_response
 from errors import VoidSystemException
 from modules.analytics.dashboard import AnalyticsDashboard
@@ -18,6 +18,11 @@ logger = logging.getLogger("void-system.analytics")
 router = APIRouter(tags=["Analytics"])
 
 
+def _period_days(days: int, granularity: str) -> int:
+    """Clamp an hourly window to the hour buckets that are still retained."""
+    return min(days, HOUR_TREND_MAX_DAYS) if granularity == "hour" else days
+
+
 @router.get("/api/stats/overview", summary="Get the user's dashboard overview", response_model=APIResponse)
 async def get_stats_overview(
     current_user: Dict[str, Any] = Depends(get_current_user),
@@ -59,18 +64,21 @@ async def get_visualization_overview(
 @router.get("/api/admin/visualization/users", summary="Get user analytics", response_model=APIResponse)
 async def get_users_visualization(
     days: int = Query(30, ge=1, le=365),
+    granularity: str = Query("day", pattern="^(day|hour)$"),
     current_admin: Dict[str, Any] = Depends(get_current_admin),
     repository: AnalyticsRepository = Depends(get_analytics_repository),
 ) -> APIResponse:
     del current_admin
+    days = _period_days(days, granularity)
     try:
         return create_success_response(
             "User analytics loaded",
             data={
-                "registration_trend": repository.user_registration_trend(days),
+                "registration_trend": repository.user_registration_trend(days, granularity),
                 "activity_stats": repository.user_activity_stats(days),
                 "level_distribution": repository.user_level_distribution(),
                 "period_days": days,
+                "granularity": granularity,
             },
         )
     except Exception as exc:
@@ -85,19 +93,22 @@ async def get_users_visualization(
 @router.get("/api/admin/visualization/tasks", summary="Get task analytics", response_model=APIResponse)
 async def get_tasks_visualization(
     days: int = Query(30, ge=1, le=365),
+    granularity: str = Query("day", pattern="^(day|hour)$"),
     current_admin: Dict[str, Any] = Depends(get_current_admin),
     repository: AnalyticsRepository = Depends(get_analytics_repository),
 ) -> APIResponse:
     del current_admin
+    days = _period_days(days, granularity)
     try:
         return create_success_response(
             "Task analytics loaded",
             data={
                 "status_distribution": repository.task_status_distribution(),
-                "completion_trend": repository.task_completion_trend(days),
+                "completion_trend": repository.task_completion_trend(days, granularity),
                 "category_stats": repository.task_category_stats(),
                 "duration_stats": repository.task_duration_stats(),
                 "period_days": days,
+                "granularity": granularity,
             },
         )
     except Exception as exc:
@@ -136,18 +147,21 @@ async def get_attributes_visualization(
 @router.get("/api/admin/visualization/growth", summary="Get growth-point analytics", response_model=APIResponse)
 async def get_growth_visualization(
     days: int = Query(30, ge=1, le=365),
+    granularity: str = Query("day", pattern="^(day|hour)$"),
     current_admin: Dict[str, Any] = Depends(get_current_admin),
     repository: AnalyticsRepository = Depends(get_analytics_repository),
 ) -> APIResponse:
     del current_admin
+    days = _period_days(days, granularity)
     try:
         return create_success_response(
             "Growth-point analytics loaded",
             data={
-                "activity_trend": repository.growth_point_activity_trend(days),
+                "activity_trend": repository.growth_point_activity_trend(days, granularity),
                 "points_distribution": repository.growth_point_distribution(),
                 "health_metrics": repository.growth_point_health_metrics(),
                 "period_days": days,
+                "granularity": granularity,
             },
         )
     except Exception as exc:
@@ -1,5 +1,5 @@
 """HTTP Adapter for the Conversation module."""
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, Query
 
@@ -14,7 +14,16 @@ from api.http.schemas.conversations import (
 )
 from core.conversation_contracts import ConversationError
 from errors import VoidSystemException
-from modules.conversations.service import ConversationService
+from modules.conversations.service import (
+    DEFAULT_MESSAGE_PAGE_SIZE,
+    DEFAULT_SESSION_PAGE_SIZE,
+    MAX_MESSAGE_PAGE_SIZE,
+    MAX_SEARCH_OFFSET,
+    MAX_SEARCH_PAGE_SIZE,
+    MAX_SEARCH_QUERY_LENGTH,
+    MAX_SESSION_PAGE_SIZE,
+    ConversationService,
+)
 
 
 router = APIRouter(prefix="/api/chat", tags=["对话"])
@@ -30,13 +39,47 @@ def _translate_error(exc: ConversationError) -> VoidSystemException:
 
 @router.get("/groups", summary="获取对话分组及会话", response_model=APIResponse)
 async def get_chat_history(
+    session_limit: Optional[int] = Query(None, ge=1, le=MAX_SESSION_PAGE_SIZE, description="每组最多返回的会话数；省略时返回全部"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     conversations: ConversationService = Depends(get_conversation_service),
 ) -> APIResponse:
-    groups = conversations.list_groups(current_user["user_id"])
+    try:
+        groups = conversations.list_groups(current_user["user_id"], session_limit)
+    except ConversationError as exc:
+        raise _translate_error(exc) from exc
     return create_success_response("获取对话历史成功", data={"groups": groups})
 
 
+@router.get("/groups/{group_id}/sessions", summary="分页获取分组内会话", response_model=APIResponse)
+async def get_group_sessions(
+    group_id: str,
+    limit: int = Query(DEFAULT_SESSION_PAGE_SIZE, ge=1, le=MAX_SESSION_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, max_length=512),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    conversations: ConversationService = Depends(get_conversation_service),
+) -> APIResponse:
+    try:
+        page = conversations.list_group_sessions(current_user["user_id"], group_id, limit, cursor)
+    except ConversationError as exc:
+        raise _translate_error(exc) from exc
+    return create_success_response("获取分组会话成功", data=page)
+
+
+@router.get("/search", summary="搜索对话标题与消息", response_model=APIResponse)
+async def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_SEARCH_OFFSET),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    conversations: ConversationService = Depends(get_conversation_service),
+) -> APIResponse:
+    try:
+        page = conversations.search(current_user["user_id"], q, limit, offset)
+    except ConversationError as exc:
+        raise _translate_error(exc) from exc
+    return create_success_response("搜索对话成功", data=page)
+
+
 @router.post("/groups", summary="创建对话分组", response_model=APIResponse)
 async def create_chat_group(
     group_data: ChatGroupCreate,
@@ -149,17 +192,18 @@ async def duplicate_chat_session(
 @router.get("/sessions/{session_id}/messages", summary="获取历史消息", response_model=APIResponse)
 async def get_chat_messages(
     session_id: str,
-    limit: int = Query(100, ge=1, le=500),
+    limit: int = Query(DEFAULT_MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    before: Optional[str] = Query(None, max_length=512, description="上一页返回的 next_cursor；省略时返回最新消息"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     conversations: ConversationService = Depends(get_conversation_service),
 ) -> APIResponse:
     try:
-        messages = conversations.list_messages(
-            current_user["user_id"], session_id, limit
+        page = conversations.list_message_page(
+            current_user["user_id"], session_id, limit, before
         )
     except ConversationError as exc:
         raise _translate_error(exc) from exc
-    return create_success_response("获取消息成功", data={"messages": messages})
+    return create_success_response("获取消息成功", data=page)
 
 
 @router.post("/sessions/{session_id}/messages", summary="新增对话消息", response_model=APIResponse)
@@ -78,7 +78,7 @@ async def upload_user_document(
                 IngestSource(
                     owner_id=current_user["user_id"],
                     file_name=file_name,
-                    content=await file.read(),
+                    content=file.file,
                     title=title.strip() if title else None,
                     tags=tag_list,
                     scope=KnowledgeScope.USER,
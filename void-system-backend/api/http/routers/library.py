@@ -126,7 +126,7 @@ async def upload_private_library_documents(
         file_name = upload.filename or "untitled-upload"
         try:
             result = await resources.engine.ingest(IngestSource(
-                owner_id=current_user["user_id"], file_name=file_name, content=await upload.read(),
+                owner_id=current_user["user_id"], file_name=file_name, content=upload.file,
                 title=title.strip() if title else None, tags=tag_list, scope=KnowledgeScope.USER,
             ))
         except Exception:
@@ -62,6 +62,7 @@ async def get_companion_context(
     purpose: str = Query("companion_context", min_length=1, max_length=80),
     sections: Optional[List[str]] = Query(None),
     item_budget: int = Query(24, ge=1, le=100),
+    query: Optional[str] = Query(None, max_length=2000),
     current_user: Dict[str, Any] = Depends(get_current_user),
     companion: PersonalContext = Depends(get_personal_context),
 ) -> APIResponse:
@@ -72,6 +73,7 @@ async def get_companion_context(
             purpose=purpose,
             requested_sections=sections,
             item_budget=item_budget,
+            query=query,
         )
     except PersonalContextError as exc:
         raise _translate_error(exc) from exc
@@ -103,7 +103,9 @@ def _serialize_generation_job(job: Dict[str, Any]) -> Dict[str, Any]:
         "topic": job["topic"],
         "execution_mode": job["execution_mode"],
         "max_steps": job["max_steps"],
+        "regenerate": bool(job.get("regenerate", False)),
         "result": job.get("result"),
+        "partial_steps": job.get("partial_steps") or [],
         "draft_id": job.get("draft_id"),
         "error_message": job.get("error_message"),
         "created_at": job["created_at"],
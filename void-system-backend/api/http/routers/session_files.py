@@ -1,6 +1,7 @@
 """HTTP adapter for per-session temporary attachments."""
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, File, Query, UploadFile
@@ -42,9 +43,11 @@ async def session_upload_temporary(
     current_user: Dict[str, Any] = Depends(get_current_user),
     attachments: SessionAttachments = Depends(get_session_attachments),
 ) -> APIResponse:
+    file_data = await file.read()
     try:
-        result = attachments.upload(
-            current_user["user_id"], session_id, await file.read(), file.filename or "unnamed"
+        # Images are downscaled and normalized during upload; keep that off the event loop.
+        result = await asyncio.to_thread(
+            attachments.upload, current_user["user_id"], session_id, file_data, file.filename or "unnamed"
         )
     except SessionAttachmentError as exc:
         raise _translate_error(exc) from exc
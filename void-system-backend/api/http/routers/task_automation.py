@@ -3,10 +3,11 @@ from typing import Any, Dict
 
 from fastapi import APIRouter, Depends
 
-from api.http.dependencies import get_current_user, get_task_automation
+from api.http.dependencies import get_current_admin, get_current_user, get_task_automation
 from api.http.responses import APIResponse, create_success_response
 from api.http.schemas.task_automation import (
     TriggerCreate,
+    TriggerEventDelivery,
     TriggerFireRequest,
     TriggerUpdate,
 )
@@ -137,3 +138,34 @@ async def fire_trigger(
     except TaskAutomationError as exc:
         raise _translate_error(exc) from exc
     return create_success_response("Trigger fired", result)
+
+
+@router.post("/api/trigger-events", summary="Deliver an event to my triggers", response_model=APIResponse)
+async def deliver_trigger_event(
+    request: TriggerEventDelivery,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    automation: TaskAutomation = Depends(get_task_automation),
+) -> APIResponse:
+    try:
+        result = automation.ingest_event(
+            request.event_type,
+            request.source_key,
+            request.payload,
+            user_id=current_user["user_id"],
+        )
+    except TaskAutomationError as exc:
+        raise _translate_error(exc) from exc
+    return create_success_response("Event delivered", result)
+
+
+@router.post("/api/admin/trigger-events", summary="Deliver an event to all subscribed triggers", response_model=APIResponse)
+async def deliver_trigger_event_to_all_owners(
+    request: TriggerEventDelivery,
+    current_admin: Dict[str, Any] = Depends(get_current_admin),
+    automation: TaskAutomation = Depends(get_task_automation),
+) -> APIResponse:
+    try:
+        result = automation.ingest_event(request.event_type, request.source_key, request.payload)
+    except TaskAutomationError as exc:
+        raise _translate_error(exc) from exc
+    return create_success_response("Event delivered", result)
@@ -1,13 +1,14 @@
 """HTTP Adapter for durable Goal and Run execution."""
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, Query, Response
 
 from api.http.dependencies import get_current_user, get_task_execution
 from api.http.responses import APIResponse, create_success_response
 from api.http.schemas.task_execution import (
     ActionCompleteRequest,
     ActionStartRequest,
+    ApprovalBatchRequest,
     ApprovalDecisionRequest,
     ApprovalRequest,
     GoalCreate,
@@ -16,6 +17,7 @@ from api.http.schemas.task_execution import (
     RunCreate,
     RunReviewUpdate,
     AssistedStepReviewRequest,
+    StepCommandBatchRequest,
     StepCompleteRequest,
     StepFailRequest,
 )
@@ -35,6 +37,34 @@ def _translate_error(exc: TaskExecutionError) -> VoidSystemException:
     )
 
 
+def _etag(version: Any) -> str:
+    return f'"{int(version)}"'
+
+
+def _command_options(
+    if_match: Optional[str] = Header(None),
+    prefer: Optional[str] = Header(None),
+) -> Dict[str, Any]:
+    """Read a command's Run version precondition and response preference.
+
+    ``If-Match`` carries the ETag of the Run snapshot the client acted on; ``*`` or no
+    header applies the command to the current state. ``Prefer: return=minimal`` returns
+    only the Run status projection instead of the full snapshot.
+    """
+    expected_version = None
+    if if_match and if_match.strip() != "*":
+        tag = if_match.strip().removeprefix("W/").strip('"')
+        if not tag.isdigit():
+            raise VoidSystemException(
+                message="If-Match must carry a Run ETag.",
+                error_code="INVALID_PRECONDITION",
+                status_code=400,
+            )
+        expected_version = int(tag)
+    minimal = "return=minimal" in (prefer or "").replace(" ", "").lower()
+    return {"expected_version": expected_version, "hydrate": not minimal}
+
+
 @router.post("/api/goals", summary="创建目标", response_model=APIResponse)
 async def create_goal(
     request: GoalCreate,
@@ -124,13 +154,23 @@ async def list_runs(
 @router.get("/api/runs/{run_id}", summary="获取执行详情", response_model=APIResponse)
 async def get_run(
     run_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     current_user: Dict[str, Any] = Depends(get_current_user),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
+        if if_none_match:
+            state = execution.get_run_state(current_user["user_id"], run_id)
+            etag = _etag(state["version"])
+            # get_run_state raised above for a missing Run, so "*" matches here.
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or etag in tags:
+                return Response(status_code=304, headers={"ETag": etag})
         run = execution.get_run(current_user["user_id"], run_id)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行详情已更新", {"run": run})
 
 
@@ -179,39 +219,48 @@ async def list_run_events(
 @router.post("/api/runs/{run_id}/start", summary="开始执行", response_model=APIResponse)
 async def start_run(
     run_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.start_run(current_user["user_id"], run_id)
+        run = execution.start_run(current_user["user_id"], run_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行已开始", {"run": run})
 
 
 @router.post("/api/runs/{run_id}/pause", summary="暂停执行", response_model=APIResponse)
 async def pause_run(
     run_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.pause_run(current_user["user_id"], run_id)
+        run = execution.pause_run(current_user["user_id"], run_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行已暂停", {"run": run})
 
 
 @router.post("/api/runs/{run_id}/resume", summary="继续执行", response_model=APIResponse)
 async def resume_run(
     run_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.resume_run(current_user["user_id"], run_id)
+        run = execution.resume_run(current_user["user_id"], run_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行已继续", {"run": run})
 
 
@@ -219,26 +268,32 @@ async def resume_run(
 async def cancel_run(
     run_id: str,
     request: RunCancelRequest,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.cancel_run(current_user["user_id"], run_id, request.reason)
+        run = execution.cancel_run(current_user["user_id"], run_id, request.reason, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行已取消", {"run": run})
 
 
 @router.post("/api/runs/{run_id}/retry", summary="重新开始执行", response_model=APIResponse)
 async def retry_run(
     run_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.retry_run(current_user["user_id"], run_id)
+        run = execution.retry_run(current_user["user_id"], run_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("执行已重新开始", {"run": run})
 
 
@@ -246,13 +301,16 @@ async def retry_run(
 async def start_step(
     run_id: str,
     step_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.start_step(current_user["user_id"], run_id, step_id)
+        run = execution.start_step(current_user["user_id"], run_id, step_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("步骤已开始", {"run": run})
 
 
@@ -260,13 +318,16 @@ async def start_step(
 async def skip_step(
     run_id: str,
     step_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.skip_step(current_user["user_id"], run_id, step_id)
+        run = execution.skip_step(current_user["user_id"], run_id, step_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("步骤已跳过", {"run": run})
 
 
@@ -275,7 +336,9 @@ async def complete_step(
     run_id: str,
     step_id: str,
     request: StepCompleteRequest,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
@@ -285,12 +348,36 @@ async def complete_step(
             step_id,
             output_data=request.output_data,
             artifacts=[item.model_dump() for item in request.artifacts],
+            **options,
         )
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("步骤已完成", {"run": run})
 
 
+@router.post("/api/runs/{run_id}/steps/batch", summary="批量处理步骤", response_model=APIResponse)
+async def apply_step_commands(
+    run_id: str,
+    request: StepCommandBatchRequest,
+    response: Response,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
+    execution: TaskExecution = Depends(get_task_execution),
+) -> APIResponse:
+    try:
+        result = execution.apply_step_commands(
+            current_user["user_id"],
+            run_id,
+            [item.model_dump() for item in request.commands],
+            expected_version=options["expected_version"],
+        )
+    except TaskExecutionError as exc:
+        raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(result["version"])
+    return create_success_response("步骤已批量更新", {"batch": result})
+
+
 @router.post(
     "/api/runs/{run_id}/steps/{step_id}/review",
     summary="Submit evidence for system-assisted review",
@@ -317,15 +404,18 @@ async def fail_step(
     run_id: str,
     step_id: str,
     request: StepFailRequest,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
         run = execution.fail_step(
-            current_user["user_id"], run_id, step_id, request.error_summary
+            current_user["user_id"], run_id, step_id, request.error_summary, **options
         )
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("步骤失败已记录", {"run": run})
 
 
@@ -333,13 +423,16 @@ async def fail_step(
 async def retry_step(
     run_id: str,
     step_id: str,
+    response: Response,
     current_user: Dict[str, Any] = Depends(get_current_user),
+    options: Dict[str, Any] = Depends(_command_options),
     execution: TaskExecution = Depends(get_task_execution),
 ) -> APIResponse:
     try:
-        run = execution.retry_step(current_user["user_id"], run_id, step_id)
+        run = execution.retry_step(current_user["user_id"], run_id, step_id, **options)
     except TaskExecutionError as exc:
         raise _translate_error(exc) from exc
+    response.headers["ETag"] = _etag(run["version"])
     return create_success_response("步骤已准备重试", {"run": run})
 
 
@@ -377,6 +470,21 @@ async def resolve_approval(
     return create_success_response(message, {"run": run})
 
 
+@router.post("/api/approvals/resolve", summary="批量处理确认请求", response_model=APIResponse)
+async def resolve_approvals(
+    request: ApprovalBatchRequest,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    execution: TaskExecution = Depends(get_task_execution),
+) -> APIResponse:
+    try:
+        result = execution.resolve_approvals(
+            current_user["user_id"], [item.model_dump() for item in request.decisions]
+        )
+    except TaskExecutionError as exc:
+        raise _translate_error(exc) from exc
+    return create_success_response("确认请求已批量处理", result)
+
+
 @router.post("/api/runs/{run_id}/steps/{step_id}/actions", summary="记录执行动作", response_model=APIResponse)
 async def start_action(
     run_id: str,
@@ -11,6 +11,7 @@ class RunPlanRequest(BaseModel):
     execution_mode: Literal["manual", "assisted"] = "assisted"
     max_steps: int = Field(8, ge=1, le=20)
     advisor_prefs: Dict[str, Any] = Field(default_factory=dict)
+    regenerate: bool = False
 
 
 class PlanDraftUpdateRequest(BaseModel):
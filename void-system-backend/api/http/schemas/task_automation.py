@@ -31,3 +31,9 @@ class TriggerUpdate(BaseModel):
 class TriggerFireRequest(BaseModel):
     source_key: str = Field(..., min_length=1, max_length=200)
     payload: Dict[str, Any] = Field(default_factory=dict)
+
+
+class TriggerEventDelivery(BaseModel):
+    event_type: str = Field(..., min_length=1, max_length=200)
+    source_key: str = Field(..., min_length=1, max_length=200)
+    payload: Dict[str, Any] = Field(default_factory=dict)
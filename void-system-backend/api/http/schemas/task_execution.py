@@ -98,6 +98,33 @@ class ApprovalDecisionRequest(BaseModel):
     note: Optional[str] = Field(None, max_length=2000)
 
 
+class StepCommand(BaseModel):
+    op: Literal["start", "complete", "skip", "resolve_approval"]
+    step_id: str = Field(..., min_length=1, max_length=100)
+    output_data: Dict[str, Any] = Field(default_factory=dict)
+    artifacts: List[ArtifactCreate] = Field(default_factory=list, max_length=50)
+    decision: Optional[Literal["approved", "rejected"]] = None
+    note: Optional[str] = Field(None, max_length=2000)
+
+    @model_validator(mode="after")
+    def require_decision(self) -> "StepCommand":
+        if self.op == "resolve_approval" and self.decision is None:
+            raise ValueError("decision is required to resolve an approval")
+        return self
+
+
+class StepCommandBatchRequest(BaseModel):
+    commands: List[StepCommand] = Field(..., min_length=1, max_length=100)
+
+
+class ApprovalBatchDecision(ApprovalDecisionRequest):
+    approval_id: str = Field(..., min_length=1, max_length=100)
+
+
+class ApprovalBatchRequest(BaseModel):
+    decisions: List[ApprovalBatchDecision] = Field(..., min_length=1, max_length=100)
+
+
 class ActionStartRequest(BaseModel):
     action_type: Optional[str] = Field(None, max_length=60)
     tool_name: Optional[str] = Field(None, max_length=200)
@@ -17,6 +17,7 @@ backend_dir = os.path.dirname(os.path.dirname(__file__))
 if backend_dir not in sys.path:
     sys.path.insert(0, backend_dir)
 
+from api.session_file_access import prepare_session_image_payload, remove_session_file
 from database import Database
 
 logger: logging.Logger = logging.getLogger("void-system-session")
@@ -78,6 +79,8 @@ class SessionContextManager:
                 user_dir.mkdir(parents=True, exist_ok=True)
                 disk_path = user_dir / f"{file_id}.{ext}"
                 disk_path.write_bytes(file_data)
+                # 上传时一次性缩放归一化，对话轮次直接复用该载荷。
+                prepare_session_image_payload(file_data, file_name, disk_path)
                 storage_path = str(disk_path.resolve())
                 mime_type = mimetypes.guess_type(file_name)[0] or f"image/{ext}"
                 content_preview = f"[图片文件] {file_name}"
@@ -133,7 +136,6 @@ class SessionContextManager:
     def get_session_context(self, user_id: str, session_id: str) -> Dict[str, Any]:
         try:
             session_files = self.db.get_user_session_files(user_id, session_id)
-            self.cleanup_expired_files()
             return {
                 "success": True,
                 "session_id": session_id,
@@ -177,7 +179,7 @@ class SessionContextManager:
             sp = prev.get("storage_path")
             if sp:
                 try:
-                    Path(sp).unlink(missing_ok=True)
+                    remove_session_file(sp)
                 except OSError as oe:
                     logger.warning(f"删除磁盘临时文件失败 {sp}: {oe}")
             return {"success": True, "message": "临时文件删除成功"}
@@ -188,28 +190,29 @@ class SessionContextManager:
                 "message": f"删除临时文件失败: {str(e)}",
             }
 
-    def cleanup_expired_files(self) -> Dict[str, Any]:
-        try:
-            paths = self.db.list_expired_session_file_storage_paths()
-            for p in paths:
+    def sweep_expired_files(self, limit: int) -> Dict[str, int]:
+        """删除一批已过期的临时文件：先删磁盘文件，再删对应记录。
+
+        由后台清理任务调用；读取路径只按 expires_at 过滤，从不删除。
+        磁盘删除失败的记录保留，下次清理时重试，避免遗留无记录的孤儿文件。
+        """
+        rows = self.db.list_expired_session_files(limit)
+        removed_files = 0
+        file_errors = 0
+        removable_ids = []
+        for row in rows:
+            storage_path = row.get("storage_path")
+            if storage_path:
                 try:
-                    Path(p).unlink(missing_ok=True)
+                    remove_session_file(storage_path)
+                    removed_files += 1
                 except OSError as oe:
-                    logger.warning(f"清理过期文件磁盘失败 {p}: {oe}")
-            deleted_count = self.db.cleanup_expired_session_files()
-            if deleted_count > 0:
-                logger.info(f"清理了 {deleted_count} 个过期的临时文件")
-            return {
-                "success": True,
-                "message": f"清理了 {deleted_count} 个过期的临时文件",
-                "deleted_count": deleted_count,
-            }
-        except Exception as e:
-            logger.error(f"清理过期文件失败: {str(e)}")
-            return {
-                "success": False,
-                "message": f"清理过期文件失败: {str(e)}",
-            }
+                    file_errors += 1
+                    logger.warning(f"清理过期文件磁盘失败 {storage_path}: {oe}")
+                    continue
+            removable_ids.append(row["id"])
+        deleted_rows = self.db.delete_expired_session_files(removable_ids)
+        return {"expired_rows": len(rows), "deleted_rows": deleted_rows, "removed_files": removed_files, "file_errors": file_errors}
 
     def get_user_session_stats(self, user_id: str) -> Dict[str, Any]:
         try:
@@ -297,7 +300,6 @@ class SessionContextManager:
 
     def get_active_sessions(self, user_id: str) -> Dict[str, Any]:
         try:
-            self.cleanup_expired_files()
             sessions = self.db.list_active_session_file_summaries(user_id)
             return {
                 "success": True,
@@ -1,32 +1,77 @@
 """
 会话临时文件：读盘转 data URL（与路由鉴权解耦，仅做行级一致性检查）。
+
+图片在上传时按知识库图片同样的边界缩放并归一化一次，结果以 data URL 文本
+保存在原文件旁；每轮对话只读取该文本，不再重新读取原图并编码。
 """
 from __future__ import annotations
 
 import base64
 import logging
 import mimetypes
+import os
+import uuid
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 from database import Database
+from services.ai_services.vision_caption import image_data_url_for_vision
 
 logger = logging.getLogger("void-system-session")
 
+_PREPARED_PAYLOAD_SUFFIX = ".vision"
+
+
+def prepared_payload_path(storage_path: Union[str, Path]) -> Path:
+    """返回存放已归一化 data URL 的旁路文件路径。"""
+    path = Path(storage_path)
+    return path.with_name(f"{path.name}{_PREPARED_PAYLOAD_SUFFIX}")
+
+
+def prepare_session_image_payload(file_data: bytes, file_name: str, storage_path: Union[str, Path]) -> str:
+    """缩放并归一化一张会话图片，把 data URL 原子写到原文件旁并返回。
+
+    无法解码或超出像素上限的图片保留原始字节，与归一化之前的行为一致。
+    """
+    try:
+        data_url = image_data_url_for_vision(file_data, file_name)
+    except ValueError:
+        mime = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        data_url = f"data:{mime};base64,{base64.standard_b64encode(file_data).decode('ascii')}"
+    target = prepared_payload_path(storage_path)
+    temporary = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        temporary.write_text(data_url, encoding="ascii")
+        os.replace(temporary, target)
+    finally:
+        temporary.unlink(missing_ok=True)
+    return data_url
+
+
+def remove_session_file(storage_path: Union[str, Path]) -> None:
+    """删除会话原文件及其归一化旁路文件；OSError 由调用方记录。"""
+    for path in (Path(storage_path), prepared_payload_path(storage_path)):
+        path.unlink(missing_ok=True)
+
 
 def session_file_row_to_data_url(row: Dict[str, Any]) -> Optional[str]:
     """将已校验的 user_session_files 行转为 data URL。"""
     path_str = row.get("storage_path")
     if not path_str:
         return None
+    try:
+        return prepared_payload_path(path_str).read_text(encoding="ascii")
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("读取会话图片载荷失败 %s: %s", path_str, e)
+        return None
     p = Path(path_str)
     if not p.is_file():
         return None
-    mime = row.get("mime_type") or mimetypes.guess_type(row.get("file_name") or "")[0] or "application/octet-stream"
     try:
-        raw = p.read_bytes()
-        b64 = base64.standard_b64encode(raw).decode("ascii")
-        return f"data:{mime};base64,{b64}"
+        # 归一化上线前上传的图片在首次使用时补做一次。
+        return prepare_session_image_payload(p.read_bytes(), row.get("file_name") or p.name, p)
     except OSError as e:
         logger.warning("读取会话文件失败 %s: %s", path_str, e)
         return None
@@ -45,11 +90,14 @@ def load_session_image_data_url(
 def build_data_urls_for_session_files(
     db: Database, user_id: str, session_id: str, file_ids: List[str]
 ) -> List[str]:
+    """按请求顺序返回仍有效的会话图片；所有文件行由一次查询读取。"""
+    rows = {row["id"]: row for row in db.get_user_session_files_by_ids(user_id, session_id, file_ids)}
     urls: List[str] = []
     for fid in file_ids:
-        if not fid:
+        row = rows.get(fid)
+        if row is None:
             continue
-        u = load_session_image_data_url(db, user_id, session_id, fid)
+        u = session_file_row_to_data_url(row)
         if u:
             urls.append(u)
     return urls
@@ -4,6 +4,10 @@ from __future__ import annotations
 from typing import Any, Dict, List, Protocol
 
 
+# Hour buckets are kept this long, so hourly trends cover at most this many days.
+HOUR_TREND_MAX_DAYS = 31
+
+
 class AnalyticsRepository(Protocol):
     def user_overview(self, user_id: str) -> Dict[str, Any]: ...
     def global_user_stats(self) -> Dict[str, Any]: ...
@@ -11,16 +15,18 @@ class AnalyticsRepository(Protocol):
     def global_attribute_stats(self) -> Dict[str, Any]: ...
     def global_growth_point_stats(self) -> Dict[str, Any]: ...
     def global_document_stats(self) -> Dict[str, Any]: ...
-    def user_registration_trend(self, days: int) -> List[Dict[str, Any]]: ...
+    def user_registration_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]: ...
     def user_activity_stats(self, days: int) -> Dict[str, Any]: ...
     def user_level_distribution(self) -> List[Dict[str, Any]]: ...
     def task_status_distribution(self) -> List[Dict[str, Any]]: ...
-    def task_completion_trend(self, days: int) -> List[Dict[str, Any]]: ...
+    def task_completion_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]: ...
     def task_category_stats(self) -> List[Dict[str, Any]]: ...
     def task_duration_stats(self) -> Dict[str, Any]: ...
     def attribute_type_distribution(self) -> List[Dict[str, Any]]: ...
     def attribute_value_distribution(self) -> List[Dict[str, Any]]: ...
     def popular_attributes(self, limit: int) -> List[Dict[str, Any]]: ...
-    def growth_point_activity_trend(self, days: int) -> List[Dict[str, Any]]: ...
+    def growth_point_activity_trend(self, days: int, granularity: str = "day") -> List[Dict[str, Any]]: ...
     def growth_point_distribution(self) -> List[Dict[str, Any]]: ...
     def growth_point_health_metrics(self) -> Dict[str, Any]: ...
+    def refresh_rollups(self) -> Dict[str, str]: ...
+    def backfill_rollups(self) -> Dict[str, str]: ...
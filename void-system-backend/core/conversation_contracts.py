@@ -1,6 +1,6 @@
 """Contracts for user-owned conversation persistence."""
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Protocol
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 
 
 @dataclass(frozen=True)
@@ -14,7 +14,8 @@ class ConversationError(Exception):
 
 
 class ConversationRepository(Protocol):
-    def list_groups(self, user_id: str) -> List[Dict[str, Any]]: ...
+    def list_groups(self, user_id: str, session_limit: Optional[int] = None) -> List[Dict[str, Any]]: ...
+    def list_group_sessions(self, user_id: str, group_id: str, limit: int, after: Optional[Tuple[str, str]] = None) -> Optional[List[Dict[str, Any]]]: ...
     def create_group(self, user_id: str, name: str) -> str: ...
     def update_group(self, user_id: str, group_id: str, name: str) -> bool: ...
     def delete_group(self, user_id: str, group_id: str) -> bool: ...
@@ -22,6 +23,16 @@ class ConversationRepository(Protocol):
     def update_session(self, user_id: str, session_id: str, name: Optional[str], group_id: Optional[str]) -> bool: ...
     def delete_session(self, user_id: str, session_id: str) -> bool: ...
     def duplicate_session(self, user_id: str, session_id: str) -> Optional[str]: ...
-    def list_messages(self, user_id: str, session_id: str, limit: int) -> Optional[List[Dict[str, Any]]]: ...
+    def list_messages(
+        self,
+        user_id: str,
+        session_id: str,
+        limit: int,
+        before: Optional[Tuple[str, str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]: ...
     def add_message(self, user_id: str, session_id: str, role: str, content: str, tokens: int, reply_to_id: Optional[str]) -> Optional[str]: ...
     def clear_messages(self, user_id: str, session_id: str) -> bool: ...
+
+    def search(
+        self, user_id: str, phrases: List[Tuple[str, ...]], limit: int, offset: int
+    ) -> List[Dict[str, Any]]: ...
@@ -9,7 +9,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Protocol, Sequence, Union
 
 
 class KnowledgeRetrievalError(RuntimeError):
@@ -39,11 +39,15 @@ class KnowledgeScope(str, Enum):
 
 @dataclass(frozen=True)
 class IngestSource:
-    """Raw document bytes plus product-level ownership metadata."""
+    """Raw document bytes, or a readable binary stream of them, plus ownership metadata.
+
+    Upload routes pass the request's spool file so ingestors can copy it in bounded
+    chunks instead of materializing the whole source in memory.
+    """
 
     owner_id: str
     file_name: str
-    content: bytes
+    content: Union[bytes, BinaryIO]
     scope: KnowledgeScope = KnowledgeScope.USER
     title: Optional[str] = None
     tags: Sequence[str] = field(default_factory=list)
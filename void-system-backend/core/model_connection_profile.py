@@ -8,6 +8,8 @@ successful connection test represents the configuration used at runtime.
 
 from __future__ import annotations
 
+import hashlib
+import json
 from dataclasses import dataclass, field
 from typing import Any, Mapping, Optional
 
@@ -68,6 +70,19 @@ class ModelConnectionProfile:
         """Return provider request fields shared by probes and runtime clients."""
         return self.extra_body
 
+    @property
+    def output_identity(self) -> str:
+        """Return a digest of everything that shapes model output except the credential.
+
+        Rotating an API key does not change what the model returns, so results cached
+        under this identity, such as vectors and image captions, survive it.
+        """
+        encoded = json.dumps(
+            [self.purpose, self.provider, self.protocol, self.base_url or "", self.model, dict(self.extra_body)],
+            sort_keys=True, default=str, ensure_ascii=False,
+        )
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
     def public_diagnostics(self) -> dict[str, Any]:
         """Return credential-free values for diagnostics and audit events."""
         return {
@@ -37,6 +37,12 @@ class PersonalContextRepository(Protocol):
         limit: int = 100,
     ) -> Sequence[Dict[str, Any]]: ...
 
+    def search_context_memories(
+        self, owner_id: str, query: Optional[str], *, limit: int
+    ) -> Sequence[Dict[str, Any]]: ...
+
+    def count_profile_memories(self, owner_id: str) -> int: ...
+
     def get_memory(self, owner_id: str, memory_id: str) -> Optional[Dict[str, Any]]: ...
 
     def find_memory_by_source(
@@ -7,7 +7,15 @@ can replace the active adapter without changing durable jobs or route handlers.
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Protocol, Sequence
+from typing import Any, Callable, Dict, List, Optional, Protocol, Sequence
+
+
+class PlanGenerationCancelled(Exception):
+    """Raised by an ``on_task`` callback to stop an engine that is still generating.
+
+    Engines let it propagate instead of falling back, so the caller can discard the
+    job without waiting for the model call to finish.
+    """
 
 
 @dataclass(frozen=True)
@@ -41,6 +49,11 @@ class PlanRequest:
     The interaction policy can affect plan explanation and the optional next
     action only. It cannot change the output schema, task state, authorization,
     rewards, or other execution semantics.
+
+    ``on_task`` optionally receives each normalized task while the engine is
+    still generating. Engines that cannot stream may ignore it; the returned
+    PlanResult remains the only authoritative output. The callback may raise
+    PlanGenerationCancelled to abort the stream.
     """
 
     topic: str
@@ -52,6 +65,9 @@ class PlanRequest:
     interaction_policy: PlanningInteractionPolicy = field(
         default_factory=PlanningInteractionPolicy
     )
+    on_task: Optional[Callable[["PlannedTask"], Any]] = field(
+        default=None, compare=False, repr=False
+    )
 
 
 @dataclass(frozen=True)
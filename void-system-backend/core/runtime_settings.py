@@ -76,6 +76,8 @@ class RuntimeSettings:
     OPENAI_BASE_URL: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None
     CHROMA_PERSIST_DIR: str = "chroma_db"
+    MODEL_MAX_CONCURRENCY: int = 0
+    MODEL_TOKENS_PER_MINUTE: int = 0
     LOG_LEVEL: str = "INFO"
     CORS_ORIGINS: list[str] = field(default_factory=lambda: list(DEFAULT_CORS_ORIGINS))
 
@@ -119,6 +121,8 @@ class RuntimeSettings:
             OPENAI_BASE_URL=source.get("OPENAI_BASE_URL") or None,
             GOOGLE_API_KEY=source.get("GOOGLE_API_KEY") or None,
             CHROMA_PERSIST_DIR=source.get("CHROMA_PERSIST_DIR", "chroma_db"),
+            MODEL_MAX_CONCURRENCY=_int(source, "MODEL_MAX_CONCURRENCY", 0),
+            MODEL_TOKENS_PER_MINUTE=_int(source, "MODEL_TOKENS_PER_MINUTE", 0),
             LOG_LEVEL=source.get("LOG_LEVEL", "INFO"),
             CORS_ORIGINS=_origins(source),
         )
@@ -1,7 +1,7 @@
 """Contracts for temporary attachment sessions."""
 from __future__ import annotations
 
-from typing import Any, Dict, Protocol
+from typing import Any, Dict, List, Protocol
 
 
 class SessionAttachmentError(Exception):
@@ -20,4 +20,6 @@ class SessionAttachmentGateway(Protocol):
     def active_sessions(self, user_id: str) -> Dict[str, Any]: ...
     def file_content(self, user_id: str, file_id: str) -> Dict[str, Any]: ...
     def image_data_url(self, user_id: str, session_id: str, file_id: str) -> str | None: ...
+    def image_data_urls(self, user_id: str, session_id: str, file_ids: List[str]) -> List[str]: ...
     def delete_file(self, user_id: str, file_id: str) -> Dict[str, Any]: ...
+    def sweep_expired(self, limit: int) -> Dict[str, int]: ...
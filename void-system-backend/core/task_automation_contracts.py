@@ -1,7 +1,7 @@
 """Portable contracts for Trigger-to-Run automation."""
 from __future__ import annotations
 
-from typing import Any, Dict, Mapping, Optional, Protocol, Sequence
+from typing import Any, Dict, List, Mapping, Optional, Protocol, Sequence
 
 
 class TaskAutomationError(Exception):
@@ -18,6 +18,11 @@ class TaskAutomationRepository(Protocol):
     def get_trigger(self, user_id: str, trigger_id: str) -> Optional[Dict[str, Any]]: ...
     def update_trigger(self, user_id: str, trigger_id: str, values: Mapping[str, Any]) -> bool: ...
     def delete_trigger(self, user_id: str, trigger_id: str) -> bool: ...
-    def set_trigger_status(self, user_id: str, trigger_id: str, status: str) -> bool: ...
+    def set_trigger_status(self, user_id: str, trigger_id: str, status: str, *, next_fire_at: Optional[str] = None) -> bool: ...
+    def store_compiled_run_plan(self, trigger_id: str, plan: Mapping[str, Any], *, expected_updated_at: str) -> bool: ...
     def get_firing(self, user_id: str, trigger_id: str, source_key: str) -> Optional[Dict[str, Any]]: ...
     def record_firing(self, user_id: str, trigger_id: str, source_key: str, run_id: str, payload: Mapping[str, Any]) -> Dict[str, Any]: ...
+    def claim_due_schedules(self, worker_id: str, *, limit: int = 100, lease_seconds: int = 120) -> List[Dict[str, Any]]: ...
+    def complete_schedule(self, trigger_id: str, lease_token: str, next_fire_at: str) -> bool: ...
+    def list_event_triggers(self, event_type: str, *, user_id: Optional[str] = None) -> List[Dict[str, Any]]: ...
+    def record_event_firings(self, source_key: str, payload: Mapping[str, Any], deliveries: Sequence[Mapping[str, Any]], *, batch_size: int = 200) -> List[Dict[str, Any]]: ...
@@ -17,6 +17,8 @@ STEP_KINDS = frozenset({"manual"})
 TERMINAL_RUN_STATUSES = frozenset({"completed", "failed", "cancelled"})
 TERMINAL_STEP_STATUSES = frozenset({"completed", "failed", "skipped", "cancelled"})
 SATISFIED_STEP_STATUSES = frozenset({"completed", "skipped"})
+STEP_COMMAND_OPS = frozenset({"start", "complete", "skip", "resolve_approval"})
+MAX_BATCH_COMMANDS = 100
 
 
 class TaskExecutionError(Exception):
@@ -81,6 +83,8 @@ class TaskExecutionRepository(Protocol):
         goal_id: str,
         values: Mapping[str, Any],
         steps: Sequence[Mapping[str, Any]],
+        *,
+        edges: Optional[Sequence[Sequence[int]]] = None,
     ) -> Dict[str, Any]: ...
     def list_runs(
         self,
@@ -90,6 +94,9 @@ class TaskExecutionRepository(Protocol):
         status: Optional[str] = None,
     ) -> Sequence[Dict[str, Any]]: ...
     def get_run(self, user_id: str, run_id: str) -> Optional[Dict[str, Any]]: ...
+    def get_run_state(
+        self, user_id: str, run_id: str, *, step_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]: ...
     def summarize_profile_behavior(self, user_id: str) -> Dict[str, Any]: ...
     def compare_and_set_run_status(
         self,
@@ -125,6 +132,7 @@ class TaskExecutionRepository(Protocol):
         error_summary: Optional[str] = None,
         cancel_open_steps: bool = False,
         publish_ready_steps: bool = False,
+        expected_version: Optional[int] = None,
     ) -> bool: ...
     def apply_step_transition(
         self,
@@ -147,6 +155,15 @@ class TaskExecutionRepository(Protocol):
         run_payload: Optional[Mapping[str, Any]] = None,
         run_error_summary: Optional[str] = None,
         complete_run_if_satisfied: bool = False,
+        expected_version: Optional[int] = None,
+    ) -> Dict[str, Any]: ...
+    def apply_step_commands(
+        self,
+        user_id: str,
+        run_id: str,
+        commands: Sequence[Mapping[str, Any]],
+        *,
+        expected_version: Optional[int] = None,
     ) -> Dict[str, Any]: ...
     def mark_ready_steps(self, user_id: str, run_id: str) -> Sequence[str]: ...
     def cancel_open_steps(self, user_id: str, run_id: str) -> None: ...
@@ -223,6 +240,8 @@ class TaskExecutionRepository(Protocol):
         step_id: str,
         expected_step_status: str,
         request: Mapping[str, Any],
+        *,
+        expected_version: Optional[int] = None,
     ) -> Optional[Dict[str, Any]]: ...
     def resolve_approval_transition(
         self,
@@ -231,3 +250,8 @@ class TaskExecutionRepository(Protocol):
         decision: str,
         note: Optional[str],
     ) -> Optional[str]: ...
+    def resolve_approvals(
+        self,
+        user_id: str,
+        decisions: Sequence[Mapping[str, Any]],
+    ) -> Dict[str, Any]: ...
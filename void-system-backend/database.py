@@ -86,6 +86,26 @@ class Database:
             Migration(36, "canonical_step_rewards_and_retire_marketplace", self._add_canonical_step_rewards_and_retire_marketplace),
             Migration(37, "canonical_growth_point_ledger", self._canonicalize_growth_point_ledger),
             Migration(38, "retire_legacy_user_experience", self._retire_legacy_user_experience),
+            Migration(39, "task_behavior_summaries", self._add_task_behavior_summaries),
+            Migration(40, "growth_point_projections", self._add_growth_point_projections),
+            Migration(41, "user_overview_rollups", self._add_user_overview_rollups),
+            Migration(42, "analytics_rollups", self._add_analytics_rollups),
+            Migration(43, "personal_memory_terms", self._add_personal_memory_terms),
+            Migration(44, "trigger_schedules", self._add_trigger_schedules),
+            Migration(45, "trigger_event_index", self._add_trigger_event_index),
+            Migration(46, "compiled_trigger_run_plans", self._add_compiled_trigger_run_plans),
+            Migration(47, "step_readiness_counters", self._add_step_readiness_counters),
+            Migration(48, "run_version_tracking", self._add_run_version_tracking),
+            Migration(49, "plan_generation_partial_steps", self._add_plan_generation_partial_steps),
+            Migration(50, "plan_result_cache", self._add_plan_result_cache),
+            Migration(51, "knowledge_ingestion_cache", self._add_knowledge_ingestion_cache),
+            Migration(52, "vision_caption_cache", self._add_vision_caption_cache),
+            Migration(53, "conversation_sidebar_index", self._add_conversation_sidebar_index),
+            Migration(54, "chat_message_history_index", self._add_chat_message_history_index),
+            Migration(55, "conversation_search", self._add_conversation_search),
+            Migration(56, "chat_session_branches", self._add_chat_session_branches),
+            Migration(57, "analytics_rollup_feed", self._add_analytics_rollup_feed),
+            Migration(58, "knowledge_ingestion_cache_refs", self._add_knowledge_ingestion_cache_refs),
         )
 
     def _unify_assisted_task_execution_and_companion_persona(self, conn: sqlite3.Connection) -> None:
@@ -206,6 +226,255 @@ class Database:
         if "experience" in columns:
             conn.execute("ALTER TABLE users DROP COLUMN experience")
 
+    def _add_task_behavior_summaries(self, conn: sqlite3.Connection) -> None:
+        """Materialize per-owner execution behavior signals and backfill them from history.
+
+        Inputs: the exclusive migration transaction after canonical Task Execution tables
+        exist. Output: one task_behavior_summaries row per user, equal to a full scan of
+        goals, runs, steps, reviews, events, approvals and goal changes. Called once as
+        migration 39; afterwards the Task Execution and Plan Draft adapters maintain the
+        rows in the same transaction as each execution write.
+        """
+        from adapters.sqlite.task_behavior_summary import (
+            create_behavior_summary_table,
+            rebuild_behavior_summaries,
+        )
+        create_behavior_summary_table(conn)
+        rebuild_behavior_summaries(conn)
+
+    def _add_growth_point_projections(self, conn: sqlite3.Connection) -> None:
+        """Add O(1) balance and per-day growth-point projections and backfill them.
+
+        Inputs: the exclusive migration transaction with the canonical growth_point_ledger.
+        Output: growth_point_balances and growth_point_daily_totals equal to a full ledger
+        aggregation. Called once as migration 40; runtime ledger writes then maintain both
+        projections in the same transaction as each ledger insert.
+        """
+        from adapters.sqlite.growth_point_projections import (
+            create_growth_point_projection_tables,
+            rebuild_growth_point_projections,
+        )
+        create_growth_point_projection_tables(conn)
+        rebuild_growth_point_projections(conn)
+
+    def _add_user_overview_rollups(self, conn: sqlite3.Connection) -> None:
+        """Add the dashboard rollup cache, its covering Step index, and invalidation triggers.
+
+        Inputs: the exclusive migration transaction. Output: an empty cache that fills on
+        the first overview read per user and day. Called once as migration 41.
+        """
+        from adapters.sqlite.user_overview_rollups import create_user_overview_rollup_schema
+        create_user_overview_rollup_schema(conn)
+
+    def _add_analytics_rollups(self, conn: sqlite3.Connection) -> None:
+        """Add administrator analytics buckets and watermarks and backfill them.
+
+        Inputs: the exclusive migration transaction. Output: hour, day and snapshot
+        buckets equal to a full-history aggregation, with watermarks at the current
+        source positions. Called once as migration 42; the rollup worker continues
+        incrementally from those watermarks.
+        """
+        from adapters.sqlite.analytics_rollups import (
+            backfill_analytics_rollups,
+            create_analytics_rollup_tables,
+        )
+        create_analytics_rollup_tables(conn)
+        backfill_analytics_rollups(conn)
+
+    def _add_personal_memory_terms(self, conn: sqlite3.Connection) -> None:
+        """Add lexical postings for relevance-ranked memory retrieval and index history.
+
+        Inputs: the exclusive migration transaction with personal_memories. Output: one
+        posting per distinct title/content term per memory. Called once as migration 43;
+        memory writes keep postings current in their own transactions afterwards.
+        """
+        from adapters.sqlite.memory_terms import create_memory_term_table, rebuild_memory_terms
+        create_memory_term_table(conn)
+        rebuild_memory_terms(conn)
+
+    def _add_trigger_schedules(self, conn: sqlite3.Connection) -> None:
+        """Add the due-time index that the in-process schedule worker claims from.
+
+        Inputs: the exclusive migration transaction with task_triggers. Output: one row
+        per active schedule Trigger holding its next slot after the migration time.
+        Called once as migration 44; Trigger writes keep the rows current afterwards.
+        """
+        from adapters.sqlite.trigger_schedules import backfill_trigger_schedules, create_trigger_schedule_table
+        create_trigger_schedule_table(conn)
+        backfill_trigger_schedules(conn)
+
+    def _add_trigger_event_index(self, conn: sqlite3.Connection) -> None:
+        """Index active event Triggers by event type for batched event fan-out.
+
+        Inputs: the exclusive migration transaction with task_triggers. Output: an
+        ``event_type`` column copied from each event Trigger's configuration. Called once
+        as migration 45; Trigger writes keep the column current afterwards.
+        """
+        from adapters.sqlite.trigger_event_index import backfill_trigger_event_types, create_trigger_event_index
+        create_trigger_event_index(conn)
+        backfill_trigger_event_types(conn)
+
+    def _add_compiled_trigger_run_plans(self, conn: sqlite3.Connection) -> None:
+        """Add the cached, pre-validated Run plan that Trigger firings insert from.
+
+        Inputs: the exclusive migration transaction with task_triggers. Output: a nullable
+        ``compiled_run_plan`` column. Called once as migration 46; existing Triggers start
+        without a plan and compile it through full validation on their next firing.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(task_triggers)").fetchall()}
+        if "compiled_run_plan" not in columns:
+            conn.execute("ALTER TABLE task_triggers ADD COLUMN compiled_run_plan TEXT")
+
+    def _add_step_readiness_counters(self, conn: sqlite3.Connection) -> None:
+        """Track unmet dependencies per Step so readiness only touches direct children.
+
+        Inputs: the exclusive migration transaction with task_steps and dependencies.
+        Output: ``unmet_dependency_count`` recounted for every existing Step. Called once
+        as migration 47; SQLite triggers keep the counters current afterwards.
+        """
+        from adapters.sqlite.step_readiness import create_step_readiness_schema, rebuild_step_readiness_counters
+        create_step_readiness_schema(conn)
+        rebuild_step_readiness_counters(conn)
+
+    def _add_run_version_tracking(self, conn: sqlite3.Connection) -> None:
+        """Advance Run versions for every change that a Run snapshot exposes.
+
+        Inputs: the exclusive migration transaction with the execution tables. Output:
+        version triggers on Steps, Artifacts, Approvals, Actions, and Goal titles. Called
+        once as migration 48; existing versions stay as they are and only move forward.
+        """
+        from adapters.sqlite.run_versions import create_run_version_triggers
+        create_run_version_triggers(conn)
+
+    def _add_plan_generation_partial_steps(self, conn: sqlite3.Connection) -> None:
+        """Store the Steps a running plan generation has streamed so far.
+
+        Inputs: the exclusive migration transaction with plan_generation_jobs. Output: a
+        nullable ``partial_steps`` JSON column. Called once as migration 49; existing jobs
+        have no previews and workers fill the column as model output arrives.
+        """
+        columns = {
+            row[1] for row in conn.execute("PRAGMA table_info(plan_generation_jobs)").fetchall()
+        }
+        if "partial_steps" not in columns:
+            conn.execute("ALTER TABLE plan_generation_jobs ADD COLUMN partial_steps TEXT")
+
+    def _add_plan_result_cache(self, conn: sqlite3.Connection) -> None:
+        """Cache validated plan results and let a job ask to bypass that cache.
+
+        Inputs: the exclusive migration transaction with plan_generation_jobs. Output: the
+        owner-scoped ``plan_result_cache`` table and a ``regenerate`` flag on jobs. Called
+        once as migration 50; the cache starts empty and existing jobs keep using it.
+        """
+        from adapters.sqlite.plan_result_cache import create_plan_result_cache_table
+        create_plan_result_cache_table(conn)
+        columns = {
+            row[1] for row in conn.execute("PRAGMA table_info(plan_generation_jobs)").fetchall()
+        }
+        if "regenerate" not in columns:
+            conn.execute("ALTER TABLE plan_generation_jobs ADD COLUMN regenerate INTEGER NOT NULL DEFAULT 0")
+
+    def _add_knowledge_ingestion_cache(self, conn: sqlite3.Connection) -> None:
+        """Create the content-addressed cache of parsed chunks and embeddings.
+
+        Inputs: the exclusive migration transaction. Output: the
+        ``knowledge_ingestion_cache`` entry and chunk tables. Called once as
+        migration 51; the cache starts empty and fills as sources are ingested.
+        """
+        from adapters.sqlite.knowledge_ingestion_cache import create_knowledge_ingestion_cache_tables
+        create_knowledge_ingestion_cache_tables(conn)
+
+    def _add_knowledge_ingestion_cache_refs(self, conn: sqlite3.Connection) -> None:
+        """Track which documents use each ingestion cache entry.
+
+        Inputs: the exclusive migration transaction with the ingestion cache. Output:
+        the ``knowledge_ingestion_cache_refs`` table and an empty cache, because the
+        documents behind existing entries are unknown and purging them could not
+        remove those entries. Called once as migration 58.
+        """
+        from adapters.sqlite.knowledge_ingestion_cache import create_knowledge_ingestion_cache_tables
+        create_knowledge_ingestion_cache_tables(conn)
+        conn.execute("DELETE FROM knowledge_ingestion_cache_chunks")
+        conn.execute("DELETE FROM knowledge_ingestion_cache")
+
+    def _add_vision_caption_cache(self, conn: sqlite3.Connection) -> None:
+        """Create the durable cache of vision-model image captions.
+
+        Inputs: the exclusive migration transaction. Output: the
+        ``vision_caption_cache`` table. Called once as migration 52; captions are
+        cached as images are described.
+        """
+        from adapters.sqlite.vision_caption_cache import create_vision_caption_cache_table
+        create_vision_caption_cache_table(conn)
+
+    def _add_conversation_sidebar_index(self, conn: sqlite3.Connection) -> None:
+        """Order each group's sessions by recency inside one covering index.
+
+        Inputs: the exclusive migration transaction with chat_sessions. Output:
+        ``idx_chat_sessions_group_recent`` replacing ``idx_chat_sessions_owner_group``,
+        whose columns it extends. Called once as migration 53; sidebar reads take each
+        group's newest sessions and counts from it without sorting.
+        """
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_chat_sessions_group_recent
+               ON chat_sessions(user_id, group_id, updated_at DESC, session_id DESC)"""
+        )
+        conn.execute("DROP INDEX IF EXISTS idx_chat_sessions_owner_group")
+
+    def _add_chat_message_history_index(self, conn: sqlite3.Connection) -> None:
+        """Order each session's messages newest first for keyset history pages.
+
+        Inputs: the exclusive migration transaction with chat_messages. Output:
+        ``idx_chat_messages_session_recent`` replacing ``idx_chat_messages_owner_session``,
+        whose columns it extends. Called once as migration 54; history reads seek the
+        page boundary and walk backwards without sorting.
+        """
+        conn.execute(
+            """CREATE INDEX IF NOT EXISTS idx_chat_messages_session_recent
+               ON chat_messages(user_id, session_id, created_at DESC, message_id DESC)"""
+        )
+        conn.execute("DROP INDEX IF EXISTS idx_chat_messages_owner_session")
+
+    def _add_conversation_search(self, conn: sqlite3.Connection) -> None:
+        """Add the full-text index over chat messages and session titles.
+
+        Inputs: the exclusive migration transaction with chat tables. Output: FTS5
+        ``chat_message_search`` and ``chat_session_search`` tables filled from existing
+        rows. Called once as migration 55; conversation writes keep them current in
+        their own transactions afterwards.
+        """
+        from adapters.sqlite.conversation_search import (
+            create_conversation_search_tables,
+            rebuild_conversation_search,
+        )
+        create_conversation_search_tables(conn)
+        rebuild_conversation_search(conn)
+
+    def _add_chat_session_branches(self, conn: sqlite3.Connection) -> None:
+        """Let duplicated sessions share their source's messages copy-on-write.
+
+        Inputs: the exclusive migration transaction with chat_sessions. Output: nullable
+        ``parent_session_id``, ``branch_created_at`` and ``branch_message_id`` columns and
+        a partial index over branches. Called once as migration 56; existing sessions
+        keep their own copies and are not branches.
+        """
+        from adapters.sqlite.conversation_branches import add_branch_columns
+        add_branch_columns(conn)
+
+    def _add_analytics_rollup_feed(self, conn: sqlite3.Connection) -> None:
+        """Move user and ledger rollups off reusable rowid watermarks and rebuild them.
+
+        Inputs: the exclusive migration transaction with the rollup tables. Output: the
+        AUTOINCREMENT feed and its insert triggers, and buckets rebuilt from full history
+        with feed-sequence watermarks. Called once as migration 57.
+        """
+        from adapters.sqlite.analytics_rollups import (
+            backfill_analytics_rollups,
+            create_analytics_rollup_tables,
+        )
+        create_analytics_rollup_tables(conn)
+        backfill_analytics_rollups(conn)
+
     def init_database(self) -> SchemaState:
         """Bring the embedded store to the runtime's exact schema contract."""
         return run_migrations(self.get_connection, self._migrations())
@@ -2642,34 +2911,36 @@ class Database:
         finally:
             conn.close()
 
-    def cleanup_expired_session_files(self) -> int:
-        """
-        清理过期的会话临时文件
-        Returns:
-            清理的文件数量
-        """
+    def list_expired_session_files(self, limit: int) -> List[Dict[str, Any]]:
+        """按过期时间读取一批已过期的会话临时文件（走 idx_expires），供后台清理使用。"""
         conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                "DELETE FROM user_session_files WHERE expires_at <= ?",
-                (datetime.now().isoformat(),)
-            )
-            conn.commit()
-            return cursor.rowcount
+            rows = conn.execute(
+                """SELECT id, storage_path FROM user_session_files
+                   WHERE expires_at <= ? ORDER BY expires_at LIMIT ?""",
+                (datetime.now().isoformat(), max(1, int(limit))),
+            ).fetchall()
+            return [dict(row) for row in rows]
         finally:
             conn.close()
 
-    def list_expired_session_file_storage_paths(self) -> List[str]:
-        """返回已过期记录的 storage_path（用于在删除行前清理磁盘）。"""
+    def delete_expired_session_files(self, file_ids: List[str]) -> int:
+        """删除一批仍处于过期状态的会话临时文件记录，返回删除行数。"""
+        if not file_ids:
+            return 0
         conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute(
-                "SELECT storage_path FROM user_session_files WHERE expires_at <= ? AND storage_path IS NOT NULL",
-                (datetime.now().isoformat(),)
-            )
-            return [row[0] for row in cursor.fetchall() if row[0]]
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(
+                f"""DELETE FROM user_session_files
+                    WHERE expires_at <= ? AND id IN ({", ".join("?" for _ in file_ids)})""",
+                (datetime.now().isoformat(), *file_ids),
+            ).rowcount
+            conn.commit()
+            return deleted
+        except Exception:
+            conn.rollback()
+            raise
         finally:
             conn.close()
 
@@ -2701,6 +2972,23 @@ class Database:
         finally:
             conn.close()
 
+    def get_user_session_files_by_ids(self, user_id: str, session_id: str, file_ids: List[str]) -> List[Dict[str, Any]]:
+        """一次查询读取某会话下多条未过期的临时文件记录，忽略不存在或不属于该会话的 ID。"""
+        ids = list(dict.fromkeys(fid for fid in file_ids if fid))
+        if not ids:
+            return []
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                f"""SELECT * FROM user_session_files
+                    WHERE user_id = ? AND session_id = ? AND expires_at > ?
+                      AND id IN ({", ".join("?" for _ in ids)})""",
+                (user_id, session_id, datetime.now().isoformat(), *ids),
+            ).fetchall()
+            return [dict(row) for row in rows]
+        finally:
+            conn.close()
+
     def delete_user_session_file(self, user_id: str, file_id: str) -> Optional[Dict[str, Any]]:
         """
         删除会话临时文件记录，返回被删行（含 storage_path）以便删磁盘。
@@ -3113,6 +3401,8 @@ class Database:
                    VALUES (?, ?, ?, ?, ?, ?)""",
                 (sid, group_id, user_id, session_name, now, now)
             )
+            from adapters.sqlite.conversation_search import index_session_title
+            index_session_title(conn, sid)
             conn.commit()
             return sid
         finally:
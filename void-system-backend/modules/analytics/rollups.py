@@ -0,0 +1,64 @@
+"""Scheduled refresh of administrator analytics rollups."""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+from core.analytics_contracts import AnalyticsRepository
+
+
+logger = logging.getLogger("void-system.analytics.rollups")
+
+
+class AnalyticsRollupWorker:
+    """Application-owned schedule that folds new history into analytics rollups.
+
+    Inputs:
+        repository: Analytics repository that owns rollup buckets and watermarks.
+        interval_seconds: Delay between refreshes; the first refresh runs at start.
+    Outputs:
+        A daemon worker that can be started, woken, and stopped with the app.
+    Called by:
+        FastAPI lifespan. Administrator reads never refresh rollups themselves.
+    Side effects:
+        Writes buckets and watermarks in one short SQLite transaction per refresh.
+    Invariants:
+        Watermarks are persisted with the buckets they cover, so a stopped or crashed
+        worker resumes from the last committed refresh without double counting.
+    """
+
+    def __init__(self, repository: AnalyticsRepository, *, interval_seconds: float = 300.0) -> None:
+        self._repository = repository
+        self._interval_seconds = max(1.0, interval_seconds)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the single refresh thread during lifespan startup."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="analytics-rollup-worker", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Run a refresh now instead of waiting for the next interval."""
+        self._wake.set()
+
+    def stop(self, *, timeout: float = 5.0) -> None:
+        """Request shutdown; an interrupted refresh rolls back and reruns on next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self._repository.refresh_rollups()
+            except Exception as exc:
+                logger.exception("Analytics rollup refresh failed (%s)", type(exc).__name__)
+            self._wake.wait(self._interval_seconds)
+            self._wake.clear()
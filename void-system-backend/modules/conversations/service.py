@@ -1,13 +1,25 @@
 """Conversation workflow with ownership and lifecycle invariants."""
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
 
 from adapters.sqlite.conversation_repository import SQLiteConversationRepository
+from adapters.sqlite.conversation_search import RANKED_CANDIDATES, query_phrases, snippet
 from core.conversation_contracts import ConversationError, ConversationRepository
 from database import Database
 
 
+DEFAULT_SESSION_PAGE_SIZE = 50
+MAX_SESSION_PAGE_SIZE = 200
+DEFAULT_MESSAGE_PAGE_SIZE = 100
+MAX_MESSAGE_PAGE_SIZE = 500
+MAX_SEARCH_QUERY_LENGTH = 200
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_OFFSET = RANKED_CANDIDATES - MAX_SEARCH_PAGE_SIZE
+
+
 class ConversationService:
     def __init__(self, repository: ConversationRepository):
         self._repository = repository
@@ -29,8 +41,61 @@ class ConversationService:
             404,
         )
 
-    def list_groups(self, user_id: str) -> List[Dict[str, Any]]:
-        return self._repository.list_groups(user_id)
+    @staticmethod
+    def _page_limit(value: Optional[int], label: str) -> Optional[int]:
+        if value is None:
+            return None
+        if not 1 <= value <= MAX_SESSION_PAGE_SIZE:
+            raise ConversationError("INVALID_LIMIT", f"{label}须在 1 到 {MAX_SESSION_PAGE_SIZE} 之间")
+        return value
+
+    @staticmethod
+    def _keyset_cursor(timestamp: str, row_id: str) -> str:
+        encoded = json.dumps([timestamp, row_id], ensure_ascii=False)
+        return base64.urlsafe_b64encode(encoded.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _keyset_position(cursor: str, label: str) -> Tuple[str, str]:
+        try:
+            timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (ValueError, TypeError, UnicodeError):
+            raise ConversationError("INVALID_CURSOR", f"{label}分页游标无效") from None
+        if not isinstance(timestamp, str) or not isinstance(row_id, str):
+            raise ConversationError("INVALID_CURSOR", f"{label}分页游标无效")
+        return timestamp, row_id
+
+    @classmethod
+    def _session_cursor(cls, session: Dict[str, Any]) -> str:
+        return cls._keyset_cursor(session["updated_at"], session["session_id"])
+
+    def list_groups(self, user_id: str, session_limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return groups with their newest sessions; truncated groups carry a ``next_cursor``."""
+        groups = self._repository.list_groups(user_id, self._page_limit(session_limit, "每组会话数量"))
+        for group in groups:
+            sessions = group["sessions"]
+            truncated = bool(sessions) and len(sessions) < group["session_count"]
+            group["next_cursor"] = self._session_cursor(sessions[-1]) if truncated else None
+        return groups
+
+    def list_group_sessions(
+        self,
+        user_id: str,
+        group_id: str,
+        limit: int = DEFAULT_SESSION_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of a group's sessions for lazy sidebar expansion."""
+        page_size = self._page_limit(limit, "会话数量")
+        after = self._keyset_position(cursor, "会话") if cursor else None
+        sessions = self._repository.list_group_sessions(user_id, group_id, page_size + 1, after)
+        if sessions is None:
+            raise self._not_found("分组")
+        has_more = len(sessions) > page_size
+        sessions = sessions[:page_size]
+        return {
+            "sessions": sessions,
+            "next_cursor": self._session_cursor(sessions[-1]) if has_more else None,
+        }
 
     def create_group(self, user_id: str, name: str) -> str:
         return self._repository.create_group(
@@ -91,10 +156,34 @@ class ConversationService:
         return result
 
     def list_messages(self, user_id: str, session_id: str, limit: int) -> List[Dict[str, Any]]:
-        result = self._repository.list_messages(user_id, session_id, limit)
+        """Return the session's newest ``limit`` messages in chronological order."""
+        return self.list_message_page(user_id, session_id, limit)["messages"]
+
+    def list_message_page(
+        self,
+        user_id: str,
+        session_id: str,
+        limit: int = DEFAULT_MESSAGE_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Return one page of history ending before ``cursor``, oldest first.
+
+        ``next_cursor`` points at the page's oldest message and is ``None`` once the
+        start of the session has been reached.
+        """
+        if not 1 <= limit <= MAX_MESSAGE_PAGE_SIZE:
+            raise ConversationError("INVALID_LIMIT", f"消息数量须在 1 到 {MAX_MESSAGE_PAGE_SIZE} 之间")
+        before = self._keyset_position(cursor, "消息") if cursor else None
+        result = self._repository.list_messages(user_id, session_id, limit + 1, before)
         if result is None:
             raise self._not_found("会话")
-        return result
+        has_more = len(result) > limit
+        messages = result[1:] if has_more else result
+        oldest = messages[0] if has_more else None
+        return {
+            "messages": messages,
+            "next_cursor": self._keyset_cursor(oldest["created_at"], oldest["message_id"]) if oldest else None,
+        }
 
     def add_message(
         self,
@@ -126,6 +215,31 @@ class ConversationService:
         if not self._repository.clear_messages(user_id, session_id):
             raise self._not_found("会话")
 
+    def search(self, user_id: str, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Return the owner's best-ranked session titles and messages containing every query word.
+
+        Each result carries a ``snippet`` around the first matched word and the
+        ``highlights`` spans inside it; ``next_offset`` is ``None`` on the last page.
+        """
+        query = query.strip()
+        if len(query) > MAX_SEARCH_QUERY_LENGTH:
+            raise ConversationError("INVALID_QUERY", f"搜索内容不能超过 {MAX_SEARCH_QUERY_LENGTH} 个字符")
+        phrases = query_phrases(query)
+        if not phrases:
+            raise ConversationError("INVALID_QUERY", "搜索内容需包含文字或数字")
+        if not 1 <= limit <= MAX_SEARCH_PAGE_SIZE:
+            raise ConversationError("INVALID_LIMIT", f"搜索数量须在 1 到 {MAX_SEARCH_PAGE_SIZE} 之间")
+        if not 0 <= offset <= MAX_SEARCH_OFFSET:
+            raise ConversationError("INVALID_OFFSET", f"搜索偏移须在 0 到 {MAX_SEARCH_OFFSET} 之间")
+        rows = self._repository.search(user_id, phrases, limit + 1, offset)
+        results = []
+        for row in rows[:limit]:
+            text, spans = snippet(row.pop("text"), query)
+            row["snippet"] = text
+            row["highlights"] = [list(span) for span in spans]
+            results.append(row)
+        return {"results": results, "next_offset": offset + limit if len(rows) > limit else None}
+
 
 def get_conversation_service(database: Database) -> ConversationService:
     repository = SQLiteConversationRepository(database.get_connection)
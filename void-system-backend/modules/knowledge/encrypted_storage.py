@@ -1,11 +1,17 @@
 """Authenticated encryption for knowledge source files at rest."""
 from __future__ import annotations
 
+import base64
 import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
 
+from cryptography.exceptions import InvalidSignature
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes, padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.hmac import HMAC
 
 from core.runtime_settings import RuntimeSettings
 
@@ -31,7 +37,8 @@ class KnowledgeSourceCipher:
     def __init__(self, settings: Optional[RuntimeSettings], storage_root: Path) -> None:
         self._settings = settings
         self._storage_root = storage_root
-        self._fernet = Fernet(self._resolve_key())
+        self._key = self._resolve_key()
+        self._fernet = Fernet(self._key)
 
     def _resolve_key(self) -> bytes:
         configured = str(getattr(self._settings, "DOCUMENT_ENCRYPTION_KEY", "") or "").strip()
@@ -77,6 +84,18 @@ class KnowledgeSourceCipher:
     def encrypt(self, data: bytes) -> bytes:
         return self._fernet.encrypt(data)
 
+    def stream_encryptor(self, target: BinaryIO) -> "FernetStreamWriter":
+        """Return a writer that encrypts bytes into ``target`` as they arrive."""
+        return FernetStreamWriter(self._key, target)
+
+    def stream_decryptor(self, source: BinaryIO) -> "FernetStreamReader":
+        """Return an iterator of plaintext chunks decrypted from ``source`` as it is read."""
+        return FernetStreamReader(self._key, source)
+
+    def worker_key(self) -> bytes:
+        """Return the key for a trusted extraction process that reads a source file itself."""
+        return self._key
+
     def decrypt(self, data: bytes) -> bytes:
         try:
             return self._fernet.decrypt(data)
@@ -95,3 +114,123 @@ class KnowledgeSourceCipher:
     def appears_encrypted(cls, data: bytes) -> bool:
         """Identify Fernet-shaped persisted bytes before a legacy migration rewrites them."""
         return bytes(data or b"").startswith(cls._TOKEN_PREFIX)
+
+
+class FernetStreamWriter:
+    """Write one Fernet token incrementally so large sources never sit in memory.
+
+    Inputs:
+        A Fernet key and a binary target file opened for writing.
+    Outputs:
+        After finish(), the target holds exactly the token Fernet.encrypt would
+        produce for the same bytes, IV, and timestamp, so Fernet.decrypt reads it.
+    Called by:
+        PersonalKnowledgeDocumentManager while spooling an upload to managed storage.
+    Invariants:
+        Only the current chunk, one cipher block, and fewer than three encoded bytes
+        are buffered; the HMAC covers the version, timestamp, IV, and ciphertext.
+    """
+
+    def __init__(self, key: bytes, target: BinaryIO) -> None:
+        raw_key = base64.urlsafe_b64decode(key)
+        iv = os.urandom(16)
+        self._target = target
+        self._encryptor = Cipher(algorithms.AES(raw_key[16:]), modes.CBC(iv)).encryptor()
+        self._padder = padding.PKCS7(algorithms.AES.block_size).padder()
+        self._hmac = HMAC(raw_key[:16], hashes.SHA256())
+        self._unencoded = b""
+        self._signed(b"\x80" + int(time.time()).to_bytes(8, "big") + iv)
+
+    def write(self, data: bytes) -> None:
+        self._signed(self._encryptor.update(self._padder.update(data)))
+
+    def finish(self) -> None:
+        self._signed(self._encryptor.update(self._padder.finalize()) + self._encryptor.finalize())
+        self._encoded(self._hmac.finalize())
+        self._target.write(base64.urlsafe_b64encode(self._unencoded))
+        self._unencoded = b""
+
+    def _signed(self, data: bytes) -> None:
+        self._hmac.update(data)
+        self._encoded(data)
+
+    def _encoded(self, data: bytes) -> None:
+        # Base64 maps every 3 input bytes to 4 output bytes, so whole groups can be
+        # written now and only the remainder waits for the next chunk.
+        pending = self._unencoded + data
+        ready = len(pending) - len(pending) % 3
+        self._target.write(base64.urlsafe_b64encode(pending[:ready]))
+        self._unencoded = pending[ready:]
+
+
+class FernetStreamReader:
+    """Decrypt one Fernet token incrementally so large sources never sit in memory.
+
+    Inputs:
+        A Fernet key and a binary source positioned at the start of a token.
+    Outputs:
+        Iteration yields the plaintext in chunks; the concatenation equals what
+        Fernet.decrypt returns for the same token, without a TTL check.
+    Called by:
+        The extraction process, which spools a stored source to a temporary file, and
+        PersonalKnowledgeDocumentManager when it fingerprints a streamed source.
+    Invariants:
+        The HMAC is verified only after the last chunk, so a consumer must discard its
+        output when iteration raises InvalidToken. Only one read chunk, one cipher
+        block, and the 32-byte trailing tag are buffered.
+    """
+
+    _HEADER_BYTES = 25
+    _TAG_BYTES = 32
+
+    def __init__(self, key: bytes, source: BinaryIO, *, chunk_size: int = 1024 * 1024) -> None:
+        self._raw_key = base64.urlsafe_b64decode(key)
+        self._source = source
+        # Whole base64 quads decode independently of their neighbours.
+        self._chunk_size = max(4, chunk_size - chunk_size % 4)
+
+    def __iter__(self) -> Iterator[bytes]:
+        hmac = HMAC(self._raw_key[:16], hashes.SHA256())
+        decryptor = None
+        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+        pending = b""
+        encoded = b""
+        while True:
+            chunk = self._source.read(self._chunk_size)
+            encoded += chunk
+            if chunk:
+                ready = len(encoded) - len(encoded) % 4
+                data, encoded = encoded[:ready], encoded[ready:]
+            else:
+                data, encoded = encoded.strip(), b""
+            try:
+                pending += base64.urlsafe_b64decode(data)
+            except ValueError as exc:
+                raise InvalidToken from exc
+            if decryptor is None:
+                if len(pending) < self._HEADER_BYTES:
+                    if not chunk:
+                        raise InvalidToken
+                    continue
+                header, pending = pending[:self._HEADER_BYTES], pending[self._HEADER_BYTES:]
+                if header[0] != 0x80:
+                    raise InvalidToken
+                hmac.update(header)
+                decryptor = Cipher(algorithms.AES(self._raw_key[16:]), modes.CBC(header[9:])).decryptor()
+            # The trailing tag is not ciphertext, so it is held back until the source ends.
+            body, pending = pending[:-self._TAG_BYTES], pending[-self._TAG_BYTES:]
+            hmac.update(body)
+            plaintext = unpadder.update(decryptor.update(body))
+            if plaintext:
+                yield plaintext
+            if not chunk:
+                break
+        if len(pending) != self._TAG_BYTES:
+            raise InvalidToken
+        try:
+            hmac.verify(pending)
+            tail = unpadder.update(decryptor.finalize()) + unpadder.finalize()
+        except (InvalidSignature, ValueError) as exc:
+            raise InvalidToken from exc
+        if tail:
+            yield tail
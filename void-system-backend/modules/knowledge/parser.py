@@ -6,14 +6,30 @@ Void System - Knowledge Document Parser
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import BinaryIO, Dict, Any, Iterator, Optional, List, Union
 import logging
 from abc import ABC, abstractmethod
 import io
+import multiprocessing
 import re
+import tempfile
+import threading
 
 logger = logging.getLogger("void-system-doc-parser")
 
+# PDF 与 Excel 的逐页/逐表提取在独立进程中执行，避免大文件长期占用 worker 的 GIL 与内存。
+# Word 不在其列：python-docx 总是先构建整份文档树，且段落与表格分两轮输出，逐段产出无法降低峰值内存。
+STREAMED_FILE_TYPES = frozenset({"pdf", "xls", "xlsx"})
+DEFAULT_EXTRACTION_WORKERS = 2
+EXCEL_ROWS_PER_SECTION = 500
+EXCEL_MAX_ROWS_PER_SHEET = 1500
+# 提取进程处理若干文档后重建，避免解析大文件后残留的堆内存长期驻留
+_MAX_DOCUMENTS_PER_WORKER = 20
+
+
+class DocumentParseError(ValueError):
+    """流式解析失败时抛出，消息可直接展示给用户"""
+
 
 def _excel_sheet_display_name(sheet_name: str) -> str:
     """将 Excel 默认英文工作表名（如 Sheet1）转为中文描述，其余名称原样保留。"""
@@ -41,6 +57,13 @@ class DocumentParser(ABC):
         """提取文件元数据"""
         pass
 
+    def iter_sections(self, file_data: bytes, file_name: str) -> Iterator[str]:
+        """按页/表产出文本片段；默认整份内容作为一个片段，失败时抛出 DocumentParseError"""
+        result = self.parse_content(file_data, file_name)
+        if not result.get("success"):
+            raise DocumentParseError(str(result.get("error") or "文档解析失败"))
+        yield str(result.get("content") or "")
+
 class TextDocumentParser(DocumentParser):
     """文本文档解析器"""
 
@@ -143,23 +166,13 @@ class PDFDocumentParser(DocumentParser):
     def parse_content(self, file_data: bytes, file_name: str) -> Dict[str, Any]:
         """解析PDF内容"""
         try:
-            import PyPDF2
-            import io
-            
-            pdf_file = io.BytesIO(file_data)
-            reader = PyPDF2.PdfReader(pdf_file)
-            
-            text_parts = []
-            for i in range(len(reader.pages)):
-                page = reader.pages[i]
-                text_parts.append(page.extract_text())
-                
+            text_parts = list(self.iter_sections(file_data, file_name))
             content = "\n\n".join(text_parts)
-            
+
             return {
                 "success": True,
                 "content": content,
-                "page_count": len(reader.pages),
+                "page_count": len(text_parts),
                 "char_count": len(content)
             }
         except Exception as e:
@@ -169,6 +182,18 @@ class PDFDocumentParser(DocumentParser):
                 "error": f"PDF解析失败: {str(e)}"
             }
 
+    def iter_sections(self, file_data: bytes, file_name: str) -> Iterator[str]:
+        """逐页产出PDF文本，已提取的页面不会在解析器中累积"""
+        return self.iter_stream_sections(io.BytesIO(file_data), file_name)
+
+    def iter_stream_sections(self, stream: BinaryIO, file_name: str) -> Iterator[str]:
+        """从可定位的二进制流逐页产出PDF文本，页面按需从流中读取"""
+        import PyPDF2
+
+        reader = PyPDF2.PdfReader(stream)
+        for page in reader.pages:
+            yield page.extract_text() or ""
+
     def extract_metadata(self, file_data: bytes, file_name: str) -> Dict[str, Any]:
         """提取PDF元数据"""
         return {
@@ -263,31 +288,13 @@ class ExcelDocumentParser(DocumentParser):
             else:
                 # Excel文件处理 (.xls, .xlsx)
                 try:
-                    # 使用pandas读取Excel
+                    content = "\n\n".join(self.iter_sections(file_data, file_name))
                     excel_data = pd.ExcelFile(io.BytesIO(file_data))
 
-                    # 处理所有工作表
-                    all_content = []
-                    total_rows = 0
-                    total_columns = 0
-
-                    for sheet_name in excel_data.sheet_names:
-                        df = pd.read_excel(excel_data, sheet_name=sheet_name)
-                        sheet_content = self._dataframe_to_text(
-                            df, _excel_sheet_display_name(sheet_name)
-                        )
-                        all_content.append(sheet_content)
-                        total_rows += len(df)
-                        total_columns = max(total_columns, len(df.columns))
-
-                    content = "\n\n".join(all_content)
-
                     return {
                         "success": True,
                         "content": content,
                         "sheet_count": len(excel_data.sheet_names),
-                        "total_rows": total_rows,
-                        "total_columns": total_columns,
                         "sheet_names": excel_data.sheet_names,
                         "format": file_name.split('.')[-1].lower()
                     }
@@ -374,6 +381,61 @@ class ExcelDocumentParser(DocumentParser):
 
         return "\n".join(lines)
 
+    def iter_sections(self, file_data: bytes, file_name: str) -> Iterator[str]:
+        """按工作表和行块产出文本；xlsx 以只读模式逐行读取，不构建整表 DataFrame"""
+        return self.iter_stream_sections(io.BytesIO(file_data), file_name)
+
+    def iter_stream_sections(self, stream: BinaryIO, file_name: str) -> Iterator[str]:
+        """从可定位的二进制流按工作表和行块产出文本"""
+        if not file_name.lower().endswith('.xlsx'):
+            import pandas as pd
+
+            excel_data = pd.ExcelFile(stream)
+            for sheet_name in excel_data.sheet_names:
+                df = pd.read_excel(excel_data, sheet_name=sheet_name)
+                yield self._dataframe_to_text(df, _excel_sheet_display_name(sheet_name))
+            return
+
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                title = _excel_sheet_display_name(sheet.title)
+                rows = sheet.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    yield f"表格: {title}\n(数据内容为空)"
+                    continue
+                cols = [
+                    str(value) if value is not None and str(value).strip() else f"Unnamed: {index}"
+                    for index, value in enumerate(header)
+                ]
+                lines = [f"### 数据表: {title}"]
+                if sheet.max_row:
+                    lines.append(f"该表包含 {max(0, sheet.max_row - 1)} 条记录，关键列包括: {', '.join(cols)}")
+                else:
+                    lines.append(f"关键列包括: {', '.join(cols)}")
+                lines.append("--- 记录详情 ---")
+                row_number = 0
+                for row_number, row in enumerate(rows, start=1):
+                    if row_number > EXCEL_MAX_ROWS_PER_SHEET:
+                        lines.append(f"... (第 {EXCEL_MAX_ROWS_PER_SHEET} 行之后的数据已省略)")
+                        break
+                    row_desc = [f"记录第 {row_number} 号:"]
+                    for col, val in zip(cols, row):
+                        if val is not None and str(val).strip():
+                            row_desc.append(f"{col} 是 \"{val}\"")
+                    if len(row_desc) > 1:
+                        lines.append(" ".join(row_desc))
+                    if row_number % EXCEL_ROWS_PER_SECTION == 0:
+                        yield "\n".join(lines)
+                        lines = []
+                if lines:
+                    yield "\n".join(lines)
+        finally:
+            workbook.close()
+
 class ImageDocumentParser(DocumentParser):
     """图片文档解析器（OCR）"""
 
@@ -439,10 +501,177 @@ class ImageDocumentParser(DocumentParser):
             pass
         return metadata
 
+def _streaming_parser_for(file_type: str) -> Union[PDFDocumentParser, ExcelDocumentParser]:
+    return PDFDocumentParser() if file_type == "pdf" else ExcelDocumentParser()
+
+
+def _open_source(source: Union[bytes, str], fernet_key: Optional[bytes]) -> BinaryIO:
+    """打开待提取的来源：明文文件直接按需读取，加密文件逐块解密到临时文件
+
+    解析库需要可定位的流，因此明文落在关闭即删除的临时文件中，内存只保留一个解密块；
+    HMAC 校验失败时临时文件被丢弃，解析器不会读到未经认证的内容。
+    """
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if fernet_key is None:
+        return open(source, "rb")
+    from modules.knowledge.encrypted_storage import FernetStreamReader
+
+    spool = tempfile.TemporaryFile()
+    try:
+        with open(source, "rb") as handle:
+            for chunk in FernetStreamReader(fernet_key, handle):
+                spool.write(chunk)
+        spool.seek(0)
+        return spool
+    except BaseException:
+        spool.close()
+        raise
+
+
+def _extraction_worker_main(conn: Any) -> None:
+    """提取进程主循环：每次接收一份文档，逐段回传文本
+
+    请求中的来源通常是文件路径，由本进程自行打开，文件内容不经管道传输。
+    管道缓冲区有限，父进程消费变慢时 send 会阻塞，因此提取进度不会远超嵌入进度。
+    """
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            return
+        if request is None:
+            return
+        file_type, source, file_name, fernet_key = request
+        try:
+            with _open_source(source, fernet_key) as stream:
+                for section in _streaming_parser_for(file_type).iter_stream_sections(stream, file_name):
+                    conn.send(("section", section))
+            conn.send(("done", None))
+        except Exception as e:
+            conn.send(("error", str(e) or type(e).__name__))
+        del source
+
+
+class _ExtractionProcess:
+    """一个可复用的提取进程及其双向管道"""
+
+    def __init__(self) -> None:
+        # spawn 在各平台行为一致，且不会继承 worker 线程持有的锁与数据库连接
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_extraction_worker_main, args=(child_conn,), name="void-doc-extraction", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.documents = 0
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=2)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=2)
+        self.conn.close()
+
+
+class DocumentExtractionPool:
+    """有界的进程池，用于 PDF 与 Excel 的流式提取
+
+    Inputs:
+        max_workers: 同时运行的提取进程上限；0 表示在当前进程内直接提取。
+    Outputs:
+        按页、工作表或行块顺序产出的文本片段。
+    Called by:
+        UniversalDocumentParser.iter_sections 与 parse_file。
+    Side effects:
+        按需启动守护进程并在空闲时复用；调用方中途放弃迭代时终止对应进程，
+        不会把剩余页面继续读入内存。
+    Failure:
+        提取异常或进程意外退出时抛出 DocumentParseError。
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_EXTRACTION_WORKERS) -> None:
+        self._max_workers = max(0, int(max_workers))
+        self._slots = threading.BoundedSemaphore(max(1, self._max_workers))
+        self._idle: List[_ExtractionProcess] = []
+        self._lock = threading.Lock()
+
+    def iter_sections(self, file_type: str, file_data: bytes, file_name: str) -> Iterator[str]:
+        return self._stream(file_type, file_data, file_name, None)
+
+    def iter_file_sections(
+        self, file_type: str, path: Path, file_name: str, *, fernet_key: Optional[bytes] = None
+    ) -> Iterator[str]:
+        """提取磁盘上的来源文件；只传递路径，由提取进程打开，fernet_key 用于加密存储的来源"""
+        return self._stream(file_type, str(path), file_name, fernet_key)
+
+    def _stream(
+        self, file_type: str, source: Union[bytes, str], file_name: str, fernet_key: Optional[bytes]
+    ) -> Iterator[str]:
+        if self._max_workers == 0:
+            with _open_source(source, fernet_key) as stream:
+                yield from _streaming_parser_for(file_type).iter_stream_sections(stream, file_name)
+            return
+        with self._slots:
+            worker = self._lease()
+            finished = False
+            try:
+                worker.conn.send((file_type, source, file_name, fernet_key))
+                while True:
+                    try:
+                        status, payload = worker.conn.recv()
+                    except (EOFError, OSError) as exc:
+                        raise DocumentParseError("文档解析进程异常退出") from exc
+                    if status == "section":
+                        yield payload
+                        continue
+                    finished = True
+                    if status == "error":
+                        raise DocumentParseError(payload)
+                    return
+            finally:
+                self._release(worker, reusable=finished)
+
+    def close(self) -> None:
+        """停止全部空闲提取进程；之后的调用会按需重新启动进程"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def _lease(self) -> _ExtractionProcess:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return _ExtractionProcess()
+
+    def _release(self, worker: _ExtractionProcess, *, reusable: bool) -> None:
+        worker.documents += 1
+        if not reusable:
+            worker.kill()
+            return
+        if worker.documents >= _MAX_DOCUMENTS_PER_WORKER:
+            worker.stop()
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+
 class UniversalDocumentParser:
     """通用文档解析器"""
 
-    def __init__(self):
+    def __init__(self, extraction_pool: Optional[DocumentExtractionPool] = None):
         self.parsers = [
             TextDocumentParser(),
             PDFDocumentParser(),
@@ -450,6 +679,50 @@ class UniversalDocumentParser:
             ExcelDocumentParser(),
             ImageDocumentParser()
         ]
+        self.extraction_pool = extraction_pool or DocumentExtractionPool()
+
+    def iter_sections(self, file_data: bytes, file_name: str) -> Iterator[str]:
+        """
+        按页、工作表或行块逐段产出文件文本
+        Args:
+            file_data: 文件数据
+            file_name: 文件名
+        Returns:
+            文本片段迭代器；PDF 与 Excel 在提取进程池中解析，边解析边产出
+        Raises:
+            DocumentParseError: 文件类型不支持或解析失败
+        """
+        file_type = self._get_file_type(file_name)
+        if file_type in STREAMED_FILE_TYPES:
+            return self.extraction_pool.iter_sections(file_type, file_data, file_name)
+        for parser in self.parsers:
+            if parser.can_parse(file_type):
+                return parser.iter_sections(file_data, file_name)
+        raise DocumentParseError(f"不支持的文件类型: {file_type}")
+
+    def iter_file_sections(
+        self, path: Path, file_name: str, *, fernet_key: Optional[bytes] = None
+    ) -> Iterator[str]:
+        """
+        按页、工作表或行块逐段产出磁盘来源文件的文本
+        Args:
+            path: 来源文件路径，PDF 与 Excel 由提取进程直接打开
+            file_name: 原始文件名，用于判断类型
+            fernet_key: 来源以 Fernet 加密存储时的密钥
+        Returns:
+            文本片段迭代器
+        Raises:
+            DocumentParseError: 文件类型不支持或解析失败
+        """
+        file_type = self._get_file_type(file_name)
+        if file_type in STREAMED_FILE_TYPES:
+            return self.extraction_pool.iter_file_sections(file_type, path, file_name, fernet_key=fernet_key)
+        with _open_source(str(path), fernet_key) as stream:
+            return self.iter_sections(stream.read(), file_name)
+
+    def close(self) -> None:
+        """释放提取进程"""
+        self.extraction_pool.close()
 
     def parse_file(self, file_data: bytes, file_name: str) -> Dict[str, Any]:
         """
@@ -462,6 +735,21 @@ class UniversalDocumentParser:
         """
         file_type = self._get_file_type(file_name)
 
+        if file_type in STREAMED_FILE_TYPES:
+            try:
+                sections = list(self.extraction_pool.iter_sections(file_type, file_data, file_name))
+            except Exception as e:
+                logger.error(f"文档解析失败: {e}")
+                return {"success": False, "error": f"文档解析失败: {str(e)}", "file_type": file_type}
+            content = "\n\n".join(sections)
+            return {
+                "success": True,
+                "content": content,
+                "section_count": len(sections),
+                "char_count": len(content),
+                "file_type": file_type
+            }
+
         # 查找合适的解析器
         for parser in self.parsers:
             if parser.can_parse(file_type):
@@ -510,6 +798,10 @@ class UniversalDocumentParser:
             "jpg", "jpeg", "png", "gif", "bmp", "tiff",
         ]
 
+    def get_file_type(self, file_name: str) -> str:
+        """Return the normalized document type recorded for an uploaded file name."""
+        return self._get_file_type(file_name)
+
     def _get_file_type(self, file_name: str) -> str:
         """从文件名获取文件类型"""
         if '.' not in file_name:
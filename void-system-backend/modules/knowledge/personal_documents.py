@@ -6,24 +6,35 @@ manager or collection policy.
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
+import io
+import itertools
 import logging
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
 import uuid
 
+from cryptography.fernet import InvalidToken
+
 from adapters.chroma.knowledge_store import ChromaKnowledgeStore
 from adapters.sqlite.knowledge_document_repository import SQLiteKnowledgeDocumentRepository
+from adapters.sqlite.knowledge_ingestion_cache import SQLiteKnowledgeIngestionCache, ingestion_cache_key
+from adapters.sqlite.vision_caption_cache import SQLiteVisionCaptionCache
 from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
-from modules.knowledge.parser import document_parser
+from modules.knowledge.parser import STREAMED_FILE_TYPES, DocumentParseError, document_parser
 from core.knowledge_contracts import KnowledgeScope
 from core.runtime_settings import RuntimeSettings
 from database import Database
 
 logger = logging.getLogger("void-system.personal_knowledge_documents")
 ImageKnowledgeDescriber = Callable[[bytes, str], Awaitable[str]]
+_SECTION_REPORT_INTERVAL_SECONDS = 1.0
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+INDEX_VERSION = "knowledge-store-v1"
 
 
 def _storage_safe_file_name(file_name: str) -> str:
@@ -48,7 +59,7 @@ class PersonalKnowledgeDocumentManager:
     and scoped index chunks. HTTP handlers never process documents directly.
     """
 
-    def __init__(self, *, database: Database, store: ChromaKnowledgeStore, lifecycle_repository: Any = None, settings: Any = None, storage_path: Optional[str] = None, image_describer: Optional[ImageKnowledgeDescriber] = None, cipher: Optional[KnowledgeSourceCipher] = None, document_repository: Optional[SQLiteKnowledgeDocumentRepository] = None) -> None:
+    def __init__(self, *, database: Database, store: ChromaKnowledgeStore, lifecycle_repository: Any = None, settings: Any = None, storage_path: Optional[str] = None, image_describer: Optional[ImageKnowledgeDescriber] = None, cipher: Optional[KnowledgeSourceCipher] = None, document_repository: Optional[SQLiteKnowledgeDocumentRepository] = None, ingestion_cache: Optional[SQLiteKnowledgeIngestionCache] = None, caption_cache: Optional[SQLiteVisionCaptionCache] = None) -> None:
         self.db = database
         self._store = store
         self._lifecycle_repository = lifecycle_repository
@@ -68,25 +79,35 @@ class PersonalKnowledgeDocumentManager:
             if hasattr(database, "get_connection")
             else None
         )
+        self._ingestion_cache = ingestion_cache
+        self._caption_cache = caption_cache
         self.max_file_size = 50 * 1024 * 1024
         self.preview_length = 500
 
-    async def upload_and_process_document(self, user_id: str, file_data: bytes, file_name: str, title: Optional[str] = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Store a source and persist its durable ingestion job without indexing inline."""
-        validation = self._validate_file(file_data, file_name)
+    async def upload_and_process_document(self, user_id: str, file_data: Union[bytes, BinaryIO], file_name: str, title: Optional[str] = None, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Store a source and persist its durable ingestion job without indexing inline.
+
+        ``file_data`` may be bytes or a readable binary stream such as an upload's
+        spool file. Streams are copied in bounded chunks; the size limit, sha256
+        fingerprint, and encryption are applied as the bytes arrive.
+        """
+        validation = self._validate_file_name(file_name)
         if not validation["valid"]:
             return {"success": False, "message": validation["message"], "error_code": "FILE_VALIDATION_FAILED"}
+        source = io.BytesIO(file_data) if isinstance(file_data, (bytes, bytearray)) else file_data
         try:
-            metadata = document_parser.extract_metadata(file_data, file_name)
-            doc_id = self._save_document_file(user_id, file_data, file_name)
+            stored = await asyncio.to_thread(self._write_source_file, user_id, source)
+            if not stored["valid"]:
+                return {"success": False, "message": stored["message"], "error_code": "FILE_VALIDATION_FAILED"}
+            doc_id = stored["doc_id"]
             storage_path = self._storage_path(user_id, doc_id, file_name)
             self._create_private_document(
-                user_id=user_id, doc_id=doc_id, title=title or self._generate_title(file_name, metadata),
-                file_name=file_name, file_type=metadata.get("file_type", "unknown"),
-                file_size=len(file_data), storage_path=str(storage_path), tags=tags or [],
+                user_id=user_id, doc_id=doc_id, title=title or self._generate_title(file_name, {}),
+                file_name=file_name, file_type=document_parser.get_file_type(file_name),
+                file_size=stored["size"], storage_path=str(storage_path), tags=tags or [],
             )
             self._set_private_status(user_id, doc_id, "processing", chroma_ids=[])
-            lifecycle = self._start_ingestion(user_id, doc_id, file_data)
+            lifecycle = self._start_ingestion(user_id, doc_id, fingerprint=stored["fingerprint"], source_size=stored["size"])
             if not lifecycle.get("job_id"):
                 self._set_private_status(user_id, doc_id, "failed", error_message="Could not create the document processing task")
                 return {"success": False, "message": "The document was stored but its processing task could not be created", "error_code": "KNOWLEDGE_JOB_CREATE_FAILED", "doc_id": doc_id}
@@ -96,7 +117,12 @@ class PersonalKnowledgeDocumentManager:
             return {"success": False, "message": "The document could not be added", "error_code": "UPLOAD_FAILED"}
 
     async def process_stored_document(self, user_id: str, doc_id: str, *, report_progress: Optional[Callable[[str, int], bool]] = None) -> Dict[str, Any]:
-        """Parse and replace one stored source under an already claimed durable job."""
+        """Parse and replace one stored source under an already claimed durable job.
+
+        Sources whose exact bytes were already ingested with the same file type and
+        embedding model are indexed from the content-addressed ingestion cache,
+        without calling the parser, vision captioning, or the embedding model.
+        """
         checkpoint = lambda stage, progress: True if report_progress is None else bool(report_progress(stage, progress))
         document = self._get_private_document(user_id, doc_id)
         if document is None:
@@ -107,52 +133,119 @@ class PersonalKnowledgeDocumentManager:
             return self._failed(user_id, doc_id, "The original source file is unavailable for processing")
         if not checkpoint("reading_source", 15):
             return self._cancelled(user_id, doc_id)
+        streamed: Optional[Iterator[str]] = None
+        cache_key: Optional[str] = None
+        cache_claimed = False
         try:
-            file_data = self._read_source_bytes(document, storage_path)
-            validation = self._validate_file(file_data, file_name)
+            file_type = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else "unknown"
+            if file_type in STREAMED_FILE_TYPES:
+                # The extraction process opens the stored file itself, so this worker
+                # never decrypts it whole; size and fingerprint come from the version row.
+                file_data = b""
+                fingerprint, file_size = self._stored_source_identity(user_id, doc_id, document, storage_path)
+            else:
+                file_data = self._read_source_bytes(document, storage_path)
+                fingerprint, file_size = hashlib.sha256(file_data).hexdigest(), len(file_data)
+            validation = self._validate_file(file_size, file_name)
             if not validation["valid"]:
                 return self._failed(user_id, doc_id, validation["message"])
+            index_metadata = {
+                "file_name": file_name,
+                "title": str(document.get("title") or file_name),
+                "created_at": datetime.now().isoformat(),
+                "file_type": file_type,
+            }
+            if self._ingestion_cache is not None:
+                cache_key = ingestion_cache_key(
+                    content_fingerprint=fingerprint, index_version=INDEX_VERSION,
+                    file_type=file_type, embedding_identity=self._store.embedding_identity,
+                )
+                cached = self._ingestion_cache.get(cache_key)
+                if cached is not None:
+                    self._set_private_status(user_id, doc_id, "parsed", content_preview=str(cached["content_preview"]))
+                    if not checkpoint("building_search_index", 70):
+                        return self._cancelled(user_id, doc_id)
+                    indexed = self._store.index_embedded_chunks(
+                        scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id,
+                        batches=self._ingestion_cache.iter_batches(cache_key), metadata=index_metadata,
+                    )
+                    self._ingestion_cache.reference(cache_key, owner_id=user_id, document_id=doc_id)
+                    return self._finish_indexing(user_id, doc_id, indexed, checkpoint, reused=True)
             if not checkpoint("extracting_content", 35):
                 return self._cancelled(user_id, doc_id)
-            parse_result = document_parser.parse_file(file_data, file_name)
-            if not parse_result.get("success"):
-                return self._failed(user_id, doc_id, str(parse_result.get("error") or "Document parsing failed"))
-            if parse_result.get("requires_vision_enrichment"):
-                if not checkpoint("understanding_image", 50):
+            cancelled = {"requested": False}
+            if file_type in STREAMED_FILE_TYPES:
+                # PDF pages and spreadsheet row blocks are extracted out of process and
+                # chunked and embedded as they arrive instead of after the last page.
+                streamed = self._watched_sections(
+                    document_parser.iter_file_sections(storage_path, file_name, fernet_key=self._cipher.worker_key()),
+                    checkpoint, cancelled,
+                )
+                content = next(streamed, "")
+                if cancelled["requested"]:
                     return self._cancelled(user_id, doc_id)
-                parse_result = await self._enrich_image(file_data, file_name, parse_result)
+            else:
+                parse_result = document_parser.parse_file(file_data, file_name)
                 if not parse_result.get("success"):
-                    return self._failed(user_id, doc_id, str(parse_result.get("error") or "Image understanding failed"))
-            content = str(parse_result.get("content") or "")
+                    return self._failed(user_id, doc_id, str(parse_result.get("error") or "Document parsing failed"))
+                if parse_result.get("requires_vision_enrichment"):
+                    if not checkpoint("understanding_image", 50):
+                        return self._cancelled(user_id, doc_id)
+                    parse_result = await self._enrich_image(file_data, file_name, parse_result)
+                    if not parse_result.get("success"):
+                        return self._failed(user_id, doc_id, str(parse_result.get("error") or "Image understanding failed"))
+                content = str(parse_result.get("content") or "")
             if not content.strip():
                 return self._failed(user_id, doc_id, "No searchable content could be extracted from this source")
             preview = content[:self.preview_length] + ("..." if len(content) > self.preview_length else "")
             self._set_private_status(user_id, doc_id, "parsed", content_preview=preview)
             if not checkpoint("building_search_index", 70):
                 return self._cancelled(user_id, doc_id)
-            indexed = self._store.index_text(
-                scope=KnowledgeScope.USER,
-                owner_id=user_id,
-                document_id=doc_id,
-                text=content,
-                metadata={
-                    "file_name": file_name,
-                    "title": str((self._get_private_document(user_id, doc_id) or {}).get("title") or file_name),
-                    "created_at": datetime.now().isoformat(),
-                    "file_type": file_name.rsplit(".", 1)[-1].lower() if "." in file_name else "unknown",
-                },
-            )
-            if not checkpoint("finalizing", 95):
+            on_batch = None
+            if cache_key is not None and self._ingestion_cache.begin(cache_key):
+                cache_claimed = True
+                on_batch = lambda start, texts, embeddings: self._ingestion_cache.add_chunks(cache_key, start, texts, embeddings)
+            if streamed is None:
+                indexed = self._store.index_text(
+                    scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id, text=content,
+                    metadata=index_metadata, on_batch=on_batch,
+                )
+            else:
+                indexed = self._store.index_sections(
+                    scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id,
+                    sections=itertools.chain([content], streamed), metadata=index_metadata, on_batch=on_batch,
+                )
+            if cancelled["requested"]:
                 self._store.delete_document(scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id)
                 return self._cancelled(user_id, doc_id)
-            self._set_private_status(
-                user_id, doc_id, "completed", vector_collection=indexed.collection, chroma_ids=list(indexed.chunk_ids),
-                index_encryption_version=self._cipher.VERSION if self._cipher else "none",
-            )
-            return {"success": True, "chunk_count": len(indexed.chunk_ids), "index_version": "knowledge-store-v1", "document_id": doc_id}
+            if cache_claimed:
+                self._ingestion_cache.complete(cache_key, chunk_count=len(indexed.chunk_ids), content_preview=preview)
+                cache_claimed = False
+                self._ingestion_cache.reference(cache_key, owner_id=user_id, document_id=doc_id)
+            return self._finish_indexing(user_id, doc_id, indexed, checkpoint, reused=False)
+        except DocumentParseError as exc:
+            return self._failed(user_id, doc_id, str(exc) or "Document parsing failed")
         except Exception:
             logger.exception("Knowledge document processing failed for %s", doc_id)
             return self._failed(user_id, doc_id, "Document processing failed")
+        finally:
+            if streamed is not None:
+                streamed.close()
+            if cache_claimed:
+                try:
+                    self._ingestion_cache.discard(cache_key)
+                except Exception:
+                    logger.exception("Could not discard an incomplete ingestion cache entry")
+
+    def _finish_indexing(self, user_id: str, doc_id: str, indexed: Any, checkpoint: Callable[[str, int], bool], *, reused: bool) -> Dict[str, Any]:
+        if not checkpoint("finalizing", 95):
+            self._store.delete_document(scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id)
+            return self._cancelled(user_id, doc_id)
+        self._set_private_status(
+            user_id, doc_id, "completed", vector_collection=indexed.collection, chroma_ids=list(indexed.chunk_ids),
+            index_encryption_version=self._cipher.VERSION if self._cipher else "none",
+        )
+        return {"success": True, "chunk_count": len(indexed.chunk_ids), "index_version": INDEX_VERSION, "document_id": doc_id, "reused_ingestion": reused}
 
     def enqueue_rebuild_jobs(self, user_id: str) -> Dict[str, Any]:
         """Create durable reindex work for every active source belonging to one user."""
@@ -173,8 +266,10 @@ class PersonalKnowledgeDocumentManager:
                 failures.append({"doc_id": doc_id, "reason": reason})
                 continue
             try:
-                file_data = self._read_source_bytes(document, storage_path)
-                snapshot = self._start_ingestion(user_id, doc_id, file_data, job_type="rebuild", force=True)
+                fingerprint, file_size = self._stored_source_identity(user_id, doc_id, document, storage_path)
+                snapshot = self._start_ingestion(
+                    user_id, doc_id, fingerprint=fingerprint, source_size=file_size, job_type="rebuild", force=True
+                )
                 if snapshot.get("job_id"):
                     self._set_private_status(user_id, doc_id, "processing")
                     jobs.append(snapshot)
@@ -186,8 +281,12 @@ class PersonalKnowledgeDocumentManager:
         return {"success": bool(jobs) or not documents, "message": "Knowledge rebuild tasks were queued", "jobs": jobs, "queued_count": len(jobs), "failed_count": len(failures), "failures": failures}
 
     def delete_indexed_document(self, user_id: str, doc_id: str) -> bool:
-        """Delete a source's retrieval chunks for permanent purge only."""
-        return self._store.delete_document(scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id)
+        """Delete a source's retrieval chunks and cached ingestion for permanent purge only."""
+        if not self._store.delete_document(scope=KnowledgeScope.USER, owner_id=user_id, document_id=doc_id):
+            return False
+        if self._ingestion_cache is not None:
+            self._ingestion_cache.release(owner_id=user_id, document_id=doc_id)
+        return True
 
     def index_stats(self, user_id: str) -> Dict[str, Any]:
         """Return scoped index diagnostics for the workspace maintenance view."""
@@ -315,15 +414,15 @@ class PersonalKnowledgeDocumentManager:
             "failed": failures,
         }
 
-    def _start_ingestion(self, user_id: str, doc_id: str, file_data: bytes, *, job_type: str = "ingest", force: bool = False) -> Dict[str, Any]:
+    def _start_ingestion(self, user_id: str, doc_id: str, file_data: Optional[bytes] = None, *, fingerprint: Optional[str] = None, source_size: Optional[int] = None, job_type: str = "ingest", force: bool = False) -> Dict[str, Any]:
         if self._lifecycle_repository is None:
             return {}
         return self._lifecycle_repository.start_ingestion(
             document_id=doc_id,
             owner_id=user_id,
-            content_fingerprint=hashlib.sha256(file_data).hexdigest(),
-            source_size=len(file_data),
-            index_version="knowledge-store-v1",
+            content_fingerprint=fingerprint or hashlib.sha256(file_data or b"").hexdigest(),
+            source_size=len(file_data or b"") if source_size is None else source_size,
+            index_version=INDEX_VERSION,
             job_type=job_type,
             force=force,
         )
@@ -334,7 +433,7 @@ class PersonalKnowledgeDocumentManager:
                 content = await self._image_describer(file_data, file_name)
             else:
                 from services.ai_services.vision_caption import describe_image_for_knowledge
-                content = await describe_image_for_knowledge(file_data, file_name, settings=self._settings)
+                content = await describe_image_for_knowledge(file_data, file_name, settings=self._settings, cache=self._caption_cache)
         except Exception:
             logger.exception("Image knowledge extraction failed for %s", file_name)
             return {"success": False, "error": "图片资料暂时无法识别。请启用支持看图的 AI 服务，或改用可复制文本的文档。"}
@@ -346,24 +445,96 @@ class PersonalKnowledgeDocumentManager:
         enriched.pop("requires_vision_enrichment", None)
         return enriched
 
-    def _validate_file(self, file_data: bytes, file_name: str) -> Dict[str, Any]:
-        if len(file_data) > self.max_file_size:
-            return {"valid": False, "message": f"文件大小超过限制，最大允许 {self.max_file_size / 1024 / 1024:.1f}MB"}
+    @staticmethod
+    def _watched_sections(sections: Iterator[str], checkpoint: Callable[[str, int], bool], cancelled: Dict[str, bool]) -> Iterator[str]:
+        """Yield non-blank parsed sections while keeping the durable job lease alive.
+
+        The job checkpoint is consulted at most once per report interval, so a long
+        document renews its lease and stops promptly when cancellation is requested.
+        Closing this iterator closes the parser stream and its extraction process.
+        """
+        last_report = time.monotonic()
+        try:
+            for section in sections:
+                if time.monotonic() - last_report >= _SECTION_REPORT_INTERVAL_SECONDS:
+                    last_report = time.monotonic()
+                    if not checkpoint("building_search_index", 70):
+                        cancelled["requested"] = True
+                        return
+                if str(section or "").strip():
+                    yield section
+        finally:
+            close = getattr(sections, "close", None)
+            if callable(close):
+                close()
+
+    def _validate_file(self, file_size: int, file_name: str) -> Dict[str, Any]:
+        if file_size > self.max_file_size:
+            return self._too_large()
+        validation = self._validate_file_name(file_name)
+        if not validation["valid"]:
+            return validation
+        if not file_size:
+            return {"valid": False, "message": "空文件不允许上传"}
+        return {"valid": True}
+
+    def _validate_file_name(self, file_name: str) -> Dict[str, Any]:
         file_type = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
         supported = document_parser.get_supported_types()
         if file_type and file_type not in supported:
             return {"valid": False, "message": f"不支持的文件类型: {file_type}，支持的类型: {', '.join(supported)}"}
-        if not file_data:
-            return {"valid": False, "message": "空文件不允许上传"}
         return {"valid": True}
 
+    def _too_large(self) -> Dict[str, Any]:
+        return {"valid": False, "message": f"文件大小超过限制，最大允许 {self.max_file_size / 1024 / 1024:.1f}MB"}
+
     def _save_document_file(self, user_id: str, file_data: bytes, file_name: str) -> str:
+        del file_name
+        stored = self._write_source_file(user_id, io.BytesIO(file_data))
+        if not stored["valid"]:
+            raise ValueError(stored["message"])
+        return stored["doc_id"]
+
+    def _write_source_file(self, user_id: str, source: BinaryIO) -> Dict[str, Any]:
+        """Copy one upload into its encrypted managed path in bounded chunks.
+
+        Inputs: a readable binary stream. Outputs: the new document id, byte size,
+        and sha256 fingerprint, or a validation failure for empty and oversized
+        sources. Runs off the event loop. Side effects: ciphertext is written to a
+        ``.part`` file that replaces the final path only after the last chunk, so a
+        rejected or failed upload leaves no managed file behind.
+        """
         doc_id = str(uuid.uuid4())
         user_dir = self.storage_path / user_id
         user_dir.mkdir(exist_ok=True)
-        stored_data = self._cipher.encrypt(file_data) if self._cipher else file_data
-        self._storage_path(user_id, doc_id, file_name).write_bytes(stored_data)
-        return doc_id
+        target = self._storage_path(user_id, doc_id, "")
+        partial = target.with_name(target.name + ".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with partial.open("wb") as handle:
+                encryptor = self._cipher.stream_encryptor(handle) if self._cipher else None
+                while True:
+                    chunk = source.read(_UPLOAD_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        return self._too_large()
+                    digest.update(chunk)
+                    if encryptor is not None:
+                        encryptor.write(chunk)
+                    else:
+                        handle.write(chunk)
+                if not size:
+                    return {"valid": False, "message": "空文件不允许上传"}
+                if encryptor is not None:
+                    encryptor.finish()
+            os.replace(partial, target)
+        finally:
+            if partial.exists():
+                partial.unlink()
+        return {"valid": True, "doc_id": doc_id, "size": size, "fingerprint": digest.hexdigest()}
 
     def _record_storage_path(self, document: Dict[str, Any]) -> Path:
         """Resolve a catalog storage path without depending on the process CWD.
@@ -387,12 +558,37 @@ class PersonalKnowledgeDocumentManager:
 
     def _read_source_bytes(self, document: Dict[str, Any], storage_path: Path) -> bytes:
         """Read a current encrypted private source inside trusted worker code."""
+        self._require_current_encryption(document)
+        return self._cipher.decrypt(storage_path.read_bytes())
+
+    def _stored_source_identity(self, user_id: str, doc_id: str, document: Dict[str, Any], storage_path: Path) -> Tuple[str, int]:
+        """Return a stored source's sha256 fingerprint and plaintext size without holding it whole.
+
+        The version row written at upload time is used when present; otherwise the
+        source is decrypted and hashed chunk by chunk.
+        """
+        self._require_current_encryption(document)
+        if self._lifecycle_repository is not None:
+            version = self._lifecycle_repository.latest_source_version(document_id=doc_id, owner_id=user_id)
+            if version is not None:
+                return str(version["content_fingerprint"]), int(version["source_size"])
+        digest = hashlib.sha256()
+        size = 0
+        with storage_path.open("rb") as handle:
+            try:
+                for chunk in self._cipher.stream_decryptor(handle):
+                    digest.update(chunk)
+                    size += len(chunk)
+            except InvalidToken as exc:
+                raise RuntimeError("Knowledge source encryption key cannot decrypt this file") from exc
+        return digest.hexdigest(), size
+
+    def _require_current_encryption(self, document: Dict[str, Any]) -> None:
         if self._cipher is None:
             raise RuntimeError("Private knowledge source encryption is not configured")
         version = str(document.get("encryption_version") or "none")
         if version != self._cipher.VERSION:
             raise RuntimeError("Private knowledge source requires encryption migration")
-        return self._cipher.decrypt(storage_path.read_bytes())
 
     @staticmethod
     def _generate_title(file_name: str, metadata: Dict[str, Any]) -> str:
@@ -8,7 +8,9 @@ from typing import Any, Dict, Mapping, Optional
 from adapters.chroma.knowledge_store import ChromaKnowledgeStore
 from adapters.sqlite.knowledge_lifecycle_repository import SQLiteKnowledgeLifecycleRepository
 from adapters.sqlite.knowledge_document_repository import SQLiteKnowledgeDocumentRepository
+from adapters.sqlite.knowledge_ingestion_cache import SQLiteKnowledgeIngestionCache
 from adapters.sqlite.user_knowledge_repository import SQLiteUserKnowledgeRepository
+from adapters.sqlite.vision_caption_cache import SQLiteVisionCaptionCache
 from core.knowledge_contracts import KnowledgeQuery, KnowledgeScope
 from core.runtime_settings import RuntimeSettings
 from database import Database
@@ -190,6 +192,8 @@ def create_user_knowledge_workspace(database: Database, settings: Optional[Runti
             settings=settings,
             cipher=cipher,
             document_repository=catalog,
+            ingestion_cache=SQLiteKnowledgeIngestionCache(database.get_connection, cipher=cipher),
+            caption_cache=SQLiteVisionCaptionCache(database.get_connection, cipher=cipher),
         )
 
     return KnowledgeWorkspace(repository, DeferredKnowledgeMaintenance(create_documents), lifecycle)
@@ -204,7 +208,11 @@ def create_user_knowledge_resources(database: Database, settings: Optional[Runti
     lifecycle = SQLiteKnowledgeLifecycleRepository(database.get_connection)
     repository = SQLiteUserKnowledgeRepository(database.get_connection, cipher=cipher)
     catalog_repository = SQLiteKnowledgeDocumentRepository(database.get_connection, cipher=cipher)
-    documents = PersonalKnowledgeDocumentManager(database=database, store=store, lifecycle_repository=lifecycle, settings=settings, cipher=cipher, document_repository=catalog_repository)
+    documents = PersonalKnowledgeDocumentManager(
+        database=database, store=store, lifecycle_repository=lifecycle, settings=settings, cipher=cipher, document_repository=catalog_repository,
+        ingestion_cache=SQLiteKnowledgeIngestionCache(database.get_connection, cipher=cipher),
+        caption_cache=SQLiteVisionCaptionCache(database.get_connection, cipher=cipher),
+    )
     shared = _shared_manager(database, store, catalog_repository)
     catalog = _catalog_resolver(catalog_repository)
     workspace = KnowledgeWorkspace(repository, documents, lifecycle)
@@ -30,28 +30,6 @@ def _is_expired(value: Any) -> bool:
     return expires_at <= datetime.now(timezone.utc)
 
 
-def _memory_priority(memory: Mapping[str, Any]) -> tuple[int, float, float]:
-    kind_order = {"fact": 0, "preference": 1, "episode": 2, "inference": 3}
-    try:
-        confidence = float(memory.get("confidence") or 0)
-    except (TypeError, ValueError):
-        confidence = 0
-    try:
-        updated_at = datetime.fromisoformat(
-            str(memory.get("updated_at") or "").replace("Z", "+00:00")
-        )
-        if updated_at.tzinfo is None:
-            updated_at = updated_at.replace(tzinfo=timezone.utc)
-        updated_timestamp = updated_at.timestamp()
-    except (TypeError, ValueError):
-        updated_timestamp = 0
-    return (
-        kind_order.get(str(memory.get("memory_type") or "inference"), 4),
-        -confidence,
-        -updated_timestamp,
-    )
-
-
 def _text(value: Any, limit: int = 240) -> str:
     normalized = " ".join(str(value or "").split())
     return normalized if len(normalized) <= limit else normalized[: limit - 1].rstrip() + "..."
@@ -308,17 +286,15 @@ class ContextAssembler:
                 for capability in list(self._growth.list_capabilities(owner_id))[:limit]
             ]
         if section == "memories":
-            eligible_memories = sorted(
-                (
-                    memory
-                    for memory in memories
-                    if memory.get("status") == "active"
-                    and memory.get("use_in_context", True)
-                    and memory.get("review_status", "confirmed") in {"confirmed", "corrected"}
-                    and not _is_expired(memory.get("expires_at"))
-                ),
-                key=_memory_priority,
-            )
+            # Memories arrive ranked by relevance to the current request; keep that order.
+            eligible_memories = [
+                memory
+                for memory in memories
+                if memory.get("status") == "active"
+                and memory.get("use_in_context", True)
+                and memory.get("review_status", "confirmed") in {"confirmed", "corrected"}
+                and not _is_expired(memory.get("expires_at"))
+            ]
             items = []
             for memory in eligible_memories[:limit]:
                 item = _item(
@@ -338,7 +314,9 @@ class ContextAssembler:
                 )
                 item["provenance"]["evidence_refs"] = memory.get("evidence_refs", [])
                 item["_selection_reason"] = (
-                    "Confirmed memory within the current privacy and freshness policy."
+                    "Confirmed memory related to the current request."
+                    if float(memory.get("relevance") or 0) > 0
+                    else "Confirmed memory within the current privacy and freshness policy."
                 )
                 items.append(item)
             return items
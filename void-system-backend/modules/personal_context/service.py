@@ -25,7 +25,6 @@ DEFAULT_PERMISSIONS = {
 MEMORY_TYPES = {"fact", "preference", "episode", "inference"}
 MEMORY_STATUSES = {"active", "archived"}
 MEMORY_REVIEW_STATUSES = {"pending", "confirmed", "corrected", "rejected"}
-CONTEXT_ELIGIBLE_MEMORY_REVIEWS = {"confirmed", "corrected"}
 TONES = {"calm", "warm", "direct"}
 INITIATIVES = {"quiet", "balanced", "proactive"}
 DEFAULT_PERSONA = {
@@ -210,14 +209,14 @@ class PersonalContext:
             never included in the returned payload.
         """
         settings = self.get_settings(owner_id)
-        memories = self._repository.list_memories(owner_id, limit=500)
-        self._profile.sync_memories(owner_id, memories)
         if settings["permissions"]["profile"] and self._profile_evidence_collector is not None:
             self._profile_evidence_collector.collect(owner_id)
         profile_view = self._profile.view(owner_id)
         workspace = self._layered_profile.build(settings=settings, profile_view=profile_view)
         workspace["evidence"] = self._profile_evidence_state(
-            settings, profile_view["signals"], memories
+            settings,
+            profile_view["signals"],
+            self._repository.count_profile_memories(owner_id),
         )
         return workspace
 
@@ -225,7 +224,7 @@ class PersonalContext:
     def _profile_evidence_state(
         settings: Mapping[str, Any],
         signals: Sequence[Mapping[str, Any]],
-        memories: Sequence[Mapping[str, Any]],
+        explicit_memory_count: int,
     ) -> Dict[str, Any]:
         """Describe inference readiness without leaking private source content."""
         eligible = [
@@ -238,14 +237,6 @@ class PersonalContext:
         for item in eligible:
             source_type = str(item.get("source_type") or "manual")
             source_type_counts[source_type] = source_type_counts.get(source_type, 0) + 1
-        explicit_memory_count = sum(
-            1 for memory in memories
-            if memory.get("status") == "active"
-            and bool(memory.get("use_in_context", True))
-            and str(memory.get("review_status") or "confirmed") in CONTEXT_ELIGIBLE_MEMORY_REVIEWS
-            and isinstance(memory.get("metadata"), Mapping)
-            and memory["metadata"].get("contribute_to_profile") is True
-        )
         profile_permission = bool((settings.get("permissions") or {}).get("profile"))
         return {
             "eligible_signal_count": len(eligible),
@@ -399,7 +390,14 @@ class PersonalContext:
         item_budget: int = 24,
         profile_domains: Optional[Sequence[str]] = None,
         include_account_profile: bool = True,
+        query: Optional[str] = None,
     ) -> Dict[str, Any]:
+        """Assemble, audit, and return one permissioned context snapshot.
+
+        ``query`` is the text the context will accompany, such as the current chat
+        message or planning topic. The memories section holds the ``item_budget`` most
+        relevant eligible memories for it, or the highest-priority ones without a query.
+        """
         settings = self.get_settings(owner_id)
         requested = self._requested_sections(requested_sections)
         if not 1 <= item_budget <= 100:
@@ -408,13 +406,17 @@ class PersonalContext:
             raise PersonalContextError("Invalid context purpose.", "INVALID_CONTEXT_PURPOSE")
 
         if settings["enabled"]:
-            memories = self._repository.list_memories(owner_id, limit=500)
-            self._profile.sync_memories(owner_id, memories)
+            # Memory writes refresh their profile signals, so snapshots only read them.
             profile_view = self._profile.view(owner_id)
+            context_memories = (
+                self._repository.search_context_memories(owner_id, query, limit=item_budget)
+                if "memories" in requested and settings["permissions"].get("memories", False)
+                else []
+            )
             snapshot = self._assembler.collect(
                 owner_id,
                 profile,
-                memories,
+                context_memories,
                 profile_view=profile_view,
                 permissions=settings["permissions"],
                 requested_sections=requested,
@@ -472,6 +474,7 @@ class PersonalContext:
         profile: Mapping[str, Any],
         *,
         purpose: str,
+        query: Optional[str] = None,
     ) -> Dict[str, Any]:
         policy = resolve_context_policy(purpose)
         snapshot = self.build_context(
@@ -482,6 +485,7 @@ class PersonalContext:
             item_budget=policy.item_budget,
             profile_domains=policy.profile_domains,
             include_account_profile=policy.include_account_profile,
+            query=query,
         )
         snapshot["manifest"] = {
             "purpose": policy.purpose,
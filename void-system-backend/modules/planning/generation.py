@@ -1,14 +1,19 @@
 """Durable plan-generation jobs and the canonical one-pass planner call."""
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import threading
 import time
 import uuid
-from typing import Any, Callable, Dict, Mapping, Optional
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence
 
 from adapters.sqlite.plan_generation_repository import SQLitePlanGenerationRepository
-from core.planning_contracts import PlanRequest, UserCapability
+from adapters.sqlite.plan_result_cache import SQLitePlanResultCache
+from core.model_connection_profile import resolve_chat_connection
+from core.planning_contracts import PlanGenerationCancelled, PlanRequest, UserCapability
 from core.runtime_settings import RuntimeSettings
 from database import Database
 from errors import VoidSystemException
@@ -17,6 +22,7 @@ from modules.personal_context.service import PersonalContext
 from modules.planning.context import build_generation_context
 from modules.planning.interaction import resolve_planning_interaction_policy
 from modules.planning.service import get_planning_engine
+from services.ai_services.model_clients import profile_fingerprint
 
 
 logger = logging.getLogger("void-system.planning")
@@ -45,6 +51,7 @@ class PlanGenerationService:
                 "execution_mode": str(values.get("execution_mode") or "assisted"),
                 "max_steps": int(values.get("max_steps") or 8),
                 "advisor_prefs": dict(values.get("advisor_prefs") or {}),
+                "regenerate": bool(values.get("regenerate", False)),
             },
         )
 
@@ -73,7 +80,7 @@ class PlanGenerationService:
     def execute_claimed(
         self,
         job: Mapping[str, Any],
-        generate: Callable[[Mapping[str, Any], Callable[[str, int], bool]], Dict[str, Any]],
+        generate: Callable[[Mapping[str, Any], Callable[..., bool]], Dict[str, Any]],
     ) -> None:
         """Run one worker-leased job and publish only the resulting complete draft.
 
@@ -85,7 +92,8 @@ class PlanGenerationService:
         Called by:
             PlanGenerationWorker after it claims a database job.
         Side effects:
-            Renews the lease at checkpoints and writes progress, result, or a safe failure message.
+            Renews the lease at checkpoints and writes progress, streamed step previews, result,
+            or a safe failure message.
         Failure:
             Domain errors become a user-safe failed job. Unexpected errors are logged without leaking
             provider credentials or internal prompt content.
@@ -99,13 +107,14 @@ class PlanGenerationService:
             logger.error("Plan worker received an unleased generation job")
             return
 
-        def report(stage: str, progress: int) -> bool:
+        def report(stage: str, progress: int,
+                   partial_steps: Optional[Sequence[Mapping[str, Any]]] = None) -> bool:
             if self._repository.is_cancel_requested(generation_id, worker_id, lease_token):
                 return False
             if not self._repository.heartbeat(generation_id, worker_id, lease_token):
                 return False
             return self._repository.update_progress(
-                generation_id, worker_id, lease_token, stage, progress
+                generation_id, worker_id, lease_token, stage, progress, partial_steps=partial_steps
             )
 
         if not report("preparing_context", 20):
@@ -118,6 +127,8 @@ class PlanGenerationService:
                 return
             self._repository.heartbeat(generation_id, worker_id, lease_token)
             self._repository.complete(generation_id, worker_id, lease_token, result)
+        except PlanGenerationCancelled:
+            self._repository.fail(generation_id, worker_id, lease_token, "")
         except VoidSystemException as exc:
             self._repository.fail(generation_id, worker_id, lease_token, exc.message)
         except Exception as exc:
@@ -207,16 +218,32 @@ def generate_run_plan_draft(
     execution_mode: str,
     max_steps: int,
     advisor_prefs: Optional[Mapping[str, Any]] = None,
-    progress_callback: Optional[Callable[[str, int], Any]] = None,
+    progress_callback: Optional[Callable[..., bool]] = None,
+    result_cache: Optional[SQLitePlanResultCache] = None,
+    use_cached_result: bool = True,
 ) -> Dict[str, Any]:
+    """Build the planning request, call the engine once, and return a checked draft result.
+
+    With ``result_cache`` an identical earlier request from the same user (topic, mode,
+    step budget, capabilities, rendered context, preferences, interaction policy, and
+    chat model profile) returns its stored result without a model call. Passing
+    ``use_cached_result=False`` regenerates and replaces that entry. Results built from
+    the local fallback plan are never cached. ``progress_callback`` returns False once
+    the job is cancelled or its lease is lost; generation then stops, including an
+    in-flight model stream, by raising PlanGenerationCancelled.
+    """
     user_id = str(current_user["user_id"])
     companion_settings = companion.get_settings(user_id)
     interaction_policy = resolve_planning_interaction_policy(companion_settings)
     user_attributes = profile.list_capabilities(user_id)
-    if progress_callback:
-        progress_callback("preparing_context", 30)
+
+    def report(stage: str, progress: int, **extra: Any) -> None:
+        if progress_callback is not None and not progress_callback(stage, progress, **extra):
+            raise PlanGenerationCancelled(stage)
+
+    report("preparing_context", 30)
     profile_context, context_manifest = _planning_context(
-        companion, current_user, user_attributes, dict(advisor_prefs or {})
+        companion, current_user, user_attributes, dict(advisor_prefs or {}), topic
     )
     capabilities = [
         UserCapability(
@@ -228,9 +255,30 @@ def generate_run_plan_draft(
         )
         for attribute in user_attributes
     ]
-    if progress_callback:
-        progress_callback("generating_steps", 45)
+    cache_key = None
+    if result_cache is not None:
+        cache_key = _plan_cache_key(
+            topic=topic, execution_mode=execution_mode, max_steps=max_steps,
+            capabilities=[asdict(capability) for capability in capabilities],
+            profile_context=profile_context, advisor_prefs=dict(advisor_prefs or {}),
+            interaction_policy=asdict(interaction_policy),
+            model_profile=profile_fingerprint(resolve_chat_connection(settings)),
+        )
+        cached = result_cache.get(user_id, cache_key) if use_cached_result else None
+        if cached is not None:
+            cached["context"] = context_manifest
+            cached["meta"] = {**dict(cached.get("meta") or {}), "cached": True}
+            return cached
+    report("generating_steps", 45)
     planner_mode = "single_task" if max_steps == 1 else "workflow_chain"
+    streamed_steps: list[Dict[str, Any]] = []
+
+    def publish_task(task: Any) -> None:
+        # Previews only show progress; the checked draft below is what gets published.
+        streamed_steps.append(_preview_task(task, len(streamed_steps) + 1))
+        progress = 45 + (35 * len(streamed_steps)) // max(1, max_steps)
+        report("generating_steps", progress, partial_steps=list(streamed_steps))
+
     plan = get_planning_engine(settings).plan(
         PlanRequest(
             topic=topic,
@@ -240,28 +288,36 @@ def generate_run_plan_draft(
             max_steps=max_steps,
             strict=False,
             interaction_policy=interaction_policy,
+            on_task=publish_task if progress_callback else None,
         )
     )
-    if progress_callback:
-        progress_callback("checking_result", 85)
+    report("checking_result", 85)
     result = _serialize_run_plan(
         plan, topic=topic, execution_mode=execution_mode, max_steps=max_steps
     )
     result["context"] = context_manifest
+    if result_cache is not None and cache_key is not None and not result["meta"]["used_fallback"]:
+        result_cache.put(user_id, cache_key, result)
     return result
 
 
+def _plan_cache_key(**parts: Any) -> str:
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
 def _planning_context(
     companion: PersonalContext,
     current_user: Mapping[str, Any],
     user_attributes: list[Dict[str, Any]],
     advisor_preferences: Dict[str, Any],
+    topic: str,
 ) -> tuple[str, Dict[str, Any]]:
     baseline = build_generation_context(
         dict(current_user), user_attributes, advisor_preferences=advisor_preferences
     )
     snapshot = companion.build_ai_context(
-        str(current_user["user_id"]), dict(current_user), purpose="planning_assist"
+        str(current_user["user_id"]), dict(current_user), purpose="planning_assist", query=topic
     )
     personal = companion.render_ai_context(snapshot)
     return (
@@ -270,6 +326,15 @@ def _planning_context(
     )
 
 
+def _preview_task(task: Any, index: int) -> Dict[str, Any]:
+    return {
+        "client_key": f"step-{index}",
+        "title": str(getattr(task, "title", "") or "").strip(),
+        "description": str(getattr(task, "description", "") or "").strip(),
+        "estimated_minutes": getattr(task, "estimated_time", None),
+    }
+
+
 def _serialize_task(task: Any) -> Dict[str, Any]:
     title = str(getattr(task, "title", "") or "").strip()
     description = str(getattr(task, "description", "") or "").strip()
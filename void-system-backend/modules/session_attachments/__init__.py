@@ -1,5 +1,6 @@
 """Temporary session attachment module."""
 
 from modules.session_attachments.service import SessionAttachments
+from modules.session_attachments.sweeper import SessionAttachmentSweeper
 
-__all__ = ["SessionAttachments"]
+__all__ = ["SessionAttachments", "SessionAttachmentSweeper"]
@@ -66,14 +66,12 @@ class SessionAttachments:
         )
 
     def available_image_data_urls(self, user_id: str, session_id: str, file_ids: list[str]) -> list[str]:
-        """Load only still-valid session images; chat remains usable when one expires."""
-        return [
-            data_url
-            for file_id in file_ids
-            if file_id
-            for data_url in [self._gateway.image_data_url(user_id, session_id, file_id)]
-            if data_url
-        ]
+        """Load only still-valid session images; chat remains usable when one expires.
+
+        All requested files are read in one batch, in request order, from the
+        payloads normalized when each image was uploaded.
+        """
+        return self._gateway.image_data_urls(user_id, session_id, [file_id for file_id in file_ids if file_id])
 
     def image_data_url(self, user_id: str, session_id: str, file_id: str) -> str:
         self._require_session_owner(user_id, session_id)
@@ -92,6 +90,10 @@ class SessionAttachments:
         )
         return str(result.get("message", "Attachment deleted"))
 
+    def sweep_expired(self, *, limit: int) -> Dict[str, int]:
+        """Remove up to ``limit`` expired attachments and report what was removed."""
+        return self._gateway.sweep_expired(limit)
+
     def _require_session_owner(self, user_id: str, session_id: str) -> None:
         if not self._gateway.owns_session(user_id, session_id):
             raise SessionAttachmentError("Session not found", "SESSION_NOT_FOUND", 404)
@@ -0,0 +1,132 @@
+"""In-process removal of expired session attachments."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from modules.session_attachments.service import SessionAttachments
+
+
+logger = logging.getLogger("void-system.session_attachments.sweeper")
+
+_COUNTERS = ("expired_rows", "deleted_rows", "removed_files", "file_errors")
+
+
+class SessionAttachmentSweeper:
+    """Application-owned ticker that deletes expired attachment files and rows.
+
+    Inputs:
+        attachments: Attachment service that removes one bounded batch per call.
+        interval_seconds: Delay between ticks once the backlog is drained.
+        batch_size: Maximum expired rows removed per batch.
+        max_batches_per_tick: Batches run back to back before yielding to the next tick.
+    Outputs:
+        A daemon worker plus a snapshot of the last tick and cumulative counters.
+    Called by:
+        FastAPI lifespan. Attachment reads only filter on expiry and never delete.
+    Side effects:
+        One indexed expiry query, file unlinks, and one short delete transaction per batch.
+    Invariants:
+        Files are unlinked before their rows are deleted, so a crash between the two
+        leaves rows that the next tick removes rather than orphaned files.
+    """
+
+    def __init__(
+        self,
+        attachments: SessionAttachments,
+        *,
+        interval_seconds: float = 300.0,
+        batch_size: int = 200,
+        max_batches_per_tick: int = 5,
+    ) -> None:
+        self._attachments = attachments
+        self._interval_seconds = max(0.1, interval_seconds)
+        self._batch_size = max(1, batch_size)
+        self._max_batches = max(1, max_batches_per_tick)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._last_tick: Optional[Dict[str, Any]] = None
+        self._totals: Dict[str, Any] = {name: 0 for name in _COUNTERS}
+        self._totals.update({"ticks": 0, "failed_ticks": 0})
+
+    def start(self) -> None:
+        """Start the single sweep thread during lifespan startup."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="session-attachment-sweeper", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Run a tick now instead of waiting for the next interval."""
+        self._wake.set()
+
+    def stop(self, *, timeout: float = 5.0) -> None:
+        """Request shutdown; a batch in progress finishes or is redone on the next tick."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the last tick's counts and timing plus totals since start."""
+        with self._lock:
+            return {
+                "last_tick": dict(self._last_tick) if self._last_tick else None,
+                "totals": dict(self._totals),
+                "batch_size": self._batch_size,
+                "max_batches_per_tick": self._max_batches,
+                "interval_seconds": self._interval_seconds,
+            }
+
+    def sweep_once(self) -> Dict[str, Any]:
+        """Remove up to ``max_batches_per_tick`` full batches and record the tick."""
+        started = time.perf_counter()
+        tick: Dict[str, Any] = {name: 0 for name in _COUNTERS}
+        tick["batches"] = 0
+        tick["backlog_remaining"] = False
+        try:
+            while tick["batches"] < self._max_batches and not self._stop.is_set():
+                result = self._attachments.sweep_expired(limit=self._batch_size)
+                tick["batches"] += 1
+                for name in _COUNTERS:
+                    tick[name] += int(result.get(name, 0))
+                tick["backlog_remaining"] = int(result.get("expired_rows", 0)) >= self._batch_size
+                # A batch whose files all failed to delete would only be listed again.
+                if not tick["backlog_remaining"] or not int(result.get("deleted_rows", 0)):
+                    break
+        finally:
+            tick["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            tick["finished_at"] = datetime.now(timezone.utc).isoformat()
+            with self._lock:
+                self._last_tick = tick
+                self._totals["ticks"] += 1
+                for name in _COUNTERS:
+                    self._totals[name] += tick[name]
+        if tick["deleted_rows"] or tick["file_errors"]:
+            logger.info(
+                "Session attachment sweep removed %d rows and %d files (%d file errors) in %.1f ms",
+                tick["deleted_rows"], tick["removed_files"], tick["file_errors"], tick["duration_ms"],
+            )
+        return tick
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            backlog = False
+            try:
+                backlog = bool(self.sweep_once()["backlog_remaining"])
+            except Exception as exc:
+                logger.exception("Session attachment sweep failed (%s)", type(exc).__name__)
+                with self._lock:
+                    self._totals["failed_ticks"] += 1
+            if backlog:
+                # Yield briefly so a large backlog never holds the write lock back to back.
+                self._wake.wait(1.0)
+            else:
+                self._wake.wait(self._interval_seconds)
+            self._wake.clear()
@@ -1,12 +1,28 @@
 """Trigger-to-Run automation for creating user-owned Runs."""
 from __future__ import annotations
 
+from datetime import datetime, timezone
 import hashlib
+import logging
 from typing import Any, Dict, Mapping, Optional, Sequence
 
 from core.task_automation_contracts import TaskAutomationError, TaskAutomationRepository
 from core.task_execution_contracts import TaskExecutionError
-from modules.tasks.execution import TaskExecution
+from modules.tasks.execution import (
+    TaskExecution,
+    build_compiled_run_plan,
+    is_compiled_run_plan_current,
+)
+from modules.tasks.schedule import (
+    format_slot,
+    next_fire_time,
+    normalize_schedule,
+    parse_slot,
+    slot_source_key,
+)
+
+
+logger = logging.getLogger("void-system.tasks.automation")
 
 
 TRIGGER_TYPES = frozenset({"schedule", "event"})
@@ -32,7 +48,7 @@ class TaskAutomation:
         except TaskExecutionError as exc:
             raise self._execution_error(exc) from exc
         normalized_template.pop("idempotency_key", None)
-        return self._repository.create_trigger(
+        return self._public(self._repository.create_trigger(
             user_id,
             {
                 "goal_id": goal_id,
@@ -40,13 +56,18 @@ class TaskAutomation:
                 "trigger_type": trigger_type,
                 "configuration": configuration,
                 "run_template": normalized_template,
+                "compiled_run_plan": build_compiled_run_plan(normalized_template, normalized_template),
+                "next_fire_at": self._next_fire_at(trigger_type, "active", configuration),
             },
-        )
+        ))
 
     def list_triggers(self, user_id: str) -> Sequence[Dict[str, Any]]:
-        return self._repository.list_triggers(user_id)
+        return [self._public(trigger) for trigger in self._repository.list_triggers(user_id)]
 
     def get_trigger(self, user_id: str, trigger_id: str) -> Dict[str, Any]:
+        return self._public(self._load_trigger(user_id, trigger_id))
+
+    def _load_trigger(self, user_id: str, trigger_id: str) -> Dict[str, Any]:
         trigger = self._repository.get_trigger(user_id, trigger_id)
         if trigger is None:
             raise TaskAutomationError("Trigger not found.", "TRIGGER_NOT_FOUND", 404)
@@ -63,6 +84,9 @@ class TaskAutomation:
             updates["configuration"] = self._configuration(
                 trigger["trigger_type"], values.get("configuration")
             )
+            updates["next_fire_at"] = self._next_fire_at(
+                trigger["trigger_type"], trigger["status"], updates["configuration"]
+            )
         if "run_template" in values:
             template = self._mapping(values.get("run_template"), "Run template")
             try:
@@ -73,6 +97,7 @@ class TaskAutomation:
                 raise self._execution_error(exc) from exc
             normalized.pop("idempotency_key", None)
             updates["run_template"] = normalized
+            updates["compiled_run_plan"] = build_compiled_run_plan(normalized, normalized)
         if not updates:
             return trigger
         if not self._repository.update_trigger(user_id, trigger_id, updates):
@@ -97,14 +122,14 @@ class TaskAutomation:
         source_key: str,
         payload: Optional[Mapping[str, Any]] = None,
     ) -> Dict[str, Any]:
-        trigger = self.get_trigger(user_id, trigger_id)
+        trigger = self._load_trigger(user_id, trigger_id)
         normalized_source_key = self._required_text(source_key, "Trigger source key", 200)
         existing = self._repository.get_firing(
             user_id, trigger_id, normalized_source_key
         )
         if existing is not None:
             return {
-                "trigger": trigger,
+                "trigger": self._public(trigger),
                 "firing": existing,
                 "run": self._get_run(user_id, existing["run_id"]),
             }
@@ -113,21 +138,15 @@ class TaskAutomation:
                 "Only active triggers can create a run.", "TRIGGER_NOT_ACTIVE", 409
             )
 
-        run_values = dict(trigger["run_template"])
-        metadata = dict(run_values.get("metadata") or {})
-        metadata.update(
-            {
-                "trigger_id": trigger_id,
-                "trigger_type": trigger["trigger_type"],
-                "trigger_source_key": normalized_source_key,
-            }
-        )
-        run_values["metadata"] = metadata
-        source_digest = hashlib.sha256(normalized_source_key.encode("utf-8")).hexdigest()
-        run_values["idempotency_key"] = f"trigger:{trigger_id}:{source_digest}"
+        plan = self._compiled_plan(trigger)
+        idempotency_key, metadata = self._run_identity(trigger, normalized_source_key)
         try:
-            run = self._execution.create_run(
-                user_id, trigger["goal_id"], run_values
+            run = self._execution.create_compiled_run(
+                user_id,
+                trigger["goal_id"],
+                plan,
+                idempotency_key=idempotency_key,
+                metadata=metadata,
             )
         except TaskExecutionError as exc:
             raise self._execution_error(exc) from exc
@@ -146,6 +165,135 @@ class TaskAutomation:
             "run": self._get_run(user_id, firing["run_id"]),
         }
 
+    def ingest_event(
+        self,
+        event_type: str,
+        source_key: str,
+        payload: Optional[Mapping[str, Any]] = None,
+        *,
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Deliver one external event to every active event Trigger subscribed to it.
+
+        Inputs:
+            event_type: Matches ``configuration.event_type`` of event Triggers.
+            source_key: Stable event identity; redelivery replays recorded results.
+            payload: Event payload recorded on each Firing.
+            user_id: Restricts delivery to one owner; None delivers to every owner.
+        Outputs:
+            Counts by outcome and one compact result per matched Trigger, with Run ids
+            rather than full Run snapshots.
+        Called by:
+            Owner and administrator event ingestion routes.
+        Side effects:
+            One indexed Trigger lookup, then Runs and Firings written in batched
+            transactions from each Trigger's compiled Run plan. Only a stale plan is
+            revalidated; a template that no longer validates fails its own delivery.
+        """
+        normalized_event_type = self._required_text(event_type, "Event type", 200)
+        normalized_source_key = self._required_text(source_key, "Trigger source key", 200)
+        normalized_payload = self._mapping(payload, "Trigger payload")
+        results = []
+        deliveries = []
+        for trigger in self._repository.list_event_triggers(normalized_event_type, user_id=user_id):
+            if trigger["goal_status"] != "active":
+                results.append({
+                    "trigger_id": trigger["trigger_id"], "user_id": trigger["user_id"],
+                    "status": "skipped", "code": "GOAL_NOT_ACTIVE",
+                })
+                continue
+            try:
+                plan = self._compiled_plan(trigger)
+            except TaskAutomationError as exc:
+                results.append({
+                    "trigger_id": trigger["trigger_id"], "user_id": trigger["user_id"],
+                    "status": "failed", "code": exc.code, "message": exc.message,
+                })
+                continue
+            idempotency_key, metadata = self._run_identity(trigger, normalized_source_key)
+            deliveries.append({
+                "trigger_id": trigger["trigger_id"],
+                "user_id": trigger["user_id"],
+                "goal_id": trigger["goal_id"],
+                "steps": plan["steps"],
+                "edges": plan["edges"],
+                "run_values": {
+                    "title": plan["title"],
+                    "objective": plan["objective"],
+                    "mode": plan["mode"],
+                    "idempotency_key": idempotency_key,
+                    "metadata": {**plan["metadata"], **metadata},
+                },
+            })
+        results.extend(
+            self._repository.record_event_firings(normalized_source_key, normalized_payload, deliveries)
+        )
+        counts = {status: 0 for status in ("created", "replayed", "skipped", "failed")}
+        for result in results:
+            counts[result["status"]] += 1
+        return {
+            "event_type": normalized_event_type,
+            "source_key": normalized_source_key,
+            "matched": len(results),
+            "counts": counts,
+            "results": results,
+        }
+
+    def fire_due_schedules(
+        self,
+        worker_id: str,
+        *,
+        limit: int = 100,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """Fire every claimed due schedule slot once and advance each Trigger.
+
+        Inputs:
+            worker_id: Scheduler identity used for the batch lease.
+            limit: Maximum Triggers claimed in this tick.
+            now: Evaluation time; defaults to the current UTC time.
+        Outputs:
+            The number of Triggers claimed, so a worker can drain a backlog eagerly.
+        Called by:
+            TriggerScheduleWorker on each tick.
+        Side effects:
+            Creates Runs through ``fire_trigger`` with the source key
+            ``schedule:<slot>``, then moves each Trigger to its first slot after ``now``.
+        Invariants:
+            Slots missed while no worker ran coalesce into one firing of the oldest
+            missed slot. A worker that crashes mid-batch leaves its leases to expire;
+            the next claim re-fires the same slot key and replays the recorded firing.
+        """
+        moment = now or datetime.now(timezone.utc)
+        claimed = self._repository.claim_due_schedules(worker_id, limit=limit)
+        for trigger in claimed:
+            slot = parse_slot(trigger["scheduled_for"])
+            try:
+                self.fire_trigger(
+                    trigger["user_id"],
+                    trigger["trigger_id"],
+                    slot_source_key(slot),
+                    {"scheduled_for": format_slot(slot)},
+                )
+            except TaskAutomationError as exc:
+                # Domain rejections (for example a Goal that no longer accepts Runs)
+                # would fail identically on retry, so the slot is skipped.
+                logger.warning(
+                    "Schedule trigger %s skipped slot %s (%s)",
+                    trigger["trigger_id"], format_slot(slot), exc.code,
+                )
+            except Exception as exc:
+                logger.exception(
+                    "Schedule trigger %s failed (%s); retrying after lease expiry",
+                    trigger["trigger_id"], type(exc).__name__,
+                )
+                continue
+            next_slot = next_fire_time(trigger["configuration"], max(moment, slot))
+            self._repository.complete_schedule(
+                trigger["trigger_id"], trigger["lease_token"], format_slot(next_slot) or ""
+            )
+        return len(claimed)
+
     def _set_trigger_status(
         self, user_id: str, trigger_id: str, status: str
     ) -> Dict[str, Any]:
@@ -153,7 +301,12 @@ class TaskAutomation:
         if trigger["status"] == status:
             return trigger
         if not self._repository.set_trigger_status(
-            user_id, trigger_id, status
+            user_id,
+            trigger_id,
+            status,
+            next_fire_at=self._next_fire_at(
+                trigger["trigger_type"], status, trigger["configuration"]
+            ),
         ):
             raise TaskAutomationError("Trigger not found.", "TRIGGER_NOT_FOUND", 404)
         return self.get_trigger(user_id, trigger_id)
@@ -164,6 +317,50 @@ class TaskAutomation:
         except TaskExecutionError as exc:
             raise self._execution_error(exc) from exc
 
+    def _compiled_plan(self, trigger: Mapping[str, Any]) -> Dict[str, Any]:
+        """Return the Trigger's compiled Run plan, recompiling it only when stale.
+
+        A plan is stale when the stored template changed outside ``update_trigger`` or
+        the compiler version moved. Recompiling runs full template validation and caches
+        the result unless the Trigger was edited concurrently.
+        """
+        plan = trigger.get("compiled_run_plan")
+        if is_compiled_run_plan_current(plan, trigger["run_template"]):
+            return dict(plan)
+        try:
+            plan = self._execution.compile_run_template(
+                trigger["user_id"], trigger["goal_id"], trigger["run_template"]
+            )
+        except TaskExecutionError as exc:
+            raise self._execution_error(exc) from exc
+        self._repository.store_compiled_run_plan(
+            trigger["trigger_id"], plan, expected_updated_at=trigger["updated_at"]
+        )
+        return plan
+
+    @staticmethod
+    def _run_identity(trigger: Mapping[str, Any], source_key: str) -> tuple[str, Dict[str, Any]]:
+        """Return the Run idempotency key and metadata shared by every firing path."""
+        source_digest = hashlib.sha256(source_key.encode("utf-8")).hexdigest()
+        return f"trigger:{trigger['trigger_id']}:{source_digest}", {
+            "trigger_id": trigger["trigger_id"],
+            "trigger_type": trigger["trigger_type"],
+            "trigger_source_key": source_key,
+        }
+
+    @staticmethod
+    def _public(trigger: Mapping[str, Any]) -> Dict[str, Any]:
+        """Drop the internal compiled plan from a Trigger snapshot."""
+        return {key: value for key, value in trigger.items() if key != "compiled_run_plan"}
+
+    @staticmethod
+    def _next_fire_at(
+        trigger_type: str, status: str, configuration: Mapping[str, Any]
+    ) -> Optional[str]:
+        if trigger_type != "schedule" or status != "active":
+            return None
+        return format_slot(next_fire_time(configuration, datetime.now(timezone.utc)))
+
     @staticmethod
     def _configuration(trigger_type: str, value: Any) -> Dict[str, Any]:
         configuration = TaskAutomation._mapping(value, "Trigger configuration")
@@ -185,7 +382,12 @@ class TaskAutomation:
                     "Cron expression is too long.", "TRIGGER_CONFIGURATION_INVALID"
                 )
             configuration["cron"] = cron
-            return configuration
+            try:
+                return normalize_schedule(configuration)
+            except ValueError as exc:
+                raise TaskAutomationError(
+                    str(exc), "TRIGGER_CONFIGURATION_INVALID"
+                ) from exc
         try:
             seconds = int(interval)
         except (TypeError, ValueError) as exc:
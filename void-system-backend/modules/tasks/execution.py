@@ -1,14 +1,18 @@
 """Durable Goal, Run, and Step execution for manual and assisted work."""
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
-from typing import Any, Dict, Mapping, Optional, Sequence
+from typing import Any, Collection, Dict, Mapping, Optional, Sequence
 
 from core.task_execution_contracts import (
     GOAL_STATUSES,
+    MAX_BATCH_COMMANDS,
     RUN_MODES,
     RUN_STATUSES,
     SATISFIED_STEP_STATUSES,
+    STEP_COMMAND_OPS,
     STEP_KINDS,
     STEP_STATUSES,
     TERMINAL_RUN_STATUSES,
@@ -22,6 +26,52 @@ from core.planning_contracts import EvaluationEngine, EvaluationRequest
 
 logger = logging.getLogger(__name__)
 
+# Bump when template normalization or graph rules change so every stored compiled plan
+# is treated as stale and recompiled through full validation on its next use.
+RUN_PLAN_COMPILER_VERSION = 1
+
+
+def run_template_hash(template: Mapping[str, Any]) -> str:
+    """Return a stable digest of a stored Run template."""
+    canonical = json.dumps(template, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_compiled_run_plan_current(plan: Any, template: Mapping[str, Any]) -> bool:
+    """Return whether ``plan`` was compiled from ``template`` by the current compiler."""
+    return (
+        isinstance(plan, Mapping)
+        and plan.get("compiler_version") == RUN_PLAN_COMPILER_VERSION
+        and plan.get("template_hash") == run_template_hash(template)
+    )
+
+
+def build_compiled_run_plan(
+    source_template: Mapping[str, Any], normalized: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """Freeze a validated template into an insert-ready plan keyed by its source hash.
+
+    ``normalized`` must come from ``TaskExecution.validate_run_template``. Dependency
+    keys are resolved to (step index, dependency index) edges here, once.
+    """
+    steps = [dict(step) for step in normalized["steps"]]
+    index_by_key = {str(step["client_key"]): index for index, step in enumerate(steps)}
+    edges = [
+        [index, index_by_key[str(dependency)]]
+        for index, step in enumerate(steps)
+        for dependency in step.get("depends_on", [])
+    ]
+    return {
+        "compiler_version": RUN_PLAN_COMPILER_VERSION,
+        "template_hash": run_template_hash(source_template),
+        "title": normalized["title"],
+        "objective": normalized["objective"],
+        "mode": normalized["mode"],
+        "metadata": dict(normalized["metadata"]),
+        "steps": steps,
+        "edges": edges,
+    }
+
 
 class TaskExecution:
     """Own execution policy behind a compact command and query Interface."""
@@ -190,6 +240,50 @@ class TaskExecution:
         except ValueError as exc:
             raise TaskExecutionError(str(exc), "RUN_SPEC_INVALID") from exc
 
+    def compile_run_template(
+        self, user_id: str, goal_id: str, template: Mapping[str, Any]
+    ) -> Dict[str, Any]:
+        """Fully validate a stored Run template and return its compiled plan."""
+        return build_compiled_run_plan(template, self.validate_run_template(user_id, goal_id, template))
+
+    def create_compiled_run(
+        self,
+        user_id: str,
+        goal_id: str,
+        plan: Mapping[str, Any],
+        *,
+        idempotency_key: str,
+        metadata: Mapping[str, Any],
+    ) -> Dict[str, Any]:
+        """Create a Run from a current compiled plan without re-validating its Steps.
+
+        Inputs:
+            plan: Output of ``compile_run_template``/``build_compiled_run_plan``; callers
+                check ``is_compiled_run_plan_current`` against the stored template first.
+            idempotency_key, metadata: Per-Run values layered over the plan.
+        Outputs:
+            The created or previously created Run for the idempotency key.
+        Invariants:
+            The Goal must still be active; that is the only rule that can change
+            without changing the template hash.
+        """
+        goal = self.get_goal(user_id, goal_id)
+        if goal["status"] != "active":
+            raise TaskExecutionError("Only active goals can start a new run.", "GOAL_NOT_ACTIVE", 409)
+        values = {
+            "title": plan["title"],
+            "objective": plan["objective"],
+            "mode": plan["mode"],
+            "idempotency_key": idempotency_key,
+            "metadata": {**plan["metadata"], **metadata},
+        }
+        try:
+            return self._repository.create_run(
+                user_id, goal_id, values, plan["steps"], edges=plan["edges"]
+            )
+        except ValueError as exc:
+            raise TaskExecutionError(str(exc), "RUN_SPEC_INVALID") from exc
+
     def list_runs(
         self,
         user_id: str,
@@ -213,57 +307,76 @@ class TaskExecution:
             raise TaskExecutionError("Run not found.", "RUN_NOT_FOUND", 404)
         return run
 
-    def start_run(self, user_id: str, run_id: str) -> Dict[str, Any]:
-        self._require_run_status(user_id, run_id, {"queued"})
+    def get_run_state(self, user_id: str, run_id: str) -> Dict[str, Any]:
+        """Return the Run's status and version without hydrating its Step graph."""
+        state = self._repository.get_run_state(user_id, run_id)
+        if state is None:
+            raise TaskExecutionError("Run not found.", "RUN_NOT_FOUND", 404)
+        return state
+
+    def start_run(
+        self, user_id: str, run_id: str, *, expected_version: Optional[int] = None, hydrate: bool = True
+    ) -> Dict[str, Any]:
+        self._require_run_status(user_id, run_id, {"queued"}, expected_version=expected_version)
         if not self._repository.apply_run_transition(
             user_id, run_id, ["queued"], "running", "run.started",
-            publish_ready_steps=True,
+            publish_ready_steps=True, expected_version=expected_version,
         ):
-            raise TaskExecutionError(
-                "Run changed before it could start.", "RUN_STATE_CONFLICT", 409
-            )
-        return self.get_run(user_id, run_id)
+            raise self._conflict("Run changed before it could start.", "RUN_STATE_CONFLICT", expected_version)
+        return self._command_result(user_id, run_id, hydrate)
 
-    def pause_run(self, user_id: str, run_id: str) -> Dict[str, Any]:
-        self._require_run_status(user_id, run_id, {"running"})
+    def pause_run(
+        self, user_id: str, run_id: str, *, expected_version: Optional[int] = None, hydrate: bool = True
+    ) -> Dict[str, Any]:
+        self._require_run_status(user_id, run_id, {"running"}, expected_version=expected_version)
         if not self._repository.apply_run_transition(
-            user_id, run_id, ["running"], "paused", "run.paused"
+            user_id, run_id, ["running"], "paused", "run.paused", expected_version=expected_version
         ):
-            raise TaskExecutionError(
-                "Run changed before it could pause.", "RUN_STATE_CONFLICT", 409
-            )
-        return self.get_run(user_id, run_id)
+            raise self._conflict("Run changed before it could pause.", "RUN_STATE_CONFLICT", expected_version)
+        return self._command_result(user_id, run_id, hydrate)
 
-    def resume_run(self, user_id: str, run_id: str) -> Dict[str, Any]:
-        self._require_run_status(user_id, run_id, {"paused"})
+    def resume_run(
+        self, user_id: str, run_id: str, *, expected_version: Optional[int] = None, hydrate: bool = True
+    ) -> Dict[str, Any]:
+        self._require_run_status(user_id, run_id, {"paused"}, expected_version=expected_version)
         if not self._repository.apply_run_transition(
             user_id, run_id, ["paused"], "running", "run.resumed",
-            publish_ready_steps=True,
+            publish_ready_steps=True, expected_version=expected_version,
         ):
-            raise TaskExecutionError(
-                "Run changed before it could resume.", "RUN_STATE_CONFLICT", 409
-            )
-        return self.get_run(user_id, run_id)
+            raise self._conflict("Run changed before it could resume.", "RUN_STATE_CONFLICT", expected_version)
+        return self._command_result(user_id, run_id, hydrate)
 
-    def cancel_run(self, user_id: str, run_id: str, reason: Optional[str] = None) -> Dict[str, Any]:
-        run = self.get_run(user_id, run_id)
+    def cancel_run(
+        self,
+        user_id: str,
+        run_id: str,
+        reason: Optional[str] = None,
+        *,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
+    ) -> Dict[str, Any]:
+        run = self._require_run_status(
+            user_id, run_id, RUN_STATUSES, expected_version=expected_version
+        )
         if run["status"] in {"completed", "failed", "cancelled"}:
             if run["status"] == "cancelled":
-                return run
+                return self._command_result(user_id, run_id, hydrate)
             raise TaskExecutionError("A finished run cannot be cancelled.", "RUN_ALREADY_FINISHED", 409)
         if not self._repository.apply_run_transition(
             user_id, run_id, [run["status"]], "cancelled", "run.cancelled",
-            payload={"reason": reason}, cancel_open_steps=True,
+            payload={"reason": reason}, cancel_open_steps=True, expected_version=expected_version,
         ):
-            raise TaskExecutionError(
-                "Run changed before it could be cancelled.", "RUN_STATE_CONFLICT", 409
+            raise self._conflict(
+                "Run changed before it could be cancelled.", "RUN_STATE_CONFLICT", expected_version
             )
-        return self.get_run(user_id, run_id)
+        return self._command_result(user_id, run_id, hydrate)
 
-    def retry_run(self, user_id: str, run_id: str) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"failed"})
+    def retry_run(
+        self, user_id: str, run_id: str, *, expected_version: Optional[int] = None, hydrate: bool = True
+    ) -> Dict[str, Any]:
+        self._require_run_status(user_id, run_id, {"failed"}, expected_version=expected_version)
         retryable_steps = [
-            step for step in run.get("steps", [])
+            step for step in self.get_run(user_id, run_id).get("steps", [])
             if step["status"] == "failed" and int(step["attempt_count"]) < int(step["max_attempts"])
         ]
         if not retryable_steps:
@@ -272,45 +385,56 @@ class TaskExecution:
                 "RUN_RETRY_NOT_AVAILABLE",
                 409,
             )
-        return self.retry_step(user_id, run_id, retryable_steps[0]["step_id"])
+        return self.retry_step(
+            user_id, run_id, retryable_steps[0]["step_id"],
+            expected_version=expected_version, hydrate=hydrate,
+        )
 
-    def start_step(self, user_id: str, run_id: str, step_id: str) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running"})
-        step = self._find_step(run, step_id)
-        if step["status"] != "ready":
-            raise TaskExecutionError("Only a ready step can start.", "STEP_NOT_READY", 409)
-        if int(step["attempt_count"]) >= int(step["max_attempts"]):
-            raise TaskExecutionError("This step has no retry attempts remaining.", "STEP_ATTEMPTS_EXHAUSTED", 409)
-        if step.get("requires_approval") and not self._has_approved_decision(run, step_id):
-            return self.request_approval(
-                user_id,
-                run_id,
-                step_id,
-                {"summary": "开始这一步前，需要你先确认。"},
-            )["run"]
-        result = self._repository.apply_step_transition(
-            user_id, run_id, step_id, ["ready"], "running", "step.started",
-            payload={"attempt": int(step["attempt_count"]) + 1},
-            increment_attempt=True,
+    def start_step(
+        self,
+        user_id: str,
+        run_id: str,
+        step_id: str,
+        *,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
+    ) -> Dict[str, Any]:
+        run = self._require_run_status(
+            user_id, run_id, {"running"}, step_id=step_id, expected_version=expected_version
         )
-        if not result.get("changed"):
-            raise TaskExecutionError("Step changed before it could start.", "STEP_STATE_CONFLICT", 409)
-        return self.get_run(user_id, run_id)
+        command = self._start_step_command(run, self._find_step(run, step_id))
+        if command["kind"] == "request_approval":
+            if self._repository.request_approval_transition(
+                user_id, run_id, step_id, command["expected_step_status"], command["request"],
+                expected_version=expected_version,
+            ) is None:
+                raise self._conflict(
+                    "Execution changed before approval was requested.", "STEP_STATE_CONFLICT", expected_version
+                )
+            return self._command_result(user_id, run_id, hydrate)
+        self._apply_step_command(
+            user_id, run_id, command, "Step changed before it could start.", expected_version
+        )
+        return self._command_result(user_id, run_id, hydrate)
 
-    def skip_step(self, user_id: str, run_id: str, step_id: str) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running"})
-        step = self._find_step(run, step_id)
-        if step["status"] in SATISFIED_STEP_STATUSES:
-            return run
-        if step["status"] not in {"pending", "ready", "failed"}:
-            raise TaskExecutionError("This step cannot be skipped now.", "STEP_NOT_SKIPPABLE", 409)
-        result = self._repository.apply_step_transition(
-            user_id, run_id, step_id, [step["status"]], "skipped", "step.skipped",
-            publish_ready_steps=True, complete_run_if_satisfied=True,
+    def skip_step(
+        self,
+        user_id: str,
+        run_id: str,
+        step_id: str,
+        *,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
+    ) -> Dict[str, Any]:
+        run = self._require_run_status(
+            user_id, run_id, {"running"}, step_id=step_id, expected_version=expected_version
         )
-        if not result.get("changed"):
-            raise TaskExecutionError("Step changed before it could be skipped.", "STEP_STATE_CONFLICT", 409)
-        return self.get_run(user_id, run_id)
+        command = self._skip_step_command(self._find_step(run, step_id))
+        if command is not None:
+            self._apply_step_command(
+                user_id, run_id, command, "Step changed before it could be skipped.", expected_version
+            )
+        return self._command_result(user_id, run_id, hydrate)
 
     def complete_step(
         self,
@@ -320,28 +444,146 @@ class TaskExecution:
         *,
         output_data: Optional[Mapping[str, Any]] = None,
         artifacts: Optional[Sequence[Mapping[str, Any]]] = None,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
     ) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running"})
-        if run["mode"] != "manual":
-            raise TaskExecutionError(
-                "System-assisted steps must be submitted for review.",
-                "ASSISTED_REVIEW_REQUIRED",
-                409,
-            )
-        step = self._find_step(run, step_id)
-        if step["status"] != "running":
-            raise TaskExecutionError("Only a running step can complete.", "STEP_NOT_RUNNING", 409)
-        normalized_artifacts = self._normalize_artifacts(artifacts)
-        result = self._repository.apply_step_transition(
-            user_id, run_id, step_id, ["running"], "completed", "step.completed",
-            output_data=output_data or {}, artifacts=normalized_artifacts,
-            publish_ready_steps=True, complete_run_if_satisfied=True,
+        run = self._require_run_status(
+            user_id, run_id, {"running"}, step_id=step_id, expected_version=expected_version
         )
-        if not result.get("changed"):
+        command = self._complete_step_command(
+            run, self._find_step(run, step_id), output_data, artifacts
+        )
+        self._apply_step_command(
+            user_id, run_id, command, "Step changed before completion was saved.", expected_version
+        )
+        return self._command_result(user_id, run_id, hydrate)
+
+    def apply_step_commands(
+        self,
+        user_id: str,
+        run_id: str,
+        commands: Sequence[Mapping[str, Any]],
+        *,
+        expected_version: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Apply an ordered list of Step commands atomically and return a compact result.
+
+        Inputs:
+            commands: ``{"op", "step_id", ...}`` mappings where op is ``start``,
+                ``complete`` (with optional ``output_data`` and ``artifacts``), ``skip``,
+                or ``resolve_approval`` (with ``decision`` and optional ``note``).
+        Outputs:
+            The Run's final status and version, one result per command, and the final
+            status of every Step the batch changed.
+        Called by:
+            The batch Step command HTTP route.
+        Side effects:
+            Exactly the writes and events of the equivalent single commands, committed
+            together; any rejected or conflicting command leaves the Run untouched.
+        Invariants:
+            Each command is checked with the single-command rules against the Run state
+            left by the commands before it. The Run is read once up front and every write
+            is guarded by the status that check expects, so a concurrent change rolls the
+            whole batch back instead of being overwritten.
+        """
+        if not isinstance(commands, Sequence) or isinstance(commands, (str, bytes)) or not commands:
+            raise TaskExecutionError("Provide at least one step command.", "STEP_COMMANDS_INVALID")
+        if len(commands) > MAX_BATCH_COMMANDS:
             raise TaskExecutionError(
-                "Step changed before completion was saved.", "STEP_STATE_CONFLICT", 409
+                f"A batch accepts at most {MAX_BATCH_COMMANDS} commands.", "STEP_COMMANDS_INVALID"
             )
-        return self.get_run(user_id, run_id)
+        run = self.get_run(user_id, run_id)
+        self._check_version(run, expected_version)
+        working = {
+            "status": run["status"],
+            "mode": run["mode"],
+            "steps": [dict(step) for step in run.get("steps", [])],
+            "approvals": [dict(approval) for approval in run.get("approvals", [])],
+        }
+        steps_by_id = {step["step_id"]: step for step in working["steps"]}
+        initial_statuses = {step_id: step["status"] for step_id, step in steps_by_id.items()}
+        prepared: list[Dict[str, Any]] = []
+        summaries: list[Dict[str, Any]] = []
+        for index, raw in enumerate(commands):
+            try:
+                if not isinstance(raw, Mapping):
+                    raise TaskExecutionError("Step commands must be objects.", "STEP_COMMANDS_INVALID")
+                op = self._choice(raw.get("op"), sorted(STEP_COMMAND_OPS), "Command op")
+                step_id = str(raw.get("step_id") or "")
+                self._find_step(working, step_id)
+                step = steps_by_id[step_id]
+                required_status = "waiting_approval" if op == "resolve_approval" else "running"
+                if working["status"] != required_status:
+                    raise TaskExecutionError(
+                        f"Run status {working['status']} does not allow this command.",
+                        "RUN_STATUS_CONFLICT",
+                        409,
+                    )
+                if op == "start":
+                    command = self._start_step_command(working, step)
+                elif op == "skip":
+                    command = self._skip_step_command(step)
+                elif op == "complete":
+                    command = self._complete_step_command(
+                        working, step, raw.get("output_data"), raw.get("artifacts")
+                    )
+                else:
+                    command = self._resolve_step_approval_command(
+                        working, step, raw.get("decision"), raw.get("note")
+                    )
+            except TaskExecutionError as exc:
+                raise TaskExecutionError(
+                    f"Command {index + 1}: {exc.message}", exc.code, exc.status_code
+                ) from exc
+            summary: Dict[str, Any] = {"op": op, "step_id": step_id, "changed": command is not None}
+            if command is not None:
+                self._simulate_step_command(working, steps_by_id, command)
+                summary["position"] = len(prepared)
+                prepared.append(command)
+            summary["status"] = step["status"]
+            summaries.append(summary)
+        if prepared:
+            result = self._repository.apply_step_commands(
+                user_id, run_id, prepared, expected_version=expected_version
+            )
+            if not result.get("changed"):
+                if result.get("version_conflict"):
+                    raise self._version_conflict()
+                code = "RUN_STATE_CONFLICT" if result.get("run_conflict") else "STEP_STATE_CONFLICT"
+                number = next(
+                    index + 1 for index, summary in enumerate(summaries)
+                    if summary.get("position") == result["index"]
+                )
+                raise TaskExecutionError(
+                    f"Execution changed before command {number} was saved; no command was applied.",
+                    code,
+                    409,
+                )
+            outcomes, final_run = result["results"], result["run"]
+        else:
+            outcomes, final_run = [], {
+                "status": run["status"], "version": run.get("version"), "updated_at": run.get("updated_at"),
+            }
+        for summary in summaries:
+            position = summary.pop("position", None)
+            if position is None:
+                continue
+            outcome = outcomes[position]
+            for key in ("ready_step_ids", "reward_settlement", "approval_id"):
+                if outcome.get(key):
+                    summary[key] = outcome[key]
+        return {
+            "run_id": run_id,
+            "status": final_run["status"],
+            "version": final_run["version"],
+            "updated_at": final_run["updated_at"],
+            "commands": summaries,
+            "steps": [
+                {"step_id": step_id, "status": step["status"]}
+                for step_id, step in steps_by_id.items()
+                if step["status"] != initial_statuses[step_id]
+            ],
+        }
 
     def review_assisted_step(
         self,
@@ -357,7 +599,7 @@ class TaskExecution:
         the review HTTP command. Evidence is saved before the model is called, so a provider
         outage is visible and retryable rather than losing the user's submission.
         """
-        run = self._require_run_status(user_id, run_id, {"running"})
+        run = self._require_run_status(user_id, run_id, {"running"}, step_id=step_id)
         if run["mode"] != "assisted":
             raise TaskExecutionError("This run does not use system review.", "REVIEW_NOT_ENABLED", 409)
         step = self._find_step(run, step_id)
@@ -441,8 +683,14 @@ class TaskExecution:
         run_id: str,
         step_id: str,
         error_summary: str,
+        *,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
     ) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running", "waiting_approval"})
+        run = self._require_run_status(
+            user_id, run_id, {"running", "waiting_approval"},
+            step_id=step_id, expected_version=expected_version,
+        )
         step = self._find_step(run, step_id)
         if step["status"] not in {"running", "waiting_approval"}:
             raise TaskExecutionError("Only active work can fail.", "STEP_NOT_ACTIVE", 409)
@@ -454,14 +702,25 @@ class TaskExecution:
             run_event_type="run.failed",
             run_payload={"step_id": step_id, "error": error},
             run_error_summary=error,
+            expected_version=expected_version,
         )
         if not result.get("changed"):
             code = "RUN_STATE_CONFLICT" if result.get("run_conflict") else "STEP_STATE_CONFLICT"
-            raise TaskExecutionError("Execution changed before failure was saved.", code, 409)
-        return self.get_run(user_id, run_id)
+            raise self._conflict("Execution changed before failure was saved.", code, expected_version)
+        return self._command_result(user_id, run_id, hydrate)
 
-    def retry_step(self, user_id: str, run_id: str, step_id: str) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"failed"})
+    def retry_step(
+        self,
+        user_id: str,
+        run_id: str,
+        step_id: str,
+        *,
+        expected_version: Optional[int] = None,
+        hydrate: bool = True,
+    ) -> Dict[str, Any]:
+        run = self._require_run_status(
+            user_id, run_id, {"failed"}, step_id=step_id, expected_version=expected_version
+        )
         step = self._find_step(run, step_id)
         if step["status"] != "failed":
             raise TaskExecutionError("Only a failed step can be retried.", "STEP_NOT_FAILED", 409)
@@ -471,11 +730,12 @@ class TaskExecution:
             user_id, run_id, step_id, ["failed"], "ready", "step.retry_scheduled",
             error_summary="", run_expected=["failed"], run_target="running",
             run_event_type="run.resumed_after_retry", run_error_summary="",
+            expected_version=expected_version,
         )
         if not result.get("changed"):
             code = "RUN_STATE_CONFLICT" if result.get("run_conflict") else "STEP_STATE_CONFLICT"
-            raise TaskExecutionError("Execution changed before retry was saved.", code, 409)
-        return self.get_run(user_id, run_id)
+            raise self._conflict("Execution changed before retry was saved.", code, expected_version)
+        return self._command_result(user_id, run_id, hydrate)
 
     def request_approval(
         self,
@@ -483,19 +743,24 @@ class TaskExecution:
         run_id: str,
         step_id: str,
         request: Mapping[str, Any],
+        *,
+        expected_version: Optional[int] = None,
     ) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running"})
+        run = self._require_run_status(
+            user_id, run_id, {"running"}, step_id=step_id, expected_version=expected_version
+        )
         step = self._find_step(run, step_id)
         if step["status"] not in {"ready", "running"}:
             raise TaskExecutionError(
                 "Approval can only pause ready or running work.", "STEP_APPROVAL_NOT_ALLOWED", 409
             )
         approval = self._repository.request_approval_transition(
-            user_id, run_id, step_id, step["status"], self._mapping(request)
+            user_id, run_id, step_id, step["status"], self._mapping(request),
+            expected_version=expected_version,
         )
         if approval is None:
-            raise TaskExecutionError(
-                "Execution changed before approval was requested.", "STEP_STATE_CONFLICT", 409
+            raise self._conflict(
+                "Execution changed before approval was requested.", "STEP_STATE_CONFLICT", expected_version
             )
         return {"approval": approval, "run": self.get_run(user_id, run_id)}
 
@@ -524,6 +789,60 @@ class TaskExecution:
             )
         return self.get_run(user_id, run_id)
 
+    def resolve_approvals(
+        self,
+        user_id: str,
+        decisions: Sequence[Mapping[str, Any]],
+    ) -> Dict[str, Any]:
+        """Resolve several pending approvals, usually across Runs, in one transaction.
+
+        Every decision is validated first; a missing, already resolved, or conflicting
+        approval rejects the whole batch. Returns each approval's Run and new Run status.
+        """
+        if not isinstance(decisions, Sequence) or isinstance(decisions, (str, bytes)) or not decisions:
+            raise TaskExecutionError("Provide at least one approval decision.", "APPROVAL_DECISIONS_INVALID")
+        if len(decisions) > MAX_BATCH_COMMANDS:
+            raise TaskExecutionError(
+                f"A batch accepts at most {MAX_BATCH_COMMANDS} decisions.", "APPROVAL_DECISIONS_INVALID"
+            )
+        normalized: list[Dict[str, Any]] = []
+        for index, item in enumerate(decisions):
+            approval_id = str(item.get("approval_id") or "") if isinstance(item, Mapping) else ""
+            if not approval_id:
+                raise TaskExecutionError(
+                    f"Decision {index + 1}: approval_id is required.", "APPROVAL_DECISIONS_INVALID"
+                )
+            if item.get("decision") not in {"approved", "rejected"}:
+                raise TaskExecutionError(
+                    f"Decision {index + 1}: decision must be approved or rejected.",
+                    "INVALID_APPROVAL_DECISION",
+                )
+            if any(entry["approval_id"] == approval_id for entry in normalized):
+                raise TaskExecutionError(
+                    f"Decision {index + 1}: approval {approval_id} appears more than once.",
+                    "APPROVAL_DECISIONS_INVALID",
+                )
+            normalized.append({
+                "approval_id": approval_id,
+                "decision": item["decision"],
+                "note": self._optional_text(item.get("note"), 2000),
+            })
+        result = self._repository.resolve_approvals(user_id, normalized)
+        if not result.get("changed"):
+            number = result["index"] + 1
+            if result.get("approval_status") is None:
+                raise TaskExecutionError(f"Decision {number}: approval not found.", "APPROVAL_NOT_FOUND", 404)
+            if result["approval_status"] != "pending":
+                raise TaskExecutionError(
+                    f"Decision {number}: approval has already been resolved.", "APPROVAL_ALREADY_RESOLVED", 409
+                )
+            raise TaskExecutionError(
+                f"Decision {number}: approval or execution state changed before the decision was saved.",
+                "APPROVAL_STATE_CONFLICT",
+                409,
+            )
+        return {"approvals": result["results"]}
+
     def start_action(
         self,
         user_id: str,
@@ -531,7 +850,7 @@ class TaskExecution:
         step_id: str,
         values: Mapping[str, Any],
     ) -> Dict[str, Any]:
-        run = self._require_run_status(user_id, run_id, {"running"})
+        run = self._require_run_status(user_id, run_id, {"running"}, step_id=step_id)
         step = self._find_step(run, step_id)
         if step["status"] != "running":
             raise TaskExecutionError("Actions can only run inside a running step.", "STEP_NOT_RUNNING", 409)
@@ -560,7 +879,7 @@ class TaskExecution:
         output_data: Optional[Mapping[str, Any]] = None,
         error_summary: Optional[str] = None,
     ) -> Dict[str, Any]:
-        self._find_step(self.get_run(user_id, run_id), step_id)
+        self._find_step(self._require_run_status(user_id, run_id, RUN_STATUSES, step_id=step_id), step_id)
         if status not in {"completed", "failed", "cancelled", "confirmed", "revision_requested", "unavailable"}:
             raise TaskExecutionError("Invalid action result status.", "INVALID_ACTION_STATUS")
         if not self._repository.complete_action(
@@ -571,7 +890,7 @@ class TaskExecution:
         return self.get_run(user_id, run_id)
 
     def list_events(self, user_id: str, run_id: str) -> Sequence[Dict[str, Any]]:
-        self.get_run(user_id, run_id)
+        self.get_run_state(user_id, run_id)
         return self._repository.list_events(user_id, run_id)
 
     def get_run_review(self, user_id: str, run_id: str) -> Dict[str, Any]:
@@ -790,9 +1109,19 @@ class TaskExecution:
         return {"kind": "continue", "text": "继续推进当前行动。"}
 
     def _require_run_status(
-        self, user_id: str, run_id: str, allowed: set[str]
+        self,
+        user_id: str,
+        run_id: str,
+        allowed: Collection[str],
+        *,
+        step_id: Optional[str] = None,
+        expected_version: Optional[int] = None,
     ) -> Dict[str, Any]:
-        run = self.get_run(user_id, run_id)
+        """Validate a command against the slim Run projection, not the full Step graph."""
+        run = self._repository.get_run_state(user_id, run_id, step_id=step_id)
+        if run is None:
+            raise TaskExecutionError("Run not found.", "RUN_NOT_FOUND", 404)
+        self._check_version(run, expected_version)
         if run["status"] not in allowed:
             raise TaskExecutionError(
                 f"Run status {run['status']} does not allow this command.",
@@ -801,6 +1130,155 @@ class TaskExecution:
             )
         return run
 
+    def _command_result(self, user_id: str, run_id: str, hydrate: bool) -> Dict[str, Any]:
+        return self.get_run(user_id, run_id) if hydrate else self.get_run_state(user_id, run_id)
+
+    def _check_version(self, run: Mapping[str, Any], expected_version: Optional[int]) -> None:
+        if expected_version is not None and int(run["version"]) != int(expected_version):
+            raise self._version_conflict()
+
+    @staticmethod
+    def _version_conflict() -> TaskExecutionError:
+        return TaskExecutionError(
+            "Run changed since it was last read. Refresh and try again.", "RUN_VERSION_CONFLICT", 412
+        )
+
+    def _conflict(self, message: str, code: str, expected_version: Optional[int]) -> TaskExecutionError:
+        """Report a lost compare-and-set; with a version precondition any change is a version conflict."""
+        if expected_version is not None:
+            return self._version_conflict()
+        return TaskExecutionError(message, code, 409)
+
+    def _start_step_command(self, run: Mapping[str, Any], step: Mapping[str, Any]) -> Dict[str, Any]:
+        if step["status"] != "ready":
+            raise TaskExecutionError("Only a ready step can start.", "STEP_NOT_READY", 409)
+        if int(step["attempt_count"]) >= int(step["max_attempts"]):
+            raise TaskExecutionError("This step has no retry attempts remaining.", "STEP_ATTEMPTS_EXHAUSTED", 409)
+        if step.get("requires_approval") and not self._has_approved_decision(run, step["step_id"]):
+            return {
+                "kind": "request_approval",
+                "step_id": step["step_id"],
+                "expected_step_status": "ready",
+                "request": {"summary": "开始这一步前，需要你先确认。"},
+            }
+        return {
+            "kind": "step",
+            "step_id": step["step_id"],
+            "expected": ["ready"],
+            "target": "running",
+            "event_type": "step.started",
+            "options": {"payload": {"attempt": int(step["attempt_count"]) + 1}, "increment_attempt": True},
+        }
+
+    @staticmethod
+    def _skip_step_command(step: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        if step["status"] in SATISFIED_STEP_STATUSES:
+            return None
+        if step["status"] not in {"pending", "ready", "failed"}:
+            raise TaskExecutionError("This step cannot be skipped now.", "STEP_NOT_SKIPPABLE", 409)
+        return {
+            "kind": "step",
+            "step_id": step["step_id"],
+            "expected": [step["status"]],
+            "target": "skipped",
+            "event_type": "step.skipped",
+            "options": {"publish_ready_steps": True, "complete_run_if_satisfied": True},
+        }
+
+    def _complete_step_command(
+        self,
+        run: Mapping[str, Any],
+        step: Mapping[str, Any],
+        output_data: Optional[Mapping[str, Any]],
+        artifacts: Optional[Sequence[Mapping[str, Any]]],
+    ) -> Dict[str, Any]:
+        if run["mode"] != "manual":
+            raise TaskExecutionError(
+                "System-assisted steps must be submitted for review.",
+                "ASSISTED_REVIEW_REQUIRED",
+                409,
+            )
+        if step["status"] != "running":
+            raise TaskExecutionError("Only a running step can complete.", "STEP_NOT_RUNNING", 409)
+        return {
+            "kind": "step",
+            "step_id": step["step_id"],
+            "expected": ["running"],
+            "target": "completed",
+            "event_type": "step.completed",
+            "options": {
+                "output_data": self._mapping(output_data),
+                "artifacts": self._normalize_artifacts(artifacts),
+                "publish_ready_steps": True,
+                "complete_run_if_satisfied": True,
+            },
+        }
+
+    def _resolve_step_approval_command(
+        self, run: Mapping[str, Any], step: Mapping[str, Any], decision: Any, note: Any
+    ) -> Dict[str, Any]:
+        if decision not in {"approved", "rejected"}:
+            raise TaskExecutionError("Decision must be approved or rejected.", "INVALID_APPROVAL_DECISION")
+        if step["status"] != "waiting_approval" or not any(
+            approval.get("step_id") == step["step_id"] and approval.get("status") == "pending"
+            for approval in run.get("approvals", [])
+        ):
+            raise TaskExecutionError("This step has no pending approval.", "APPROVAL_NOT_FOUND", 404)
+        return {
+            "kind": "resolve_approval",
+            "step_id": step["step_id"],
+            "decision": decision,
+            "note": self._optional_text(note, 2000),
+        }
+
+    def _apply_step_command(
+        self,
+        user_id: str,
+        run_id: str,
+        command: Mapping[str, Any],
+        conflict_message: str,
+        expected_version: Optional[int],
+    ) -> Dict[str, Any]:
+        result = self._repository.apply_step_transition(
+            user_id, run_id, command["step_id"], command["expected"], command["target"],
+            command["event_type"], expected_version=expected_version, **command["options"],
+        )
+        if not result.get("changed"):
+            raise self._conflict(conflict_message, "STEP_STATE_CONFLICT", expected_version)
+        return result
+
+    @staticmethod
+    def _simulate_step_command(
+        run: Dict[str, Any], steps_by_id: Mapping[str, Dict[str, Any]], command: Mapping[str, Any]
+    ) -> None:
+        """Advance an in-memory Run copy the way the repository will for ``command``."""
+        step = steps_by_id[command["step_id"]]
+        if command["kind"] == "request_approval":
+            step["status"] = run["status"] = "waiting_approval"
+            run["approvals"].append({"step_id": step["step_id"], "status": "pending"})
+            return
+        if command["kind"] == "resolve_approval":
+            approved = command["decision"] == "approved"
+            for approval in run["approvals"]:
+                if approval.get("step_id") == step["step_id"] and approval.get("status") == "pending":
+                    approval["status"] = command["decision"]
+            step["status"] = "ready" if approved else "failed"
+            run["status"] = "running" if approved else "failed"
+            return
+        step["status"] = command["target"]
+        if command["options"].get("increment_attempt"):
+            step["attempt_count"] = int(step["attempt_count"]) + 1
+        if command["target"] not in SATISFIED_STEP_STATUSES:
+            return
+        for candidate in run["steps"]:
+            if candidate["status"] == "pending" and all(
+                steps_by_id[parent["step_id"]]["status"] in SATISFIED_STEP_STATUSES
+                for parent in candidate.get("depends_on", [])
+            ):
+                candidate["status"] = "ready"
+        if all(candidate["status"] in SATISFIED_STEP_STATUSES for candidate in run["steps"]):
+            run["status"] = "completed"
+
     @staticmethod
     def _find_step(run: Mapping[str, Any], step_id: str) -> Dict[str, Any]:
         for step in run.get("steps", []):
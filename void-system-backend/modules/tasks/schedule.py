@@ -0,0 +1,183 @@
+"""Deterministic schedule slots for schedule Triggers.
+
+Slots are pure functions of a Trigger configuration and a point in time, so every
+worker and every restart derives the same slot, and therefore the same firing
+source key, for a given due time.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, Mapping, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+_MONTH_NAMES = {
+    name: index
+    for index, name in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+    )
+}
+_WEEKDAY_NAMES = {
+    name: index for index, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))
+}
+_MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+# Long enough for every satisfiable expression, including 29 February on a weekday.
+_SEARCH_YEARS = 30
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class CronExpression:
+    """A parsed five-field cron expression: minute, hour, day, month, weekday.
+
+    Supports ``*``, values, ranges, ``/`` steps, comma lists, month and weekday
+    names, and the ``@daily``-style macros. As in Vixie cron, when both the day of
+    month and the weekday are restricted a date matches if either field does.
+    """
+
+    def __init__(self, expression: str) -> None:
+        text = _MACROS.get(expression.strip().lower(), expression.strip())
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError("Cron expressions need five fields.")
+        self.expression = text
+        self.minutes = _parse_field(fields[0], 0, 59, {})
+        self.hours = _parse_field(fields[1], 0, 23, {})
+        self.days = _parse_field(fields[2], 1, 31, {})
+        self.months = _parse_field(fields[3], 1, 12, _MONTH_NAMES)
+        # Both 0 and 7 mean Sunday; Python's weekday() counts Monday as 0.
+        weekdays = _parse_field(fields[4], 0, 7, _WEEKDAY_NAMES)
+        self.weekdays = frozenset((value - 1) % 7 for value in weekdays)
+        self._days_restricted = fields[2] != "*"
+        self._weekdays_restricted = fields[4] != "*"
+
+    def _date_matches(self, moment: datetime) -> bool:
+        if moment.month not in self.months:
+            return False
+        day_match = moment.day in self.days
+        weekday_match = moment.weekday() in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment: datetime) -> datetime:
+        """Return the first matching naive wall-clock minute strictly after ``moment``."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate.replace(year=candidate.year + _SEARCH_YEARS, month=1, day=1)
+        while candidate < limit:
+            if not self._date_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError("Cron expression never matches a calendar date.")
+
+
+def _parse_field(text: str, low: int, high: int, names: Mapping[str, int]) -> FrozenSet[int]:
+    values = set()
+    for part in text.lower().split(","):
+        span, _, step_text = part.partition("/")
+        step = _parse_value(step_text, 1, high, {}) if step_text else 1
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start_text, _, end_text = span.partition("-")
+            start = _parse_value(start_text, low, high, names)
+            end = _parse_value(end_text, low, high, names)
+            if start > end:
+                raise ValueError(f"Cron range {span} is reversed.")
+        else:
+            start = _parse_value(span, low, high, names)
+            end = high if step_text else start
+        if step < 1:
+            raise ValueError("Cron steps must be positive.")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+def _parse_value(text: str, low: int, high: int, names: Mapping[str, int]) -> int:
+    value = names.get(text)
+    if value is None:
+        if not text.isdigit():
+            raise ValueError(f"Invalid cron value {text!r}.")
+        value = int(text)
+    if not low <= value <= high:
+        raise ValueError(f"Cron value {value} is outside {low}-{high}.")
+    return value
+
+
+def _zone(configuration: Mapping[str, Any]) -> ZoneInfo:
+    name = str(configuration.get("timezone") or "UTC")
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown timezone {name!r}.") from exc
+
+
+def normalize_schedule(configuration: Mapping[str, Any]) -> Dict[str, Any]:
+    """Validate schedule fields and return them in canonical form.
+
+    Raises ValueError with a user-facing message when the cron expression cannot be
+    parsed or never matches, or when the timezone is unknown.
+    """
+    normalized = dict(configuration)
+    cron = str(configuration.get("cron") or "").strip()
+    if cron:
+        normalized["cron"] = cron
+        if configuration.get("timezone"):
+            normalized["timezone"] = _zone(configuration).key
+        next_fire_time(normalized, datetime.now(timezone.utc))
+    return normalized
+
+
+def next_fire_time(configuration: Mapping[str, Any], after: datetime) -> datetime:
+    """Return the first schedule slot strictly after ``after`` as an aware UTC time.
+
+    Interval schedules are anchored to the Unix epoch, so slots do not drift with
+    Trigger creation or worker restarts. Cron schedules are evaluated on the wall
+    clock of the configured timezone, defaulting to UTC.
+    """
+    after = after.astimezone(timezone.utc)
+    cron = str(configuration.get("cron") or "").strip()
+    if not cron:
+        seconds = int(configuration["interval_seconds"])
+        elapsed = int((after - _EPOCH).total_seconds() // seconds) + 1
+        return _EPOCH + timedelta(seconds=elapsed * seconds)
+    expression = CronExpression(cron)
+    zone = _zone(configuration)
+    local = after.astimezone(zone).replace(tzinfo=None)
+    while True:
+        local = expression.next_after(local)
+        # Wall-clock minutes skipped by a daylight-saving gap resolve forward; a
+        # repeated minute resolves to its first occurrence, so the result is monotonic.
+        slot = local.replace(tzinfo=zone).astimezone(timezone.utc)
+        if slot > after:
+            return slot
+
+
+def slot_source_key(slot: datetime) -> str:
+    """Return the firing source key shared by every worker that fires ``slot``."""
+    return "schedule:" + slot.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def format_slot(slot: Optional[datetime]) -> Optional[str]:
+    """Return the lexically sortable UTC text stored for a slot."""
+    return None if slot is None else slot.astimezone(timezone.utc).isoformat()
+
+
+def parse_slot(value: str) -> datetime:
+    """Read a stored slot back as an aware UTC time."""
+    slot = datetime.fromisoformat(value)
+    return slot if slot.tzinfo is not None else slot.replace(tzinfo=timezone.utc)
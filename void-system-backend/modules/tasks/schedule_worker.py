@@ -0,0 +1,77 @@
+"""In-process firing of due schedule Triggers."""
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from typing import Optional
+
+from modules.tasks.automation import TaskAutomation
+
+
+logger = logging.getLogger("void-system.tasks.schedule_worker")
+
+
+class TriggerScheduleWorker:
+    """Application-owned ticker that turns due schedule slots into Runs.
+
+    Inputs:
+        automation: Trigger service that claims, fires, and advances schedules.
+        poll_seconds: Delay between ticks when no backlog remains.
+        batch_size: Maximum Triggers claimed per tick.
+    Outputs:
+        A daemon worker that can be started, woken, and stopped with the app.
+    Called by:
+        FastAPI lifespan. Several processes may run one each against the same database.
+    Side effects:
+        One indexed due-time query and one lease update per tick, plus one Run per slot.
+    Invariants:
+        SQLite holds every schedule and lease; a restarted worker resumes from the
+        persisted next slot, and replays of a slot reuse its recorded firing.
+    """
+
+    def __init__(
+        self,
+        automation: TaskAutomation,
+        *,
+        poll_seconds: float = 15.0,
+        batch_size: int = 100,
+    ) -> None:
+        self._automation = automation
+        self._poll_seconds = max(0.1, poll_seconds)
+        self._batch_size = max(1, batch_size)
+        self._worker_id = f"trigger-schedule-worker-{uuid.uuid4()}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the single schedule thread during lifespan startup."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=self._worker_id, daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Run a tick now instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self, *, timeout: float = 5.0) -> None:
+        """Request shutdown; unfinished leases expire and are re-claimed on the next tick."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self._automation.fire_due_schedules(self._worker_id, limit=self._batch_size)
+            except Exception as exc:
+                logger.exception("Trigger schedule tick failed (%s)", type(exc).__name__)
+                claimed = 0
+            if claimed >= self._batch_size:
+                continue
+            self._wake.wait(self._poll_seconds)
+            self._wake.clear()
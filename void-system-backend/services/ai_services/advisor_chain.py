@@ -6,7 +6,7 @@ run through the durable plan-generation job API; no legacy multi-stage task chai
 
 from __future__ import annotations
 
-from typing import Dict, Any, List, Literal, Optional, Tuple
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
 import json
 import re
 import logging
@@ -15,6 +15,7 @@ from pydantic import BaseModel, Field
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 
+from core.planning_contracts import PlanGenerationCancelled
 from services.ai_services.llm_factory import get_chat_llm
 
 logger = logging.getLogger("void-system")
@@ -56,6 +57,73 @@ def _extract_json_object(text: str) -> str:
     raise ValueError("no json object found")
 
 
+class StreamedStepParser:
+    """Yield each complete object of a plan's top-level ``steps`` array as text arrives.
+
+    Inputs: model output chunks in order. Output: decoded step dicts, each exactly once,
+    as soon as its closing brace is read. The parser only tracks string, escape, and
+    nesting state, so each chunk costs time linear in its length. It never validates the
+    whole document; the caller still parses the complete text once the stream ends.
+    """
+
+    def __init__(self) -> None:
+        self._text: List[str] = []
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = -1
+        self._last_key = ""
+        self._in_steps = False
+        self._step_start = -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        steps: List[Dict[str, Any]] = []
+        offset = self._length
+        self._text.append(chunk)
+        self._length += len(chunk)
+        for index, char in enumerate(chunk, start=offset):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = self._slice(self._string_start + 1, index)
+                continue
+            if char == '"':
+                self._in_string, self._string_start = True, index
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._depth == 2 and self._last_key == "steps":
+                    self._in_steps = True
+                elif char == "{" and self._depth == 3 and self._in_steps:
+                    self._step_start = index
+            elif char in "}]":
+                if char == "}" and self._depth == 3 and self._step_start >= 0:
+                    try:
+                        step = json.loads(self._slice(self._step_start, index + 1))
+                    except json.JSONDecodeError:
+                        step = None
+                    if isinstance(step, dict):
+                        steps.append(step)
+                    self._step_start = -1
+                elif char == "]" and self._depth == 2:
+                    self._in_steps = False
+                self._depth = max(0, self._depth - 1)
+        return steps
+
+    def text(self) -> str:
+        return "".join(self._text)
+
+    def _slice(self, start: int, end: int) -> str:
+        if len(self._text) > 1:
+            self._text = ["".join(self._text)]
+        return self._text[0][start:end]
+
+
 def _invoke_llm_for_json(prompt: PromptTemplate, variables: Dict[str, Any], temperature: float, json_mode: bool) -> Dict[str, Any]:
     llm = get_chat_llm(temperature=temperature, json_mode=json_mode)
     rendered = prompt.format(**variables)
@@ -66,6 +134,44 @@ def _invoke_llm_for_json(prompt: PromptTemplate, variables: Dict[str, Any], temp
     return json.loads(js)
 
 
+def _stream_llm_for_json(
+    prompt: PromptTemplate,
+    variables: Dict[str, Any],
+    temperature: float,
+    json_mode: bool,
+    on_step: Callable[[Dict[str, Any]], Any],
+) -> Dict[str, Any]:
+    """Stream one model call, handing each finished plan step to ``on_step`` early.
+
+    The complete text is still extracted and parsed exactly like ``_invoke_llm_for_json``.
+    Publishing steps is best effort: a failing callback is logged and not called again,
+    so it never replaces a usable model result with the local fallback. A callback that
+    raises PlanGenerationCancelled closes the model stream and the error propagates.
+    """
+    llm = get_chat_llm(temperature=temperature, json_mode=json_mode)
+    parser = StreamedStepParser()
+    publishing = True
+    stream = llm.stream(prompt.format(**variables))
+    try:
+        for chunk in stream:
+            content = chunk.content if hasattr(chunk, "content") else chunk
+            for step in parser.feed(content if isinstance(content, str) else str(content)):
+                if not publishing:
+                    break
+                try:
+                    on_step(step)
+                except PlanGenerationCancelled:
+                    raise
+                except Exception as exc:
+                    logger.warning("Streamed plan step could not be published (%s)", type(exc).__name__)
+                    publishing = False
+    finally:
+        close = getattr(stream, "close", None)
+        if callable(close):
+            close()
+    return json.loads(_extract_json_object(parser.text()))
+
+
 
 # ==================== Attribute inference & plan preview ====================
 def _infer_related_attrs_from_task_text(step: Dict[str, Any], user_attrs: List[Dict[str, Any]]) -> Dict[str, float]:
@@ -268,16 +374,28 @@ def generate_structured_plan(
     max_steps: int = 8,
     allow_fallback: bool = True,
     collaboration_instruction: str = "",
+    on_step: Optional[Callable[[Dict[str, Any]], Any]] = None,
 ) -> Dict[str, Any]:
     """Generate the complete plan in one model call, then validate it locally.
 
     The retired outline, expand, review, and per-step attribute-inference graph
     was removed because it made one user request trigger serial model calls.
     This canonical path performs one structured generation call, then validates
-    and normalizes the result locally.
+    and normalizes the result locally. With ``on_step`` the call is streamed and
+    each usable step is normalized and handed over as soon as the model closes it;
+    the returned plan is still built from the complete response.
     """
     user_attrs = user_attrs or []
     requested_steps = max(1, min(int(max_steps or 8), 8))
+    streamed_steps = 0
+
+    def publish_step(step: Dict[str, Any]) -> None:
+        nonlocal streamed_steps
+        normalized = _sanitize_generated_plan({"steps": [step]}, topic, user_attrs)["steps"]
+        if normalized and streamed_steps < requested_steps:
+            streamed_steps += 1
+            on_step(normalized[0])
+
     prompt = PromptTemplate.from_template(
         """You are the execution-planning assistant for Void System. Turn the user's goal into a concise, reviewable action plan.
 
@@ -318,18 +436,19 @@ Return exactly one JSON object and nothing else using this shape:
 Rules: produce between 1 and {max_steps} steps; keep the sequence practical; only include related_attrs when genuinely relevant; do not invent personal facts.
 """
     )
+    variables = {
+        "topic": topic,
+        "profile_context": profile_context,
+        "collaboration_instruction": collaboration_instruction,
+        "max_steps": requested_steps,
+    }
     try:
-        plan = _invoke_llm_for_json(
-            prompt,
-            {
-                "topic": topic,
-                "profile_context": profile_context,
-                "collaboration_instruction": collaboration_instruction,
-                "max_steps": requested_steps,
-            },
-            temperature=0.35,
-            json_mode=True,
-        )
+        if on_step is None:
+            plan = _invoke_llm_for_json(prompt, variables, temperature=0.35, json_mode=True)
+        else:
+            plan = _stream_llm_for_json(
+                prompt, variables, temperature=0.35, json_mode=True, on_step=publish_step
+            )
         plan["mode"] = "structured_plan"
         plan.setdefault("meta", {})
         plan["meta"].update({
@@ -342,6 +461,8 @@ Rules: produce between 1 and {max_steps} steps; keep the sequence practical; onl
         if not plan["steps"]:
             raise ValueError("planner returned no usable steps")
         return plan
+    except PlanGenerationCancelled:
+        raise
     except Exception as exc:
         if not allow_fallback:
             raise
@@ -12,6 +12,8 @@ from core.model_connection_profile import (
     resolve_embedding_connection,
 )
 from core.runtime_settings import RuntimeSettings
+from services.ai_services.model_clients import model_clients, profile_fingerprint
+from services.ai_services.model_scheduler import ScheduledChatModel, ScheduledEmbeddings, model_scheduler
 
 
 _active_runtime_settings: ContextVar[Optional[RuntimeSettings]] = ContextVar(
@@ -118,6 +120,13 @@ def _supports_openai_json_mode(provider: str, base_url: Optional[str]) -> bool:
     return provider != "openai" or _supports_openai_responses_api(provider, base_url)
 
 
+def _close_ollama_client(client: Any) -> None:
+    """Close the private HTTP pool that each Ollama LangChain client opens."""
+    inner = getattr(client, "_client", None)
+    if inner is not None:
+        inner.close()
+
+
 def get_chat_llm(
     temperature: float = 0.5,
     json_mode: bool = False,
@@ -135,8 +144,19 @@ def get_chat_llm(
     The default preserves the transport selected for interactive chat. Structured
     callers normally keep that provider-specific choice: LangChain aggregates
     compatible SSE chunks into one complete response for invoke().
+
+    Clients are shared through ``model_clients`` per profile fingerprint and call
+    options, so repeated calls reuse one client and its keep-alive connections.
+    Callers must derive new runnables with ``bind`` rather than mutate the client.
+    Every call is admitted by the profile's lane in ``model_scheduler``.
     """
-    profile = resolve_chat_connection(_resolve_runtime(settings))
+    runtime = _resolve_runtime(settings)
+    profile = resolve_chat_connection(runtime)
+    fingerprint = profile_fingerprint(profile)
+    # Apply the current limits now; the client looks its lane up again on every call.
+    model_scheduler.lane_for(fingerprint, profile, runtime)
+    lane = model_scheduler.lane_source(fingerprint, profile, runtime)
+    options = (fingerprint, temperature, json_mode, streaming)
     if profile.protocol == "ollama":
         from langchain_ollama import ChatOllama
 
@@ -149,7 +169,9 @@ def get_chat_llm(
             kwargs["format"] = "json"
         if streaming is False:
             kwargs["disable_streaming"] = True
-        return ChatOllama(**kwargs)
+        return model_clients.get(
+            ("chat", ChatOllama, *options), lambda: ScheduledChatModel(ChatOllama(**kwargs), lane), close=_close_ollama_client
+        )
 
     if profile.protocol == "openai":
         from langchain_openai import ChatOpenAI
@@ -173,7 +195,8 @@ def get_chat_llm(
             kwargs["extra_body"] = dict(profile.extra_body)
         if json_mode and _supports_openai_json_mode(profile.provider, profile.base_url):
             kwargs["model_kwargs"] = {"response_format": {"type": "json_object"}}
-        return ChatOpenAI(**kwargs)
+        # langchain_openai already shares its default httpx pools per endpoint.
+        return model_clients.get(("chat", ChatOpenAI, *options), lambda: ScheduledChatModel(ChatOpenAI(**kwargs), lane))
 
     if profile.protocol == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
@@ -185,7 +208,9 @@ def get_chat_llm(
         }
         if streaming is not None:
             kwargs["streaming"] = streaming
-        return ChatGoogleGenerativeAI(**kwargs)
+        return model_clients.get(
+            ("chat", ChatGoogleGenerativeAI, *options), lambda: ScheduledChatModel(ChatGoogleGenerativeAI(**kwargs), lane)
+        )
 
     raise ModelConnectionError(
         f"Unsupported resolved chat protocol: {profile.protocol}.",
@@ -225,26 +250,52 @@ def chat_output_limit_options(
     return {"max_tokens": max_tokens}
 
 
+def chat_model_identity(settings: Optional[RuntimeSettings] = None) -> str:
+    """Return the credential-free identity of the chat model that would serve a call.
+
+    Callers use it to key cached model outputs, so switching endpoint or model
+    never serves a result produced by the previous one.
+    """
+    return resolve_chat_connection(_resolve_runtime(settings)).output_identity
+
+
 def get_embeddings(settings: Optional[RuntimeSettings] = None) -> Any:
     """Create embeddings from the canonical embedding connection profile.
 
     Inputs: optional explicit settings. Output: a LangChain embeddings client.
     LM Studio is deliberately not silently treated as an embedding provider;
     callers receive a stable configuration error until a verified provider is
-    selected.
+    selected. Clients are shared per profile fingerprint like chat clients.
     """
-    profile = resolve_embedding_connection(_resolve_runtime(settings))
+    runtime = _resolve_runtime(settings)
+    profile = resolve_embedding_connection(runtime)
+    fingerprint = profile_fingerprint(profile)
+    # Apply the current limits now; the client looks its lane up again on every call.
+    model_scheduler.lane_for(fingerprint, profile, runtime)
+    lane = model_scheduler.lane_source(fingerprint, profile, runtime)
     if profile.protocol == "ollama":
         from langchain_ollama import OllamaEmbeddings
 
-        return OllamaEmbeddings(model=profile.model, base_url=profile.base_url)
+        return model_clients.get(
+            ("embedding", OllamaEmbeddings, fingerprint),
+            lambda: ScheduledEmbeddings(
+                OllamaEmbeddings(model=profile.model, base_url=profile.base_url), lane
+            ),
+            close=_close_ollama_client,
+        )
     if profile.protocol == "openai":
         from langchain_openai import OpenAIEmbeddings
 
-        return OpenAIEmbeddings(
-            model=profile.model,
-            api_key=profile.api_key,
-            base_url=profile.base_url,
+        return model_clients.get(
+            ("embedding", OpenAIEmbeddings, fingerprint),
+            lambda: ScheduledEmbeddings(
+                OpenAIEmbeddings(
+                    model=profile.model,
+                    api_key=profile.api_key,
+                    base_url=profile.base_url,
+                ),
+                lane,
+            ),
         )
     raise ModelConnectionError(
         f"Unsupported resolved embedding protocol: {profile.protocol}.",
@@ -0,0 +1,105 @@
+"""Process-wide reuse of LangChain model clients built from connection profiles."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+from core.model_connection_profile import ModelConnectionProfile
+
+
+logger = logging.getLogger("void-system")
+
+DEFAULT_MAX_CLIENTS = 32
+
+_Closer = Optional[Callable[[Any], None]]
+
+
+def profile_fingerprint(profile: ModelConnectionProfile) -> str:
+    """Return a stable digest of every field that shapes an upstream connection.
+
+    The digest includes the API key, so a rotated credential never reuses a client
+    built for the previous one, while the key itself is not kept in registry keys.
+    """
+    encoded = json.dumps(asdict(profile), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ModelClientRegistry:
+    """Share constructed chat and embedding clients between calls with equal options.
+
+    Inputs:
+        max_clients: Upper bound on live cached clients; the least recently used is retired.
+    Outputs:
+        The cached client for a key, built once by the caller-supplied factory.
+    Called by:
+        llm_factory for every chat and embedding client request.
+    Side effects:
+        Keeps client objects, and with them their keep-alive HTTP pools, between requests.
+    Failure:
+        Factory errors propagate and nothing is cached for that key.
+    Invariants:
+        A retired client is never handed out again. Its pool is only closed once it has
+        been out of the registry for a full cache generation or at shutdown, so a request
+        that still holds it is not cut off mid-stream.
+    """
+
+    def __init__(self, max_clients: int = DEFAULT_MAX_CLIENTS) -> None:
+        self._max_clients = max(1, int(max_clients))
+        self._clients: "OrderedDict[Hashable, Tuple[Any, _Closer]]" = OrderedDict()
+        self._retired: List[Tuple[Any, _Closer]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, build: Callable[[], Any], *, close: _Closer = None) -> Any:
+        """Return the client cached under ``key``, building and caching it on first use."""
+        with self._lock:
+            cached = self._clients.get(key)
+            if cached is not None:
+                self._clients.move_to_end(key)
+                return cached[0]
+            client = build()
+            self._clients[key] = (client, close)
+            while len(self._clients) > self._max_clients:
+                self._retire(self._clients.popitem(last=False)[1])
+            return client
+
+    def invalidate(self) -> None:
+        """Retire every cached client after the active connection profiles changed."""
+        with self._lock:
+            while self._clients:
+                self._retire(self._clients.popitem(last=False)[1])
+
+    def close(self) -> None:
+        """Retire and close every client; the registry stays usable and rebuilds lazily."""
+        with self._lock:
+            retired = self._retired + list(self._clients.values())
+            self._clients.clear()
+            self._retired = []
+        for entry in retired:
+            _close_entry(entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def _retire(self, entry: Tuple[Any, _Closer]) -> None:
+        self._retired.append(entry)
+        while len(self._retired) > self._max_clients:
+            _close_entry(self._retired.pop(0))
+
+
+def _close_entry(entry: Tuple[Any, _Closer]) -> None:
+    client, close = entry
+    if close is None:
+        return
+    try:
+        close(client)
+    except Exception as exc:
+        logger.warning("Model client pool could not be closed (%s)", type(exc).__name__)
+
+
+model_clients = ModelClientRegistry()
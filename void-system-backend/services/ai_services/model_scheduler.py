@@ -0,0 +1,550 @@
+"""Admission control for upstream model calls, shared by every AI feature.
+
+Each connection profile gets one lane with a concurrency limit, an optional token-rate
+budget, and a priority queue, so a burst of chat turns and background jobs queues here
+instead of overloading the provider. Identical non-streaming calls already in flight on a
+lane share one upstream request.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, Union
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables import Runnable
+
+from core.model_connection_profile import ModelConnectionError, ModelConnectionProfile
+from core.runtime_settings import RuntimeSettings
+
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_PRIORITY_ORDER = {INTERACTIVE: 0, BACKGROUND: 1}
+# Longest time a call may wait for admission before it fails fast with AI_PROVIDER_BUSY.
+_MAX_QUEUE_SECONDS = {INTERACTIVE: 30.0, BACKGROUND: 300.0}
+DEFAULT_LOCAL_CONCURRENCY = 2
+DEFAULT_REMOTE_CONCURRENCY = 8
+DEFAULT_MAX_QUEUED = 64
+# Output tokens reserved for a chat call whose completion size is unknown up front.
+_OUTPUT_TOKEN_RESERVE = 512
+_WAIT_SAMPLES = 512
+
+_call_priority: ContextVar[str] = ContextVar("void_system_model_call_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def model_call_priority(priority: str) -> Iterator[None]:
+    """Run model calls made in this context under ``priority``.
+
+    Background workers wrap their jobs in ``BACKGROUND`` so a waiting chat turn is
+    always admitted first. The binding follows the context into executor threads.
+    """
+    if priority not in _PRIORITY_ORDER:
+        raise ValueError(f"Unknown model call priority: {priority}")
+    token = _call_priority.set(priority)
+    try:
+        yield
+    finally:
+        _call_priority.reset(token)
+
+
+def estimate_tokens(value: Any) -> int:
+    """Return a cheap upper-bound token estimate of roughly four characters per token."""
+    return max(1, len(str(value)) // 4)
+
+
+def _busy(message: str) -> ModelConnectionError:
+    return ModelConnectionError(message, "AI_PROVIDER_BUSY")
+
+
+def _reported_tokens(result: Any) -> Optional[int]:
+    usage = getattr(result, "usage_metadata", None)
+    if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    return None
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class _Ticket:
+    """One queued admission request, woken by whichever thread grants it."""
+
+    __slots__ = ("priority", "tokens", "granted", "queued_at", "_event", "_loop", "_future")
+
+    def __init__(self, priority: str, tokens: int, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+        self.priority = priority
+        self.tokens = tokens
+        self.granted = False
+        self.queued_at = time.monotonic()
+        self._loop = loop
+        self._event = threading.Event() if loop is None else None
+        self._future: Optional[asyncio.Future[None]] = loop.create_future() if loop is not None else None
+
+    def wake(self) -> None:
+        if self._event is not None:
+            self._event.set()
+        elif self._loop is not None and self._future is not None:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if self._future is not None and not self._future.done():
+            self._future.set_result(None)
+
+    def wait(self, timeout: float) -> None:
+        if self._event is not None:
+            self._event.wait(timeout)
+
+    async def await_wake(self, timeout: float) -> None:
+        if self._future is not None:
+            await asyncio.wait({self._future}, timeout=timeout)
+
+
+class ModelCallLane:
+    """Concurrency slots, token budget, priority queue, and in-flight sharing for one profile.
+
+    Inputs:
+        max_concurrency: Upstream calls allowed at once.
+        tokens_per_minute: Estimated token budget refilled continuously; 0 disables it.
+        max_queued: Waiting calls beyond this are rejected immediately.
+    Outputs:
+        ``run``/``arun`` execute a call once a slot and budget are available; ``coalesce``
+        and ``acoalesce`` share the result of an identical call already in flight.
+    Failure:
+        Raises ModelConnectionError(AI_PROVIDER_BUSY) when the queue is full or a call waits
+        longer than its priority allows, so callers fail fast instead of timing out together.
+    Invariants:
+        Slots are granted strictly in (priority, arrival) order and every granted slot is
+        released exactly once, including when a stream is abandoned part way.
+    """
+
+    def __init__(self, label: Dict[str, Any], *, max_concurrency: int, tokens_per_minute: int = 0,
+                 max_queued: int = DEFAULT_MAX_QUEUED) -> None:
+        self.label = label
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.tokens_per_minute = max(0, int(tokens_per_minute))
+        self.max_queued = max(0, int(max_queued))
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._waiting: List[tuple[int, int, _Ticket]] = []
+        self._in_flight = 0
+        self._tokens = float(self.tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._shared: Dict[Hashable, Future] = {}
+        self._waits: Dict[str, deque] = {name: deque(maxlen=_WAIT_SAMPLES) for name in _PRIORITY_ORDER}
+        self._counters = {"admitted": 0, "rejected": 0, "timed_out": 0, "coalesced": 0}
+
+    def run(self, call: Callable[[], Any], *, tokens: int) -> Any:
+        """Run ``call`` under one admitted slot and release it afterwards."""
+        self.acquire(tokens)
+        used = None
+        try:
+            result = call()
+            used = _reported_tokens(result)
+            return result
+        finally:
+            self.release(tokens, used)
+
+    async def arun(self, call: Callable[[], Awaitable[Any]], *, tokens: int) -> Any:
+        """Await ``call`` under one admitted slot and release it afterwards."""
+        await self.aacquire(tokens)
+        used = None
+        try:
+            result = await call()
+            used = _reported_tokens(result)
+            return result
+        finally:
+            self.release(tokens, used)
+
+    def coalesce(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """Return the result of an identical in-flight call, or run ``call`` as its leader."""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._lead(key, future, call)
+
+    async def acoalesce(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Async form of ``coalesce``; followers on any loop or thread share the leader result."""
+        future, leader = self._join(key)
+        if not leader:
+            # Shielded so a cancelled follower never cancels the leader's shared future.
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await call()
+        except BaseException as exc:
+            future.set_exception(_shared_failure(exc))
+            raise
+        finally:
+            with self._lock:
+                self._shared.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def acquire(self, tokens: int) -> None:
+        ticket = self._enqueue(tokens, None)
+        deadline = ticket.queued_at + _MAX_QUEUE_SECONDS[ticket.priority]
+        while not self._granted(ticket, deadline):
+            ticket.wait(self._next_check(deadline))
+
+    async def aacquire(self, tokens: int) -> None:
+        ticket = self._enqueue(tokens, asyncio.get_running_loop())
+        deadline = ticket.queued_at + _MAX_QUEUE_SECONDS[ticket.priority]
+        try:
+            while not self._granted(ticket, deadline):
+                await ticket.await_wake(self._next_check(deadline))
+        except asyncio.CancelledError:
+            self._abandon(ticket, cancelled=True)
+            raise
+
+    def release(self, tokens: int, used: Optional[int] = None) -> None:
+        """Return a slot and charge the budget for any tokens used beyond the estimate."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if self.tokens_per_minute and used is not None:
+                self._tokens = max(-float(self.tokens_per_minute), self._tokens - max(0, used - tokens))
+            self._grant_locked()
+
+    def retune(self, *, max_concurrency: int, tokens_per_minute: int) -> None:
+        """Apply new limits; calls already admitted finish under the limits they started with."""
+        with self._lock:
+            self.max_concurrency = max(1, int(max_concurrency))
+            tokens_per_minute = max(0, int(tokens_per_minute))
+            if tokens_per_minute != self.tokens_per_minute:
+                self.tokens_per_minute = tokens_per_minute
+                self._tokens = float(tokens_per_minute)
+                self._refilled_at = time.monotonic()
+            self._grant_locked()
+
+    def is_idle(self) -> bool:
+        """Return whether no call is running, waiting, or shared on this lane."""
+        with self._lock:
+            return not self._in_flight and not self._waiting and not self._shared
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return credential-free occupancy, counters, and recent queue-wait percentiles."""
+        with self._lock:
+            waits = {
+                name: {
+                    "samples": len(samples),
+                    "p50_ms": round(_percentile(list(samples), 0.5) * 1000, 1) if samples else 0.0,
+                    "p95_ms": round(_percentile(list(samples), 0.95) * 1000, 1) if samples else 0.0,
+                    "max_ms": round(max(samples) * 1000, 1) if samples else 0.0,
+                }
+                for name, samples in self._waits.items()
+            }
+            return {
+                **self.label,
+                "max_concurrency": self.max_concurrency,
+                "tokens_per_minute": self.tokens_per_minute,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiting),
+                **self._counters,
+                "queue_wait": waits,
+            }
+
+    def _enqueue(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop]) -> _Ticket:
+        ticket = _Ticket(_call_priority.get(), max(1, int(tokens)), loop)
+        with self._lock:
+            if len(self._waiting) >= self.max_queued and self._in_flight >= self.max_concurrency:
+                self._counters["rejected"] += 1
+                raise _busy("The AI provider queue is full.")
+            heapq.heappush(self._waiting, (_PRIORITY_ORDER[ticket.priority], next(self._sequence), ticket))
+            self._grant_locked()
+        return ticket
+
+    def _granted(self, ticket: _Ticket, deadline: float) -> bool:
+        with self._lock:
+            self._grant_locked()
+            if ticket.granted:
+                return True
+        if time.monotonic() >= deadline:
+            if self._abandon(ticket, cancelled=False):
+                return True
+            raise _busy("The AI provider is busy; the call waited too long to start.")
+        return False
+
+    def _abandon(self, ticket: _Ticket, *, cancelled: bool) -> bool:
+        """Withdraw a waiting ticket; True when it was granted first and now holds a slot."""
+        with self._lock:
+            if ticket.granted:
+                if cancelled:
+                    self._in_flight -= 1
+                    self._grant_locked()
+                return not cancelled
+            self._waiting = [entry for entry in self._waiting if entry[2] is not ticket]
+            heapq.heapify(self._waiting)
+            if not cancelled:
+                self._counters["timed_out"] += 1
+            self._grant_locked()
+            return False
+
+    def _next_check(self, deadline: float) -> float:
+        remaining = max(0.0, deadline - time.monotonic())
+        with self._lock:
+            if not self.tokens_per_minute or not self._waiting:
+                return remaining
+            shortfall = self._need(self._waiting[0][2]) - self._tokens
+        return min(remaining, max(0.01, shortfall * 60.0 / self.tokens_per_minute))
+
+    def _need(self, ticket: _Ticket) -> float:
+        return float(min(ticket.tokens, self.tokens_per_minute))
+
+    def _grant_locked(self) -> None:
+        if self.tokens_per_minute:
+            now = time.monotonic()
+            refill = (now - self._refilled_at) * self.tokens_per_minute / 60.0
+            self._tokens = min(float(self.tokens_per_minute), self._tokens + refill)
+            self._refilled_at = now
+        while self._waiting and self._in_flight < self.max_concurrency:
+            ticket = self._waiting[0][2]
+            if self.tokens_per_minute:
+                if self._need(ticket) > self._tokens:
+                    break
+                self._tokens -= self._need(ticket)
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            self._waits[ticket.priority].append(time.monotonic() - ticket.queued_at)
+            ticket.granted = True
+            ticket.wake()
+
+    def _join(self, key: Hashable) -> tuple[Future, bool]:
+        with self._lock:
+            future = self._shared.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._shared[key] = future
+            return future, True
+
+    def _lead(self, key: Hashable, future: Future, call: Callable[[], Any]) -> Any:
+        try:
+            result = call()
+        except BaseException as exc:
+            future.set_exception(_shared_failure(exc))
+            raise
+        finally:
+            with self._lock:
+                self._shared.pop(key, None)
+        future.set_result(result)
+        return result
+
+
+def _shared_failure(exc: BaseException) -> BaseException:
+    """Pass a leader's error to followers, but never its task cancellation."""
+    return exc if isinstance(exc, Exception) else _busy("The shared AI call was cancelled.")
+
+
+def _call_key(*parts: Any) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8", "replace"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# A lane, or a lookup that returns the profile's current lane on every call.
+LaneSource = Union[ModelCallLane, Callable[[], ModelCallLane]]
+
+
+def _lane_lookup(lane: LaneSource) -> Callable[[], ModelCallLane]:
+    return (lambda: lane) if isinstance(lane, ModelCallLane) else lane
+
+
+class ScheduledChatModel(Runnable):
+    """A chat model whose every call is admitted by its profile's ModelCallLane.
+
+    The call surface (invoke, stream, their async forms, batch through those) is
+    wrapped, and ``bind``, ``bind_tools`` and ``with_structured_output`` return models
+    admitted by the same lane; other attributes read through to the underlying
+    LangChain model. Non-streaming calls with identical input and options that overlap
+    in time share one upstream request, unless the caller passes a run config, whose
+    callbacks and tags belong to that caller alone.
+    """
+
+    def __init__(self, model: Any, lane: LaneSource) -> None:
+        self._model = model
+        self._lane_source = lane
+        self._lane_lookup = _lane_lookup(lane)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in {"_model", "_lane_source", "_lane_lookup"}:
+            raise AttributeError(name)
+        return getattr(self._model, name)
+
+    @property
+    def _lane(self) -> ModelCallLane:
+        return self._lane_lookup()
+
+    @property
+    def InputType(self) -> Any:  # noqa: N802 - LangChain Runnable interface name
+        return self._model.InputType
+
+    @property
+    def OutputType(self) -> Any:  # noqa: N802 - LangChain Runnable interface name
+        return self._model.OutputType
+
+    def bind(self, **kwargs: Any) -> "ScheduledChatModel":
+        return ScheduledChatModel(self._model.bind(**kwargs), self._lane_source)
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScheduledChatModel":
+        return ScheduledChatModel(self._model.bind_tools(tools, **kwargs), self._lane_source)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> "ScheduledChatModel":
+        return ScheduledChatModel(self._model.with_structured_output(schema, **kwargs), self._lane_source)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        tokens = estimate_tokens(input) + _OUTPUT_TOKEN_RESERVE
+        lane = self._lane
+        call = lambda: lane.run(lambda: self._model.invoke(input, config, **kwargs), tokens=tokens)  # noqa: E731
+        if config:
+            return call()
+        return lane.coalesce(_call_key(id(self._model), input, sorted(kwargs.items())), call)
+
+    async def ainvoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        tokens = estimate_tokens(input) + _OUTPUT_TOKEN_RESERVE
+        lane = self._lane
+        call = lambda: lane.arun(lambda: self._model.ainvoke(input, config, **kwargs), tokens=tokens)  # noqa: E731
+        if config:
+            return await call()
+        return await lane.acoalesce(_call_key(id(self._model), input, sorted(kwargs.items())), call)
+
+    def stream(self, input: Any, config: Any = None, **kwargs: Any) -> Iterator[Any]:
+        tokens = estimate_tokens(input) + _OUTPUT_TOKEN_RESERVE
+        lane = self._lane
+        lane.acquire(tokens)
+        try:
+            yield from self._model.stream(input, config, **kwargs)
+        finally:
+            lane.release(tokens)
+
+    async def astream(self, input: Any, config: Any = None, **kwargs: Any) -> AsyncIterator[Any]:
+        tokens = estimate_tokens(input) + _OUTPUT_TOKEN_RESERVE
+        lane = self._lane
+        await lane.aacquire(tokens)
+        try:
+            async for chunk in self._model.astream(input, config, **kwargs):
+                yield chunk
+        finally:
+            lane.release(tokens)
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Embeddings admitted by a ModelCallLane, with identical in-flight batches shared."""
+
+    def __init__(self, embeddings: Any, lane: LaneSource) -> None:
+        self._embeddings = embeddings
+        self._lane_lookup = _lane_lookup(lane)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in {"_embeddings", "_lane_lookup"}:
+            raise AttributeError(name)
+        return getattr(self._embeddings, name)
+
+    @property
+    def _lane(self) -> ModelCallLane:
+        return self._lane_lookup()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._lane.coalesce(
+            _call_key("documents", texts),
+            lambda: self._lane.run(lambda: self._embeddings.embed_documents(texts), tokens=estimate_tokens(texts)),
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._lane.coalesce(
+            _call_key("query", text),
+            lambda: self._lane.run(lambda: self._embeddings.embed_query(text), tokens=estimate_tokens(text)),
+        )
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._lane.acoalesce(
+            _call_key("documents", texts),
+            lambda: self._lane.arun(lambda: self._embeddings.aembed_documents(texts), tokens=estimate_tokens(texts)),
+        )
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self._lane.acoalesce(
+            _call_key("query", text),
+            lambda: self._lane.arun(lambda: self._embeddings.aembed_query(text), tokens=estimate_tokens(text)),
+        )
+
+
+class ModelCallScheduler:
+    """Own one ModelCallLane per connection profile fingerprint.
+
+    Limits come from ``MODEL_MAX_CONCURRENCY`` and ``MODEL_TOKENS_PER_MINUTE`` in the
+    settings passed with each lookup, so an updated AI configuration retunes the lane on
+    its next use; a zero concurrency selects the local or remote default.
+    """
+
+    def __init__(self) -> None:
+        self._lanes: Dict[str, ModelCallLane] = {}
+        self._lock = threading.Lock()
+
+    def lane_for(self, fingerprint: str, profile: ModelConnectionProfile,
+                 settings: RuntimeSettings) -> ModelCallLane:
+        """Return the profile's lane, created or retuned to the limits in ``settings``."""
+        return self._lane(fingerprint, profile, settings, retune=True)
+
+    def _lane(self, fingerprint: str, profile: ModelConnectionProfile,
+              settings: RuntimeSettings, *, retune: bool) -> ModelCallLane:
+        default = DEFAULT_LOCAL_CONCURRENCY if profile.is_local else DEFAULT_REMOTE_CONCURRENCY
+        max_concurrency = max(1, int(settings.MODEL_MAX_CONCURRENCY or default))
+        tokens_per_minute = max(0, int(settings.MODEL_TOKENS_PER_MINUTE))
+        with self._lock:
+            lane = self._lanes.get(fingerprint)
+            if lane is None:
+                diagnostics = profile.public_diagnostics()
+                lane = ModelCallLane(
+                    {key: diagnostics[key] for key in ("purpose", "provider", "model")},
+                    max_concurrency=max_concurrency,
+                    tokens_per_minute=tokens_per_minute,
+                )
+                self._lanes[fingerprint] = lane
+            elif retune and (lane.max_concurrency, lane.tokens_per_minute) != (max_concurrency, tokens_per_minute):
+                lane.retune(max_concurrency=max_concurrency, tokens_per_minute=tokens_per_minute)
+            return lane
+
+    def lane_source(self, fingerprint: str, profile: ModelConnectionProfile,
+                    settings: RuntimeSettings) -> Callable[[], ModelCallLane]:
+        """Return a lookup of the profile's current lane for a cached client to call per request.
+
+        A client that kept a lane object would keep queueing on it after ``prune_idle``
+        replaced it, splitting one profile's limits across two lanes. The lookup never
+        retunes, so a client built under older settings cannot undo newer limits.
+        """
+        return lambda: self._lane(fingerprint, profile, settings, retune=False)
+
+    def prune_idle(self) -> int:
+        """Forget idle lanes after the connection profiles changed and return how many.
+
+        Busy lanes are kept so calls for a still-active profile keep sharing one queue;
+        a pruned profile gets a fresh lane on its next call. Clients built by llm_factory
+        look their lane up on every call, so none keeps using a pruned lane.
+        """
+        with self._lock:
+            idle = [fingerprint for fingerprint, lane in self._lanes.items() if lane.is_idle()]
+            for fingerprint in idle:
+                del self._lanes[fingerprint]
+            return len(idle)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            lanes = list(self._lanes.values())
+        return [lane.snapshot() for lane in lanes]
+
+
+model_scheduler = ModelCallScheduler()
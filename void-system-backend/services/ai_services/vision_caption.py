@@ -3,7 +3,9 @@
 """
 from __future__ import annotations
 
+import asyncio
 import base64
+import hashlib
 import io
 import logging
 import mimetypes
@@ -11,8 +13,9 @@ from typing import Optional, Union
 
 from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
 
+from adapters.sqlite.vision_caption_cache import SQLiteVisionCaptionCache, vision_caption_key
 from core.runtime_settings import RuntimeSettings
-from services.ai_services.llm_factory import get_chat_llm
+from services.ai_services.llm_factory import chat_model_identity, get_chat_llm
 from services.ai_services.vision_messages import human_message_with_text_and_images
 
 logger = logging.getLogger("void-system-vision")
@@ -27,6 +30,11 @@ KNOWLEDGE_IMAGE_SYSTEM = (
     "再用简洁事实描述图片中的图表、流程、结构和关键结论。不要猜测看不清的内容，不要加入开场白。"
 )
 
+# Bump a version whenever its prompt or temperature changes so cached captions
+# produced by the previous wording are not served again.
+CAPTION_PROMPT_VERSION = "session-caption-v1"
+KNOWLEDGE_IMAGE_PROMPT_VERSION = "knowledge-image-v1"
+
 
 def _flatten_message_content(content: Union[str, list, None]) -> str:
     if content is None:
@@ -44,15 +52,32 @@ def _flatten_message_content(content: Union[str, list, None]) -> str:
     return str(content).strip()
 
 
+def _caption_cache_key(data_url: str, prompt_version: str, settings: Optional[RuntimeSettings]) -> str:
+    return vision_caption_key(
+        image_digest=hashlib.sha256(data_url.encode("ascii")).hexdigest(),
+        model_identity=chat_model_identity(settings),
+        prompt_version=prompt_version,
+    )
+
+
 async def caption_one_image_data_url(
-    data_url: str, *, settings: Optional[RuntimeSettings] = None
+    data_url: str, *, settings: Optional[RuntimeSettings] = None,
+    cache: Optional[SQLiteVisionCaptionCache] = None,
 ) -> str:
     """Caption one session image using the caller's immutable AI settings.
 
-    Inputs: a bounded image data URL and optional application settings snapshot.
-    Output: a concise visible-text summary. Transport configuration stays in the
-    canonical LLM factory, which prevents per-feature provider divergence.
+    Inputs: a bounded image data URL, optional application settings snapshot, and
+    an optional caption cache. Output: a concise visible-text summary. Transport
+    configuration stays in the canonical LLM factory, which prevents per-feature
+    provider divergence. A cached caption for the same image, model, and prompt
+    version is returned without a model call; cache reads and writes run in a
+    worker thread so SQLite never blocks the event loop.
     """
+    cache_key = _caption_cache_key(data_url, CAPTION_PROMPT_VERSION, settings) if cache is not None else None
+    if cache_key is not None:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached:
+            return cached
     llm = get_chat_llm(temperature=0.2, settings=settings)
     human = human_message_with_text_and_images("请根据附图输出概括。", [data_url])
     messages = [SystemMessage(content=CAPTION_SYSTEM), human]
@@ -64,14 +89,23 @@ async def caption_one_image_data_url(
     text = _flatten_message_content(getattr(resp, "content", None))
     if isinstance(resp, AIMessage) and not text:
         text = _flatten_message_content(resp.content)
-    return text or "（无法生成摘要）"
+    if not text:
+        return "（无法生成摘要）"
+    if cache_key is not None:
+        await asyncio.to_thread(cache.put, cache_key, text)
+    return text
 
 
 _MAX_VISION_PIXELS = 24_000_000
 _MAX_VISION_EDGE = 2_048
 
-def _image_data_url_for_vision(file_data: bytes, file_name: str) -> str:
-    """Normalize an uploaded image into a bounded, widely-supported vision payload."""
+def image_data_url_for_vision(file_data: bytes, file_name: str) -> str:
+    """Normalize an uploaded image into a bounded, widely-supported vision payload.
+
+    Used for knowledge images and, once at upload time, for session attachments.
+    Raises ValueError for images that cannot be decoded or exceed the pixel bound,
+    including those Pillow itself rejects as decompression bombs.
+    """
     try:
         from PIL import Image, ImageOps
     except ImportError:
@@ -89,7 +123,7 @@ def _image_data_url_for_vision(file_data: bytes, file_name: str) -> str:
             image.thumbnail((_MAX_VISION_EDGE, _MAX_VISION_EDGE))
             output = io.BytesIO()
             image.save(output, format="JPEG", quality=85, optimize=True)
-    except (OSError, ValueError) as exc:
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
         raise ValueError("The uploaded image cannot be prepared for knowledge extraction") from exc
 
     encoded = base64.b64encode(output.getvalue()).decode("ascii")
@@ -97,15 +131,22 @@ def _image_data_url_for_vision(file_data: bytes, file_name: str) -> str:
 
 
 async def describe_image_for_knowledge(
-    file_data: bytes, file_name: str, *, settings: Optional[RuntimeSettings] = None
+    file_data: bytes, file_name: str, *, settings: Optional[RuntimeSettings] = None,
+    cache: Optional[SQLiteVisionCaptionCache] = None,
 ) -> str:
     """Produce searchable image evidence with a configured multimodal chat model.
 
-    Inputs: file bytes, display name, and an optional application settings
-    snapshot. Output: searchable factual image evidence. This is called by
-    knowledge ingestion and must not read a mutable global model configuration.
+    Inputs: file bytes, display name, an optional application settings snapshot,
+    and an optional caption cache keyed by the normalized image. Output:
+    searchable factual image evidence. This is called by knowledge ingestion and
+    must not read a mutable global model configuration.
     """
-    data_url = _image_data_url_for_vision(file_data, file_name)
+    data_url = image_data_url_for_vision(file_data, file_name)
+    cache_key = _caption_cache_key(data_url, KNOWLEDGE_IMAGE_PROMPT_VERSION, settings) if cache is not None else None
+    if cache_key is not None:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached:
+            return cached
     llm = get_chat_llm(temperature=0.0, settings=settings)
     human = human_message_with_text_and_images(
         "请提取这张资料图片中可检索、可引用的事实内容。",
@@ -115,4 +156,7 @@ async def describe_image_for_knowledge(
         SystemMessage(content=KNOWLEDGE_IMAGE_SYSTEM),
         human,
     ])
-    return _flatten_message_content(getattr(response, "content", None))
+    text = _flatten_message_content(getattr(response, "content", None))
+    if text and cache_key is not None:
+        await asyncio.to_thread(cache.put, cache_key, text)
+    return text
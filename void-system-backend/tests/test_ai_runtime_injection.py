@@ -1,4 +1,5 @@
 import asyncio
+import threading
 
 from langchain_core.messages import AIMessage
 
@@ -46,3 +47,35 @@ def test_image_caption_uses_the_explicit_runtime_settings(monkeypatch):
     assert result == "A concise image summary."
     assert captured["settings"] is settings
     assert captured["temperature"] == 0.2
+
+
+def test_image_caption_cache_is_used_off_the_event_loop(monkeypatch):
+    threads = []
+
+    class RecordingCache:
+        def get(self, _key):
+            threads.append(threading.get_ident())
+            return None
+
+        def put(self, _key, _caption):
+            threads.append(threading.get_ident())
+
+    class FakeLlm:
+        async def ainvoke(self, _messages):
+            return AIMessage(content="A concise image summary.")
+
+    monkeypatch.setattr(vision_caption, "get_chat_llm", lambda **_kwargs: FakeLlm())
+
+    async def caption():
+        loop_thread = threading.get_ident()
+        await vision_caption.caption_one_image_data_url(
+            "data:image/png;base64,AA==",
+            settings=RuntimeSettings(LLM_PROVIDER="lmstudio", CHAT_MODEL="vision-model"),
+            cache=RecordingCache(),
+        )
+        return loop_thread
+
+    loop_thread = asyncio.run(caption())
+
+    assert len(threads) == 2
+    assert loop_thread not in threads
@@ -0,0 +1,99 @@
+"""Behavior tests for the cached user dashboard overview."""
+from pathlib import Path
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from adapters.sqlite.analytics_repository import SQLiteAnalyticsRepository
+from adapters.sqlite.growth_point_projections import append_growth_point_entry
+from database import Database
+from modules.tasks.service import get_task_execution
+
+
+class UserOverviewTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self.temp_dir.name) / "overview.db")
+        connection = self.database.get_connection()
+        connection.execute(
+            "INSERT INTO users (user_id, username, password_hash) VALUES ('owner', 'owner', 'unused')"
+        )
+        connection.commit()
+        connection.close()
+        self.database.add_attribute("owner", "Focus", max_value=100)
+        self.execution = get_task_execution(self.database)
+        self.cached = SQLiteAnalyticsRepository(self.database.get_connection)
+        self.uncached = SQLiteAnalyticsRepository(
+            self.database.get_connection, cache_user_overview=False
+        )
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _cached_rollups(self) -> int:
+        connection = self.database.get_connection()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM user_overview_rollups").fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_step_transitions_and_ledger_writes_invalidate_the_cached_rollup(self) -> None:
+        goal = self.execution.create_goal("owner", {"title": "Ship", "desired_outcome": "Shipped"})
+        run = self.execution.create_run(
+            "owner",
+            goal["goal_id"],
+            {
+                "steps": [
+                    {"client_key": "build", "title": "Build", "reward_spec": {"growth_points": 9}},
+                    {"client_key": "verify", "title": "Verify", "depends_on": ["build"]},
+                ]
+            },
+        )
+        first = self.cached.user_overview("owner")
+        self.assertEqual(first["task_stats"]["status_stats"], {"pending": 2})
+        self.assertEqual(self._cached_rollups(), 1)
+
+        run = self.execution.start_run("owner", run["run_id"])
+        self.assertEqual(self._cached_rollups(), 0)
+        build = next(step for step in run["steps"] if step["client_key"] == "build")
+        self.execution.start_step("owner", run["run_id"], build["step_id"])
+        self.execution.complete_step("owner", run["run_id"], build["step_id"])
+
+        after_completion = self.cached.user_overview("owner")
+        self.assertEqual(after_completion, self.uncached.user_overview("owner"))
+        self.assertEqual(after_completion["task_stats"]["status_stats"], {"completed": 1, "ready": 1})
+        self.assertEqual(after_completion["user_stats"]["in_progress_tasks"], 1)
+        self.assertEqual(after_completion["task_stats"]["completed_last_30_days"], 1)
+        self.assertEqual(after_completion["growth_points"]["total_recorded"], 9)
+        self.assertEqual(after_completion["attribute_stats"]["total_attributes"], 1)
+        self.assertEqual(self._cached_rollups(), 1)
+
+        connection = self.database.get_connection()
+        try:
+            append_growth_point_entry(
+                connection, "owner", 4, "earn", "manual", created_at="2026-07-20T00:00:00+00:00"
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        self.assertEqual(self._cached_rollups(), 0)
+        self.assertEqual(self.cached.user_overview("owner")["growth_points"]["total_recorded"], 13)
+
+    def test_only_lock_contention_is_dropped_silently_when_caching(self) -> None:
+        busy = sqlite3.OperationalError("database is locked")
+        busy.sqlite_errorcode = sqlite3.SQLITE_BUSY
+        connection = MagicMock()
+        connection.execute.side_effect = busy
+        with self.assertNoLogs("void-system.analytics.overview"):
+            SQLiteAnalyticsRepository._store_activity_rollup(connection, "owner", {})
+        connection.rollback.assert_called_once()
+
+        connection.execute.side_effect = sqlite3.OperationalError("disk I/O error")
+        with self.assertLogs("void-system.analytics.overview", "WARNING"):
+            SQLiteAnalyticsRepository._store_activity_rollup(connection, "owner", {})
+        self.assertEqual(connection.rollback.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Behavior tests for watermark-driven administrator analytics rollups."""
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from adapters.sqlite.analytics_repository import SQLiteAnalyticsRepository
+from adapters.sqlite.growth_point_projections import append_growth_point_entry
+from database import Database
+
+
+class AnalyticsRollupTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self.temp_dir.name) / "rollups.db")
+        self.repository = SQLiteAnalyticsRepository(self.database.get_connection)
+        self.now = datetime.now(timezone.utc)
+        self._add_user("owner")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def _write(self, callback) -> None:
+        connection = self.database.get_connection()
+        try:
+            callback(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _add_user(self, user_id: str) -> None:
+        def insert(connection: sqlite3.Connection) -> None:
+            connection.execute(
+                "INSERT INTO users (user_id, username, password_hash, created_at) VALUES (?, ?, 'unused', ?)",
+                (user_id, user_id, self.now.isoformat()),
+            )
+            connection.execute(
+                """INSERT INTO task_goals (goal_id, user_id, title, created_at, updated_at)
+                   VALUES (?, ?, 'Goal', ?, ?)""",
+                (f"goal-{user_id}", user_id, self.now.isoformat(), self.now.isoformat()),
+            )
+            connection.execute(
+                """INSERT INTO task_runs (run_id, goal_id, user_id, title, created_at, updated_at)
+                   VALUES (?, ?, ?, 'Run', ?, ?)""",
+                (f"run-{user_id}", f"goal-{user_id}", user_id, self.now.isoformat(), self.now.isoformat()),
+            )
+
+        self._write(insert)
+
+    def _add_completed_step(self, user_id: str, step_id: str, *, hours: int) -> None:
+        completed = datetime.now(timezone.utc)
+        created = completed - timedelta(hours=hours)
+        self._write(lambda connection: connection.execute(
+            """INSERT INTO task_steps
+               (step_id, run_id, user_id, client_key, title, status, created_at, updated_at, completed_at)
+               VALUES (?, ?, ?, ?, 'Step', 'completed', ?, ?, ?)""",
+            (step_id, f"run-{user_id}", user_id, step_id, created.isoformat(), completed.isoformat(), completed.isoformat()),
+        ))
+
+    def _award(self, user_id: str, amount: int) -> None:
+        self._write(lambda connection: append_growth_point_entry(
+            connection, user_id, amount, "earn", "test", created_at=self.now.isoformat()
+        ))
+
+    def _snapshot(self) -> dict:
+        return {
+            "users": self.repository.global_user_stats(),
+            "tasks": self.repository.global_task_stats(),
+            "trend": self.repository.task_completion_trend(30),
+            "hourly_trend": self.repository.task_completion_trend(2, "hour"),
+            "duration": self.repository.task_duration_stats(),
+            "growth": self.repository.global_growth_point_stats(),
+            "activity": self.repository.growth_point_activity_trend(30),
+            "distribution": self.repository.growth_point_distribution(),
+            "health": self.repository.growth_point_health_metrics(),
+        }
+
+    @patch("adapters.sqlite.analytics_rollups.SNAPSHOT_REFRESH_SECONDS", 0)
+    @patch("adapters.sqlite.analytics_rollups.COMPLETION_SETTLE_SECONDS", 0)
+    def test_incremental_refresh_matches_a_full_backfill(self) -> None:
+        self._add_completed_step("owner", "s1", hours=2)
+        self._award("owner", 150)
+        self.repository.refresh_rollups()
+
+        self._add_user("second")
+        self._add_completed_step("second", "s2", hours=4)
+        self._award("second", 40)
+        self.repository.refresh_rollups()
+        incremental = self._snapshot()
+        self.repository.refresh_rollups()
+        self.assertEqual(self._snapshot(), incremental)
+
+        self.repository.backfill_rollups()
+        self.assertEqual(self._snapshot(), incremental)
+        self.assertEqual(incremental["users"]["new_users_30d"], 2)
+        self.assertEqual(incremental["tasks"]["completed_tasks"], 2)
+        self.assertEqual(sum(item["completed_count"] for item in incremental["trend"]), 2)
+        self.assertEqual(sum(item["completed_count"] for item in incremental["hourly_trend"]), 2)
+        self.assertAlmostEqual(incremental["duration"]["average_completion_hours"], 3.0, places=3)
+        self.assertEqual(incremental["growth"]["total_recorded_points"], 190)
+        self.assertEqual(incremental["growth"]["recorded_activity_count"], 2)
+        self.assertEqual(
+            incremental["distribution"],
+            [{"points_range": "1-99", "user_count": 1}, {"points_range": "100-499", "user_count": 1}],
+        )
+
+    @patch("adapters.sqlite.analytics_rollups.SNAPSHOT_REFRESH_SECONDS", 0)
+    def test_recent_completions_wait_for_the_settle_window(self) -> None:
+        self._add_completed_step("owner", "fresh", hours=1)
+        self.repository.refresh_rollups()
+
+        self.assertEqual(self.repository.task_completion_trend(30), [])
+        self.assertEqual(self.repository.global_task_stats()["completed_tasks"], 1)
+
+    def test_rows_reusing_a_deleted_rowid_are_still_folded(self) -> None:
+        self._add_user("second")
+        self.repository.refresh_rollups()
+        self._write(lambda connection: connection.execute("DELETE FROM users WHERE user_id = 'second'"))
+        self._add_user("third")
+        self._award("third", 30)
+
+        self.repository.refresh_rollups()
+
+        self.assertEqual(self.repository.global_user_stats()["new_users_30d"], 3)
+        self.assertEqual(self.repository.global_growth_point_stats()["recorded_activity_count"], 1)
+        self.assertEqual(self._scalar("SELECT COUNT(*) FROM analytics_rollup_feed"), 0)
+
+    def test_snapshots_wait_for_their_interval_and_old_hour_buckets_are_dropped(self) -> None:
+        old = (self.now - timedelta(days=40)).strftime("%Y-%m-%dT%H")
+        self._write(lambda connection: connection.execute(
+            """INSERT INTO analytics_rollup_buckets (metric, granularity, bucket, count, value)
+               VALUES ('users.registered', 'hour', ?, 1, 1)""",
+            (old,),
+        ))
+        self._add_completed_step("owner", "first", hours=1)
+
+        self.repository.refresh_rollups()
+        self.assertEqual(
+            self._scalar("SELECT COUNT(*) FROM analytics_rollup_buckets WHERE bucket = ?", (old,)), 0
+        )
+        self.assertEqual(self.repository.global_task_stats()["completed_tasks"], 0)
+
+        with patch("adapters.sqlite.analytics_rollups.SNAPSHOT_REFRESH_SECONDS", 0):
+            self.repository.refresh_rollups()
+        self.assertEqual(self.repository.global_task_stats()["completed_tasks"], 1)
+
+    def test_snapshot_scans_run_before_the_write_lock(self) -> None:
+        statements = []
+
+        def traced_connection() -> sqlite3.Connection:
+            connection = self.database.get_connection()
+            connection.set_trace_callback(statements.append)
+            return connection
+
+        with patch("adapters.sqlite.analytics_rollups.SNAPSHOT_REFRESH_SECONDS", 0):
+            SQLiteAnalyticsRepository(traced_connection).refresh_rollups()
+
+        begin = next(index for index, sql in enumerate(statements) if sql.startswith("BEGIN IMMEDIATE"))
+        scans = [index for index, sql in enumerate(statements) if "FROM task_steps GROUP BY status" in sql]
+        self.assertTrue(scans)
+        self.assertLess(max(scans), begin)
+
+    def _scalar(self, query: str, parameters: tuple = ()) -> int:
+        connection = self.database.get_connection()
+        try:
+            return connection.execute(query, parameters).fetchone()[0]
+        finally:
+            connection.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Duplicated sessions share their source's history copy-on-write."""
+from pathlib import Path
+import tempfile
+import unittest
+
+from adapters.sqlite.conversation_branches import MAX_BRANCH_DEPTH
+from database import Database
+from modules.conversations.service import get_conversation_service
+
+
+class ConversationBranchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = Database(Path(self.temp_dir.name) / "branches.db")
+        connection = self.database.get_connection()
+        try:
+            connection.execute(
+                "INSERT INTO users (user_id, username, email) VALUES ('user-a', 'user-a', 'a@example.com')"
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        self.service = get_conversation_service(self.database)
+        self.group_id = self.service.create_group("user-a", "工作")
+        self.source = self.service.create_session("user-a", self.group_id, "长会话")
+        self.first = self.service.add_message("user-a", self.source, "user", "第一条")
+        self.second = self.service.add_message(
+            "user-a", self.source, "assistant", "第二条", reply_to_id=self.first
+        )
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self.temp_dir.cleanup()
+
+    def _contents(self, session_id: str) -> list:
+        return [message["content"] for message in self.service.list_messages("user-a", session_id, 100)]
+
+    def _message_rows(self) -> int:
+        connection = self.database.get_connection()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_branch_shares_history_without_copying_and_diverges_independently(self) -> None:
+        branch = self.service.duplicate_session("user-a", self.source)
+        self.assertEqual(self._message_rows(), 2)
+
+        self.service.add_message("user-a", self.source, "user", "原会话新消息")
+        reply = self.service.add_message("user-a", branch, "user", "分支新消息", reply_to_id=self.second)
+
+        self.assertEqual(self._contents(self.source), ["第一条", "第二条", "原会话新消息"])
+        messages = self.service.list_messages("user-a", branch, 100)
+        self.assertEqual([message["content"] for message in messages], ["第一条", "第二条", "分支新消息"])
+        self.assertEqual({message["session_id"] for message in messages}, {branch})
+        self.assertEqual(messages[1]["reply_content"], "第一条")
+        self.assertEqual(messages[2]["message_id"], reply)
+        self.assertEqual(messages[2]["reply_content"], "第二条")
+
+        newest = self.service.list_message_page("user-a", branch, limit=2)
+        oldest = self.service.list_message_page("user-a", branch, limit=2, cursor=newest["next_cursor"])
+        self.assertEqual([message["content"] for message in oldest["messages"]], ["第一条"])
+
+    def test_deleting_or_clearing_a_source_materializes_its_branches(self) -> None:
+        branch = self.service.duplicate_session("user-a", self.source)
+        self.service.add_message("user-a", branch, "user", "分支回复", reply_to_id=self.second)
+        nested = self.service.duplicate_session("user-a", branch)
+
+        self.service.clear_messages("user-a", self.source)
+        self.assertEqual(self._contents(self.source), [])
+        self.assertEqual(self._contents(branch), ["第一条", "第二条", "分支回复"])
+
+        self.service.delete_session("user-a", branch)
+        messages = self.service.list_messages("user-a", nested, 100)
+        self.assertEqual([message["content"] for message in messages], ["第一条", "第二条", "分支回复"])
+        self.assertEqual([message["reply_content"] for message in messages], [None, "第一条", "第二条"])
+        self.assertEqual(self.service.search("user-a", "分支回复")["results"][0]["session_id"], nested)
+
+        self.service.clear_messages("user-a", nested)
+        self.assertEqual(self._contents(nested), [])
+        self.assertEqual(self._message_rows(), 0)
+
+    def test_search_reports_shared_messages_under_every_branch_that_sees_them(self) -> None:
+        branch = self.service.duplicate_session("user-a", self.source)
+        self.service.add_message("user-a", self.source, "user", "原会话新消息")
+        nested = self.service.duplicate_session("user-a", branch)
+
+        def sessions(query: str) -> set:
+            return {
+                (result["session_id"], result["message_id"])
+                for result in self.service.search("user-a", query)["results"]
+                if result["kind"] == "message"
+            }
+
+        self.assertEqual(
+            sessions("第二条"),
+            {(self.source, self.second), (branch, self.second), (nested, self.second)},
+        )
+        self.assertEqual({session_id for session_id, _ in sessions("原会话新消息")}, {self.source})
+
+    def test_long_lineages_are_flattened_into_a_single_copy(self) -> None:
+        session_id = self.source
+        for _ in range(MAX_BRANCH_DEPTH - 1):
+            session_id = self.service.duplicate_session("user-a", session_id)
+        self.assertEqual(self._message_rows(), 2)
+
+        flattened = self.service.duplicate_session("user-a", session_id)
+
+        self.assertEqual(self._message_rows(), 4)
+        self.assertEqual(self._contents(flattened), ["第一条", "第二条"])
+        self.assertEqual(self.service.list_messages("user-a", flattened, 100)[1]["reply_content"], "第一条")
+        self.service.delete_group("user-a", self.group_id)
+        self.assertEqual(self._message_rows(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
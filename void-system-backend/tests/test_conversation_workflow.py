@@ -74,6 +74,135 @@ class ConversationWorkflowTests(unittest.TestCase):
         self.assertEqual(session_count, 0)
         self.assertEqual(message_count, 0)
 
+    def test_sidebar_groups_carry_bounded_session_summaries_and_page_lazily(self) -> None:
+        busy = self.service.create_group("user-a", "工作")
+        empty = self.service.create_group("user-a", "空分组")
+        sessions = [self.service.create_session("user-a", busy, f"会话 {index}") for index in range(5)]
+        connection = self.database.get_connection()
+        try:
+            connection.executemany(
+                "UPDATE chat_sessions SET updated_at = ? WHERE session_id = ?",
+                [(f"2026-01-0{index + 1} 00:00:00", session_id) for index, session_id in enumerate(sessions)],
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        newest_first = list(reversed(sessions))
+
+        groups = {group["group_id"]: group for group in self.service.list_groups("user-a", session_limit=2)}
+
+        self.assertEqual(set(groups), {busy, empty})
+        self.assertEqual((groups[empty]["session_count"], groups[empty]["sessions"]), (0, []))
+        self.assertIsNone(groups[empty]["next_cursor"])
+        self.assertEqual(groups[busy]["session_count"], 5)
+        self.assertEqual([item["session_id"] for item in groups[busy]["sessions"]], newest_first[:2])
+        self.assertEqual(
+            set(groups[busy]["sessions"][0]),
+            {"session_id", "group_id", "session_name", "created_at", "updated_at"},
+        )
+
+        page = self.service.list_group_sessions("user-a", busy, limit=2, cursor=groups[busy]["next_cursor"])
+        self.assertEqual([item["session_id"] for item in page["sessions"]], newest_first[2:4])
+        last = self.service.list_group_sessions("user-a", busy, limit=2, cursor=page["next_cursor"])
+        self.assertEqual([item["session_id"] for item in last["sessions"]], newest_first[4:])
+        self.assertIsNone(last["next_cursor"])
+
+        unbounded = {group["group_id"]: group for group in self.service.list_groups("user-a")}
+        self.assertEqual(len(unbounded[busy]["sessions"]), 5)
+        self.assertIsNone(unbounded[busy]["next_cursor"])
+
+    def test_group_session_pages_require_ownership_and_a_valid_cursor(self) -> None:
+        group_id = self.service.create_group("user-a", "工作")
+        self.service.create_session("user-a", group_id, "周计划")
+        with self.assertRaises(ConversationError) as context:
+            self.service.list_group_sessions("user-b", group_id)
+        self.assertEqual(context.exception.status_code, 404)
+        with self.assertRaises(ConversationError) as context:
+            self.service.list_group_sessions("user-a", group_id, cursor="not-a-cursor")
+        self.assertEqual(context.exception.code, "INVALID_CURSOR")
+        self.assertEqual(self.service.list_groups("user-b"), [])
+
+    def test_message_history_pages_backwards_from_the_newest_messages(self) -> None:
+        group_id = self.service.create_group("user-a", "工作")
+        session_id = self.service.create_session("user-a", group_id, "长会话")
+        quoted = self.service.add_message("user-a", session_id, "user", "引" * 500)
+        for index in range(1, 5):
+            self.service.add_message(
+                "user-a", session_id, "assistant", f"第 {index} 条", reply_to_id=quoted
+            )
+
+        newest = self.service.list_message_page("user-a", session_id, limit=2)
+        older = self.service.list_message_page("user-a", session_id, limit=2, cursor=newest["next_cursor"])
+        oldest = self.service.list_message_page("user-a", session_id, limit=2, cursor=older["next_cursor"])
+
+        self.assertEqual([message["content"] for message in newest["messages"]], ["第 3 条", "第 4 条"])
+        self.assertEqual([message["content"] for message in older["messages"]], ["第 1 条", "第 2 条"])
+        self.assertEqual([message["message_id"] for message in oldest["messages"]], [quoted])
+        self.assertIsNone(oldest["next_cursor"])
+        self.assertEqual(newest["messages"][0]["reply_content"], "引" * 200)
+        self.assertEqual(
+            [message["content"] for message in self.service.list_messages("user-a", session_id, 1)],
+            ["第 4 条"],
+        )
+        with self.assertRaises(ConversationError) as context:
+            self.service.list_message_page("user-a", session_id, cursor="not-a-cursor")
+        self.assertEqual(context.exception.code, "INVALID_CURSOR")
+
+    def test_search_ranks_owned_titles_and_messages_and_follows_every_write(self) -> None:
+        group_id = self.service.create_group("user-a", "工作")
+        plan = self.service.create_session("user-a", group_id, "季度周报计划")
+        notes = self.service.create_session("user-a", group_id, "杂记")
+        message_id = self.service.add_message("user-a", notes, "user", "下周一前提交 Weekly Report 周报草稿")
+        other_group = self.service.create_group("user-b", "私人")
+        self.service.add_message(
+            "user-b", self.service.create_session("user-b", other_group, "周报"), "user", "周报"
+        )
+
+        found = self.service.search("user-a", "周报")
+        self.assertEqual(
+            {(result["kind"], result["session_id"], result["message_id"]) for result in found["results"]},
+            {("session", plan, None), ("message", notes, message_id)},
+        )
+        message = next(result for result in found["results"] if result["kind"] == "message")
+        start, end = message["highlights"][0]
+        self.assertEqual(message["snippet"][start:end], "周报")
+        self.assertEqual(message["session_name"], "杂记")
+        self.assertEqual(
+            [result["message_id"] for result in self.service.search("user-a", "weekly 草稿")["results"]],
+            [message_id],
+        )
+        self.assertEqual(self.service.search("user-a", "周报计划 月报")["results"], [])
+
+        first = self.service.search("user-a", "周报", limit=1)
+        second = self.service.search("user-a", "周报", limit=1, offset=first["next_offset"])
+        self.assertEqual(len(first["results"] + second["results"]), 2)
+        self.assertIsNone(second["next_offset"])
+
+        self.service.update_session("user-a", plan, "季度总结", None)
+        self.service.clear_messages("user-a", notes)
+        self.assertEqual(self.service.search("user-a", "周报")["results"], [])
+        self.assertEqual(
+            [result["session_id"] for result in self.service.search("user-a", "总结")["results"]], [plan]
+        )
+        self.service.delete_session("user-a", plan)
+        self.assertEqual(self.service.search("user-a", "总结")["results"], [])
+        self.assertEqual(len(self.service.search("user-b", "周报")["results"]), 2)
+
+        with self.assertRaises(ConversationError) as context:
+            self.service.search("user-a", "？！")
+        self.assertEqual(context.exception.code, "INVALID_QUERY")
+
+    def test_search_ranks_denser_matches_first(self) -> None:
+        group_id = self.service.create_group("user-a", "工作")
+        session_id = self.service.create_session("user-a", group_id, "杂记")
+        passing = self.service.add_message("user-a", session_id, "user", "顺便提一句周报，" + "其他内容" * 30)
+        focused = self.service.add_message("user-a", session_id, "user", "周报：整理周报并发送周报")
+
+        results = self.service.search("user-a", "周报")["results"]
+
+        self.assertEqual([result["message_id"] for result in results], [focused, passing])
+        self.assertGreater(results[0]["score"], results[1]["score"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,116 @@
+"""Streamed, out-of-process extraction of paged and tabular knowledge sources."""
+from __future__ import annotations
+
+import io
+import multiprocessing
+from pathlib import Path
+import tempfile
+import unittest
+
+from cryptography.fernet import Fernet
+import openpyxl
+from PyPDF2 import PdfWriter
+
+from modules.knowledge.parser import (
+    EXCEL_ROWS_PER_SECTION,
+    DocumentExtractionPool,
+    DocumentParseError,
+    UniversalDocumentParser,
+)
+
+
+def _workbook(rows: int) -> bytes:
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Sheet1"
+    sheet.append(["task", "hours"])
+    for index in range(rows):
+        sheet.append([f"task-{index}", index])
+    workbook.create_sheet("Goals").append(["goal"])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _blank_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+class DocumentParserStreamingTests(unittest.TestCase):
+    def test_workbook_rows_stream_in_blocks_per_sheet(self) -> None:
+        parser = UniversalDocumentParser(DocumentExtractionPool(max_workers=0))
+
+        sections = list(parser.iter_sections(_workbook(EXCEL_ROWS_PER_SECTION + 20), "hours.xlsx"))
+
+        self.assertEqual(len(sections), 3)
+        self.assertTrue(sections[0].startswith("### 数据表: 第 1 个工作表"))
+        self.assertIn(f"该表包含 {EXCEL_ROWS_PER_SECTION + 20} 条记录", sections[0])
+        self.assertIn('记录第 1 号: task 是 "task-0" hours 是 "0"', sections[0])
+        self.assertTrue(sections[1].startswith(f"记录第 {EXCEL_ROWS_PER_SECTION + 1} 号:"))
+        self.assertTrue(sections[2].startswith("### 数据表: Goals"))
+
+    def test_pdf_pages_are_extracted_in_a_reused_worker_process(self) -> None:
+        pool = DocumentExtractionPool(max_workers=1)
+        parser = UniversalDocumentParser(pool)
+        try:
+            self.assertEqual(list(parser.iter_sections(_blank_pdf(3), "report.pdf")), ["", "", ""])
+            worker = pool._idle[0]
+            parsed = parser.parse_file(_blank_pdf(2), "report.pdf")
+
+            self.assertTrue(parsed["success"])
+            self.assertEqual(parsed["section_count"], 2)
+            self.assertIs(pool._idle[0], worker)
+            self.assertTrue(worker.process.is_alive())
+        finally:
+            parser.close()
+
+    def test_stored_files_are_opened_and_decrypted_by_the_worker_process(self) -> None:
+        key = Fernet.generate_key()
+        pool = DocumentExtractionPool(max_workers=1)
+        parser = UniversalDocumentParser(pool)
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            encrypted = Path(temporary_directory) / "report.bin"
+            encrypted.write_bytes(Fernet(key).encrypt(_blank_pdf(2)))
+            plain = Path(temporary_directory) / "hours.bin"
+            plain.write_bytes(_workbook(3))
+            sent = []
+            try:
+                worker = pool._lease()
+                original_send = worker.conn.send
+                worker.conn.send = lambda request: sent.append(request) or original_send(request)
+                pool._idle.append(worker)
+
+                self.assertEqual(list(parser.iter_file_sections(encrypted, "report.pdf", fernet_key=key)), ["", ""])
+                sections = list(parser.iter_file_sections(plain, "hours.xlsx"))
+            finally:
+                parser.close()
+
+        self.assertEqual([request[1] for request in sent[:2]], [str(encrypted), str(plain)])
+        self.assertIn('记录第 3 号: task 是 "task-2" hours 是 "2"', sections[0])
+
+    def test_abandoned_stream_stops_its_worker_and_errors_surface_as_parse_errors(self) -> None:
+        pool = DocumentExtractionPool(max_workers=1)
+        parser = UniversalDocumentParser(pool)
+        try:
+            stream = parser.iter_sections(_workbook(EXCEL_ROWS_PER_SECTION * 3), "hours.xlsx")
+            next(stream)
+            self.assertEqual(len(multiprocessing.active_children()), 1)
+            stream.close()
+            self.assertEqual(pool._idle, [])
+            self.assertEqual(multiprocessing.active_children(), [])
+
+            with self.assertRaises(DocumentParseError):
+                list(parser.iter_sections(b"not a pdf", "broken.pdf"))
+            self.assertFalse(parser.parse_file(b"not a pdf", "broken.pdf")["success"])
+            self.assertEqual(len(pool._idle), 1)
+        finally:
+            parser.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,8 @@ from pathlib import Path
 import tempfile
 import unittest
 
+from adapters.sqlite.growth_point_projections import append_growth_point_entry
+from adapters.sqlite.growth_repository import SQLiteGrowthProfileRepository
 from database import Database
 
 
@@ -48,5 +50,40 @@ class GrowthProfileTests(unittest.TestCase):
             self.assertEqual(attributes[0]["attr_value"], 40)
 
 
+    def test_projection_checker_reports_and_repairs_ledger_writes_that_bypass_projections(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            database = Database(Path(temp_dir) / "growth.db")
+            user_id = "growth-user"
+            self._create_user(database, user_id)
+            connection = database.get_connection()
+            try:
+                append_growth_point_entry(
+                    connection, user_id, 12, "earn", "task_step:a", created_at="2026-07-20T08:00:00+00:00"
+                )
+                connection.execute(
+                    """INSERT INTO growth_point_ledger (record_id, user_id, amount, type, source, created_at)
+                       VALUES ('manual', ?, -4, 'spend', 'restore', '2026-07-21T08:00:00+00:00')""",
+                    (user_id,),
+                )
+                connection.commit()
+            finally:
+                connection.close()
+            repository = SQLiteGrowthProfileRepository(database.get_connection)
+
+            drift = repository.check_growth_point_projections(repair=True)
+            repaired_drift = repository.check_growth_point_projections()
+            balance = repository.get_balance(user_id)
+            summary = repository.growth_point_summary(user_id)
+
+        self.assertEqual(
+            [(item["projection"], item.get("day")) for item in drift],
+            [("balance", None), ("daily", "2026-07-21")],
+        )
+        self.assertEqual(drift[0]["stored"]["balance"], 12)
+        self.assertEqual(drift[0]["expected"]["balance"], 8)
+        self.assertEqual(repaired_drift, [])
+        self.assertEqual(balance, 8)
+        self.assertEqual((summary["total_income"], summary["total_expense"]), (12, 4))
+
 if __name__ == "__main__":
     unittest.main()
@@ -6,6 +6,7 @@ import unittest
 from fastapi.testclient import TestClient
 
 from api.http.application import ApplicationOptions, create_app
+from core.analytics_contracts import HOUR_TREND_MAX_DAYS
 from core.runtime_settings import RuntimeSettings
 
 
@@ -25,6 +26,9 @@ class AdminAnalyticsHttpTests(unittest.TestCase):
                     database_path=str(database_path),
                     enable_ai_routes=False,
                     enable_langserve_routes=False,
+                    enable_analytics_rollup_worker=False,
+                    enable_trigger_schedule_worker=False,
+                    enable_session_attachment_sweeper=False,
                     settings=settings,
                 )
             )
@@ -66,6 +70,19 @@ class AdminAnalyticsHttpTests(unittest.TestCase):
             self.assertTrue(body["success"], endpoint)
             self.assertTrue(keys.issubset(body["data"]), endpoint)
 
+    def test_trend_endpoints_serve_hourly_buckets_on_request(self) -> None:
+        hourly = self.client.get("/api/admin/visualization/tasks?days=2&granularity=hour", headers=self.headers)
+        invalid = self.client.get("/api/admin/visualization/growth?granularity=minute", headers=self.headers)
+        clamped = self.client.get("/api/admin/visualization/users?days=365&granularity=hour", headers=self.headers)
+        daily = self.client.get("/api/admin/visualization/users?days=365", headers=self.headers)
+
+        self.assertEqual(hourly.status_code, 200)
+        self.assertEqual(hourly.json()["data"]["granularity"], "hour")
+        self.assertEqual(hourly.json()["data"]["period_days"], 2)
+        self.assertEqual(clamped.json()["data"]["period_days"], HOUR_TREND_MAX_DAYS)
+        self.assertEqual(daily.json()["data"]["period_days"], 365)
+        self.assertEqual(invalid.status_code, 422)
+
     def test_regular_member_is_still_denied_administrator_analytics(self) -> None:
         registered = self.client.post(
             "/api/auth/register",
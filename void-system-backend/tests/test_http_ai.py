@@ -56,9 +56,10 @@ def test_persona_stream_forwards_authorized_context_for_logged_in_users(monkeypa
             yield "OK"
 
     class FakeCompanion:
-        def build_ai_context(self, owner_id, profile, *, purpose):
+        def build_ai_context(self, owner_id, profile, *, purpose, query=None):
             assert owner_id == "user-1"
             assert purpose == "conversation_assist"
+            assert query == "What should I do next?"
             return {"included_sections": ["runs"]}
 
         def render_ai_context(self, snapshot):
@@ -99,7 +100,7 @@ def test_persona_stream_retrieves_library_context_only_when_user_allows_it(monke
             yield "OK"
 
     class FakeCompanion:
-        def build_ai_context(self, _owner_id, _profile, *, purpose):
+        def build_ai_context(self, _owner_id, _profile, *, purpose, query=None):
             assert purpose == "conversation_assist"
             return {"included_sections": [], "permissions": {"knowledge": True}}
 
@@ -150,7 +151,7 @@ def test_persona_stream_does_not_query_library_when_permission_is_off(monkeypatc
             yield "OK"
 
     class FakeCompanion:
-        def build_ai_context(self, _owner_id, _profile, *, purpose):
+        def build_ai_context(self, _owner_id, _profile, *, purpose, query=None):
             assert purpose == "conversation_assist"
             return {"included_sections": [], "permissions": {"knowledge": False}}
 
@@ -62,6 +62,9 @@ class KnowledgeWorkspaceHttpTests(unittest.TestCase):
                 database_path=str(Path(self.temp_dir.name) / "documents.db"),
                 enable_ai_routes=False,
                 enable_langserve_routes=False,
+                enable_analytics_rollup_worker=False,
+                enable_trigger_schedule_worker=False,
+                enable_session_attachment_sweeper=False,
                 enable_knowledge_job_worker=False,
                 settings=settings,
             )
@@ -17,6 +17,9 @@ class GrowthProfileHttpTests(unittest.TestCase):
                     database_path=str(Path(self.temp_dir.name) / "growth-http.db"),
                     enable_ai_routes=False,
                     enable_langserve_routes=False,
+                    enable_analytics_rollup_worker=False,
+                    enable_trigger_schedule_worker=False,
+                    enable_session_attachment_sweeper=False,
                     bootstrap_admin=False,
                 )
             )
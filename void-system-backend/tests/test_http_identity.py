@@ -18,6 +18,9 @@ class IdentityHttpTests(unittest.TestCase):
                     database_path=str(database_path),
                     enable_ai_routes=False,
                     enable_langserve_routes=False,
+                    enable_analytics_rollup_worker=False,
+                    enable_trigger_schedule_worker=False,
+                    enable_session_attachment_sweeper=False,
                     bootstrap_admin=False,
                 )
             )
@@ -1,4 +1,5 @@
 """HTTP contract tests for Personal Context and the system companion."""
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import tempfile
 import unittest
@@ -19,6 +20,9 @@ class PersonalContextHttpTests(unittest.TestCase):
                     database_path=str(Path(self.temp_dir.name) / "personal-context-http.db"),
                     enable_ai_routes=False,
                     enable_langserve_routes=False,
+                    enable_analytics_rollup_worker=False,
+                    enable_trigger_schedule_worker=False,
+                    enable_session_attachment_sweeper=False,
                     bootstrap_admin=False,
                 )
             )
@@ -139,6 +143,134 @@ class PersonalContextHttpTests(unittest.TestCase):
         items = renewed_context.json()["data"]["context"]["sections"]["memories"]
         self.assertEqual([item["reference"]["id"] for item in items], [memory_id])
 
+    def test_memory_expiry_is_compared_as_an_instant_across_offsets(self) -> None:
+        now = datetime.now(timezone.utc)
+        expiries = {
+            "future": (now + timedelta(hours=2)).astimezone(timezone(timedelta(hours=-5))),
+            "past": (now - timedelta(hours=2)).astimezone(timezone(timedelta(hours=5))),
+        }
+        memory_ids = {}
+        for label, expires_at in expiries.items():
+            created = self.client.post(
+                "/api/companion/memories",
+                headers=self.headers,
+                json={
+                    "memory_type": "fact",
+                    "title": f"Offset {label}",
+                    "content": "Expiry written with a local offset.",
+                    "expires_at": expires_at.isoformat(),
+                },
+            )
+            self.assertEqual(created.status_code, 200)
+            memory_ids[label] = created.json()["data"]["memory"]["memory_id"]
+
+        context = self.client.get("/api/companion/context?sections=memories", headers=self.headers)
+
+        self.assertEqual(context.status_code, 200)
+        items = context.json()["data"]["context"]["sections"]["memories"]
+        self.assertEqual([item["reference"]["id"] for item in items], [memory_ids["future"]])
+
+    def test_context_memories_are_ranked_by_relevance_to_the_query(self) -> None:
+        memories = [
+            ("fact", "常用城市", "我住在上海，通勤大约四十分钟。"),
+            ("fact", "工作时间", "工作日早上九点开始上班。"),
+            ("preference", "Writing habit", "I prefer drafting Python tutorials in the evening."),
+            ("episode", "复盘经验", "上次马拉松训练因为膝盖不适中断了两周。"),
+        ]
+        created_ids = []
+        for memory_type, title, content in memories:
+            created = self.client.post(
+                "/api/companion/memories",
+                headers=self.headers,
+                json={"memory_type": memory_type, "title": title, "content": content},
+            )
+            self.assertEqual(created.status_code, 200)
+            created_ids.append(created.json()["data"]["memory"]["memory_id"])
+
+        running = self.client.get(
+            "/api/companion/context",
+            headers=self.headers,
+            params={"sections": "memories", "item_budget": 2, "query": "下个月想恢复马拉松训练"},
+        )
+        self.assertEqual(running.status_code, 200)
+        items = running.json()["data"]["context"]["sections"]["memories"]
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0]["reference"]["id"], created_ids[3])
+        self.assertEqual(items[0]["selection"]["reason"], "Confirmed memory related to the current request.")
+
+        corrected = self.client.patch(
+            f"/api/companion/memories/{created_ids[2]}",
+            headers=self.headers,
+            json={"content": "I prefer evening sessions for marathon stretching."},
+        )
+        self.assertEqual(corrected.status_code, 200)
+        english = self.client.get(
+            "/api/companion/context",
+            headers=self.headers,
+            params={"sections": "memories", "item_budget": 1, "query": "Python tutorials"},
+        )
+        stale = english.json()["data"]["context"]["sections"]["memories"][0]
+        self.assertNotEqual(stale["reference"]["id"], created_ids[2])
+        self.assertEqual(
+            stale["selection"]["reason"],
+            "Confirmed memory within the current privacy and freshness policy.",
+        )
+        stretching = self.client.get(
+            "/api/companion/context",
+            headers=self.headers,
+            params={"sections": "memories", "item_budget": 1, "query": "evening stretching"},
+        )
+        self.assertEqual(stretching.json()["data"]["context"]["sections"]["memories"][0]["reference"]["id"], created_ids[2])
+
+    def test_memory_signals_follow_writes_and_context_reads_leave_them_alone(self) -> None:
+        created = self.client.post(
+            "/api/companion/memories",
+            headers=self.headers,
+            json={
+                "memory_type": "preference",
+                "title": "Morning focus",
+                "content": "Deep work happens before lunch.",
+                "contribute_to_profile": True,
+            },
+        )
+        self.assertEqual(created.status_code, 200)
+        memory_id = created.json()["data"]["memory"]["memory_id"]
+
+        def explicit_memory_count() -> int:
+            profile = self.client.get("/api/companion/profile", headers=self.headers)
+            self.assertEqual(profile.status_code, 200)
+            sources = profile.json()["data"]["profile"]["evidence"]["sources"]
+            return next(item["count"] for item in sources if item["key"] == "explicit_memories")
+
+        def signal_rows() -> list:
+            connection = self.client.app.state.database.get_connection()
+            try:
+                return [
+                    tuple(row)
+                    for row in connection.execute(
+                        """SELECT source_ref, status, updated_at FROM profile_signals
+                           WHERE source_type = 'explicit_memory'"""
+                    ).fetchall()
+                ]
+            finally:
+                connection.close()
+
+        self.assertEqual(explicit_memory_count(), 1)
+        before = signal_rows()
+        self.assertEqual([row[:2] for row in before], [(f"memory:{memory_id}", "active")])
+        context = self.client.get(
+            "/api/companion/context",
+            headers=self.headers,
+            params={"sections": "memories", "query": "focus"},
+        )
+        self.assertEqual(context.status_code, 200)
+        self.assertEqual(signal_rows(), before)
+
+        archived = self.client.delete(f"/api/companion/memories/{memory_id}", headers=self.headers)
+        self.assertEqual(archived.status_code, 200)
+        self.assertEqual([row[:2] for row in signal_rows()], [(f"memory:{memory_id}", "archived")])
+        self.assertEqual(explicit_memory_count(), 0)
+
     def test_memory_crud_is_owner_scoped_and_preserves_type(self) -> None:
         created = self.client.post(
             "/api/companion/memories",
@@ -17,6 +17,9 @@ class TaskAutomationHttpTests(unittest.TestCase):
                     database_path=str(Path(self.temp_dir.name) / "automation-http.db"),
                     enable_ai_routes=False,
                     enable_langserve_routes=False,
+                    enable_analytics_rollup_worker=False,
+                    enable_trigger_schedule_worker=False,
+                    enable_session_attachment_sweeper=False,
                     bootstrap_admin=False,
                 )
             )
@@ -164,6 +167,23 @@ class TaskAutomationHttpTests(unittest.TestCase):
             response.json()["error_code"], "TRIGGER_CONFIGURATION_INVALID"
         )
 
+    def test_event_delivery_is_owner_scoped_and_replayable(self) -> None:
+        trigger = self._create_trigger()
+        payload = {"event_type": "release.completed", "source_key": "release:43", "payload": {"release": 43}}
+        first = self.client.post("/api/trigger-events", headers=self.headers, json=payload)
+        self.assertEqual(first.status_code, 200)
+        data = first.json()["data"]
+        self.assertEqual(data["counts"]["created"], 1)
+        self.assertEqual(data["results"][0]["trigger_id"], trigger["trigger_id"])
+        self.assertNotIn("run", data["results"][0])
+
+        replay = self.client.post("/api/trigger-events", headers=self.headers, json=payload)
+        self.assertEqual(replay.json()["data"]["counts"]["replayed"], 1)
+        other = self.client.post("/api/trigger-events", headers=self.other_headers, json=payload)
+        self.assertEqual(other.json()["data"]["matched"], 0)
+        forbidden = self.client.post("/api/admin/trigger-events", headers=self.headers, json=payload)
+        self.assertEqual(forbidden.status_code, 403)
+
     def test_trigger_update_and_delete_contract(self) -> None:
         trigger = self._create_trigger()
         updated = self.client.patch(
@@ -31,6 +31,9 @@ class TaskExecutionHttpTests(unittest.TestCase):
                 database_path=str(Path(self.temp_dir.name) / "task-execution-http.db"),
                 enable_ai_routes=False,
                 enable_langserve_routes=False,
+                enable_analytics_rollup_worker=False,
+                enable_trigger_schedule_worker=False,
+                enable_session_attachment_sweeper=False,
                 bootstrap_admin=False,
             )
         )
@@ -431,6 +434,103 @@ class TaskExecutionHttpTests(unittest.TestCase):
         self.assertEqual(completed_goal.status_code, 200)
         self.assertEqual(completed_goal.json()["data"]["goal"]["status"], "completed")
 
+    def test_step_command_batch_contract(self) -> None:
+        goal = self.client.post(
+            "/api/goals", headers=self.headers, json={"title": "Close the checklist"}
+        ).json()["data"]["goal"]
+        run = self.client.post(
+            f"/api/goals/{goal['goal_id']}/runs",
+            headers=self.headers,
+            json={"steps": [{"title": "One"}, {"title": "Two"}, {"title": "Three"}]},
+        ).json()["data"]["run"]
+        run = self.client.post(
+            f"/api/runs/{run['run_id']}/start", headers=self.headers
+        ).json()["data"]["run"]
+        commands = []
+        for step in run["steps"]:
+            commands.extend([
+                {"op": "start", "step_id": step["step_id"]},
+                {
+                    "op": "complete",
+                    "step_id": step["step_id"],
+                    "artifacts": [{"title": f"{step['title']} proof", "uri": "memory://proof"}],
+                },
+            ])
+        response = self.client.post(
+            f"/api/runs/{run['run_id']}/steps/batch",
+            headers=self.headers,
+            json={"commands": commands},
+        )
+        self.assertEqual(response.status_code, 200)
+        batch = response.json()["data"]["batch"]
+        self.assertEqual(batch["status"], "completed")
+        self.assertEqual(len(batch["commands"]), 6)
+        self.assertEqual({item["status"] for item in batch["steps"]}, {"completed"})
+
+        rejected = self.client.post(
+            f"/api/runs/{run['run_id']}/steps/batch",
+            headers=self.headers,
+            json={"commands": [{"op": "resolve_approval", "step_id": run["steps"][0]["step_id"]}]},
+        )
+        self.assertEqual(rejected.status_code, 422)
+        finished = self.client.post(
+            f"/api/runs/{run['run_id']}/steps/batch",
+            headers=self.headers,
+            json={"commands": [{"op": "skip", "step_id": run["steps"][0]["step_id"]}]},
+        )
+        self.assertEqual(finished.status_code, 409)
+        self.assertEqual(finished.json()["error_code"], "RUN_STATUS_CONFLICT")
+
+    def test_run_etags_support_conditional_reads_and_commands(self) -> None:
+        goal = self.client.post(
+            "/api/goals", headers=self.headers, json={"title": "Conditional release"}
+        ).json()["data"]["goal"]
+        run = self.client.post(
+            f"/api/goals/{goal['goal_id']}/runs",
+            headers=self.headers,
+            json={"steps": [{"title": "Only step"}]},
+        ).json()["data"]["run"]
+        read = self.client.get(f"/api/runs/{run['run_id']}", headers=self.headers)
+        etag = read.headers["ETag"]
+        self.assertEqual(etag, f'"{run["version"]}"')
+        unchanged = self.client.get(
+            f"/api/runs/{run['run_id']}", headers={**self.headers, "If-None-Match": etag}
+        )
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(unchanged.headers["ETag"], etag)
+        any_version = self.client.get(
+            f"/api/runs/{run['run_id']}", headers={**self.headers, "If-None-Match": "*"}
+        )
+        self.assertEqual(any_version.status_code, 304)
+        self.assertEqual(any_version.headers["ETag"], etag)
+        missing = self.client.get("/api/runs/missing-run", headers={**self.headers, "If-None-Match": "*"})
+        self.assertEqual(missing.status_code, 404)
+
+        started = self.client.post(
+            f"/api/runs/{run['run_id']}/start",
+            headers={**self.headers, "If-Match": etag, "Prefer": "return=minimal"},
+        )
+        self.assertEqual(started.status_code, 200)
+        state = started.json()["data"]["run"]
+        self.assertNotIn("steps", state)
+        self.assertEqual(state["status"], "running")
+        self.assertEqual(started.headers["ETag"], f'"{state["version"]}"')
+
+        stale = self.client.post(
+            f"/api/runs/{run['run_id']}/pause", headers={**self.headers, "If-Match": etag}
+        )
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(stale.json()["error_code"], "RUN_VERSION_CONFLICT")
+        invalid = self.client.post(
+            f"/api/runs/{run['run_id']}/pause", headers={**self.headers, "If-Match": "latest"}
+        )
+        self.assertEqual(invalid.status_code, 400)
+        refreshed = self.client.get(
+            f"/api/runs/{run['run_id']}", headers={**self.headers, "If-None-Match": etag}
+        )
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(refreshed.headers["ETag"], started.headers["ETag"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,15 +2,25 @@
 from __future__ import annotations
 
 import asyncio
+import io
 import tempfile
 import unittest
+from dataclasses import replace
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
 
+from cryptography.fernet import Fernet
+from langchain_core.messages import AIMessage
+from PIL import Image
+
+from adapters.sqlite.vision_caption_cache import SQLiteVisionCaptionCache
 from core.knowledge_contracts import KnowledgeScope
 from core.runtime_settings import RuntimeSettings
+from database import Database
+from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
 from modules.knowledge.personal_documents import PersonalKnowledgeDocumentManager
+from services.ai_services import vision_caption
 
 
 class _ImageDatabase:
@@ -98,5 +108,39 @@ class ImageKnowledgeIngestionTests(unittest.TestCase):
             self.assertEqual(manager._cipher.decrypt(stored_path.read_bytes()), b"notes")
 
 
+    def test_captions_are_reused_per_image_model_and_prompt_without_model_calls(self) -> None:
+        calls = []
+
+        class VisionLlm:
+            async def ainvoke(self, messages):
+                calls.append(messages[0].content)
+                return AIMessage(content=f"Caption {len(calls)}")
+
+        image = io.BytesIO()
+        Image.new("RGB", (8, 8), "navy").save(image, format="PNG")
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            root = Path(temporary_directory)
+            database = Database(root / "captions.db")
+            settings = RuntimeSettings(
+                BASE_DIR=root, LLM_PROVIDER="lmstudio", CHAT_MODEL="vision-a",
+                DOCUMENT_ENCRYPTION_KEY=Fernet.generate_key().decode("ascii"),
+            )
+            cache = SQLiteVisionCaptionCache(database.get_connection, cipher=KnowledgeSourceCipher(settings, root))
+            describe = lambda runtime: vision_caption.describe_image_for_knowledge(image.getvalue(), "board.png", settings=runtime, cache=cache)
+            try:
+                with patch.object(vision_caption, "get_chat_llm", lambda **_kwargs: VisionLlm()):
+                    first = asyncio.run(describe(settings))
+                    repeated = asyncio.run(describe(settings))
+                    other_model = asyncio.run(describe(replace(settings, CHAT_MODEL="vision-b")))
+                    session = asyncio.run(vision_caption.caption_one_image_data_url("data:image/png;base64,AA==", settings=settings, cache=cache))
+                    session_repeated = asyncio.run(vision_caption.caption_one_image_data_url("data:image/png;base64,AA==", settings=settings, cache=cache))
+            finally:
+                database.close()
+
+        self.assertEqual((first, repeated, other_model), ("Caption 1", "Caption 1", "Caption 2"))
+        self.assertEqual((session, session_repeated), ("Caption 3", "Caption 3"))
+        self.assertEqual(calls, [vision_caption.KNOWLEDGE_IMAGE_SYSTEM] * 2 + [vision_caption.CAPTION_SYSTEM])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,201 @@
+"""Content-addressed reuse of parsed chunks and embeddings across documents."""
+from __future__ import annotations
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from cryptography.fernet import Fernet
+
+from adapters.sqlite.knowledge_ingestion_cache import SQLiteKnowledgeIngestionCache, ingestion_cache_key
+from core.runtime_settings import RuntimeSettings
+from database import Database
+from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
+from modules.knowledge.personal_documents import PersonalKnowledgeDocumentManager
+
+
+class _EmbeddingStore:
+    """Stand-in store that reports each written batch like ChromaKnowledgeStore."""
+
+    embedding_identity = "embedding-model-a"
+
+    def __init__(self) -> None:
+        self.embedded_texts = []
+        self.reused = []
+
+    def index_text(self, *, text, on_batch=None, **kwargs):
+        chunks = text.split(". ")
+        embeddings = [[float(len(chunk)), 0.5] for chunk in chunks]
+        self.embedded_texts.extend(chunks)
+        if on_batch is not None:
+            on_batch(0, chunks[:1], embeddings[:1])
+            on_batch(1, chunks[1:], embeddings[1:])
+        return SimpleNamespace(chunk_ids=[f"{kwargs['document_id']}:{index}" for index in range(len(chunks))], collection="user_docs")
+
+    def index_embedded_chunks(self, *, document_id, batches, **kwargs):
+        del kwargs
+        rows = [pair for texts, embeddings in batches for pair in zip(texts, embeddings)]
+        self.reused.append((document_id, rows))
+        return SimpleNamespace(chunk_ids=[f"{document_id}:{index}" for index in range(len(rows))], collection="user_docs")
+
+    def delete_document(self, **kwargs):
+        return True
+
+
+class _Documents:
+    def __init__(self) -> None:
+        self.documents = {}
+
+    def get_user_document(self, user_id, doc_id):
+        del user_id
+        return self.documents.get(doc_id)
+
+    def update_user_document_status(self, doc_id, status, **kwargs):
+        self.documents[doc_id]["parse_status"] = status
+        self.documents[doc_id].update({key: value for key, value in kwargs.items() if value is not None})
+        return True
+
+
+class KnowledgeIngestionCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.database = Database(root / "ingestion-cache.db")
+        self.settings = RuntimeSettings(BASE_DIR=root, DOCUMENT_ENCRYPTION_KEY=Fernet.generate_key().decode("ascii"))
+        self.cipher = KnowledgeSourceCipher(self.settings, root)
+        self.cache = SQLiteKnowledgeIngestionCache(self.database.get_connection, cipher=self.cipher, max_entries=2)
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self.temp_dir.cleanup()
+
+    def _key(self, fingerprint: str, identity: str = "embedding-model-a") -> str:
+        return ingestion_cache_key(content_fingerprint=fingerprint, index_version="v1", file_type="txt", embedding_identity=identity)
+
+    def test_entries_are_visible_only_once_complete_and_stored_encrypted(self) -> None:
+        key = self._key("source-a")
+        self.assertNotEqual(key, self._key("source-a", identity="embedding-model-b"))
+        self.assertTrue(self.cache.begin(key))
+        self.assertFalse(self.cache.begin(key))
+        self.cache.add_chunks(key, 0, ["private chunk one", "private chunk two"], [[0.25, 1.0], [0.5, 2.0]])
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.complete(key, chunk_count=2, content_preview="private preview")
+
+        self.assertEqual(self.cache.get(key), {"chunk_count": 2, "content_preview": "private preview"})
+        self.assertEqual(
+            list(self.cache.iter_batches(key, batch_size=1)),
+            [(["private chunk one"], [[0.25, 1.0]]), (["private chunk two"], [[0.5, 2.0]])],
+        )
+        connection = self.database.get_connection()
+        try:
+            stored = [row["chunk_text"] for row in connection.execute("SELECT chunk_text FROM knowledge_ingestion_cache_chunks")]
+        finally:
+            connection.close()
+        self.assertFalse(any("private" in text for text in stored))
+
+    def test_discarded_writes_and_least_recently_used_entries_are_removed(self) -> None:
+        abandoned = self._key("abandoned")
+        self.assertTrue(self.cache.begin(abandoned))
+        self.cache.add_chunks(abandoned, 0, ["partial"], [[1.0]])
+        self.cache.discard(abandoned)
+        self.assertTrue(self.cache.begin(abandoned))
+        self.cache.discard(abandoned)
+
+        keys = [self._key(name) for name in ("first", "second", "third")]
+        for key in keys[:2]:
+            self.cache.begin(key)
+            self.cache.complete(key, chunk_count=0, content_preview="")
+        self.cache.get(keys[0])
+        self.cache.begin(keys[2])
+        self.cache.complete(keys[2], chunk_count=0, content_preview="")
+
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def _cache_row_counts(self) -> tuple:
+        connection = self.database.get_connection()
+        try:
+            return tuple(
+                connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("knowledge_ingestion_cache", "knowledge_ingestion_cache_chunks", "knowledge_ingestion_cache_refs")
+            )
+        finally:
+            connection.close()
+
+    def test_entry_is_deleted_when_its_last_referencing_document_is_purged(self) -> None:
+        manager, documents = self._manager_with_shared_documents()
+        parser = SimpleNamespace(
+            get_supported_types=lambda: ["txt"],
+            parse_file=lambda data, _name: {"success": True, "content": data.decode("utf-8")},
+        )
+        with patch("modules.knowledge.personal_documents.document_parser", parser):
+            asyncio.run(manager.process_stored_document("member-1", "doc-1"))
+            asyncio.run(manager.process_stored_document("member-2", "doc-2"))
+        self.assertEqual(self._cache_row_counts(), (1, 2, 2))
+
+        self.assertTrue(manager.delete_indexed_document("member-1", "doc-1"))
+        self.assertEqual(self._cache_row_counts(), (1, 2, 1))
+
+        self.assertTrue(manager.delete_indexed_document("member-2", "doc-2"))
+        self.assertEqual(self._cache_row_counts(), (0, 0, 0))
+        self.assertIn("doc-1", documents.documents)
+
+    def test_reindexing_from_new_bytes_drops_the_entry_the_document_left(self) -> None:
+        manager, documents = self._manager_with_shared_documents()
+        parser = SimpleNamespace(
+            get_supported_types=lambda: ["txt"],
+            parse_file=lambda data, _name: {"success": True, "content": data.decode("utf-8")},
+        )
+        with patch("modules.knowledge.personal_documents.document_parser", parser):
+            asyncio.run(manager.process_stored_document("member-1", "doc-1"))
+            Path(documents.documents["doc-1"]["storage_path"]).write_bytes(self.cipher.encrypt(b"Edited note. Another line"))
+            asyncio.run(manager.process_stored_document("member-1", "doc-1"))
+
+        self.assertEqual(self._cache_row_counts(), (1, 2, 1))
+
+    def _manager_with_shared_documents(self) -> tuple:
+        root = Path(self.temp_dir.name)
+        documents = _Documents()
+        for doc_id, owner in (("doc-1", "member-1"), ("doc-2", "member-2")):
+            path = root / f"{doc_id}.txt"
+            path.write_bytes(self.cipher.encrypt(b"First shared note. Second shared note"))
+            documents.documents[doc_id] = {
+                "doc_id": doc_id, "user_id": owner, "title": "Shared", "original_name": "shared.txt",
+                "storage_path": str(path), "parse_status": "processing", "encryption_version": self.cipher.VERSION,
+            }
+        store = _EmbeddingStore()
+        manager = PersonalKnowledgeDocumentManager(
+            storage_path=self.temp_dir.name, database=documents, store=store, settings=self.settings,
+            cipher=self.cipher, ingestion_cache=self.cache,
+        )
+        return manager, documents
+
+    def test_identical_source_bytes_reuse_chunks_without_parsing_or_embedding(self) -> None:
+        manager, documents = self._manager_with_shared_documents()
+        store = manager._store
+        parse_calls = []
+        parser = SimpleNamespace(
+            get_supported_types=lambda: ["txt"],
+            parse_file=lambda data, _name: parse_calls.append(data) or {"success": True, "content": data.decode("utf-8")},
+        )
+        with patch("modules.knowledge.personal_documents.document_parser", parser):
+            first = asyncio.run(manager.process_stored_document("member-1", "doc-1"))
+            second = asyncio.run(manager.process_stored_document("member-2", "doc-2"))
+
+        self.assertFalse(first["reused_ingestion"])
+        self.assertTrue(second["reused_ingestion"])
+        self.assertEqual(second["chunk_count"], 2)
+        self.assertEqual(len(parse_calls), 1)
+        self.assertEqual(store.embedded_texts, ["First shared note", "Second shared note"])
+        self.assertEqual(store.reused, [("doc-2", [("First shared note", [17.0, 0.5]), ("Second shared note", [18.0, 0.5])])])
+        self.assertEqual(documents.documents["doc-2"]["parse_status"], "completed")
+        self.assertTrue(documents.documents["doc-2"]["content_preview"].startswith("First shared note"))
+
+
+if __name__ == "__main__":
+    unittest.main()
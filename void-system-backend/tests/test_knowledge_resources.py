@@ -56,6 +56,8 @@ class KnowledgeResourceCompositionTests(unittest.TestCase):
             settings=settings,
             cipher=ANY,
             document_repository=ANY,
+            ingestion_cache=ANY,
+            caption_cache=ANY,
         )
         shared_factory.assert_called_once_with(database=database, store=fake_store, document_repository=ANY)
         workspace_factory.assert_called_once_with(fake_repository, fake_documents, fake_lifecycle)
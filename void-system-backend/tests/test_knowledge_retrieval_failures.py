@@ -85,6 +85,9 @@ class KnowledgeRetrievalHttpTests(unittest.TestCase):
                 database_path=str(Path(self.temp_dir.name) / "knowledge-failures.db"),
                 enable_ai_routes=False,
                 enable_langserve_routes=False,
+                enable_analytics_rollup_worker=False,
+                enable_trigger_schedule_worker=False,
+                enable_session_attachment_sweeper=False,
                 settings=settings,
             )
         )
@@ -14,6 +14,7 @@ from services.ai_services.llm_factory import (
     get_embeddings,
     runtime_settings_scope,
 )
+from services.ai_services.model_clients import ModelClientRegistry, model_clients
 
 
 class LLMFactoryRuntimeSettingsTests(unittest.TestCase):
@@ -179,6 +180,71 @@ class LLMFactoryRuntimeSettingsTests(unittest.TestCase):
         self.assertEqual("scoped-embedding-model", embeddings.kwargs["model"])
         self.assertEqual("http://127.0.0.1:1234/v1", embeddings.kwargs["base_url"])
 
+    def test_equal_profiles_and_options_share_one_client_until_invalidated(self) -> None:
+        class FakeChatOpenAI:
+            built = 0
+
+            def __init__(self, **kwargs):
+                FakeChatOpenAI.built += 1
+                self.kwargs = kwargs
+
+        fake_module = types.ModuleType("langchain_openai")
+        fake_module.ChatOpenAI = FakeChatOpenAI
+        settings = RuntimeSettings(
+            LLM_PROVIDER="openai",
+            CHAT_MODEL="gpt-4.1-mini",
+            OPENAI_API_KEY="test-key",
+            OPENAI_BASE_URL="https://gateway.example.test/v1",
+        )
+        rotated = RuntimeSettings(
+            LLM_PROVIDER="openai",
+            CHAT_MODEL="gpt-4.1-mini",
+            OPENAI_API_KEY="rotated-key",
+            OPENAI_BASE_URL="https://gateway.example.test/v1",
+        )
+
+        with patch.dict(sys.modules, {"langchain_openai": fake_module}):
+            first = get_chat_llm(temperature=0.1, settings=settings)
+            same = get_chat_llm(temperature=0.1, settings=RuntimeSettings(
+                LLM_PROVIDER="openai",
+                CHAT_MODEL="gpt-4.1-mini",
+                OPENAI_API_KEY="test-key",
+                OPENAI_BASE_URL="https://gateway.example.test/v1",
+            ))
+            warmer = get_chat_llm(temperature=0.7, settings=settings)
+            structured = get_chat_llm(temperature=0.1, json_mode=True, settings=settings)
+            other_key = get_chat_llm(temperature=0.1, settings=rotated)
+            model_clients.invalidate()
+            rebuilt = get_chat_llm(temperature=0.1, settings=settings)
+
+        self.assertIs(first, same)
+        self.assertEqual(len({id(first), id(warmer), id(structured), id(other_key)}), 4)
+        self.assertEqual("rotated-key", other_key.kwargs["api_key"])
+        self.assertIsNot(first, rebuilt)
+        self.assertEqual(FakeChatOpenAI.built, 5)
+
+    def test_registry_is_bounded_and_closes_retired_clients_at_shutdown(self) -> None:
+        registry = ModelClientRegistry(max_clients=2)
+        closed = []
+
+        def client(name):
+            return registry.get(name, lambda: object(), close=lambda _: closed.append(name))
+
+        a, _b = client("a"), client("b")
+        self.assertIs(client("a"), a)
+        client("c")
+
+        self.assertEqual(len(registry), 2)
+        self.assertIsNot(client("b"), _b)
+        self.assertEqual(closed, [])
+        client("d")
+        self.assertEqual(closed, ["b"])
+        client("e")
+        self.assertEqual(closed, ["b", "a"])
+        registry.close()
+        self.assertEqual(sorted(closed), ["a", "b", "b", "c", "d", "e"])
+        self.assertEqual(len(registry), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,231 @@
+"""Admission, priority, budget, and in-flight sharing for upstream model calls."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.runnables import RunnableLambda
+
+from core.model_connection_profile import ModelConnectionError, resolve_chat_connection
+from core.runtime_settings import RuntimeSettings
+from services.ai_services.model_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    ModelCallLane,
+    ModelCallScheduler,
+    ScheduledChatModel,
+    ScheduledEmbeddings,
+    model_call_priority,
+)
+
+
+class _SlowEmbeddings:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.started = threading.Event()
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.started.set()
+        time.sleep(0.2)
+        return [[float(len(text))] for text in texts]
+
+
+class _StructuredModel:
+    """Chat model stub whose derived runnables count their upstream calls."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def _runnable(self, label):
+        def call(value):
+            self.calls += 1
+            time.sleep(0.1)
+            return {label: value}
+
+        return RunnableLambda(call)
+
+    def bind_tools(self, tools, **kwargs):
+        return self._runnable("tools")
+
+    def with_structured_output(self, schema, **kwargs):
+        return self._runnable("structured")
+
+    def invoke(self, input, config=None, **kwargs):
+        return self._runnable("plain").invoke(input, config)
+
+
+def _lane(**options) -> ModelCallLane:
+    return ModelCallLane({"purpose": "chat"}, **{"max_concurrency": 1, **options})
+
+
+class ModelSchedulerTests(unittest.TestCase):
+    def test_waiting_interactive_calls_are_admitted_before_earlier_background_calls(self) -> None:
+        lane = _lane()
+        lane.acquire(1)
+        order = []
+
+        def call(priority: str, name: str) -> None:
+            with model_call_priority(priority):
+                lane.run(lambda: order.append(name), tokens=1)
+
+        background = threading.Thread(target=call, args=(BACKGROUND, "background"))
+        background.start()
+        self._wait_until(lambda: lane.snapshot()["queued"] == 1)
+        interactive = threading.Thread(target=call, args=(INTERACTIVE, "interactive"))
+        interactive.start()
+        self._wait_until(lambda: lane.snapshot()["queued"] == 2)
+        lane.release(1)
+        background.join(2)
+        interactive.join(2)
+
+        self.assertEqual(order, ["interactive", "background"])
+        snapshot = lane.snapshot()
+        self.assertEqual(snapshot["in_flight"], 0)
+        self.assertEqual(snapshot["queue_wait"]["background"]["samples"], 1)
+        self.assertGreater(snapshot["queue_wait"]["background"]["max_ms"], 0)
+
+    def test_full_queue_and_long_waits_fail_fast_as_busy(self) -> None:
+        lane = _lane(max_queued=1)
+        lane.acquire(1)
+        waiter = threading.Thread(target=lambda: self.assertRaises(ModelConnectionError, lane.acquire, 1))
+
+        with patch.dict("services.ai_services.model_scheduler._MAX_QUEUE_SECONDS", {INTERACTIVE: 0.2}):
+            waiter.start()
+            self._wait_until(lambda: lane.snapshot()["queued"] == 1)
+            with self.assertRaises(ModelConnectionError) as rejected:
+                lane.acquire(1)
+            waiter.join(2)
+
+        self.assertEqual(rejected.exception.code, "AI_PROVIDER_BUSY")
+        snapshot = lane.snapshot()
+        self.assertEqual((snapshot["rejected"], snapshot["timed_out"], snapshot["queued"]), (1, 1, 0))
+        lane.release(1)
+        self.assertEqual(lane.snapshot()["in_flight"], 0)
+
+    def test_token_budget_delays_calls_until_it_refills(self) -> None:
+        lane = _lane(max_concurrency=4, tokens_per_minute=600)
+        lane.run(lambda: None, tokens=600)
+
+        started = time.monotonic()
+        lane.run(lambda: None, tokens=3)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_identical_in_flight_embedding_batches_share_one_upstream_call(self) -> None:
+        upstream = _SlowEmbeddings()
+        embeddings = ScheduledEmbeddings(upstream, _lane(max_concurrency=4))
+        results = []
+
+        def embed() -> None:
+            results.append(embeddings.embed_documents(["alpha", "beta"]))
+
+        first = threading.Thread(target=embed)
+        first.start()
+        upstream.started.wait(2)
+        followers = [threading.Thread(target=embed) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        for thread in [first, *followers]:
+            thread.join(2)
+
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(results, [[[5.0], [4.0]]] * 5)
+        self.assertEqual(embeddings._lane.snapshot()["coalesced"], 4)
+        self.assertEqual(embeddings.embed_documents(["gamma"]), [[5.0]])
+        self.assertEqual(upstream.calls, 2)
+
+    def test_abandoned_stream_returns_its_slot(self) -> None:
+        lane = _lane()
+        model = ScheduledChatModel(FakeListChatModel(responses=["streamed answer"] * 3), lane)
+
+        async def read_one_chunk() -> str:
+            stream = model.astream("hello")
+            chunk = await stream.__anext__()
+            self.assertEqual(lane.snapshot()["in_flight"], 1)
+            await stream.aclose()
+            return chunk.content
+
+        self.assertEqual(asyncio.run(read_one_chunk()), "s")
+        self.assertEqual(lane.snapshot()["in_flight"], 0)
+        self.assertEqual(model.invoke("hello").content, "streamed answer")
+
+    def test_scheduler_retunes_lanes_and_forgets_idle_ones(self) -> None:
+        scheduler = ModelCallScheduler()
+        profile = resolve_chat_connection(RuntimeSettings(CHAT_MODEL="test-model"))
+        lane = scheduler.lane_for("profile-a", profile, RuntimeSettings(MODEL_MAX_CONCURRENCY=1))
+        lane.acquire(1)
+        waiter = threading.Thread(target=lane.run, args=(lambda: None,), kwargs={"tokens": 1})
+        waiter.start()
+        self._wait_until(lambda: lane.snapshot()["queued"] == 1)
+
+        tuned = RuntimeSettings(MODEL_MAX_CONCURRENCY=2, MODEL_TOKENS_PER_MINUTE=6000)
+        retuned = scheduler.lane_for("profile-a", profile, tuned)
+        waiter.join(2)
+        self.assertIs(retuned, lane)
+        self.assertEqual((lane.max_concurrency, lane.tokens_per_minute), (2, 6000))
+        self.assertEqual(lane.snapshot()["admitted"], 2)
+
+        idle = scheduler.lane_for("profile-b", profile, RuntimeSettings())
+        self.assertEqual(scheduler.prune_idle(), 1)
+        self.assertIs(scheduler.lane_for("profile-a", profile, tuned), lane)
+        self.assertIsNot(scheduler.lane_for("profile-b", profile, RuntimeSettings()), idle)
+        lane.release(1)
+        self.assertEqual(scheduler.prune_idle(), 2)
+        self.assertEqual(scheduler.snapshot(), [])
+
+    def test_derived_models_are_admitted_and_config_calls_are_not_shared(self) -> None:
+        lane = _lane(max_concurrency=4)
+        upstream = _StructuredModel()
+        model = ScheduledChatModel(upstream, lane)
+        structured = model.with_structured_output({"type": "object"})
+        with_tools = model.bind_tools([])
+
+        self.assertIsInstance(structured, ScheduledChatModel)
+        self.assertIsInstance(with_tools, ScheduledChatModel)
+        self.assertEqual(structured.invoke("plan"), {"structured": "plan"})
+        self.assertEqual(with_tools.invoke("plan"), {"tools": "plan"})
+        self.assertEqual(lane.snapshot()["admitted"], 2)
+
+        threads = [
+            threading.Thread(target=model.invoke, args=("same",), kwargs={"config": {"tags": [str(index)]}})
+            for index in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(upstream.calls, 5)
+        self.assertEqual(lane.snapshot()["coalesced"], 0)
+
+    def test_clients_follow_the_scheduler_lane_after_it_is_pruned(self) -> None:
+        scheduler = ModelCallScheduler()
+        profile = resolve_chat_connection(RuntimeSettings(CHAT_MODEL="test-model"))
+        first = scheduler.lane_for("profile-a", profile, RuntimeSettings(MODEL_MAX_CONCURRENCY=3))
+        model = ScheduledChatModel(
+            FakeListChatModel(responses=["answer"] * 2),
+            scheduler.lane_source("profile-a", profile, RuntimeSettings(MODEL_MAX_CONCURRENCY=1)),
+        )
+        self.assertEqual(model.invoke("hello").content, "answer")
+        self.assertEqual(first.snapshot()["admitted"], 1)
+        self.assertEqual(first.max_concurrency, 3)
+
+        self.assertEqual(scheduler.prune_idle(), 1)
+        self.assertEqual(model.invoke("hello").content, "answer")
+        [current] = scheduler.snapshot()
+        self.assertEqual(current["admitted"], 1)
+        self.assertEqual(first.snapshot()["admitted"], 1)
+
+    def _wait_until(self, condition) -> None:
+        deadline = time.monotonic() + 2
+        while not condition():
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+
+if __name__ == "__main__":
+    unittest.main()
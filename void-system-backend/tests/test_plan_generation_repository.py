@@ -4,6 +4,7 @@ import tempfile
 import unittest
 
 from adapters.sqlite.plan_generation_repository import SQLitePlanGenerationRepository
+from adapters.sqlite.plan_result_cache import SQLitePlanResultCache
 from modules.planning.generation import PlanGenerationService, PlanGenerationWorker
 from database import Database
 
@@ -80,6 +81,35 @@ class PlanGenerationRepositoryTests(unittest.TestCase):
             job["generation_id"], "worker-b", first["lease_token"], "generating_steps", 50
         ))
 
+    def test_streamed_step_previews_belong_to_the_current_attempt(self) -> None:
+        job = self.create_job()
+        claimed = self.repository.claim_next("worker-a")
+        preview = [{"client_key": "step-1", "title": "Outline"}]
+
+        self.assertTrue(self.repository.update_progress(
+            job["generation_id"], "worker-a", claimed["lease_token"], "generating_steps", 55,
+            partial_steps=preview,
+        ))
+        self.assertTrue(self.repository.update_progress(
+            job["generation_id"], "worker-a", claimed["lease_token"], "checking_result", 85
+        ))
+        current = self.repository.get("user-1", job["generation_id"])
+        self.assertEqual(current["partial_steps"], preview)
+        self.assertEqual(current["progress"], 85)
+
+        self.assertEqual(self.repository.recover_interrupted_jobs(), 1)
+        self.assertEqual(self.repository.get("user-1", job["generation_id"])["partial_steps"], [])
+        reclaimed = self.repository.claim_next("worker-b")
+        self.repository.update_progress(
+            job["generation_id"], "worker-b", reclaimed["lease_token"], "generating_steps", 55,
+            partial_steps=preview,
+        )
+        self.assertTrue(self.repository.complete(
+            job["generation_id"], "worker-b", reclaimed["lease_token"],
+            {"goal": {"title": job["topic"]}, "run": {"steps": []}},
+        ))
+        self.assertEqual(self.repository.get("user-1", job["generation_id"])["partial_steps"], [])
+
     def test_worker_executes_a_persisted_job_without_a_request(self) -> None:
         service = PlanGenerationService(self.repository)
         worker = PlanGenerationWorker(
@@ -111,6 +141,34 @@ class PlanGenerationRepositoryTests(unittest.TestCase):
         finally:
             worker.stop()
 
+    def test_result_cache_is_owner_scoped_bounded_and_expiring(self) -> None:
+        cache = SQLitePlanResultCache(self.database.get_connection, max_entries_per_user=2)
+        for key in ("first", "second"):
+            cache.put("user-1", key, {"summary": key})
+        self.assertEqual(cache.get("user-1", "first"), {"summary": "first"})
+        cache.put("user-1", "third", {"summary": "third"})
+
+        self.assertIsNone(cache.get("user-1", "second"))
+        self.assertEqual(cache.get("user-1", "first"), {"summary": "first"})
+        self.assertIsNone(cache.get("user-2", "first"))
+        connection = self.database.get_connection()
+        try:
+            connection.execute(
+                "UPDATE plan_result_cache SET expires_at = '2000-01-01T00:00:00+00:00' WHERE cache_key = 'third'"
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        self.assertIsNone(cache.get("user-1", "third"))
+
+    def test_regenerate_request_is_persisted_on_the_job(self) -> None:
+        job = self.repository.create(
+            "user-1",
+            {"topic": "Plan again", "execution_mode": "assisted", "max_steps": 3, "regenerate": True},
+        )
+        self.assertTrue(job["regenerate"])
+        self.assertFalse(self.create_job()["regenerate"])
+
     def test_job_is_not_visible_to_another_user(self) -> None:
         job = self.create_job()
         self.assertIsNone(self.repository.get("user-2", job["generation_id"]))
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import gc
+import io
 import tempfile
 import unittest
 from pathlib import Path
@@ -9,14 +10,14 @@ from unittest.mock import patch
 
 import chromadb
 from chromadb.api.client import SharedSystemClient
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 
 from adapters.chroma.knowledge_store import ChromaKnowledgeStore
 from adapters.sqlite.knowledge_document_repository import SQLiteKnowledgeDocumentRepository
 from core.knowledge_contracts import KnowledgeQuery, KnowledgeScope
 from core.runtime_settings import RuntimeSettings
 from database import Database
-from modules.knowledge.encrypted_storage import KnowledgeSourceCipher
+from modules.knowledge.encrypted_storage import FernetStreamReader, KnowledgeSourceCipher
 from modules.knowledge.personal_documents import PersonalKnowledgeDocumentManager
 
 
@@ -89,6 +90,58 @@ class PrivateKnowledgeEncryptionTests(unittest.TestCase):
         self.assertEqual(semantic[0].text, "Private launch sequence: amber moon")
         self.assertEqual(lexical[0].text, "Private launch sequence: amber moon")
 
+    def test_streamed_sections_are_embedded_in_batches_and_failed_rebuilds_keep_the_previous_index(self) -> None:
+        temporary_directory = tempfile.TemporaryDirectory()
+        store = None
+        embeddings = _Embeddings()
+        batches = []
+        original_embed = embeddings.embed_documents
+        embeddings.embed_documents = lambda values: batches.append(len(values)) or original_embed(values)
+
+        def failing_pages():
+            yield from (f"Page {number}: " + "quarterly review details " * 60 for number in range(1, 40))
+            raise RuntimeError("extraction stopped")
+
+        try:
+            root = Path(temporary_directory.name)
+            settings = self._settings(root)
+            with patch("adapters.chroma.knowledge_store.get_embeddings", return_value=embeddings):
+                store = ChromaKnowledgeStore(settings, cipher=KnowledgeSourceCipher(settings, root / "user_documents"))
+                indexed = store.index_sections(
+                    scope=KnowledgeScope.USER,
+                    owner_id="member-1",
+                    document_id="doc-1",
+                    sections=(f"Page {number}: " + "quarterly review details " * 60 for number in range(1, 40)),
+                    metadata={"file_type": "pdf"},
+                )
+                indexed_count = store.stats(scope=KnowledgeScope.USER, owner_id="member-1")["total_vectors"]
+                first_batches = list(batches)
+                with self.assertRaises(RuntimeError):
+                    store.index_sections(
+                        scope=KnowledgeScope.USER, owner_id="member-1", document_id="doc-1",
+                        sections=failing_pages(), metadata={"file_type": "pdf"},
+                    )
+                failed_count = store.stats(scope=KnowledgeScope.USER, owner_id="member-1")["total_vectors"]
+                rebuilt = store.index_text(
+                    scope=KnowledgeScope.USER, owner_id="member-1", document_id="doc-1",
+                    text="Revised summary only", metadata={"file_type": "txt"},
+                )
+                rebuilt_count = store.stats(scope=KnowledgeScope.USER, owner_id="member-1")["total_vectors"]
+        finally:
+            if store is not None:
+                store.close()
+            store = None
+            SharedSystemClient.clear_system_cache()
+            gc.collect()
+            temporary_directory.cleanup()
+
+        self.assertEqual(indexed_count, len(indexed.chunk_ids))
+        self.assertGreater(len(first_batches), 1)
+        self.assertEqual(sum(first_batches), len(indexed.chunk_ids))
+        self.assertEqual(failed_count, indexed_count)
+        self.assertEqual(rebuilt_count, len(rebuilt.chunk_ids))
+        self.assertFalse(set(rebuilt.chunk_ids) & set(indexed.chunk_ids))
+
     def test_manager_direct_composition_encrypts_source_and_preview(self) -> None:
         with tempfile.TemporaryDirectory() as temporary_directory:
             root = Path(temporary_directory)
@@ -132,6 +185,38 @@ class PrivateKnowledgeEncryptionTests(unittest.TestCase):
         self.assertNotIn("preview must stay private", raw_preview)
         self.assertTrue(str(raw_preview).startswith("enc:fernet-v1:"))
 
+    def test_stream_encryptor_writes_tokens_that_fernet_decrypts(self) -> None:
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            root = Path(temporary_directory)
+            cipher = KnowledgeSourceCipher(self._settings(root), root / "user_documents")
+            for size in (0, 1, 16, 17, 5000):
+                source = bytes(index % 251 for index in range(size))
+                target = io.BytesIO()
+                encryptor = cipher.stream_encryptor(target)
+                for offset in range(0, size, 7):
+                    encryptor.write(source[offset:offset + 7])
+                encryptor.finish()
+
+                self.assertTrue(cipher.appears_encrypted(target.getvalue()))
+                self.assertEqual(cipher.decrypt(target.getvalue()), source)
+
+    def test_stream_decryptor_reads_tokens_in_bounded_chunks_and_rejects_tampering(self) -> None:
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            root = Path(temporary_directory)
+            cipher = KnowledgeSourceCipher(self._settings(root), root / "user_documents")
+            for size in (0, 1, 16, 17, 5000):
+                source = bytes(index % 251 for index in range(size))
+                token = cipher.encrypt(source)
+                chunks = list(FernetStreamReader(cipher.worker_key(), io.BytesIO(token), chunk_size=64))
+
+                self.assertEqual(b"".join(chunks), source)
+                self.assertTrue(all(len(chunk) <= 64 for chunk in chunks))
+
+            tampered = bytearray(cipher.encrypt(b"private source"))
+            tampered[-3] = ord("A") if tampered[-3] != ord("A") else ord("B")
+            with self.assertRaises(InvalidToken):
+                b"".join(cipher.stream_decryptor(io.BytesIO(bytes(tampered))))
+
     def test_private_preview_is_not_persisted_as_plaintext(self) -> None:
         with tempfile.TemporaryDirectory() as temporary_directory:
             root = Path(temporary_directory)
@@ -0,0 +1,87 @@
+"""Session images are normalized once at upload and loaded in one batch."""
+from __future__ import annotations
+
+import base64
+import io
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from PIL import Image
+
+from api.session_context_manager import SessionContextManager
+from api.session_file_access import (
+    build_data_urls_for_session_files,
+    prepare_session_image_payload,
+    prepared_payload_path,
+)
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "teal").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _decoded_size(data_url: str) -> tuple[int, int]:
+    header, encoded = data_url.split(",", 1)
+    assert header == "data:image/jpeg;base64"
+    with Image.open(io.BytesIO(base64.b64decode(encoded))) as image:
+        return image.size
+
+
+class SessionAttachmentPayloadTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.manager = SessionContextManager(str(root / "session.db"), session_files_base=root / "files")
+        self.database = self.manager.db
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self.temp_dir.cleanup()
+
+    def test_upload_stores_a_bounded_payload_that_chat_turns_reuse_in_one_batch(self) -> None:
+        large = self.manager.upload_temporary_file("user-1", "session-1", _png(3000, 1000), "wide.png")
+        small = self.manager.upload_temporary_file("user-1", "session-1", _png(40, 20), "small.png")
+        other = self.manager.upload_temporary_file("user-1", "session-2", _png(40, 20), "other.png")
+        stored = self.database.get_user_session_file("user-1", large["file_id"])
+        self.assertTrue(prepared_payload_path(stored["storage_path"]).is_file())
+
+        with patch.object(self.database, "get_user_session_file", side_effect=AssertionError("per-file lookup")), \
+                patch("api.session_file_access.image_data_url_for_vision", side_effect=AssertionError("re-encoded")):
+            urls = build_data_urls_for_session_files(
+                self.database, "user-1", "session-1",
+                [small["file_id"], other["file_id"], "missing", large["file_id"]],
+            )
+
+        self.assertEqual([_decoded_size(url) for url in urls], [(40, 20), (2048, 683)])
+
+    def test_images_uploaded_before_normalization_are_prepared_on_first_use_and_removed_together(self) -> None:
+        uploaded = self.manager.upload_temporary_file("user-1", "session-1", _png(64, 64), "legacy.png")
+        storage_path = self.database.get_user_session_file("user-1", uploaded["file_id"])["storage_path"]
+        prepared_payload_path(storage_path).unlink()
+
+        urls = build_data_urls_for_session_files(self.database, "user-1", "session-1", [uploaded["file_id"]])
+
+        self.assertEqual(_decoded_size(urls[0]), (64, 64))
+        self.assertTrue(prepared_payload_path(storage_path).is_file())
+        self.assertTrue(self.manager.delete_session_file("user-1", uploaded["file_id"])["success"])
+        self.assertFalse(Path(storage_path).exists())
+        self.assertFalse(prepared_payload_path(storage_path).exists())
+
+
+    def test_image_pillow_rejects_as_a_decompression_bomb_keeps_its_raw_bytes(self) -> None:
+        source = _png(40, 20)
+        target = Path(self.temp_dir.name) / "bomb.png"
+
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            data_url = prepare_session_image_payload(source, "bomb.png", target)
+
+        self.assertEqual(data_url, f"data:image/png;base64,{base64.standard_b64encode(source).decode('ascii')}")
+        self.assertEqual(prepared_payload_path(target).read_text(encoding="ascii"), data_url)
+
+
+if __name__ == "__main__":
+    unittest.main()
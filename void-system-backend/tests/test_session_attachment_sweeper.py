@@ -0,0 +1,116 @@
+"""Expired session attachments are removed by the bounded background sweeper only."""
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from adapters.legacy.session_attachment_gateway import LegacySessionAttachmentGateway
+from api.session_context_manager import SessionContextManager
+from api.session_file_access import prepared_payload_path, remove_session_file
+from modules.session_attachments import SessionAttachments, SessionAttachmentSweeper
+
+
+class SessionAttachmentSweeperTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.manager = SessionContextManager(str(root / "session.db"), session_files_base=root / "files")
+        self.database = self.manager.db
+        self.gateway = LegacySessionAttachmentGateway(self.database)
+
+    def tearDown(self) -> None:
+        self.database.close()
+        self.temp_dir.cleanup()
+
+    def _upload(self, name: str) -> str:
+        return self.manager.upload_temporary_file("user-1", "session-1", b"GIF89a", name)["file_id"]
+
+    def _expire(self, *file_ids: str) -> None:
+        connection = self.database.get_connection()
+        try:
+            connection.executemany(
+                "UPDATE user_session_files SET expires_at = '2000-01-01T00:00:00' WHERE id = ?",
+                [(file_id,) for file_id in file_ids],
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _row_count(self) -> int:
+        connection = self.database.get_connection()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM user_session_files").fetchone()[0]
+        finally:
+            connection.close()
+
+    def _row_ids(self) -> list:
+        connection = self.database.get_connection()
+        try:
+            return [row[0] for row in connection.execute("SELECT id FROM user_session_files")]
+        finally:
+            connection.close()
+
+    def test_reads_filter_expired_rows_without_deleting_them(self) -> None:
+        live = self._upload("live.gif")
+        self._expire(self._upload("old.gif"))
+
+        context = self.manager.get_session_context("user-1", "session-1")
+        sessions = self.manager.get_active_sessions("user-1")
+
+        self.assertEqual([row["id"] for row in context["files"]], [live])
+        self.assertTrue(sessions["success"])
+        self.assertEqual(self._row_count(), 2)
+
+    def test_sweeper_removes_expired_files_in_bounded_batches_and_reports_counts(self) -> None:
+        live = self._upload("live.gif")
+        expired = [self._upload(f"old-{index}.gif") for index in range(3)]
+        paths = [self.database.get_user_session_file("user-1", file_id)["storage_path"] for file_id in expired]
+        self._expire(*expired)
+        sweeper = SessionAttachmentSweeper(SessionAttachments(self.gateway), batch_size=2, max_batches_per_tick=1)
+
+        first = sweeper.sweep_once()
+        second = sweeper.sweep_once()
+
+        self.assertEqual((first["deleted_rows"], first["batches"], first["backlog_remaining"]), (2, 1, True))
+        self.assertEqual((second["deleted_rows"], second["backlog_remaining"]), (1, False))
+        self.assertGreaterEqual(second["duration_ms"], 0)
+        self.assertEqual(self._row_count(), 1)
+        self.assertIsNotNone(self.database.get_user_session_file("user-1", live))
+        for path in paths:
+            self.assertFalse(Path(path).exists())
+            self.assertFalse(prepared_payload_path(path).exists())
+        totals = sweeper.snapshot()["totals"]
+        self.assertEqual((totals["ticks"], totals["deleted_rows"], totals["removed_files"], totals["file_errors"]), (2, 3, 3, 0))
+
+    def test_rows_whose_files_could_not_be_removed_are_kept_for_the_next_sweep(self) -> None:
+        stuck, gone, missing = (self._upload(f"old-{index}.gif") for index in range(3))
+        stuck_path = self.database.get_user_session_file("user-1", stuck)["storage_path"]
+        Path(self.database.get_user_session_file("user-1", missing)["storage_path"]).unlink()
+        self._expire(stuck, gone, missing)
+
+        def failing_remove(path):
+            if path == stuck_path:
+                raise PermissionError("locked")
+            remove_session_file(path)
+
+        sweeper = SessionAttachmentSweeper(SessionAttachments(self.gateway), batch_size=3, max_batches_per_tick=5)
+        single = SessionAttachmentSweeper(SessionAttachments(self.gateway), batch_size=1, max_batches_per_tick=5)
+        with patch("api.session_context_manager.remove_session_file", failing_remove):
+            tick = sweeper.sweep_once()
+            stalled = single.sweep_once()
+
+        self.assertEqual((tick["deleted_rows"], tick["file_errors"]), (2, 2))
+        self.assertEqual((stalled["deleted_rows"], stalled["file_errors"], stalled["batches"]), (0, 1, 1))
+        self.assertEqual(self._row_ids(), [stuck])
+        self.assertTrue(Path(stuck_path).exists())
+
+        retried = sweeper.sweep_once()
+        self.assertEqual((retried["deleted_rows"], retried["file_errors"]), (1, 0))
+        self.assertFalse(Path(stuck_path).exists())
+        self.assertEqual(self._row_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -42,7 +42,7 @@ class SQLiteMigrationTests(unittest.TestCase):
             finally:
                 connection.close()
 
-        self.assertEqual(versions[-1], (38, "retire_legacy_user_experience"))
+        self.assertEqual(versions[-1], (58, "knowledge_ingestion_cache_refs"))
         self.assertTrue({"task_goals", "task_runs", "task_steps", "task_events", "plan_generation_jobs", "plan_drafts", "knowledge_document_versions", "knowledge_ingestion_jobs", "user_library_entries"} <= tables)
         self.assertFalse({"coins", "experience", "user_resources", "purchase_history"} & tables)
         self.assertIn("growth_point_ledger", tables)
@@ -95,7 +95,7 @@ class SQLiteMigrationTests(unittest.TestCase):
             try:
                 connection.execute("CREATE TABLE user_resources (resource_id TEXT PRIMARY KEY)")
                 connection.execute("CREATE TABLE purchase_history (purchase_id TEXT PRIMARY KEY)")
-                connection.execute("DELETE FROM schema_migrations WHERE version IN (36, 37, 38)")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 36")
                 connection.commit()
             finally:
                 connection.close()
@@ -142,7 +142,7 @@ class SQLiteMigrationTests(unittest.TestCase):
                        VALUES (?, ?, ?, ?, ?, ?)""",
                     ("legacy-point", "owner", 23, "earned", "task_complete", "2026-07-20T00:00:00"),
                 )
-                connection.execute("DELETE FROM schema_migrations WHERE version IN (37, 38)")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 37")
                 connection.commit()
             finally:
                 connection.close()
@@ -185,7 +185,7 @@ class SQLiteMigrationTests(unittest.TestCase):
             connection = database.get_connection()
             try:
                 connection.execute("ALTER TABLE users ADD COLUMN experience INTEGER NOT NULL DEFAULT 0")
-                connection.execute("DELETE FROM schema_migrations WHERE version = 38")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 38")
                 connection.commit()
             finally:
                 connection.close()
@@ -201,6 +201,88 @@ class SQLiteMigrationTests(unittest.TestCase):
 
         self.assertNotIn("experience", user_columns)
 
+    def test_migration_39_backfills_behavior_summaries_from_history(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "behavior-summary.db"
+            database = Database(path)
+            connection = database.get_connection()
+            try:
+                connection.execute(
+                    "INSERT INTO users (user_id, username, password_hash) VALUES ('owner', 'owner', 'unused')"
+                )
+                connection.execute(
+                    """INSERT INTO task_goals (goal_id, user_id, title, created_at, updated_at)
+                       VALUES ('goal', 'owner', 'Goal', '2026-07-20T00:00:00', '2026-07-20T00:00:00')"""
+                )
+                connection.execute(
+                    """INSERT INTO task_runs
+                       (run_id, goal_id, user_id, title, status, created_at, updated_at, completed_at)
+                       VALUES ('run', 'goal', 'owner', 'Run', 'completed',
+                               '2026-07-20T00:00:00', '2026-07-21T00:00:00', '2026-07-21T00:00:00')"""
+                )
+                connection.execute("DROP TABLE task_behavior_summaries")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 39")
+                connection.commit()
+            finally:
+                connection.close()
+
+            upgraded = Database(path)
+            connection = upgraded.get_connection()
+            try:
+                row = connection.execute(
+                    """SELECT goal_count, run_count, completed_run_count, runs_observed_to
+                       FROM task_behavior_summaries WHERE user_id = 'owner'"""
+                ).fetchone()
+            finally:
+                connection.close()
+
+        self.assertEqual(tuple(row), (1, 1, 1, "2026-07-21T00:00:00"))
+
+    def test_migration_40_backfills_growth_point_projections_from_ledger(self) -> None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "growth-projections.db"
+            database = Database(path)
+            connection = database.get_connection()
+            try:
+                connection.execute(
+                    "INSERT INTO users (user_id, username, password_hash) VALUES ('owner', 'owner', 'unused')"
+                )
+                connection.executemany(
+                    """INSERT INTO growth_point_ledger (record_id, user_id, amount, type, source, created_at)
+                       VALUES (?, 'owner', ?, 'earn', 'legacy', ?)""",
+                    [
+                        ("p1", 20, "2026-07-20T08:00:00"),
+                        ("p2", 5, "2026-07-20 21:00:00"),
+                        ("p3", -7, "2026-07-21T09:00:00"),
+                    ],
+                )
+                connection.execute("DROP TABLE growth_point_balances")
+                connection.execute("DROP TABLE growth_point_daily_totals")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 40")
+                connection.commit()
+            finally:
+                connection.close()
+
+            upgraded = Database(path)
+            connection = upgraded.get_connection()
+            try:
+                balance = connection.execute(
+                    """SELECT balance, total_income, total_expense, entry_count
+                       FROM growth_point_balances WHERE user_id = 'owner'"""
+                ).fetchone()
+                days = connection.execute(
+                    """SELECT day, income, expense, entry_count FROM growth_point_daily_totals
+                       WHERE user_id = 'owner' ORDER BY day"""
+                ).fetchall()
+            finally:
+                connection.close()
+
+        self.assertEqual(tuple(balance), (18, 25, 7, 3))
+        self.assertEqual(
+            [tuple(row) for row in days],
+            [("2026-07-20", 25, 0, 2), ("2026-07-21", 0, 7, 1)],
+        )
+
     def test_applied_migration_is_not_run_twice(self) -> None:
         with tempfile.TemporaryDirectory() as temp_dir:
             path = Path(temp_dir) / "idempotent.db"
@@ -254,7 +336,7 @@ class SQLiteMigrationTests(unittest.TestCase):
             try:
                 connection.execute("DROP TRIGGER validate_task_steps_object_json_insert")
                 connection.execute("DROP TRIGGER validate_task_steps_object_json_update")
-                connection.execute("DELETE FROM schema_migrations WHERE version IN (24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38)")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 24")
                 connection.execute("INSERT INTO users (user_id, username) VALUES ('owner', 'owner')")
                 connection.execute(
                     """INSERT INTO task_goals
@@ -389,7 +471,7 @@ class SQLiteMigrationTests(unittest.TestCase):
             database = Database(path)
             connection = database.get_connection()
             try:
-                connection.execute("DELETE FROM schema_migrations WHERE version IN (23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 33, 34, 35, 36, 37, 38)")
+                connection.execute("DELETE FROM schema_migrations WHERE version >= 23")
                 connection.execute(
                     "CREATE TABLE tasks (task_id TEXT PRIMARY KEY, user_id TEXT NOT NULL)"
                 )
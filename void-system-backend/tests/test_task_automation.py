@@ -1,11 +1,14 @@
 """Behavior tests for Trigger-to-Run automation over canonical execution."""
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 import sqlite3
 import tempfile
 import unittest
+from unittest.mock import patch
 
 from core.task_automation_contracts import TaskAutomationError
 from database import Database
+from modules.tasks.schedule import next_fire_time
 from modules.tasks.service import get_task_automation, get_task_execution
 
 
@@ -169,6 +172,236 @@ class TaskAutomationTests(unittest.TestCase):
         )
         connection.close()
 
+    def stored_plan(self, trigger_id: str):
+        connection = self.database.get_connection()
+        try:
+            return connection.execute(
+                "SELECT compiled_run_plan FROM task_triggers WHERE trigger_id = ?", (trigger_id,)
+            ).fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_current_compiled_plan_creates_runs_without_revalidation(self) -> None:
+        trigger = self.create_trigger()
+        self.assertNotIn("compiled_run_plan", trigger)
+        self.assertIsNotNone(self.stored_plan(trigger["trigger_id"]))
+        with patch.object(
+            self.automation._execution, "validate_run_template", side_effect=AssertionError("revalidated")
+        ):
+            fired = self.automation.fire_trigger("user-1", trigger["trigger_id"], "compiled:1")
+        self.assertEqual(
+            [item["client_key"] for item in fired["run"]["steps"][1]["depends_on"]], ["collect"]
+        )
+        self.assertEqual(fired["run"]["metadata"]["trigger_source_key"], "compiled:1")
+
+    def test_stale_compiled_plan_is_revalidated_and_cached(self) -> None:
+        trigger = self.create_trigger()
+        connection = self.database.get_connection()
+        connection.execute(
+            """UPDATE task_triggers
+               SET run_template = json_set(run_template, '$.steps[0].title', 'Collect fresh evidence'),
+                   compiled_run_plan = NULL
+               WHERE trigger_id = ?""",
+            (trigger["trigger_id"],),
+        )
+        connection.commit()
+        connection.close()
+
+        fired = self.automation.fire_trigger("user-1", trigger["trigger_id"], "stale:1")
+        self.assertEqual(fired["run"]["steps"][0]["title"], "Collect fresh evidence")
+        self.assertIn("Collect fresh evidence", self.stored_plan(trigger["trigger_id"]))
+        with patch("modules.tasks.execution.RUN_PLAN_COMPILER_VERSION", 2), patch.object(
+            self.automation._execution, "validate_run_template",
+            wraps=self.automation._execution.validate_run_template,
+        ) as validate:
+            self.automation.fire_trigger("user-1", trigger["trigger_id"], "stale:2")
+        validate.assert_called_once()
+
+    def test_event_fans_out_to_subscribed_triggers_in_one_delivery(self) -> None:
+        first = self.create_trigger()
+        second = self.create_trigger()
+        other_goal = self.execution.create_goal("user-2", {"title": "Other owner"})
+        other = self.automation.create_trigger(
+            "user-2",
+            {
+                "goal_id": other_goal["goal_id"],
+                "name": "Other review",
+                "trigger_type": "event",
+                "configuration": {"event_type": "review.ready"},
+                "run_template": {"steps": [{"client_key": "read", "title": "Read"}]},
+            },
+        )
+        self.execution.update_goal("user-1", second["goal_id"], {"status": "archived"})
+        already = self.automation.fire_trigger("user-2", other["trigger_id"], "review:29")
+
+        delivered = self.automation.ingest_event("review.ready", "review:29", {"week": 29})
+        self.assertEqual(delivered["counts"], {"created": 1, "replayed": 1, "skipped": 1, "failed": 0})
+        by_trigger = {item["trigger_id"]: item for item in delivered["results"]}
+        self.assertEqual(by_trigger[second["trigger_id"]]["code"], "GOAL_NOT_ACTIVE")
+        self.assertEqual(by_trigger[other["trigger_id"]]["run_id"], already["run"]["run_id"])
+        created = by_trigger[first["trigger_id"]]
+        run = self.execution.get_run("user-1", created["run_id"])
+        self.assertEqual([step["client_key"] for step in run["steps"]], ["collect", "publish"])
+        self.assertEqual(run["metadata"]["trigger_source_key"], "review:29")
+        connection = self.database.get_connection()
+        fired_at = connection.execute(
+            "SELECT fired_at FROM task_trigger_firings WHERE run_id = ?", (created["run_id"],)
+        ).fetchone()[0]
+        event_times = {row[0] for row in connection.execute(
+            "SELECT created_at FROM task_events WHERE run_id = ? AND event_type = 'trigger.fired'",
+            (created["run_id"],),
+        )}
+        connection.close()
+        self.assertEqual(run["created_at"], fired_at)
+        self.assertEqual(event_times, {fired_at})
+        self.assertEqual(self.automation.get_trigger("user-1", first["trigger_id"])["last_fired_at"], fired_at)
+
+        replay = self.automation.fire_trigger("user-1", first["trigger_id"], "review:29")
+        self.assertEqual(replay["run"]["run_id"], created["run_id"])
+        owner_only = self.automation.ingest_event("review.ready", "review:30", user_id="user-2")
+        self.assertEqual(owner_only["counts"]["created"], 1)
+        self.assertEqual(self.automation.ingest_event("review.unknown", "review:29")["matched"], 0)
+
+    def test_invalid_stored_template_fails_only_its_own_delivery(self) -> None:
+        broken = self.create_trigger()
+        healthy = self.create_trigger()
+        connection = self.database.get_connection()
+        connection.execute(
+            """UPDATE task_triggers SET run_template = json_set(run_template, '$.steps[1].depends_on', json('["missing"]'))
+               WHERE trigger_id = ?""",
+            (broken["trigger_id"],),
+        )
+        connection.commit()
+        connection.close()
+
+        delivered = self.automation.ingest_event("review.ready", "review:31")
+        statuses = {item["trigger_id"]: item["status"] for item in delivered["results"]}
+        self.assertEqual(statuses, {broken["trigger_id"]: "failed", healthy["trigger_id"]: "created"})
+        self.assertEqual(self.automation.get_trigger("user-1", broken["trigger_id"])["last_fired_at"], None)
+
+    def create_schedule(self, configuration: dict) -> dict:
+        goal = self.create_goal()
+        return self.automation.create_trigger(
+            "user-1",
+            {
+                "goal_id": goal["goal_id"],
+                "name": "Morning review",
+                "trigger_type": "schedule",
+                "configuration": configuration,
+                "run_template": {"mode": "manual", "steps": [{"client_key": "review", "title": "Review"}]},
+            },
+        )
+
+    def make_due(self, trigger_id: str, slot: str) -> None:
+        connection = self.database.get_connection()
+        connection.execute(
+            "UPDATE task_trigger_schedules SET next_fire_at = ? WHERE trigger_id = ?", (slot, trigger_id)
+        )
+        connection.commit()
+        connection.close()
+
+    def runs(self) -> int:
+        connection = self.database.get_connection()
+        try:
+            return connection.execute("SELECT COUNT(*) FROM task_runs WHERE user_id = 'user-1'").fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_cron_evaluator_matches_wall_clock_fields(self) -> None:
+        after = datetime(2026, 10, 17, 8, 30, tzinfo=timezone.utc)  # Saturday
+        self.assertEqual(
+            next_fire_time({"cron": "0 9 * * mon-fri"}, after),
+            datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            next_fire_time({"cron": "*/15 8 * * *", "timezone": "Asia/Shanghai"}, after),
+            datetime(2026, 10, 18, 0, 0, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            next_fire_time({"cron": "0 0 29 2 *"}, after),
+            datetime(2028, 2, 29, 0, 0, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            next_fire_time({"interval_seconds": 3600}, after),
+            datetime(2026, 10, 17, 9, 0, tzinfo=timezone.utc),
+        )
+
+    def test_unsatisfiable_cron_is_rejected(self) -> None:
+        for configuration in ({"cron": "0 0 31 2 *"}, {"cron": "61 * * * *"}, {"cron": "0 9 * * *", "timezone": "Mars/Base"}):
+            with self.subTest(configuration=configuration):
+                with self.assertRaises(TaskAutomationError) as context:
+                    self.create_schedule(configuration)
+                self.assertEqual(context.exception.code, "TRIGGER_CONFIGURATION_INVALID")
+
+    def test_due_slot_fires_once_and_advances(self) -> None:
+        trigger = self.create_schedule({"cron": "0 * * * *"})
+        self.assertGreater(trigger["next_fire_at"], datetime.now(timezone.utc).isoformat())
+        self.assertEqual(self.automation.fire_due_schedules("worker-a"), 0)
+
+        self.make_due(trigger["trigger_id"], "2026-01-05T07:00:00+00:00")
+        self.assertEqual(self.automation.fire_due_schedules("worker-a"), 1)
+        self.assertEqual(self.automation.fire_due_schedules("worker-b"), 0)
+
+        connection = self.database.get_connection()
+        firings = connection.execute(
+            "SELECT source_key FROM task_trigger_firings WHERE trigger_id = ?", (trigger["trigger_id"],)
+        ).fetchall()
+        connection.close()
+        self.assertEqual([row[0] for row in firings], ["schedule:2026-01-05T07:00:00Z"])
+        advanced = self.automation.get_trigger("user-1", trigger["trigger_id"])
+        self.assertGreater(advanced["next_fire_at"], datetime.now(timezone.utc).isoformat())
+        self.assertEqual(self.runs(), 1)
+        for field in ("created_at", "updated_at", "last_fired_at"):
+            self.assertEqual(datetime.fromisoformat(advanced[field]).utcoffset(), timedelta(0), field)
+
+    def test_expired_lease_replays_the_same_slot(self) -> None:
+        trigger = self.create_schedule({"interval_seconds": 60})
+        self.make_due(trigger["trigger_id"], "2026-01-05T07:00:00+00:00")
+        repository = self.automation._repository
+        abandoned = repository.claim_due_schedules("crashed-worker")
+        self.assertEqual(len(abandoned), 1)
+        self.assertEqual(repository.claim_due_schedules("other-worker"), [])
+        self.automation.fire_trigger(
+            "user-1", trigger["trigger_id"], "schedule:2026-01-05T07:00:00Z"
+        )
+
+        connection = self.database.get_connection()
+        connection.execute(
+            "UPDATE task_trigger_schedules SET lease_expires_at = ?",
+            ((datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat(),),
+        )
+        connection.commit()
+        connection.close()
+        self.assertEqual(self.automation.fire_due_schedules("other-worker"), 1)
+        self.assertEqual(self.runs(), 1)
+        self.assertFalse(
+            repository.complete_schedule(
+                trigger["trigger_id"], abandoned[0]["lease_token"], "2026-01-05T07:01:00+00:00"
+            )
+        )
+
+    def test_paused_schedule_is_not_claimed_until_resumed(self) -> None:
+        trigger = self.create_schedule({"interval_seconds": 60})
+        paused = self.automation.pause_trigger("user-1", trigger["trigger_id"])
+        self.assertIsNone(paused["next_fire_at"])
+        self.assertEqual(self.automation.fire_due_schedules("worker"), 0)
+        resumed = self.automation.resume_trigger("user-1", trigger["trigger_id"])
+        self.assertIsNotNone(resumed["next_fire_at"])
+        self.assertIsNone(self.create_trigger()["next_fire_at"])
+
+    def test_due_query_uses_the_next_fire_index(self) -> None:
+        connection = self.database.get_connection()
+        plan = " ".join(
+            row[-1] for row in connection.execute(
+                """EXPLAIN QUERY PLAN SELECT trigger_id FROM task_trigger_schedules
+                   WHERE next_fire_at <= ? AND (lease_expires_at IS NULL OR lease_expires_at <= ?)
+                   ORDER BY next_fire_at LIMIT 100""",
+                ("2026", "2026"),
+            ).fetchall()
+        )
+        connection.close()
+        self.assertIn("idx_task_trigger_schedules_due", plan)
+
 
 if __name__ == "__main__":
     unittest.main()
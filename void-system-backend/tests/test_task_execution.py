@@ -1,9 +1,12 @@
 """Behavior tests for durable Goal and Run execution."""
 from pathlib import Path
+import random
 import sqlite3
 import tempfile
 import unittest
+from unittest.mock import patch
 
+from adapters.sqlite.growth_repository import SQLiteGrowthProfileRepository
 from adapters.sqlite.task_execution_repository import SQLiteTaskExecutionRepository
 from core.planning_contracts import EvaluationResult
 from core.task_execution_contracts import TaskExecutionError
@@ -258,6 +261,49 @@ class TaskExecutionTests(unittest.TestCase):
         self.assertNotIn("Release the workspace", str(summary))
         self.assertNotIn("Needs a decision", str(summary))
 
+    def test_materialized_behavior_summary_matches_a_full_history_rebuild(self) -> None:
+        goal = self.create_goal()
+        self.execution.update_goal("user-1", goal["goal_id"], {"title": "Release the new workspace"})
+        self.execution.update_goal("user-1", goal["goal_id"], {"description": "Ship it"})
+        paused = self.execution.create_run(
+            "user-1",
+            goal["goal_id"],
+            {"mode": "assisted", "steps": [{"client_key": "a", "title": "A"}, {"title": "B", "depends_on": ["a"]}]},
+        )
+        paused = self.execution.start_run("user-1", paused["run_id"])
+        self.execution.pause_run("user-1", paused["run_id"])
+        self.execution.resume_run("user-1", paused["run_id"])
+        self.execution.skip_step("user-1", paused["run_id"], paused["steps"][0]["step_id"])
+        self.execution.cancel_run("user-1", paused["run_id"], "Changed plans")
+        finished = self.execution.create_run("user-1", goal["goal_id"], {"steps": [{"title": "Only"}]})
+        finished = self.execution.start_run("user-1", finished["run_id"])
+        step_id = finished["steps"][0]["step_id"]
+        self.execution.start_step("user-1", finished["run_id"], step_id)
+        self.execution.complete_step("user-1", finished["run_id"], step_id)
+        self.execution.update_run_review("user-1", finished["run_id"], {"rating": 4, "notes": "Smooth"})
+        self.execution.update_run_review("user-1", finished["run_id"], {"rating": 2, "next_action": "Repeat"})
+        self.execution.update_run_review("user-1", paused["run_id"], {"rating": 5})
+
+        incremental = self.execution.summarize_profile_behavior("user-1")
+        repository = SQLiteTaskExecutionRepository(self.database.get_connection)
+        self.assertEqual(repository.rebuild_profile_behavior_summaries("user-1"), 1)
+        rebuilt = self.execution.summarize_profile_behavior("user-1")
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(incremental["run_count"], 2)
+        self.assertEqual(incremental["assisted_run_count"], 1)
+        self.assertEqual(incremental["completed_run_count"], 1)
+        self.assertEqual(incremental["cancelled_run_count"], 1)
+        self.assertEqual(incremental["finished_step_count"], 2)
+        self.assertEqual(incremental["pause_count"], 1)
+        self.assertEqual(incremental["resume_count"], 1)
+        self.assertEqual(incremental["review_count"], 2)
+        self.assertEqual(incremental["review_with_notes_count"], 1)
+        self.assertEqual(incremental["review_with_next_action_count"], 1)
+        self.assertEqual(incremental["average_rating"], 3.5)
+        self.assertEqual(incremental["refined_goal_count"], 1)
+        self.assertEqual(self.execution.summarize_profile_behavior("user-2")["run_count"], 0)
+
     def test_run_creation_is_idempotent_and_owner_scoped(self) -> None:
         goal = self.create_goal()
         values = {"idempotency_key": "launch-2026", "steps": [{"title": "Launch"}]}
@@ -345,6 +391,10 @@ class TaskExecutionTests(unittest.TestCase):
             connection.close()
         self.assertEqual(settlements, 1)
         self.assertEqual([(row[0], row[1]) for row in ledger_entries], [(17, f"task_step:{step_id}")])
+        growth = SQLiteGrowthProfileRepository(self.database.get_connection)
+        self.assertEqual(growth.get_balance("user-1"), 17)
+        self.assertEqual(growth.growth_point_summary("user-1")["weekly_income"], 17)
+        self.assertEqual(growth.check_growth_point_projections("user-1"), [])
 
         with self.assertRaises(TaskExecutionError) as context:
             self.execution.complete_step("user-1", run["run_id"], step_id)
@@ -483,6 +533,279 @@ class TaskExecutionTests(unittest.TestCase):
         self.assertEqual(unchanged["status"], "queued")
         self.assertEqual(unchanged["steps"][0]["status"], "pending")
 
+    def test_step_command_batch_matches_single_commands_in_one_transaction(self) -> None:
+        goal = self.create_goal()
+        template = {
+            "mode": "manual",
+            "steps": [
+                {"client_key": "plan", "title": "Plan", "reward_spec": {"growth_points": 5}},
+                {"client_key": "build", "title": "Build", "depends_on": ["plan"]},
+                {"client_key": "docs", "title": "Docs", "depends_on": ["plan"]},
+                {"client_key": "ship", "title": "Ship", "depends_on": ["build", "docs"]},
+            ],
+        }
+        single = self.execution.start_run(
+            "user-1", self.execution.create_run("user-1", goal["goal_id"], template)["run_id"]
+        )
+        batched = self.execution.start_run(
+            "user-1", self.execution.create_run("user-1", goal["goal_id"], template)["run_id"]
+        )
+        single_ids = {step["client_key"]: step["step_id"] for step in single["steps"]}
+        batched_ids = {step["client_key"]: step["step_id"] for step in batched["steps"]}
+
+        self.execution.start_step("user-1", single["run_id"], single_ids["plan"])
+        self.execution.complete_step("user-1", single["run_id"], single_ids["plan"], output_data={"ok": True})
+        self.execution.skip_step("user-1", single["run_id"], single_ids["docs"])
+        for key in ("build", "ship"):
+            self.execution.start_step("user-1", single["run_id"], single_ids[key])
+            self.execution.complete_step("user-1", single["run_id"], single_ids[key])
+
+        result = self.execution.apply_step_commands(
+            "user-1",
+            batched["run_id"],
+            [
+                {"op": "start", "step_id": batched_ids["plan"]},
+                {"op": "complete", "step_id": batched_ids["plan"], "output_data": {"ok": True}},
+                {"op": "skip", "step_id": batched_ids["docs"]},
+                {"op": "skip", "step_id": batched_ids["docs"]},
+                {"op": "start", "step_id": batched_ids["build"]},
+                {"op": "complete", "step_id": batched_ids["build"]},
+                {"op": "start", "step_id": batched_ids["ship"]},
+                {"op": "complete", "step_id": batched_ids["ship"]},
+            ],
+        )
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["commands"][1]["reward_settlement"]["growth_points"], 5)
+        self.assertEqual(
+            set(result["commands"][1]["ready_step_ids"]), {batched_ids["build"], batched_ids["docs"]}
+        )
+        self.assertFalse(result["commands"][3]["changed"])
+        self.assertEqual(
+            {item["step_id"]: item["status"] for item in result["steps"]},
+            {
+                batched_ids["plan"]: "completed",
+                batched_ids["build"]: "completed",
+                batched_ids["docs"]: "skipped",
+                batched_ids["ship"]: "completed",
+            },
+        )
+        self.assertEqual(result["version"], self.execution.get_run("user-1", batched["run_id"])["version"])
+
+        def timeline(run_id: str, step_ids: dict) -> list:
+            keys = {step_id: key for key, step_id in step_ids.items()}
+            return sorted(
+                (event["event_type"], keys.get(event["step_id"]))
+                for event in self.execution.list_events("user-1", run_id)
+            )
+
+        self.assertEqual(timeline(batched["run_id"], batched_ids), timeline(single["run_id"], single_ids))
+        connection = self.database.get_connection()
+        try:
+            settlements = connection.execute(
+                "SELECT COUNT(*) FROM task_reward_settlements WHERE run_id = ?", (batched["run_id"],)
+            ).fetchone()[0]
+        finally:
+            connection.close()
+        self.assertEqual(settlements, 1)
+
+    def test_rejected_step_command_rolls_back_the_whole_batch(self) -> None:
+        goal = self.create_goal()
+        run = self.execution.create_run(
+            "user-1",
+            goal["goal_id"],
+            {"steps": [{"client_key": "a", "title": "A"}, {"client_key": "b", "title": "B", "depends_on": ["a"]}]},
+        )
+        run = self.execution.start_run("user-1", run["run_id"])
+        first, second = (step["step_id"] for step in run["steps"])
+        events_before = len(self.execution.list_events("user-1", run["run_id"]))
+
+        with self.assertRaises(TaskExecutionError) as context:
+            self.execution.apply_step_commands(
+                "user-1",
+                run["run_id"],
+                [{"op": "start", "step_id": first}, {"op": "start", "step_id": second}],
+            )
+        self.assertEqual(context.exception.code, "STEP_NOT_READY")
+        self.assertTrue(context.exception.message.startswith("Command 2:"))
+
+        stale = self.execution.get_run("user-1", run["run_id"])
+        self.execution.start_step("user-1", run["run_id"], first)
+        events_after_single = len(self.execution.list_events("user-1", run["run_id"]))
+        with patch.object(self.execution, "get_run", return_value=stale):
+            with self.assertRaises(TaskExecutionError) as context:
+                self.execution.apply_step_commands(
+                    "user-1",
+                    run["run_id"],
+                    [{"op": "skip", "step_id": second}, {"op": "start", "step_id": first}],
+                )
+        self.assertEqual(context.exception.code, "STEP_STATE_CONFLICT")
+        self.assertIn("command 2", context.exception.message)
+
+        unchanged = self.execution.get_run("user-1", run["run_id"])
+        self.assertEqual([step["status"] for step in unchanged["steps"]], ["running", "pending"])
+        self.assertEqual(events_after_single, events_before + 1)
+        self.assertEqual(len(self.execution.list_events("user-1", run["run_id"])), events_after_single)
+
+    def test_batch_approvals_resolve_inline_and_across_runs(self) -> None:
+        goal = self.create_goal()
+        template = {"steps": [{"title": "Deploy", "requires_approval": True}]}
+        gated = self.execution.start_run(
+            "user-1", self.execution.create_run("user-1", goal["goal_id"], template)["run_id"]
+        )
+        step_id = gated["steps"][0]["step_id"]
+        result = self.execution.apply_step_commands(
+            "user-1",
+            gated["run_id"],
+            [
+                {"op": "start", "step_id": step_id},
+                {"op": "resolve_approval", "step_id": step_id, "decision": "approved"},
+                {"op": "start", "step_id": step_id},
+                {"op": "complete", "step_id": step_id},
+            ],
+        )
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual([item["status"] for item in result["commands"]], [
+            "waiting_approval", "ready", "running", "completed",
+        ])
+        self.assertEqual(result["commands"][0]["approval_id"], result["commands"][1]["approval_id"])
+
+        pending = []
+        for _ in range(3):
+            run = self.execution.start_run(
+                "user-1", self.execution.create_run("user-1", goal["goal_id"], template)["run_id"]
+            )
+            run = self.execution.start_step("user-1", run["run_id"], run["steps"][0]["step_id"])
+            pending.append(run["approvals"][0])
+
+        with self.assertRaises(TaskExecutionError) as context:
+            self.execution.resolve_approvals(
+                "user-1",
+                [
+                    {"approval_id": pending[0]["approval_id"], "decision": "approved"},
+                    {"approval_id": "missing", "decision": "approved"},
+                ],
+            )
+        self.assertEqual(context.exception.code, "APPROVAL_NOT_FOUND")
+        self.assertEqual(self.execution.get_run("user-1", pending[0]["run_id"])["status"], "waiting_approval")
+        with self.assertRaises(TaskExecutionError) as context:
+            self.execution.resolve_approvals(
+                "user-2", [{"approval_id": pending[0]["approval_id"], "decision": "approved"}]
+            )
+        self.assertEqual(context.exception.code, "APPROVAL_NOT_FOUND")
+
+        resolved = self.execution.resolve_approvals(
+            "user-1",
+            [
+                {"approval_id": pending[0]["approval_id"], "decision": "approved"},
+                {"approval_id": pending[1]["approval_id"], "decision": "approved"},
+                {"approval_id": pending[2]["approval_id"], "decision": "rejected", "note": "Not now"},
+            ],
+        )
+        self.assertEqual(
+            [item["run_status"] for item in resolved["approvals"]], ["running", "running", "failed"]
+        )
+        with self.assertRaises(TaskExecutionError) as context:
+            self.execution.resolve_approvals(
+                "user-1", [{"approval_id": pending[0]["approval_id"], "decision": "approved"}]
+            )
+        self.assertEqual(context.exception.code, "APPROVAL_ALREADY_RESOLVED")
+
+    def test_run_version_tracks_snapshot_changes_and_guards_commands(self) -> None:
+        goal = self.create_goal()
+        run = self.execution.create_run(
+            "user-1", goal["goal_id"], {"steps": [{"title": "Draft"}, {"title": "Publish"}]}
+        )
+        versions = [run["version"]]
+        run = self.execution.start_run("user-1", run["run_id"], expected_version=run["version"])
+        versions.append(run["version"])
+        first, second = (step["step_id"] for step in run["steps"])
+        state = self.execution.start_step(
+            "user-1", run["run_id"], first, expected_version=run["version"], hydrate=False
+        )
+        self.assertNotIn("steps", state)
+        versions.append(state["version"])
+        self.execution.start_action("user-1", run["run_id"], first, {"action_type": "note"})
+        versions.append(self.execution.get_run_state("user-1", run["run_id"])["version"])
+        self.execution.update_goal("user-1", goal["goal_id"], {"title": "Renamed release"})
+        versions.append(self.execution.get_run("user-1", run["run_id"])["version"])
+        self.assertEqual(versions, sorted(set(versions)))
+
+        with self.assertRaises(TaskExecutionError) as context:
+            self.execution.complete_step("user-1", run["run_id"], first, expected_version=versions[2])
+        self.assertEqual((context.exception.code, context.exception.status_code), ("RUN_VERSION_CONFLICT", 412))
+
+        stale = self.execution.get_run_state("user-1", run["run_id"])
+        self.execution.skip_step("user-1", run["run_id"], second)
+        with patch.object(
+            self.execution._repository, "get_run_state", return_value={**stale, "steps": [
+                step for step in self.execution.get_run("user-1", run["run_id"])["steps"] if step["step_id"] == first
+            ], "approvals": []},
+        ):
+            with self.assertRaises(TaskExecutionError) as context:
+                self.execution.complete_step(
+                    "user-1", run["run_id"], first, expected_version=stale["version"]
+                )
+        self.assertEqual(context.exception.code, "RUN_VERSION_CONFLICT")
+        current = self.execution.get_run("user-1", run["run_id"])
+        self.assertEqual(current["steps"][0]["status"], "running")
+
+        completed = self.execution.complete_step(
+            "user-1", run["run_id"], first, expected_version=current["version"]
+        )
+        self.assertEqual(completed["status"], "completed")
+        self.assertGreater(completed["version"], current["version"])
+
+    def test_counted_readiness_matches_a_full_dependency_scan_on_random_graphs(self) -> None:
+        goal = self.create_goal()
+        for seed in range(12):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                steps = []
+                for index in range(rng.randint(2, 14)):
+                    parents = [f"s{parent}" for parent in range(index) if rng.random() < 0.3]
+                    steps.append({"client_key": f"s{index}", "title": f"Step {index}", "depends_on": parents})
+                run = self.execution.create_run("user-1", goal["goal_id"], {"mode": "manual", "steps": steps})
+                run = self.execution.start_run("user-1", run["run_id"])
+                self.assert_readiness_matches_scan(run)
+                while run["status"] == "running":
+                    open_steps = [step for step in run["steps"] if step["status"] in {"pending", "ready"}]
+                    step = rng.choice(open_steps)
+                    if step["status"] == "ready" and rng.random() < 0.7:
+                        run = self.execution.start_step("user-1", run["run_id"], step["step_id"])
+                        run = self.execution.complete_step("user-1", run["run_id"], step["step_id"])
+                    else:
+                        run = self.execution.skip_step("user-1", run["run_id"], step["step_id"])
+                    if run["status"] == "running" and rng.random() < 0.15:
+                        self.execution.pause_run("user-1", run["run_id"])
+                        run = self.execution.resume_run("user-1", run["run_id"])
+                    self.assert_readiness_matches_scan(run)
+                self.assertEqual(run["status"], "completed")
+
+    def assert_readiness_matches_scan(self, run: dict) -> None:
+        """Compare the counters and ready set with a direct scan of the dependency table."""
+        connection = self.database.get_connection()
+        try:
+            rows = connection.execute(
+                """SELECT s.step_id, s.status, s.unmet_dependency_count,
+                          (SELECT COUNT(*) FROM task_step_dependencies d
+                           JOIN task_steps parent ON parent.step_id = d.depends_on_step_id
+                           WHERE d.step_id = s.step_id
+                             AND parent.status NOT IN ('completed', 'skipped')) AS scanned
+                   FROM task_steps s WHERE s.run_id = ?""",
+                (run["run_id"],),
+            ).fetchall()
+        finally:
+            connection.close()
+        for row in rows:
+            self.assertEqual(row["unmet_dependency_count"], row["scanned"], row["step_id"])
+            if run["status"] == "running":
+                self.assertEqual(
+                    row["status"] == "ready",
+                    row["status"] in {"pending", "ready"} and row["scanned"] == 0,
+                    row["step_id"],
+                )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,6 +2,8 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import io
 import tempfile
 import unittest
 from pathlib import Path
@@ -28,6 +30,10 @@ class _Store:
             raise RuntimeError("index unavailable")
         return SimpleNamespace(chunk_ids=["chunk-1", "chunk-2"], collection="user_member-1_docs")
 
+    def index_sections(self, *, sections, **kwargs):
+        kwargs["sections"] = list(sections)
+        return self.index_text(**kwargs)
+
     def delete_document(self, **kwargs):
         self.delete_calls.append(kwargs)
         return True
@@ -37,8 +43,13 @@ class _Store:
 
 
 class _Lifecycle:
-    def __init__(self) -> None:
+    def __init__(self, versions=None) -> None:
         self.calls = []
+        self.versions = versions or {}
+
+    def latest_source_version(self, *, document_id, owner_id):
+        del owner_id
+        return self.versions.get(document_id)
 
     def start_ingestion(self, **kwargs):
         self.calls.append(kwargs)
@@ -97,7 +108,7 @@ class PersonalKnowledgeDocumentManagerTests(unittest.TestCase):
         database = _Database()
         lifecycle = _Lifecycle()
         store = _Store()
-        parser = SimpleNamespace(get_supported_types=lambda: ["txt"], extract_metadata=lambda *_: {"file_type": "txt"})
+        parser = SimpleNamespace(get_supported_types=lambda: ["txt"], get_file_type=lambda _name: "txt")
         with tempfile.TemporaryDirectory() as temporary_directory:
             settings, cipher = _private_storage_settings(Path(temporary_directory))
             manager = PersonalKnowledgeDocumentManager(
@@ -114,6 +125,48 @@ class PersonalKnowledgeDocumentManagerTests(unittest.TestCase):
         self.assertEqual(lifecycle.calls[0]["job_type"], "ingest")
         self.assertEqual(store.index_calls, [])
 
+    def test_stream_upload_is_hashed_and_encrypted_in_bounded_reads(self) -> None:
+        class _Spool(io.BytesIO):
+            def __init__(self, data: bytes) -> None:
+                super().__init__(data)
+                self.reads = []
+
+            def read(self, size=-1):
+                self.reads.append(size)
+                return super().read(size)
+
+        source = b"streamed upload content " * 40
+        database = _Database()
+        lifecycle = _Lifecycle()
+        parser = SimpleNamespace(get_supported_types=lambda: ["txt"], get_file_type=lambda _name: "txt")
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            settings, cipher = _private_storage_settings(Path(temporary_directory))
+            manager = PersonalKnowledgeDocumentManager(
+                storage_path=temporary_directory, database=database, store=_Store(), lifecycle_repository=lifecycle,
+                settings=settings, cipher=cipher,
+            )
+            spool = _Spool(source)
+            with patch("modules.knowledge.personal_documents.document_parser", parser), \
+                    patch("modules.knowledge.personal_documents._UPLOAD_CHUNK_BYTES", 64):
+                result = asyncio.run(manager.upload_and_process_document("member-1", spool, "notes.txt"))
+            document = database.documents[result["doc_id"]]
+            stored = Path(document["storage_path"]).read_bytes()
+
+            manager.max_file_size = len(source) - 1
+            with patch("modules.knowledge.personal_documents.document_parser", parser):
+                rejected = asyncio.run(manager.upload_and_process_document("member-1", io.BytesIO(source), "large.txt"))
+            leftovers = sorted(path.name for path in (Path(temporary_directory) / "member-1").iterdir())
+
+        self.assertTrue(result["success"])
+        self.assertEqual(set(spool.reads), {64})
+        self.assertEqual(cipher.decrypt(stored), source)
+        self.assertEqual(document["file_size"], len(source))
+        self.assertEqual(lifecycle.calls[0]["content_fingerprint"], hashlib.sha256(source).hexdigest())
+        self.assertEqual(lifecycle.calls[0]["source_size"], len(source))
+        self.assertEqual(rejected["error_code"], "FILE_VALIDATION_FAILED")
+        self.assertEqual(leftovers, [f"{result['doc_id']}.bin"])
+        self.assertEqual(len(lifecycle.calls), 1)
+
     def test_rebuild_only_queues_jobs_and_does_not_parse_or_index(self) -> None:
         with tempfile.TemporaryDirectory() as temporary_directory:
             source_path = Path(temporary_directory) / "notes.txt"
@@ -132,6 +185,8 @@ class PersonalKnowledgeDocumentManagerTests(unittest.TestCase):
         self.assertEqual(result["queued_count"], 1)
         self.assertEqual(lifecycle.calls[0]["job_type"], "rebuild")
         self.assertTrue(lifecycle.calls[0]["force"])
+        self.assertEqual(lifecycle.calls[0]["content_fingerprint"], hashlib.sha256(b"Existing indexed note").hexdigest())
+        self.assertEqual(lifecycle.calls[0]["source_size"], len(b"Existing indexed note"))
         self.assertEqual(store.index_calls, [])
 
     def test_worker_replaces_document_chunks_in_the_unified_store(self) -> None:
@@ -189,6 +244,81 @@ class PersonalKnowledgeDocumentManagerTests(unittest.TestCase):
         self.assertTrue(result["cancelled"])
         self.assertEqual(database.documents["doc-1"]["parse_status"], "cancelled")
 
+    def test_streamed_pages_are_indexed_while_later_pages_are_still_unparsed(self) -> None:
+        parsed_pages = []
+        indexed_after = []
+        opened = []
+
+        def pages(path, _name, *, fernet_key):
+            opened.append((path, fernet_key))
+            for number in range(1, 4):
+                parsed_pages.append(number)
+                yield f"Page {number} of the quarterly review."
+
+        class _StreamingStore(_Store):
+            def index_sections(self, *, sections, **kwargs):
+                received = []
+                for section in sections:
+                    indexed_after.append(len(parsed_pages))
+                    received.append(section)
+                return self.index_text(sections=received, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            source_path = Path(temporary_directory) / "review.bin"
+            settings, cipher = _private_storage_settings(Path(temporary_directory))
+            source_path.write_bytes(cipher.encrypt(b"%PDF-1.4 review"))
+            database = _Database({"doc_id": "doc-1", "title": "Review", "original_name": "review.pdf", "storage_path": str(source_path), "parse_status": "processing", "encryption_version": cipher.VERSION})
+            store = _StreamingStore()
+            lifecycle = _Lifecycle({"doc-1": {"content_fingerprint": "recorded", "source_size": 15}})
+            manager = PersonalKnowledgeDocumentManager(
+                storage_path=temporary_directory, database=database, store=store, settings=settings, cipher=cipher,
+                lifecycle_repository=lifecycle,
+            )
+            parser = SimpleNamespace(get_supported_types=lambda: ["pdf"], iter_file_sections=pages)
+            with patch("modules.knowledge.personal_documents.document_parser", parser), \
+                    patch.object(cipher, "decrypt", side_effect=AssertionError("whole source decrypted")):
+                result = asyncio.run(manager.process_stored_document("member-1", "doc-1"))
+
+        self.assertTrue(result["success"])
+        self.assertEqual(indexed_after, [1, 2, 3])
+        self.assertEqual(opened, [(source_path, cipher.worker_key())])
+        self.assertEqual(len(store.index_calls[0]["sections"]), 3)
+        self.assertEqual(database.documents["doc-1"]["content_preview"], "Page 1 of the quarterly review.")
+        self.assertEqual(database.documents["doc-1"]["parse_status"], "completed")
+
+    def test_cancellation_during_a_streamed_parse_closes_the_parser_and_removes_chunks(self) -> None:
+        closed = []
+
+        def pages(_path, _name, **_kwargs):
+            try:
+                for number in range(1, 100):
+                    yield f"Page {number}"
+            finally:
+                closed.append(True)
+
+        reports = iter([True] * 6)
+        with tempfile.TemporaryDirectory() as temporary_directory:
+            source_path = Path(temporary_directory) / "review.bin"
+            settings, cipher = _private_storage_settings(Path(temporary_directory))
+            source_path.write_bytes(cipher.encrypt(b"%PDF-1.4 review"))
+            database = _Database({"doc_id": "doc-1", "title": "Review", "original_name": "review.pdf", "storage_path": str(source_path), "parse_status": "processing", "encryption_version": cipher.VERSION})
+            store = _Store()
+            manager = PersonalKnowledgeDocumentManager(
+                storage_path=temporary_directory, database=database, store=store, settings=settings, cipher=cipher,
+            )
+            parser = SimpleNamespace(get_supported_types=lambda: ["pdf"], iter_file_sections=pages)
+            with patch("modules.knowledge.personal_documents.document_parser", parser), \
+                    patch("modules.knowledge.personal_documents._SECTION_REPORT_INTERVAL_SECONDS", 0):
+                result = asyncio.run(manager.process_stored_document(
+                    "member-1", "doc-1", report_progress=lambda _stage, _progress: next(reports, False),
+                ))
+
+        self.assertTrue(result["cancelled"])
+        self.assertEqual(closed, [True])
+        self.assertEqual(store.index_calls[0]["sections"], ["Page 1", "Page 2", "Page 3"])
+        self.assertEqual(len(store.delete_calls), 1)
+        self.assertEqual(database.documents["doc-1"]["parse_status"], "cancelled")
+
 
 if __name__ == "__main__":
     unittest.main()
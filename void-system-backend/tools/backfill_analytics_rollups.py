@@ -0,0 +1,57 @@
+"""Rebuild or refresh administrator analytics rollups from source history."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+from typing import Dict, Optional
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.analytics_repository import SQLiteAnalyticsRepository
+from core.runtime_settings import RuntimeSettings
+from database import Database
+
+
+def _database_path(value: Optional[str]) -> Path:
+    if value:
+        path = Path(value).expanduser()
+        return path if path.is_absolute() else (Path.cwd() / path).resolve()
+    settings = RuntimeSettings.from_environment(base_dir=BACKEND_ROOT)
+    return Path(settings.get_database_path()).resolve()
+
+
+def backfill_analytics_rollups(database_path: Path, *, incremental: bool = False) -> Dict[str, str]:
+    """Rebuild every bucket, or only fold rows past the watermarks, and return the watermarks."""
+    if not database_path.exists():
+        raise FileNotFoundError(f"数据库不存在：{database_path}")
+    repository = SQLiteAnalyticsRepository(Database(str(database_path)).get_connection)
+    return repository.refresh_rollups() if incremental else repository.backfill_rollups()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="根据完整历史重建管理员分析的小时、日与快照汇总。"
+    )
+    parser.add_argument("--database", help="SQLite 数据库路径；默认读取当前后端配置")
+    parser.add_argument(
+        "--incremental", action="store_true", help="只从当前水位线继续汇总，不清空已有数据"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    try:
+        watermarks = backfill_analytics_rollups(_database_path(args.database), incremental=args.incremental)
+    except FileNotFoundError as exc:
+        raise SystemExit(str(exc)) from exc
+    for metric, position in sorted(watermarks.items()):
+        print(f"{metric}: {position}")
+
+
+if __name__ == "__main__":
+    main()
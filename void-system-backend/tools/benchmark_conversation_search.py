@@ -0,0 +1,119 @@
+"""Benchmark conversation full-text search against a synthetic chat history."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.conversation_search import rebuild_conversation_search
+from database import Database
+from modules.conversations.service import get_conversation_service
+
+
+_VOCABULARY = (
+    "周报", "计划", "复盘", "学习", "英语", "单词", "跑步", "健身", "阅读", "笔记", "项目", "会议",
+    "预算", "旅行", "代码", "测试", "部署", "接口", "数据库", "索引", "目标", "习惯", "睡眠", "饮食",
+    "python", "sqlite", "fastapi", "report", "review", "deadline", "draft", "release",
+)
+_RARE_WORD = "量子纠缠"
+_QUERIES = ("周报", "数据库 索引", "python deadline", _RARE_WORD)
+_SESSIONS = 1_000
+
+
+def _seed(database: Database, message_count: int) -> None:
+    """Insert one owner with ``message_count`` messages across synthetic sessions and index them."""
+    generator = random.Random(42)
+    now = datetime.now(timezone.utc)
+    connection = database.get_connection()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "INSERT INTO users (user_id, username, password_hash) VALUES ('bench', 'bench', 'unused')"
+        )
+        connection.execute("INSERT INTO chat_groups (group_id, user_id, group_name) VALUES ('group', 'bench', '基准')")
+        connection.executemany(
+            """INSERT INTO chat_sessions (session_id, group_id, user_id, session_name, created_at, updated_at)
+               VALUES (?, 'group', 'bench', ?, ?, ?)""",
+            [
+                (f"session-{index}", "".join(generator.sample(_VOCABULARY, 2)), now.isoformat(), now.isoformat())
+                for index in range(_SESSIONS)
+            ],
+        )
+        batch = []
+        for index in range(message_count):
+            words = generator.choices(_VOCABULARY, k=generator.randint(8, 40))
+            if index % 50_000 == 0:
+                words.append(_RARE_WORD)
+            batch.append((
+                f"message-{index}",
+                f"session-{index % _SESSIONS}",
+                "user" if index % 2 else "assistant",
+                "，".join(words),
+                (now - timedelta(seconds=message_count - index)).isoformat(),
+            ))
+            if len(batch) == 10_000:
+                _insert_messages(connection, batch)
+                batch = []
+        _insert_messages(connection, batch)
+        rebuild_conversation_search(connection)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _insert_messages(connection: sqlite3.Connection, batch: List[Tuple[str, ...]]) -> None:
+    connection.executemany(
+        """INSERT INTO chat_messages (message_id, session_id, user_id, role, content, created_at)
+           VALUES (?, ?, 'bench', ?, ?, ?)""",
+        batch,
+    )
+
+
+def benchmark(message_count: int, repeats: int) -> Dict[str, float]:
+    """Return median milliseconds for the first result page of each sample query."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = Database(Path(temp_dir) / "search-benchmark.db")
+        try:
+            _seed(database, message_count)
+            service = get_conversation_service(database)
+            results: Dict[str, float] = {}
+            for query in _QUERIES:
+                samples: List[float] = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    service.search("bench", query)
+                    samples.append((time.perf_counter() - started) * 1000)
+                results[query] = statistics.median(samples)
+            return results
+        finally:
+            database.close()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="在临时数据库中测量对话全文搜索的耗时。")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="单个用户的消息数量")
+    parser.add_argument("--repeats", type=int, default=10, help="每个查询的重复次数")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    results = benchmark(max(1, args.messages), max(1, args.repeats))
+    for query, median_ms in results.items():
+        print(f"{args.messages} 条消息，搜索「{query}」：{median_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark the conversation sidebar query against a synthetic chat history."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.conversation_repository import SQLiteConversationRepository
+from database import Database
+
+
+def _seed(database: Database, group_count: int, session_count: int) -> None:
+    """Insert one owner with ``group_count`` groups and ``session_count`` sessions spread across them."""
+    now = datetime.now(timezone.utc)
+    connection = database.get_connection()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "INSERT INTO users (user_id, username, password_hash) VALUES ('bench', 'bench', 'unused')"
+        )
+        connection.executemany(
+            "INSERT INTO chat_groups (group_id, user_id, group_name, created_at) VALUES (?, 'bench', ?, ?)",
+            [
+                (f"group-{index}", f"分组 {index}", (now - timedelta(days=index)).isoformat())
+                for index in range(group_count)
+            ],
+        )
+        connection.executemany(
+            """INSERT INTO chat_sessions (session_id, group_id, user_id, session_name, created_at, updated_at)
+               VALUES (?, ?, 'bench', ?, ?, ?)""",
+            [
+                (
+                    f"session-{index}",
+                    f"group-{index % group_count}",
+                    f"会话 {index}",
+                    (now - timedelta(minutes=index)).isoformat(),
+                    (now - timedelta(minutes=index * 7 % 9973)).isoformat(),
+                )
+                for index in range(session_count)
+            ],
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _legacy_list_groups(database: Database) -> List[Dict[str, Any]]:
+    """The previous sidebar read: one group query followed by one full session query per group."""
+    connection = database.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT * FROM chat_groups WHERE user_id = ? ORDER BY created_at DESC", ("bench",))
+        groups = [dict(row) for row in cursor.fetchall()]
+        for group in groups:
+            cursor.execute(
+                """SELECT * FROM chat_sessions
+                   WHERE group_id = ? AND user_id = ?
+                   ORDER BY updated_at DESC""",
+                (group["group_id"], "bench"),
+            )
+            group["sessions"] = [dict(row) for row in cursor.fetchall()]
+        return groups
+    finally:
+        connection.close()
+
+
+def _median_ms(read: Callable[[], Any], repeats: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        read()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def benchmark(group_count: int, session_count: int, session_limit: int, repeats: int) -> Dict[str, float]:
+    """Return median milliseconds for the per-group loop and both single-statement modes."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = Database(Path(temp_dir) / "sidebar-benchmark.db")
+        try:
+            _seed(database, group_count, session_count)
+            repository = SQLiteConversationRepository(database.get_connection)
+            return {
+                "legacy_ms": _median_ms(lambda: _legacy_list_groups(database), repeats),
+                "single_query_ms": _median_ms(lambda: repository.list_groups("bench"), repeats),
+                "limited_ms": _median_ms(lambda: repository.list_groups("bench", session_limit), repeats),
+            }
+        finally:
+            database.close()
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="在临时数据库中测量对话侧边栏分组加载的耗时。")
+    parser.add_argument("--groups", type=int, default=200, help="分组数量")
+    parser.add_argument("--sessions", type=int, default=5_000, help="会话总数")
+    parser.add_argument("--session-limit", type=int, default=10, help="每组返回的会话上限")
+    parser.add_argument("--repeats", type=int, default=20, help="每种模式的重复次数")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    result = benchmark(max(1, args.groups), max(0, args.sessions), max(1, args.session_limit), max(1, args.repeats))
+    print(
+        f"{args.groups} 分组 / {args.sessions} 会话：逐组查询 {result['legacy_ms']:.2f} ms，"
+        f"单次查询 {result['single_query_ms']:.2f} ms，"
+        f"每组 {args.session_limit} 条 {result['limited_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
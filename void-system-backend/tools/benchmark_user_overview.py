@@ -0,0 +1,110 @@
+"""Benchmark the user dashboard overview against a synthetic Step history."""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.analytics_repository import SQLiteAnalyticsRepository
+from adapters.sqlite.growth_point_projections import append_growth_point_entry
+from database import Database
+
+
+_STATUSES = ("completed", "completed", "completed", "ready", "pending", "running", "cancelled")
+_STEPS_PER_RUN = 50
+
+
+def _seed(database: Database, step_count: int) -> None:
+    """Insert one owner with ``step_count`` Steps and one ledger entry per completed Step."""
+    now = datetime.now(timezone.utc)
+    connection = database.get_connection()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(
+            "INSERT INTO users (user_id, username, password_hash) VALUES ('bench', 'bench', 'unused')"
+        )
+        connection.execute(
+            """INSERT INTO task_goals (goal_id, user_id, title, created_at, updated_at)
+               VALUES ('goal', 'bench', 'Benchmark', ?, ?)""",
+            (now.isoformat(), now.isoformat()),
+        )
+        for index in range(step_count):
+            run_id = f"run-{index // _STEPS_PER_RUN}"
+            if index % _STEPS_PER_RUN == 0:
+                connection.execute(
+                    """INSERT INTO task_runs (run_id, goal_id, user_id, title, created_at, updated_at)
+                       VALUES (?, 'goal', 'bench', 'Run', ?, ?)""",
+                    (run_id, now.isoformat(), now.isoformat()),
+                )
+            status = _STATUSES[index % len(_STATUSES)]
+            created = now - timedelta(days=index % 120, hours=index % 24)
+            completed = (created + timedelta(hours=index % 9)).isoformat() if status == "completed" else None
+            connection.execute(
+                """INSERT INTO task_steps
+                   (step_id, run_id, user_id, client_key, title, status, created_at, updated_at, completed_at)
+                   VALUES (?, ?, 'bench', ?, 'Step', ?, ?, ?, ?)""",
+                (f"step-{index}", run_id, f"key-{index}", status, created.isoformat(), created.isoformat(), completed),
+            )
+            if completed:
+                append_growth_point_entry(
+                    connection, "bench", 5, "earn", f"task_step:step-{index}", created_at=completed
+                )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def _median_ms(repository: SQLiteAnalyticsRepository, repeats: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        repository.user_overview("bench")
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def benchmark(step_count: int, repeats: int) -> Dict[str, float]:
+    """Return median milliseconds for a full recomputation and for a cached read."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = Database(Path(temp_dir) / "overview-benchmark.db")
+        _seed(database, step_count)
+        uncached = SQLiteAnalyticsRepository(database.get_connection, cache_user_overview=False)
+        cached = SQLiteAnalyticsRepository(database.get_connection)
+        cached.user_overview("bench")
+        return {
+            "recompute_ms": _median_ms(uncached, repeats),
+            "cached_ms": _median_ms(cached, repeats),
+        }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="在临时数据库中测量用户仪表盘概览的耗时。")
+    parser.add_argument(
+        "--steps", type=int, nargs="+", default=[10_000, 100_000], help="每个用户的步骤数量，可传多个"
+    )
+    parser.add_argument("--repeats", type=int, default=20, help="每种模式的重复次数")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    for step_count in args.steps:
+        result = benchmark(step_count, max(1, args.repeats))
+        print(
+            f"{step_count} 步骤：重新计算 {result['recompute_ms']:.2f} ms，"
+            f"缓存读取 {result['cached_ms']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Check growth-point balance and daily projections against the canonical ledger."""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.growth_repository import SQLiteGrowthProfileRepository
+from core.runtime_settings import RuntimeSettings
+from database import Database
+
+
+def _database_path(value: Optional[str]) -> Path:
+    if value:
+        path = Path(value).expanduser()
+        return path if path.is_absolute() else (Path.cwd() / path).resolve()
+    settings = RuntimeSettings.from_environment(base_dir=BACKEND_ROOT)
+    return Path(settings.get_database_path()).resolve()
+
+
+def check_growth_point_projections(
+    database_path: Path, user_id: Optional[str] = None, *, repair: bool = False
+) -> List[Dict[str, Any]]:
+    """Return projection drift found before any requested repair."""
+    if not database_path.exists():
+        raise FileNotFoundError(f"数据库不存在：{database_path}")
+    database = Database(str(database_path))
+    return SQLiteGrowthProfileRepository(database.get_connection).check_growth_point_projections(
+        user_id, repair=repair
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="比对成长点余额与每日汇总投影和流水账本，可选择按账本重建。"
+    )
+    parser.add_argument("--database", help="SQLite 数据库路径；默认读取当前后端配置")
+    parser.add_argument("--user-id", help="只检查指定用户；省略时检查全部用户")
+    parser.add_argument("--repair", action="store_true", help="发现偏差时按账本重建投影")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    try:
+        drift = check_growth_point_projections(
+            _database_path(args.database), args.user_id, repair=args.repair
+        )
+    except FileNotFoundError as exc:
+        raise SystemExit(str(exc)) from exc
+    if not drift:
+        print("成长点投影与账本一致。")
+        return
+    print(json.dumps(drift, ensure_ascii=False, indent=2))
+    if args.repair:
+        print(f"已按账本修复 {len(drift)} 处偏差。")
+        return
+    raise SystemExit(f"发现 {len(drift)} 处成长点投影偏差；使用 --repair 重建。")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Rebuild materialized Task Execution behavior summaries from execution history."""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+import sys
+from typing import Optional
+
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+from adapters.sqlite.task_execution_repository import SQLiteTaskExecutionRepository
+from core.runtime_settings import RuntimeSettings
+from database import Database
+
+
+def _database_path(value: Optional[str]) -> Path:
+    if value:
+        path = Path(value).expanduser()
+        return path if path.is_absolute() else (Path.cwd() / path).resolve()
+    settings = RuntimeSettings.from_environment(base_dir=BACKEND_ROOT)
+    return Path(settings.get_database_path()).resolve()
+
+
+def rebuild_behavior_summaries(database_path: Path, user_id: Optional[str] = None) -> int:
+    """Recompute one owner's or every owner's summary row and return the rows written."""
+    if not database_path.exists():
+        raise FileNotFoundError(f"数据库不存在：{database_path}")
+    database = Database(str(database_path))
+    return SQLiteTaskExecutionRepository(database.get_connection).rebuild_profile_behavior_summaries(
+        user_id
+    )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="根据完整执行记录重新计算行动行为摘要，用于回填或修复。"
+    )
+    parser.add_argument("--database", help="SQLite 数据库路径；默认读取当前后端配置")
+    parser.add_argument("--user-id", help="只重建指定用户；省略时重建全部用户")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    try:
+        rebuilt = rebuild_behavior_summaries(_database_path(args.database), args.user_id)
+    except FileNotFoundError as exc:
+        raise SystemExit(str(exc)) from exc
+    print(f"已重建 {rebuilt} 个用户的行为摘要。")
+
+
+if __name__ == "__main__":
+    main()